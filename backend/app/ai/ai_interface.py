@@ -1,22 +1,40 @@
 # backend/app/ai/ai_interface.py - VERSIÓN CORREGIDA
+import asyncio
 import json
 import time
-import aiohttp
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 from ..core.logger import logger
 from ..core.ai_config import AIProvider, ai_config 
+from ..core.ai_config import ai_config as ai_config_settings  # analyze_market recibe un parámetro `ai_config`
+from ..core.utils import rate_budgets, pipeline_timings
+from ..core.http_pool import http_pool, LatencyHistogram
+from .response_cache import response_cache
 from .prompt_templates import PromptTemplates
+from .stream_parser import IncrementalJSONParser
 
 class AIInterface:
     
     def __init__(self):
         self.prompt_templates = PromptTemplates()
+        # Límite global de llamadas IA simultáneas (el resto del análisis no espera por él)
+        self.ai_semaphore = asyncio.Semaphore(ai_config.MAX_CONCURRENT_AI_CALLS)
+        # Streaming: tiempo hasta tener la decisión vs. tiempo hasta la respuesta completa
+        self.streaming_stats: Dict[str, Dict[str, LatencyHistogram]] = {}
+        # Análisis por lotes: llamadas ahorradas y tokens de prompt estimados
+        self.batch_stats = {"batches": 0, "symbols_batched": 0, "fallbacks": 0, "calls_saved": 0,
+                            "tokens_used": 0, "prompt_tokens_batched": 0, "prompt_tokens_unbatched": 0}
+        # Modo replay: modelo stub con `async complete(symbol, prompt) -> str` en lugar del proveedor
+        self.replay_model = None
     
     async def analyze_market(self, symbol: str, user_id: int, market_data: Dict[str, Any], 
                        technical_indicators: Dict[str, Any], news: list,
-                       ai_config: Dict[str, Any]) -> Dict[str, Any]:
+                       ai_config: Dict[str, Any],
+                       on_decision: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
         """
         Analizar mercado - VERSIÓN CORREGIDA
+        
+        Con streaming activo, `on_decision` se invoca en cuanto signal/confidence
+        (y stops si es BUY/SELL) están completos, antes de que termine el reasoning.
         """
         try:
             start_time = time.time()
@@ -35,22 +53,23 @@ class AIInterface:
              
             logger.info(f"📰 Contexto de noticias recibido: {news_context.get('news_count', 0)} noticias, sentimiento: {news_context.get('overall_sentiment', 'neutral')}")
             
-            if analysis_type == 'technical':
-                prompt = self.prompt_templates.technical_analysis(
-                    symbol, market_data, technical_indicators, news_context
-                )
-            elif analysis_type == 'sentiment':
-                prompt = self.prompt_templates.market_sentiment(
-                    symbol, [], {}, news_context
-                )
-            else:
-                prompt = self.prompt_templates.comprehensive_analysis(
-                     symbol, 
-                    market_data, 
-                    technical_indicators, 
-                    ai_config.get('risk_profile', 'moderate'), 
-                    news_context
-                )
+            with pipeline_timings.measure("prompt"):
+                if analysis_type == 'technical':
+                    prompt = self.prompt_templates.technical_analysis(
+                        symbol, market_data, technical_indicators, news_context
+                    )
+                elif analysis_type == 'sentiment':
+                    prompt = self.prompt_templates.market_sentiment(
+                        symbol, [], {}, news_context
+                    )
+                else:
+                    prompt = self.prompt_templates.comprehensive_analysis(
+                         symbol, 
+                        market_data, 
+                        technical_indicators, 
+                        ai_config.get('risk_profile', 'moderate'), 
+                        news_context
+                    )
             
             # Llamar a la IA
             provider_name = ai_config.get('provider', 'deepseek')
@@ -62,22 +81,56 @@ class AIInterface:
                 logger.error("No API key configurada")
                 return self._get_error_response("API key no configurada")
             
+            # Caché por estado de mercado cuantizado: si nada relevante cambió, no llamar a la IA
+            cache_key = None
+            if ai_config_settings.CACHE_ENABLED:
+                cache_key = response_cache.build_key(
+                    symbol, market_data, technical_indicators, news_context,
+                    analysis_type, provider.value, model, ai_config.get('risk_profile', 'moderate')
+                )
+                cached = await response_cache.get(cache_key)
+                if cached is not None:
+                    cached['cached'] = True
+                    cached['tokens_used'] = 0
+                    cached['processing_time'] = round(time.time() - start_time, 2)
+                    logger.info(f"♻️ Respuesta IA en caché para {symbol} | Señal: {cached.get('signal')}")
+                    return cached
+            
             logger.info(f"🔗 Llamando a {provider_name} para análisis de {symbol}")
             logger.info(f"🔍 DEBUG Enviando prompt a IA (longitud: {len(prompt)} caracteres)")
             
-            # Llamar al proveedor de IA
-            response = await self._call_ai_provider(provider, api_key, model, prompt, ai_config)
-            
-            logger.info(f"🔍 DEBUG Respuesta IA CRUDA: {response}")
+            # Llamar al proveedor de IA (respetando concurrencia global y presupuesto de peticiones)
+            async with self.ai_semaphore:
+                if self.replay_model is not None:
+                    # Replay: respuesta grabada/determinista, sin proveedor ni presupuesto de peticiones
+                    with pipeline_timings.measure("model"):
+                        content = await self.replay_model.complete(symbol, prompt)
+                    with pipeline_timings.measure("parse"):
+                        result = self._parse_content(content)
+                    result['tokens_used'] = 0
+                else:
+                    await rate_budgets.acquire(provider.value)
+                    if ai_config_settings.STREAMING_ENABLED:
+                        # Modelo y parseo incremental van intercalados: se mide el conjunto
+                        with pipeline_timings.measure("model"):
+                            result = await self._stream_and_parse(provider, api_key, model, prompt, ai_config, on_decision)
+                    else:
+                        with pipeline_timings.measure("model"):
+                            response = await self._call_ai_provider(provider, api_key, model, prompt, ai_config)
+                        logger.info(f"🔍 DEBUG Respuesta IA CRUDA: {response}")
+                        with pipeline_timings.measure("parse"):
+                            result = self._parse_ai_response(response, provider)
+                        result['tokens_used'] = response.get('usage', {}).get('total_tokens', 0) if isinstance(response, dict) else 0
             
             # Procesar respuesta
             processing_time = time.time() - start_time
-            
-            result = self._parse_ai_response(response, provider)
             result['processing_time'] = round(processing_time, 2)
-            result['tokens_used'] = response.get('usage', {}).get('total_tokens', 0) if isinstance(response, dict) else 0
             
             logger.info(f"🔍 DEBUG Respuesta IA PARSEADA: {result}")
+            
+            if cache_key and not result.get('error'):
+                await response_cache.put(cache_key, symbol, provider.value, model, result)
+            
             logger.info(f"✅ Análisis IA completado - {symbol} | Señal: {result.get('signal')} | Confianza: {result.get('confidence')}%")
             
             return result
@@ -86,6 +139,197 @@ class AIInterface:
             logger.error(f"❌ Error en análisis IA para {symbol}: {str(e)}", exc_info=True)
             return self._get_error_response(f"Error en análisis: {str(e)}")
 
+    async def analyze_market_batch(self, user_id: int, items: List[Dict[str, Any]],
+                                   ai_config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Analizar VARIOS símbolos con el mínimo de llamadas a la IA.
+        
+        `items` = [{"symbol", "market_data", "technical_indicators", "news"}]. Los
+        bloques de cada símbolo se agrupan bajo un preámbulo común en lotes que
+        respetan el presupuesto de tokens; la IA responde con un array JSON.
+        Los símbolos cuya respuesta no valida se reanalizan uno a uno.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        provider = AIProvider(ai_config.get('provider', 'deepseek'))
+        api_key = ai_config.get('api_key')
+        model = ai_config.get('model', 'deepseek-chat')
+        analysis_type = ai_config.get('analysis_type', 'comprehensive')
+        risk_profile = ai_config.get('risk_profile', 'moderate')
+        
+        if not api_key:
+            logger.error("No API key configurada")
+            return {item['symbol']: self._get_error_response("API key no configurada") for item in items}
+        
+        pending = []
+        for item in items:
+            symbol = item['symbol']
+            market_data, indicators, news_context = item.get('market_data'), item.get('technical_indicators'), item.get('news') or {}
+            if not market_data or not indicators:
+                results[symbol] = self._get_error_response("Datos de mercado insuficientes")
+                continue
+            
+            cache_key = None
+            if ai_config_settings.CACHE_ENABLED:
+                cache_key = response_cache.build_key(
+                    symbol, market_data, indicators, news_context,
+                    analysis_type, provider.value, model, risk_profile
+                )
+                cached = await response_cache.get(cache_key)
+                if cached is not None:
+                    cached['cached'] = True
+                    cached['tokens_used'] = 0
+                    results[symbol] = cached
+                    continue
+            
+            block = self.prompt_templates.batch_symbol_block(symbol, market_data, indicators, news_context)
+            pending.append((item, block, cache_key))
+        
+        # Un lote de un solo símbolo no ahorra nada: va por el análisis normal
+        batches = self._split_batches(pending, risk_profile, analysis_type)
+        singles = [batch[0][0] for batch in batches if len(batch) == 1]
+        batches = [batch for batch in batches if len(batch) > 1]
+        logger.info(f"📦 Análisis por lotes: {len(pending)} símbolos en {len(batches) + len(singles)} llamadas a {provider.value}")
+        
+        outcomes = await asyncio.gather(
+            *(self._run_batch(provider, api_key, model, batch, risk_profile, analysis_type, ai_config) for batch in batches),
+            return_exceptions=True
+        )
+        
+        fallback = []
+        for batch, outcome in zip(batches, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"❌ Error en lote IA ({len(batch)} símbolos): {str(outcome)}")
+                outcome = {}
+            for item, block, cache_key in batch:
+                result = outcome.get(item['symbol'])
+                if result is None:
+                    fallback.append(item)
+                    continue
+                results[item['symbol']] = result
+                if cache_key:
+                    await response_cache.put(cache_key, item['symbol'], provider.value, model, result)
+        
+        if fallback:
+            self.batch_stats["fallbacks"] += len(fallback)
+            logger.warning(f"⚠️ {len(fallback)} símbolos sin respuesta válida en el lote, analizando por separado")
+        
+        individual = singles + fallback
+        if individual:
+            outcomes = await asyncio.gather(*(
+                self.analyze_market(
+                    symbol=item['symbol'],
+                    user_id=user_id,
+                    market_data=item['market_data'],
+                    technical_indicators=item['technical_indicators'],
+                    news=item.get('news') or {},
+                    ai_config=ai_config
+                ) for item in individual
+            ))
+            for item, result in zip(individual, outcomes):
+                results[item['symbol']] = result
+        
+        return results
+    
+    def _estimate_tokens(self, text: str) -> int:
+        return int(len(text) / ai_config.CHARS_PER_TOKEN) + 1
+    
+    def _split_batches(self, pending: List[tuple], risk_profile: str, analysis_type: str) -> List[List[tuple]]:
+        """Repartir los símbolos en lotes por número de símbolos, tokens de prompt y reserva de salida"""
+        preamble_tokens = self._estimate_tokens(self.prompt_templates.batch_analysis([], [], risk_profile, analysis_type))
+        max_symbols = max(1, min(ai_config.BATCH_MAX_SYMBOLS, ai_config.MAX_TOKENS // ai_config.BATCH_OUTPUT_TOKENS_PER_SYMBOL))
+        
+        batches: List[List[tuple]] = []
+        current: List[tuple] = []
+        current_tokens = preamble_tokens
+        for entry in pending:
+            # El nombre del símbolo aparece también en la lista de orden del preámbulo
+            block_tokens = self._estimate_tokens(entry[1]) + 2
+            if current and (len(current) >= max_symbols
+                            or current_tokens + block_tokens > ai_config.BATCH_MAX_PROMPT_TOKENS):
+                batches.append(current)
+                current, current_tokens = [], preamble_tokens
+            current.append(entry)
+            current_tokens += block_tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _run_batch(self, provider: AIProvider, api_key: str, model: str, batch: List[tuple],
+                         risk_profile: str, analysis_type: str, config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Una llamada para todo el lote; devuelve solo los resultados que validan"""
+        symbols = [item['symbol'] for item, _, _ in batch]
+        prompt = self.prompt_templates.batch_analysis([block for _, block, _ in batch], symbols, risk_profile, analysis_type)
+        self.batch_stats["prompt_tokens_batched"] += self._estimate_tokens(prompt)
+        self.batch_stats["prompt_tokens_unbatched"] += sum(
+            self._estimate_tokens(self.prompt_templates.comprehensive_analysis(
+                item['symbol'], item['market_data'], item['technical_indicators'], risk_profile, item.get('news') or {}
+            )) for item, _, _ in batch
+        )
+        batch_config = dict(config)
+        batch_config['max_tokens'] = min(ai_config.MAX_TOKENS, ai_config.BATCH_OUTPUT_TOKENS_PER_SYMBOL * len(batch))
+        
+        start_time = time.time()
+        async with self.ai_semaphore:
+            await rate_budgets.acquire(provider.value)
+            response = await self._call_ai_provider(provider, api_key, model, prompt, batch_config)
+        processing_time = round(time.time() - start_time, 2)
+        
+        parsed = self._parse_batch_content(self._response_text(response, provider), symbols)
+        tokens = response.get('usage', {}).get('total_tokens', 0) if isinstance(response, dict) else 0
+        
+        self.batch_stats["batches"] += 1
+        self.batch_stats["symbols_batched"] += len(parsed)
+        self.batch_stats["calls_saved"] += max(0, len(parsed) - 1)
+        self.batch_stats["tokens_used"] += tokens
+        
+        for result in parsed.values():
+            result['tokens_used'] = tokens // len(parsed)
+            result['processing_time'] = processing_time
+            result['batch_size'] = len(batch)
+        logger.info(f"✅ Lote IA completado: {len(parsed)}/{len(batch)} símbolos válidos en {processing_time}s")
+        return parsed
+    
+    def _parse_batch_content(self, content: str, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Validar el array JSON del lote: un objeto por símbolo pedido con señal y confianza válidas"""
+        try:
+            parsed = json.loads(self._strip_code_fence(content))
+        except json.JSONDecodeError as e:
+            logger.warning(f"JSON inválido en respuesta de lote: {e}")
+            return {}
+        if isinstance(parsed, dict):
+            parsed = parsed.get('results') or parsed.get('analyses') or []
+        if not isinstance(parsed, list):
+            return {}
+        
+        expected = set(symbols)
+        results = {}
+        for entry in parsed:
+            if not isinstance(entry, dict):
+                continue
+            symbol = str(entry.get('symbol', '')).upper()
+            signal = str(entry.get('signal', '')).upper()
+            if symbol not in expected or symbol in results or signal not in ("BUY", "SELL", "HOLD"):
+                continue
+            try:
+                confidence = float(entry.get('confidence'))
+            except (TypeError, ValueError):
+                continue
+            if not 0.0 <= confidence <= 100.0:
+                continue
+            if signal != "HOLD" and (not entry.get('stop_loss') or not entry.get('take_profit')):
+                continue
+            results[symbol] = {**entry, "symbol": symbol, "signal": signal, "confidence": confidence,
+                               "raw_response": json.dumps(entry, ensure_ascii=False)}
+        return results
+    
+    def get_batch_stats(self) -> Dict[str, Any]:
+        batched = self.batch_stats["prompt_tokens_batched"]
+        unbatched = self.batch_stats["prompt_tokens_unbatched"]
+        return {
+            **self.batch_stats,
+            "prompt_token_reduction": round(1 - batched / unbatched, 4) if unbatched else 0.0
+        }
+    
     async def _call_ai_provider(self, provider: AIProvider, api_key: str, model: str, 
                               prompt: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Llamar al proveedor de IA específico"""
@@ -107,138 +351,245 @@ class AIInterface:
             logger.error(f"Error llamando a {provider}: {str(e)}")
             raise
     
-    async def _call_deepseek(self, api_key: str, model: str, prompt: str, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Llamar a DeepSeek API"""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
+    def _build_request(self, provider: AIProvider, api_key: str, model: str, prompt: str,
+                       config: Dict[str, Any], stream: bool = False) -> Tuple[str, Optional[Dict[str, str]], Dict[str, Any]]:
+        """URL, cabeceras y cuerpo de la petición para cada proveedor"""
+        max_tokens = config.get('max_tokens', ai_config.MAX_TOKENS)
+        temperature = config.get('temperature', ai_config.TEMPERATURE)
         
-        data = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": config.get('max_tokens', ai_config.MAX_TOKENS),
-            "temperature": config.get('temperature', ai_config.TEMPERATURE),
-            "stream": False
-        }
+        if provider in (AIProvider.DEEPSEEK, AIProvider.OPENAI):
+            url = ai_config.DEEPSEEK_API_URL if provider == AIProvider.DEEPSEEK else ai_config.OPENAI_API_URL
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {api_key}"
+            }
+            data = {
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "stream": stream
+            }
+            if stream:
+                data["stream_options"] = {"include_usage": True}
+            return url, headers, data
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(ai_config.DEEPSEEK_API_URL, headers=headers, json=data, timeout=60) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_text = await response.text()
-                    logger.error(f"DeepSeek API error {response.status}: {error_text}")
-                    raise Exception(f"API error {response.status}: {error_text}")
+        if provider == AIProvider.GEMINI:
+            if stream:
+                url = f"{ai_config.GEMINI_API_URL.replace(':generateContent', ':streamGenerateContent')}?alt=sse&key={api_key}"
+            else:
+                url = f"{ai_config.GEMINI_API_URL}?key={api_key}"
+            data = {
+                "contents": [{
+                    "parts": [{"text": prompt}]
+                }],
+                "generationConfig": {
+                    "maxOutputTokens": max_tokens,
+                    "temperature": temperature
+                }
+            }
+            return url, None, data
+        
+        if provider == AIProvider.CLAUDE:
+            headers = {
+                "Content-Type": "application/json",
+                "x-api-key": api_key,
+                "anthropic-version": "2023-06-01"
+            }
+            data = {
+                "model": model,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "messages": [{"role": "user", "content": prompt}]
+            }
+            if stream:
+                data["stream"] = True
+            return ai_config.CLAUDE_API_URL, headers, data
+        
+        raise ValueError(f"Proveedor no soportado: {provider}")
+    
+    async def _call_deepseek(self, api_key: str, model: str, prompt: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Llamar a DeepSeek API"""
+        return await self._post_json(AIProvider.DEEPSEEK, *self._build_request(AIProvider.DEEPSEEK, api_key, model, prompt, config))
     
     async def _call_openai(self, api_key: str, model: str, prompt: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Llamar a OpenAI API"""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        data = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": config.get('max_tokens', ai_config.MAX_TOKENS),
-            "temperature": config.get('temperature', ai_config.TEMPERATURE),
-            "stream": False
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(ai_config.OPENAI_API_URL, headers=headers, json=data, timeout=60) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_text = await response.text()
-                    logger.error(f"OpenAI API error {response.status}: {error_text}")
-                    raise Exception(f"API error {response.status}: {error_text}")
+        return await self._post_json(AIProvider.OPENAI, *self._build_request(AIProvider.OPENAI, api_key, model, prompt, config))
     
     async def _call_gemini(self, api_key: str, model: str, prompt: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Llamar a Gemini API"""
-        url = f"{ai_config.GEMINI_API_URL}?key={api_key}"
-        
-        data = {
-            "contents": [{
-                "parts": [{"text": prompt}]
-            }],
-            "generationConfig": {
-                "maxOutputTokens": config.get('max_tokens', ai_config.MAX_TOKENS),
-                "temperature": config.get('temperature', ai_config.TEMPERATURE)
-            }
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=data, timeout=60) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Gemini API error {response.status}: {error_text}")
-                    raise Exception(f"API error {response.status}: {error_text}")
+        return await self._post_json(AIProvider.GEMINI, *self._build_request(AIProvider.GEMINI, api_key, model, prompt, config))
     
     async def _call_claude(self, api_key: str, model: str, prompt: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Llamar a Claude API"""
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": api_key,
-            "anthropic-version": "2023-06-01"
-        }
+        return await self._post_json(AIProvider.CLAUDE, *self._build_request(AIProvider.CLAUDE, api_key, model, prompt, config))
+    
+    async def _stream_ai_provider(self, provider: AIProvider, api_key: str, model: str, prompt: str,
+                                  config: Dict[str, Any], usage: Dict[str, int]) -> AsyncIterator[str]:
+        """
+        Petición en streaming (SSE) al proveedor: va devolviendo los fragmentos de
+        texto del modelo y acumula en `usage` los tokens que informe el proveedor.
+        """
+        url, headers, data = self._build_request(provider, api_key, model, prompt, config, stream=True)
+        session = http_pool.get_session(provider.value)
         
-        data = {
-            "model": model,
-            "max_tokens": config.get('max_tokens', ai_config.MAX_TOKENS),
-            "temperature": config.get('temperature', ai_config.TEMPERATURE),
-            "messages": [{"role": "user", "content": prompt}]
-        }
+        async with session.post(url, headers=headers, json=data) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"{provider.value} API error {response.status}: {error_text}")
+                raise Exception(f"API error {response.status}: {error_text}")
+            
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if not payload or payload == "[DONE]":
+                    continue
+                try:
+                    event = json.loads(payload)
+                except json.JSONDecodeError:
+                    continue
+                text = self._stream_event_text(provider, event, usage)
+                if text:
+                    yield text
+    
+    def _stream_event_text(self, provider: AIProvider, event: Dict[str, Any], usage: Dict[str, int]) -> str:
+        """Extraer el texto (y el uso de tokens) de un evento SSE según el proveedor"""
+        if provider in (AIProvider.DEEPSEEK, AIProvider.OPENAI):
+            if event.get('usage'):
+                usage['total_tokens'] = event['usage'].get('total_tokens', 0)
+            choices = event.get('choices') or []
+            return (choices[0].get('delta') or {}).get('content') or "" if choices else ""
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(ai_config.CLAUDE_API_URL, headers=headers, json=data, timeout=60) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Claude API error {response.status}: {error_text}")
-                    raise Exception(f"API error {response.status}: {error_text}")
+        if provider == AIProvider.GEMINI:
+            if event.get('usageMetadata'):
+                usage['total_tokens'] = event['usageMetadata'].get('totalTokenCount', 0)
+            candidates = event.get('candidates') or []
+            if not candidates:
+                return ""
+            parts = (candidates[0].get('content') or {}).get('parts') or []
+            return "".join(part.get('text', "") for part in parts)
+        
+        if provider == AIProvider.CLAUDE:
+            event_type = event.get('type')
+            if event_type == 'message_start':
+                usage['total_tokens'] = event.get('message', {}).get('usage', {}).get('input_tokens', 0)
+            elif event_type == 'message_delta':
+                usage['total_tokens'] = usage.get('total_tokens', 0) + event.get('usage', {}).get('output_tokens', 0)
+            elif event_type == 'content_block_delta':
+                return event.get('delta', {}).get('text', "")
+        return ""
+    
+    async def _stream_and_parse(self, provider: AIProvider, api_key: str, model: str, prompt: str,
+                                config: Dict[str, Any],
+                                on_decision: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Consumir el stream con el parser incremental y avisar en cuanto hay decisión"""
+        parser = IncrementalJSONParser()
+        usage = {"total_tokens": 0}
+        stats = self.streaming_stats.setdefault(
+            provider.value, {"time_to_decision": LatencyHistogram(), "time_to_full": LatencyHistogram()}
+        )
+        stream_start = time.perf_counter()
+        time_to_decision = None
+        
+        try:
+            async for text in self._stream_ai_provider(provider, api_key, model, prompt, config, usage):
+                parser.feed(text)
+                if time_to_decision is None:
+                    decision = parser.decision()
+                    if decision is not None:
+                        time_to_decision = time.perf_counter() - stream_start
+                        stats["time_to_decision"].record(time_to_decision)
+                        logger.info(f"⚡ Decisión IA anticipada en {time_to_decision:.2f}s: {decision}")
+                        if on_decision:
+                            await on_decision(decision)
+        except Exception as e:
+            if parser.text:
+                raise
+            # El stream falló antes de recibir texto: repetir la petición sin streaming
+            logger.warning(f"⚠️ Streaming {provider.value} no disponible, usando petición normal: {str(e)}")
+            response = await self._call_ai_provider(provider, api_key, model, prompt, config)
+            result = self._parse_ai_response(response, provider)
+            result['tokens_used'] = response.get('usage', {}).get('total_tokens', 0) if isinstance(response, dict) else 0
+            return result
+        
+        time_to_full = time.perf_counter() - stream_start
+        stats["time_to_full"].record(time_to_full)
+        http_pool.record_total(provider.value, time_to_full)
+        
+        result = self._parse_content(parser.text)
+        result['tokens_used'] = usage.get('total_tokens', 0)
+        result['time_to_decision'] = round(time_to_decision, 3) if time_to_decision is not None else None
+        result['time_to_full_response'] = round(time_to_full, 3)
+        return result
+    
+    def get_streaming_stats(self) -> Dict[str, Any]:
+        return {
+            provider: {name: histogram.get_stats() for name, histogram in stats.items()}
+            for provider, stats in self.streaming_stats.items()
+        }
+    
+    async def _post_json(self, provider: AIProvider, url: str, headers: Optional[Dict[str, str]], data: Dict[str, Any]) -> Dict[str, Any]:
+        """POST con la sesión persistente del proveedor (keep-alive, sin handshake TLS por llamada)"""
+        response = await http_pool.request(provider.value, "POST", url, headers=headers, json=data)
+        if response.status == 200:
+            return await response.json()
+        error_text = await response.text()
+        logger.error(f"{provider.value} API error {response.status}: {error_text}")
+        raise Exception(f"API error {response.status}: {error_text}")
     
     def _parse_ai_response(self, response: Dict[str, Any], provider: AIProvider) -> Dict[str, Any]:
         """Parsear respuesta de la IA a formato estándar"""
         try:
-            # Extraer texto de respuesta basado en proveedor
-            if provider == AIProvider.DEEPSEEK or provider == AIProvider.OPENAI:
-                content = response['choices'][0]['message']['content']
-            elif provider == AIProvider.GEMINI:
-                content = response['candidates'][0]['content']['parts'][0]['text']
-            elif provider == AIProvider.CLAUDE:
-                content = response['content'][0]['text']
-            else:
-                content = str(response)
-            
-            logger.debug(f"Respuesta IA cruda: {content[:200]}...")
-            
-            # Intentar parsear JSON
-            try:
-                # Limpiar contenido
-                content = content.strip()
-                if content.startswith("```json"):
-                    content = content[7:]
-                if content.endswith("```"):
-                    content = content[:-3]
-                content = content.strip()
-                
-                parsed = json.loads(content)
-                logger.info(f"✅ Respuesta IA parseada correctamente: {parsed.get('signal')} con {parsed.get('confidence')}% confianza")
-                return parsed
-                
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSON inválido en respuesta IA, usando fallback: {e}")
-                return self._extract_signal_from_text(content)
+            return self._parse_content(self._response_text(response, provider))
                 
         except Exception as e:
             logger.error(f"Error parseando respuesta IA: {str(e)}")
             return self._get_error_response("Error parseando respuesta de IA")
     
+    def _response_text(self, response: Dict[str, Any], provider: AIProvider) -> str:
+        """Extraer texto de respuesta basado en proveedor"""
+        if provider == AIProvider.DEEPSEEK or provider == AIProvider.OPENAI:
+            return response['choices'][0]['message']['content']
+        elif provider == AIProvider.GEMINI:
+            return response['candidates'][0]['content']['parts'][0]['text']
+        elif provider == AIProvider.CLAUDE:
+            return response['content'][0]['text']
+        return str(response)
+    
+    @staticmethod
+    def _strip_code_fence(content: str) -> str:
+        content = content.strip()
+        if content.startswith("```json"):
+            content = content[7:]
+        elif content.startswith("```"):
+            content = content[3:]
+        if content.endswith("```"):
+            content = content[:-3]
+        return content.strip()
+    
+    def _parse_content(self, content: str) -> Dict[str, Any]:
+        """Parsear el texto del modelo (JSON, con o sin ```json) a formato estándar"""
+        logger.debug(f"Respuesta IA cruda: {content[:200]}...")
+        raw_content = content
+        
+        # Intentar parsear JSON
+        try:
+            # Limpiar contenido
+            content = self._strip_code_fence(content)
+            
+            parsed = json.loads(content)
+            logger.info(f"✅ Respuesta IA parseada correctamente: {parsed.get('signal')} con {parsed.get('confidence')}% confianza")
+            parsed['raw_response'] = raw_content  # Se guarda en AIAnalysisHistory.ai_response (replay)
+            return parsed
+            
+        except json.JSONDecodeError as e:
+            logger.warning(f"JSON inválido en respuesta IA, usando fallback: {e}")
+            result = self._extract_signal_from_text(content)
+            result['raw_response'] = raw_content
+            return result
+    
     def _extract_signal_from_text(self, text: str) -> Dict[str, Any]:
         """Extraer señal de texto libre (fallback)"""
         text_lower = text.lower()
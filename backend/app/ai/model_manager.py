@@ -3,14 +3,16 @@
 # Cómo el nivel de riesgo afecta el tamaño de posición
 # Validación de señales antes de ejecutar
 
-import requests
 import json
 import time
 from typing import Dict, Any, Optional
 from enum import Enum
+from ..core.lazy import lazy_import
 from ..core.logger import logger
 from ..core.ai_config import AIProvider, ai_config
 
+requests = lazy_import("requests")
+
 class ModelManager:
     def __init__(self):
         self.active_models = {}
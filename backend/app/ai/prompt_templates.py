@@ -1,5 +1,5 @@
 # backend/app/ai/prompt_templates.py - CORREGIR
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 class PromptTemplates:
     
@@ -57,13 +57,13 @@ RESPONDE EXCLUSIVAMENTE EN FORMATO JSON:
 {{
     "signal": "BUY|SELL|HOLD",
     "confidence": 0.0-100.0,
-    "reasoning": "Explicación que combine análisis técnico y contexto de noticias",
     "stop_loss": "precio_absoluto",
     "take_profit": "precio_absoluto",
     "risk_level": "LOW|MEDIUM|HIGH",
     "timeframe": "M5|M15|H1|H4",
     "price_target": "precio_objetivo",
-    "news_influence": "POSITIVE|NEGATIVE|NEUTRAL|MIXED"
+    "news_influence": "POSITIVE|NEGATIVE|NEUTRAL|MIXED",
+    "reasoning": "Explicación que combine análisis técnico y contexto de noticias"
 }}
 """
 
@@ -87,11 +87,11 @@ RESPONDE EN FORMATO JSON:
 {{
     "signal": "BUY|SELL|HOLD",
     "confidence": 0.0-100.0,
-    "reasoning": "Análisis de sentimiento basado en noticias fundamentales",
     "stop_loss": "precio_o_nivel",
     "take_profit": "precio_o_nivel", 
     "sentiment_score": -10 to 10,
-    "impact_level": "LOW|MEDIUM|HIGH|CRITICAL"
+    "impact_level": "LOW|MEDIUM|HIGH|CRITICAL",
+    "reasoning": "Análisis de sentimiento basado en noticias fundamentales"
 }}
 """
 
@@ -141,12 +141,12 @@ RESPONDE EN FORMATO JSON:
 {{
     "signal": "BUY|SELL|HOLD",
     "confidence": 0.0-100.0,
-    "reasoning": "Análisis integrado técnico-fundamental-riesgo",
     "stop_loss": "precio_absoluto",
     "take_profit": "precio_absoluto",
     "position_size": "SMALL|MEDIUM|LARGE",
     "risk_adjustment": "AGGRESSIVE|MODERATE|CONSERVATIVE",
-    "timeframe": "M5|M15|H1|H4|D1"
+    "timeframe": "M5|M15|H1|H4|D1",
+    "reasoning": "Análisis integrado técnico-fundamental-riesgo"
 }}
 """
 
@@ -189,9 +189,59 @@ RESPONDE EN FORMATO JSON:
     "action": "HOLD|CLOSE|ADJUST",
     "signal": "BUY|SELL|HOLD",
     "confidence": 0.0-100.0,
-    "reasoning": "Análisis que considere cambios en contexto de noticias",
     "new_stop_loss": "nuevo_precio_sl",
     "new_take_profit": "nuevo_precio_tp",
-    "adjustment_reason": "PROFIT_PROTECTION|RISK_MANAGEMENT|TREND_CHANGE|NEWS_IMPACT"
+    "adjustment_reason": "PROFIT_PROTECTION|RISK_MANAGEMENT|TREND_CHANGE|NEWS_IMPACT",
+    "reasoning": "Análisis que considere cambios en contexto de noticias"
 }}
-"""
\ No newline at end of file
+"""
+
+    @staticmethod
+    def batch_symbol_block(symbol: str, market_data: Dict, technical_indicators: Dict, news_context: Dict[str, Any] = None) -> str:
+        """Bloque de datos de UN símbolo para el análisis por lotes (sin instrucciones)"""
+        if news_context and news_context.get("has_news", False):
+            news_line = f"{news_context.get('overall_sentiment', 'neutral').upper()} - {news_context.get('market_context', '')}"
+        else:
+            news_line = "Sin noticias recientes relevantes."
+        
+        return f"""
+### {symbol}
+- Bid/Ask: {market_data.get('bid', 'N/A')}/{market_data.get('ask', 'N/A')} | Tendencia: {market_data.get('trend', 'N/A')} | Volatilidad: {market_data.get('volatility', 'N/A')}
+- RSI: {technical_indicators.get('rsi', 'N/A')} | MACD: {technical_indicators.get('macd', 'N/A')} | ATR: {technical_indicators.get('atr', 'N/A')}
+- Soporte/Resistencia: {technical_indicators.get('support', 'N/A')}/{technical_indicators.get('resistance', 'N/A')} | MA20/MA50: {technical_indicators.get('ma_20', 'N/A')}/{technical_indicators.get('ma_50', 'N/A')}
+- Noticias: {news_line}
+"""
+
+    @staticmethod
+    def batch_analysis(symbol_blocks: List[str], symbols: List[str], risk_profile: str, analysis_type: str = "comprehensive") -> str:
+        """Plantilla para analizar VARIOS símbolos en una sola llamada (preámbulo compartido)"""
+        
+        return f"""
+ANÁLISIS DE TRADING POR LOTES ({analysis_type.upper()}) - {len(symbols)} SÍMBOLOS
+Analiza CADA símbolo de forma independiente integrando análisis TÉCNICO, gestión de RIESGO y contexto FUNDAMENTAL.
+
+PERFIL DE RIESGO: {risk_profile}
+
+INSTRUCCIONES EJECUTABLES:
+1. COMBINA análisis técnico con contexto fundamental de noticias
+2. Si hay CONFLICTO entre señales técnicas y noticias, prioriza la gestión de riesgo
+3. Proporciona stops ESPECÍFICOS (precio absoluto) si hay señal
+4. Ajusta confianza según CONVERGENCIA entre análisis técnico y fundamental
+5. Devuelve EXACTAMENTE un objeto por símbolo, en el mismo orden: {", ".join(symbols)}
+
+DATOS POR SÍMBOLO:
+{"".join(symbol_blocks)}
+RESPONDE SOLO CON UN ARRAY JSON:
+[
+    {{
+        "symbol": "SIMBOLO",
+        "signal": "BUY|SELL|HOLD",
+        "confidence": 0.0-100.0,
+        "stop_loss": "precio_absoluto",
+        "take_profit": "precio_absoluto",
+        "position_size": "SMALL|MEDIUM|LARGE",
+        "timeframe": "M5|M15|H1|H4|D1",
+        "reasoning": "Análisis breve técnico-fundamental-riesgo"
+    }}
+]
+"""
@@ -0,0 +1,198 @@
+# backend/app/ai/response_cache.py
+# Caché de respuestas IA por estado de mercado CUANTIZADO
+# Si precio, indicadores y noticias apenas cambian entre análisis (reanálisis cada 60 s)
+# se reutiliza la respuesta anterior en lugar de volver a llamar al proveedor
+
+import hashlib
+import json
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import delete, func, select
+from ..core.logger import logger
+from ..core.ai_config import ai_config
+from ..database.db_connection import async_session_scope, get_db
+from ..models.ai_config_model import AIResponseCacheEntry
+from ..services.write_buffer import write_buffer
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+        return number if math.isfinite(number) else None
+    except (TypeError, ValueError):
+        return None
+
+
+def quantize_market_state(market_data: Dict[str, Any], indicators: Dict[str, Any],
+                          news_context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reducir las entradas del prompt a cubos discretos:
+    - precio en cubos de CACHE_PRICE_ATR_FRACTION * ATR (sin ATR: 5 decimales)
+    - RSI en cubos de CACHE_RSI_BUCKET puntos
+    - tendencia, signo del MACD y noticias usadas (IDs)
+    """
+    price = _number(market_data.get("bid")) or _number(indicators.get("current_price"))
+    atr = _number(indicators.get("atr"))
+    if price is not None and atr:
+        price_bucket = int(math.floor(price / (atr * ai_config.CACHE_PRICE_ATR_FRACTION)))
+    else:
+        price_bucket = round(price, 5) if price is not None else None
+
+    rsi = _number(indicators.get("rsi"))
+    macd = _number(indicators.get("macd"))
+
+    news_ids = news_context.get("news_ids") if news_context else None
+    if news_ids is None and news_context:
+        # Sin IDs: usar el texto de contexto como identidad de las noticias
+        news_ids = hashlib.sha256(str(news_context.get("market_context", "")).encode()).hexdigest()[:16]
+
+    return {
+        "price": price_bucket,
+        "rsi": int(rsi // ai_config.CACHE_RSI_BUCKET) if rsi is not None else None,
+        "macd": (macd > 0) - (macd < 0) if macd is not None else None,
+        "trend": market_data.get("trend"),
+        "news": sorted(str(i) for i in news_ids) if isinstance(news_ids, list) else news_ids
+    }
+
+
+class ResponseCache:
+    """
+    LRU en memoria con TTL, respaldada en la tabla ai_response_cache para
+    sobrevivir reinicios. Lleva métricas de aciertos y tokens/USD ahorrados.
+
+    Se usa desde AIInterface (async): la BD solo se toca con la sesión
+    asíncrona (fallos de memoria y guardado), los aciertos se cuentan en
+    memoria y se escriben por lotes con write_buffer, y la limpieza de la
+    tabla se hace cada CACHE_PRUNE_INTERVAL segundos, no en cada guardado.
+    """
+
+    def __init__(self, max_entries: int = None, ttl_seconds: int = None, prune_interval: int = None):
+        self.max_entries = max_entries or ai_config.CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or ai_config.CACHE_TTL_SECONDS
+        self.prune_interval = prune_interval or ai_config.CACHE_PRUNE_INTERVAL
+        self.last_prune = 0.0
+        self.entries: "OrderedDict[str, Tuple[datetime, Dict[str, Any], int, str]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "prunes": 0,
+                      "tokens_saved": 0, "dollars_saved": 0.0}
+
+    def build_key(self, symbol: str, market_data: Dict[str, Any], indicators: Dict[str, Any],
+                  news_context: Dict[str, Any], template: str, provider: str, model: str,
+                  risk_profile: str = "") -> str:
+        payload = {
+            "symbol": symbol,
+            "template": template,
+            "provider": provider,
+            "model": model,
+            "risk": risk_profile,
+            "state": quantize_market_state(market_data, indicators, news_context or {})
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = datetime.now()
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = await self._load(key, now)
+        if entry is not None and entry[0] > now:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            expires_at, result, tokens, provider = entry
+            self.stats["hits"] += 1
+            self.stats["tokens_saved"] += tokens
+            self.stats["dollars_saved"] += tokens / 1000.0 * ai_config.COST_PER_1K_TOKENS.get(provider, 0.0)
+            self._touch(key, now)
+            return dict(result)
+
+        if entry is not None:
+            self.entries.pop(key, None)
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, symbol: str, provider: str, model: str, result: Dict[str, Any]):
+        expires_at = datetime.now() + timedelta(seconds=self.ttl_seconds)
+        tokens = int(result.get("tokens_used") or 0)
+        self.entries[key] = (expires_at, dict(result), tokens, provider)
+        self.entries.move_to_end(key)
+        self.stats["stores"] += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+        await self._store(key, symbol, provider, model, result, tokens, expires_at)
+
+    async def _load(self, key: str, now: datetime):
+        """Buscar en BD (p. ej. tras un reinicio)"""
+        try:
+            async with async_session_scope() as db:
+                row = (await db.execute(
+                    select(AIResponseCacheEntry).where(AIResponseCacheEntry.cache_key == key).limit(1)
+                )).scalar_one_or_none()
+            if row is None or row.expires_at is None or row.expires_at <= now:
+                return None
+            return (row.expires_at, json.loads(row.response), row.tokens_used or 0, row.ai_provider)
+        except Exception as e:
+            logger.warning(f"⚠️ Caché IA: error leyendo de BD: {str(e)}")
+            return None
+
+    async def _store(self, key: str, symbol: str, provider: str, model: str, result: Dict[str, Any],
+                     tokens: int, expires_at: datetime):
+        try:
+            async with async_session_scope() as db:
+                row = (await db.execute(
+                    select(AIResponseCacheEntry).where(AIResponseCacheEntry.cache_key == key).limit(1)
+                )).scalar_one_or_none()
+                if row is None:
+                    row = AIResponseCacheEntry(cache_key=key, symbol=symbol, hits=0, created_at=datetime.now())
+                    db.add(row)
+                row.ai_provider = provider
+                row.ai_model = model
+                row.response = json.dumps(result, default=str)
+                row.tokens_used = tokens
+                row.expires_at = expires_at
+                if time.monotonic() - self.last_prune >= self.prune_interval:
+                    self.last_prune = time.monotonic()
+                    await self._prune(db)
+        except Exception as e:
+            logger.warning(f"⚠️ Caché IA: error guardando en BD: {str(e)}")
+
+    def _touch(self, key: str, now: datetime):
+        """Contar el acierto: los incrementos se suman en memoria y se escriben por lotes"""
+        try:
+            write_buffer.increment(AIResponseCacheEntry, {"cache_key": key}, {"hits": 1}, {"last_hit_at": now})
+        except Exception as e:
+            logger.warning(f"⚠️ Caché IA: error actualizando aciertos: {str(e)}")
+
+    async def _prune(self, db):
+        """Borrar caducadas y recortar la tabla a max_entries (las menos usadas recientemente)"""
+        await db.execute(delete(AIResponseCacheEntry).where(AIResponseCacheEntry.expires_at <= datetime.now()))
+        stale_ids = (await db.execute(
+            select(AIResponseCacheEntry.id).order_by(
+                func.coalesce(AIResponseCacheEntry.last_hit_at, AIResponseCacheEntry.created_at).desc()
+            ).offset(self.max_entries)
+        )).scalars().all()
+        if stale_ids:
+            await db.execute(delete(AIResponseCacheEntry).where(AIResponseCacheEntry.id.in_(stale_ids)))
+        self.stats["prunes"] += 1
+
+    def clear(self):
+        self.entries.clear()
+        db = next(get_db())
+        try:
+            db.query(AIResponseCacheEntry).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "dollars_saved": round(self.stats["dollars_saved"], 4),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self.entries)
+        }
+
+# Instancia global
+response_cache = ResponseCache()
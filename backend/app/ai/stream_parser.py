@@ -0,0 +1,169 @@
+# backend/app/ai/stream_parser.py
+# Parser JSON INCREMENTAL para respuestas IA en streaming
+# Entrega los campos de primer nivel en cuanto su valor está completo, sin
+# esperar al cierre del objeto (p. ej. signal/confidence antes que reasoning)
+
+import json
+from typing import Any, Dict, List, Optional
+
+# Campos que bastan para decidir una operación
+DECISION_FIELDS = ("signal", "confidence", "stop_loss", "take_profit")
+
+
+class IncrementalJSONParser:
+    """
+    Analiza el texto del modelo a medida que llega (`feed`) y guarda en
+    `fields` cada par clave/valor de primer nivel ya cerrado.
+
+    Ignora lo que venga antes de la primera `{` (p. ej. ```json). Los valores
+    anidados (objetos/arrays) se recorren hasta cerrarse y se decodifican con
+    json.loads; los escalares se decodifican al terminar.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._text: List[str] = []
+        self._started = False
+        self._finished = False
+        self._state = "key"        # key | colon | value | after_value
+        self._key_buffer: Optional[List[str]] = None
+        self._key: Optional[str] = None
+        self._value: List[str] = []
+        self._depth = 0            # profundidad dentro de un valor anidado
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text)
+
+    def feed(self, chunk: str) -> List[str]:
+        """Procesar un fragmento y devolver las claves completadas en él"""
+        completed = []
+        self._text.append(chunk)
+        for char in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                continue
+            key = self._consume(char)
+            if key is not None:
+                completed.append(key)
+        return completed
+
+    def _consume(self, char: str) -> Optional[str]:
+        state = self._state
+
+        if state == "key":
+            if self._key_buffer is None:
+                if char == '"':
+                    self._key_buffer = []
+                elif char == "}":
+                    self._finished = True
+                return None
+            if self._escape:
+                self._key_buffer.append(char)
+                self._escape = False
+            elif char == "\\":
+                self._key_buffer.append(char)
+                self._escape = True
+            elif char == '"':
+                self._key = json.loads('"' + "".join(self._key_buffer) + '"')
+                self._key_buffer = None
+                self._state = "colon"
+            else:
+                self._key_buffer.append(char)
+            return None
+
+        if state == "colon":
+            if char == ":":
+                self._state = "value"
+                self._value = []
+            return None
+
+        if state == "value":
+            return self._consume_value(char)
+
+        # after_value: esperar separador o cierre
+        if char == ",":
+            self._state = "key"
+        elif char == "}":
+            self._finished = True
+        return None
+
+    def _consume_value(self, char: str) -> Optional[str]:
+        value = self._value
+
+        if not value and not self._in_string and char.isspace():
+            return None
+
+        if self._in_string:
+            value.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 0:
+                    return self._complete()
+            return None
+
+        if char == '"':
+            value.append(char)
+            self._in_string = True
+            return None
+
+        if char in "{[":
+            self._depth += 1
+            value.append(char)
+            return None
+
+        if char in "}]" and self._depth > 0:
+            self._depth -= 1
+            value.append(char)
+            if self._depth == 0:
+                return self._complete()
+            return None
+
+        if self._depth == 0 and (char in ",}" or char.isspace()):
+            # Fin de un escalar (número, true, false, null)
+            key = self._complete()
+            if char == "}":
+                self._finished = True
+            elif char == ",":
+                self._state = "key"
+            return key
+
+        value.append(char)
+        return None
+
+    def _complete(self) -> Optional[str]:
+        raw = "".join(self._value).strip()
+        key = self._key
+        self._value = []
+        self._state = "after_value"
+        try:
+            self.fields[key] = json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            self.fields[key] = raw
+        return key
+
+    def decision(self) -> Optional[Dict[str, Any]]:
+        """
+        Campos de decisión si ya están disponibles: signal y confidence siempre;
+        para BUY/SELL también stop_loss y take_profit (o el objeto ya cerrado).
+        """
+        if "signal" not in self.fields or "confidence" not in self.fields:
+            return None
+        signal = str(self.fields["signal"]).upper()
+        if signal in ("BUY", "SELL") and not self._finished:
+            if "stop_loss" not in self.fields or "take_profit" not in self.fields:
+                return None
+        return {field: self.fields[field] for field in DECISION_FIELDS if field in self.fields}
@@ -3,20 +3,22 @@ from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 
 from ..database.db_connection import get_db
-from ..models.user_model import User
 from ..models.ai_config_model import UserAIConfig, AIAnalysisHistory
-from ..core.security import get_current_user
+from ..core.security import Principal, get_current_user
 from ..core.ai_config import AIProvider, ai_config
 from ..ai.model_manager import model_manager
+from ..ai.ai_interface import ai_interface
 from ..services.analysis_service import analysis_service
 from ..core.logger import logger
+from ..core.http_pool import http_pool
+from ..ai.response_cache import response_cache
 
 router = APIRouter()
 
 @router.get("/config")
 async def get_ai_config(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener configuración de IA del usuario"""
     ai_config = db.query(UserAIConfig).filter(UserAIConfig.user_id == current_user.id).first()
@@ -53,7 +55,7 @@ async def get_ai_config(
 async def update_ai_config(
     config: Dict[str, Any],
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Actualizar configuración de IA del usuario"""
     ai_config = db.query(UserAIConfig).filter(UserAIConfig.user_id == current_user.id).first()
@@ -139,7 +141,7 @@ async def analyze_symbol(
     symbol: str,
     analysis_type: str = "comprehensive",
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Analizar un símbolo específico usando IA"""
     try:
@@ -169,7 +171,7 @@ async def analyze_multiple_symbols(
     symbols: List[str],
     analysis_type: str = "technical",
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Analizar múltiples símbolos"""
     try:
@@ -204,7 +206,7 @@ async def get_analysis_history(
     limit: int = Query(20, ge=1, le=100),
     symbol: str = Query(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener historial de análisis de IA"""
     try:
@@ -242,7 +244,7 @@ async def get_analysis_history(
 @router.post("/test-api-key")
 async def test_api_key(
     test_data: Dict[str, Any],
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Probar una API key de IA"""
     try:
@@ -269,4 +271,23 @@ async def test_api_key(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error probando API key: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/http-stats")
+async def get_http_stats(current_user: Principal = Depends(get_current_user)):
+    """Latencias HTTP por proveedor (conexión, primer byte y total) y de streaming"""
+    return {
+        "success": True,
+        "providers": http_pool.get_stats(),
+        "streaming": ai_interface.get_streaming_stats()
+    }
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_user: Principal = Depends(get_current_user)):
+    """Aciertos de la caché de respuestas IA y tokens/USD ahorrados"""
+    return {"success": True, **response_cache.get_stats()}
+
+@router.get("/batch-stats")
+async def get_batch_stats(current_user: Principal = Depends(get_current_user)):
+    """Análisis por lotes: llamadas ahorradas, reanálisis individuales y reducción de tokens de prompt"""
+    return {"success": True, **ai_interface.get_batch_stats()}
@@ -1,21 +1,19 @@
 # backend/app/api/routes_bot.py - ARCHIVO COMPLETO
-import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 from ..database.db_connection import get_db
 from ..models.config_model import BotConfig
-from ..models.user_model import User
-from ..core.security import get_current_user
+from ..core.security import Principal, get_current_user
 from ..core.logger import logger
-from ..services.bot_orchestrator import bot_orchestrator
+from ..services.bot_supervisor import bot_supervisor
 
 router = APIRouter()
 
 @router.get("/status")
 async def get_bot_status(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener estado actual del bot"""
     try:
@@ -52,7 +50,7 @@ async def get_bot_status(
         
         # Obtener información de operaciones actuales (mock por ahora)
         from ..services.broker_api import broker_api
-        portfolio = broker_api.get_portfolio_status()
+        portfolio = await broker_api.get_portfolio_status_async()
         
         current_trades = 0
         if portfolio["success"]:
@@ -85,7 +83,7 @@ async def get_bot_status(
 @router.post("/start")
 async def start_bot(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Iniciar el bot de trading"""
     try:
@@ -95,12 +93,12 @@ async def start_bot(
             bot_config.is_active = True
             db.commit()
         
-        # Iniciar orchestrator en segundo plano
-        asyncio.create_task(bot_orchestrator.start_bot(current_user.id))
+        # Iniciar el bot del usuario en segundo plano (una sola instancia por usuario)
+        result = bot_supervisor.start(current_user.id)
         
         return {
             "success": True, 
-            "message": "Bot iniciado correctamente",
+            "message": "El bot ya estaba en marcha" if result["already_running"] else "Bot iniciado correctamente",
             "status": "active"
         }
         
@@ -111,11 +109,11 @@ async def start_bot(
 @router.post("/stop")
 async def stop_bot(
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Detener el bot de trading"""
     try:
-        bot_orchestrator.stop_bot()
+        bot_supervisor.stop(current_user.id)
         
         # Actualizar configuración
         bot_config = db.query(BotConfig).filter(BotConfig.user_id == current_user.id).first()
@@ -133,11 +131,37 @@ async def stop_bot(
         logger.error(f"Error deteniendo bot: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/scan-stats")
+async def get_scan_stats(current_user: Principal = Depends(get_current_user)):
+    """Tiempos de los últimos escaneos de símbolos del bot"""
+    try:
+        orchestrator = bot_supervisor.get_instance(current_user.id)
+        if orchestrator is None:
+            return {"success": True, "scans": [], "last_wall_time": None, "avg_wall_time": None}
+        return {"success": True, **orchestrator.get_scan_stats()}
+    except Exception as e:
+        logger.error(f"Error obteniendo estadísticas de escaneo: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/instances")
+async def get_bot_instances(current_user: Principal = Depends(get_current_user)):
+    """Estado y tiempos de ciclo de la instancia del bot del usuario"""
+    try:
+        orchestrator = bot_supervisor.get_instance(current_user.id)
+        return {
+            "success": True,
+            "running": bot_supervisor.is_running(current_user.id),
+            "instance": orchestrator.get_stats() if orchestrator else None
+        }
+    except Exception as e:
+        logger.error(f"Error obteniendo instancia del bot: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/settings")
 async def update_bot_settings(
     settings: Dict[str, Any],
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Actualizar configuración del bot"""
     try:
@@ -4,14 +4,14 @@ from typing import Dict, Any
 from ..database.db_connection import get_db
 from ..models.user_model import User, UserConfig
 from ..models.config_model import BotConfig
-from ..core.security import get_current_user
+from ..core.security import Principal, get_current_user, get_current_user_model, principal_cache
 
 router = APIRouter()
 
 @router.get("/")
 async def get_user_config(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener configuración completa del usuario"""
     user_config = db.query(UserConfig).filter(UserConfig.user_id == current_user.id).first()
@@ -47,7 +47,7 @@ async def get_user_config(
 async def update_user_config(
     config: Dict[str, Any],
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_model)
 ):
     """Actualizar configuración de usuario"""
     user_config = db.query(UserConfig).filter(UserConfig.user_id == current_user.id).first()
@@ -82,6 +82,8 @@ async def update_user_config(
         current_user.theme = config['theme']
     
     db.commit()
+    # El usuario cacheado para autenticación ya no refleja la BD
+    principal_cache.invalidate(current_user.username)
     
     return {
         "message": "Configuración de usuario actualizada",
@@ -100,7 +102,7 @@ async def update_user_config(
 async def update_bot_config(
     config: Dict[str, Any],
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Actualizar configuración del bot"""
     bot_config = db.query(BotConfig).filter(BotConfig.user_id == current_user.id).first()
@@ -1,14 +1,17 @@
 # backend/app/api/routes_dashboard.py - DATOS REALES
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from ..database.db_connection import get_db
-from ..models.user_model import User
+from ..database.db_connection import get_async_db, get_db
 from ..models.trade_model import Trade
 from ..models.config_model import BotConfig
-from ..core.security import get_current_user
+from ..database.trade_stats import get_trade_aggregates, start_of_day, win_rate
+from ..core.security import Principal, get_current_user
 from ..services.broker_api import broker_api
 from ..services.data_fetcher import data_fetcher
+from ..services.price_stream import price_stream
 from ..core.logger import logger
 
 router = APIRouter()
@@ -16,43 +19,22 @@ router = APIRouter()
 @router.get("/stats")
 async def get_dashboard_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener estadísticas para el dashboard con datos reales de MT5"""
     try:
         # Obtener información de la cuenta desde MT5
-        portfolio_status = broker_api.get_portfolio_status()
+        portfolio_status = await broker_api.get_portfolio_status_async()
         
         # Datos de cuenta desde MT5
         account_info = portfolio_status.get("account_info", {}) if portfolio_status["success"] else {}
         open_positions = portfolio_status.get("open_positions", []) if portfolio_status["success"] else []
         
-        # Operaciones del día desde base de datos
-        today = datetime.now().date()
-        today_trades = db.query(Trade).filter(
-            Trade.user_id == current_user.id,
-            Trade.opened_at >= today
-        ).all()
-        
-        # Estadísticas básicas
-        total_trades = db.query(Trade).filter(Trade.user_id == current_user.id).count()
+        # Estadísticas históricas y del día en una sola consulta agregada
+        stats = get_trade_aggregates(db, current_user.id, start_of_day())
+        total_trades = stats["total_trades"]
         open_trades = len(open_positions)  # ✅ Operaciones reales de MT5
         
-        # Profit del día
-        profit_today = sum(trade.profit for trade in today_trades if trade.profit)
-        
-        # Operaciones ganadoras del día
-        winning_trades_today = len([t for t in today_trades if t.profit and t.profit > 0])
-        win_rate_today = (winning_trades_today / len(today_trades) * 100) if today_trades else 0
-        
-        # Calcular win rate general basado en historial
-        all_trades = db.query(Trade).filter(Trade.user_id == current_user.id).all()
-        winning_trades_total = len([t for t in all_trades if t.profit and t.profit > 0])
-        win_rate_total = (winning_trades_total / len(all_trades) * 100) if all_trades else 0
-        
-        # Profit total real
-        total_profit = sum(trade.profit for trade in all_trades if trade.profit)
-        
         # Estado del bot
         bot_config = db.query(BotConfig).filter(BotConfig.user_id == current_user.id).first()
         bot_status = "active" if bot_config and bot_config.is_active else "stopped"
@@ -72,11 +54,11 @@ async def get_dashboard_stats(
             "margin": account_info.get("margin", 0.0),
             "free_margin": account_info.get("free_margin", 0.0),
             "performance": {
-                "profit_today": round(profit_today, 2),
-                "trades_today": len(today_trades),
-                "win_rate_today": round(win_rate_today, 2),
-                "best_trade_today": max([t.profit for t in today_trades], default=0),
-                "worst_trade_today": min([t.profit for t in today_trades], default=0)
+                "profit_today": round(stats["profit_today"], 2),
+                "trades_today": stats["trades_today"],
+                "win_rate_today": win_rate(stats["winning_today"], stats["trades_today"]),
+                "best_trade_today": stats["best_today"],
+                "worst_trade_today": stats["worst_today"]
             },
             "bot_status": {
                 "status": bot_status,
@@ -87,8 +69,8 @@ async def get_dashboard_stats(
             "summary": {
                 "total_trades": total_trades,
                 "open_trades": open_trades,  # ✅ Operaciones reales abiertas
-                "win_rate": round(win_rate_total, 2),  # ✅ Win rate real
-                "total_profit": round(total_profit, 2)  # ✅ Profit real
+                "win_rate": win_rate(stats["winning_trades"], total_trades),  # ✅ Win rate real
+                "total_profit": round(stats["total_profit"], 2)  # ✅ Profit real
             }
         }
         
@@ -129,43 +111,32 @@ async def get_market_overview():
         popular_symbols = ["EURUSD", "GBPUSD", "XAUUSD", "BTCUSD", "USDJPY", "AUDUSD"]
         market_data = []
         
+        # Cotizaciones compartidas con el WebSocket /ws/prices: una única lectura
+        # de ticks en el hilo MT5 para todos los símbolos (y ninguna si son recientes)
+        quotes = await price_stream.get_quotes(popular_symbols)
         for symbol in popular_symbols:
-            try:
-                # Obtener precio actual desde MT5
-                price_data = data_fetcher.get_current_price(symbol)
-                if price_data:
-                    # Obtener datos históricos para calcular cambios
-                    historical_data = data_fetcher.get_market_data(symbol, timeframe=1, count=2)  # M1 para cambio reciente
-                    
-                    if historical_data is not None and not historical_data.empty:
-                        current_price = price_data['bid']
-                        previous_price = historical_data['close'].iloc[-2] if len(historical_data) > 1 else current_price
-                        price_change = ((current_price - previous_price) / previous_price) * 100
-                        
-                        # Determinar tendencia y volumen
-                        trend = "up" if price_change > 0 else "down" if price_change < 0 else "flat"
-                        
-                        # Clasificar volumen (simplificado)
-                        spread = price_data['spread']
-                        if spread <= 0.0003:
-                            volume_category = "high"
-                        elif spread <= 0.0006:
-                            volume_category = "medium"
-                        else:
-                            volume_category = "low"
-                        
-                        market_data.append({
-                            "symbol": symbol,
-                            "bid": round(price_data['bid'], 5),
-                            "ask": round(price_data['ask'], 5),
-                            "spread": round(spread, 5),
-                            "change": round(price_change, 2),
-                            "trend": trend,
-                            "volume": volume_category
-                        })
-            except Exception as e:
-                logger.warning(f"Error obteniendo datos para {symbol}: {str(e)}")
+            quote = quotes.get(symbol)
+            if quote is None:
                 continue
+            
+            # Clasificar volumen (simplificado)
+            spread = quote['spread']
+            if spread <= 0.0003:
+                volume_category = "high"
+            elif spread <= 0.0006:
+                volume_category = "medium"
+            else:
+                volume_category = "low"
+            
+            market_data.append({
+                "symbol": symbol,
+                "bid": quote['bid'],
+                "ask": quote['ask'],
+                "spread": spread,
+                "change": quote['change'],
+                "trend": quote['trend'],
+                "volume": volume_category
+            })
         
         # Noticias del mercado (placeholder - podrías integrar una API de noticias)
         market_news = [
@@ -194,26 +165,27 @@ async def get_market_overview():
 
 @router.get("/recent-activity")
 async def get_recent_activity(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Obtener actividad reciente con datos reales"""
+    """Obtener actividad reciente con datos reales (sesión asíncrona: endpoint de sondeo frecuente)"""
     try:
         # Últimas operaciones de la base de datos
-        recent_trades = db.query(Trade).filter(
-            Trade.user_id == current_user.id
-        ).order_by(Trade.opened_at.desc()).limit(5).all()
+        recent_trades = (await db.execute(
+            select(Trade).where(Trade.user_id == current_user.id).order_by(Trade.opened_at.desc()).limit(5)
+        )).scalars().all()
         
         # Operaciones abiertas actuales desde MT5
-        portfolio_status = broker_api.get_portfolio_status()
+        portfolio_status = await broker_api.get_portfolio_status_async()
         open_positions = portfolio_status.get("open_positions", []) if portfolio_status["success"] else []
         
         # Señales recientes de análisis de IA (desde base de datos)
         from ..models.ai_config_model import AIAnalysisHistory
         
-        recent_analyses = db.query(AIAnalysisHistory).filter(
-            AIAnalysisHistory.user_id == current_user.id
-        ).order_by(AIAnalysisHistory.created_at.desc()).limit(5).all()
+        recent_analyses = (await db.execute(
+            select(AIAnalysisHistory).where(AIAnalysisHistory.user_id == current_user.id)
+            .order_by(AIAnalysisHistory.created_at.desc()).limit(5)
+        )).scalars().all()
         
         recent_signals = [
             {
@@ -238,7 +210,9 @@ async def get_recent_activity(
             })
         
         # Verificar límites de riesgo
-        bot_config = db.query(BotConfig).filter(BotConfig.user_id == current_user.id).first()
+        bot_config = (await db.execute(
+            select(BotConfig).where(BotConfig.user_id == current_user.id).limit(1)
+        )).scalars().first()
         if bot_config and bot_config.is_active:
             if len(open_positions) >= bot_config.max_open_trades:
                 system_alerts.append({
@@ -2,11 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 from ..database.db_connection import get_db
-from ..models.user_model import User
 from ..models.mt5_config_model import MT5Config
 from ..services.broker_api import broker_api
 from ..services.data_fetcher import data_fetcher
-from ..core.security import get_current_user
+from ..services.mt5_executor import mt5_executor, PRIORITY_POSITION
+from ..core.security import Principal, get_current_user
 
 router = APIRouter()
 
@@ -14,7 +14,7 @@ router = APIRouter()
 async def connect_mt5(
     config: Dict[str, Any],
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Conectar a MT5 con credenciales específicas"""
     try:
@@ -28,7 +28,7 @@ async def connect_mt5(
                 )
 
         # Intentar conexión
-        connection_result = broker_api.connect_to_mt5(
+        connection_result = await broker_api.connect_to_mt5_async(
             server=config['server'],
             login=config['login'],
             password=config['password'],
@@ -94,11 +94,11 @@ async def connect_mt5(
 @router.post("/disconnect")
 async def disconnect_mt5(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Desconectar de MT5"""
     try:
-        disconnect_result = broker_api.disconnect_mt5()
+        disconnect_result = await broker_api.disconnect_mt5_async()
         
         # Actualizar estado en base de datos
         mt5_config = db.query(MT5Config).filter(MT5Config.user_id == current_user.id).first()
@@ -117,7 +117,7 @@ async def disconnect_mt5(
 @router.get("/status")
 async def get_mt5_status(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener estado de conexión MT5"""
     try:
@@ -125,7 +125,7 @@ async def get_mt5_status(
         mt5_config = db.query(MT5Config).filter(MT5Config.user_id == current_user.id).first()
         
         # Obtener estado actual de conexión
-        connection_status = broker_api.get_connection_status()
+        connection_status = await mt5_executor.run(PRIORITY_POSITION, broker_api.get_connection_status)
         
         return {
             "config": {
@@ -146,7 +146,7 @@ async def get_mt5_status(
 @router.get("/account-info")
 async def get_account_info(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener información detallada de la cuenta MT5"""
     try:
@@ -156,7 +156,7 @@ async def get_account_info(
                 detail="No hay conexión activa con MT5"
             )
 
-        portfolio_status = broker_api.get_portfolio_status()
+        portfolio_status = await broker_api.get_portfolio_status_async()
         
         return portfolio_status
 
@@ -171,7 +171,7 @@ async def get_account_info(
 @router.get("/symbols")
 async def get_available_symbols(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener símbolos disponibles en MT5"""
     try:
@@ -181,7 +181,7 @@ async def get_available_symbols(
                 detail="No hay conexión activa con MT5"
             )
 
-        symbols = data_fetcher.get_symbols()
+        symbols = await data_fetcher.get_symbols_async()
         
         # Filtrar símbolos populares para demo
         popular_symbols = [s for s in symbols if any(x in s for x in ['EURUSD', 'GBPUSD', 'USDJPY', 'XAUUSD', 'BTCUSD'])]
@@ -204,7 +204,7 @@ async def get_available_symbols(
 async def get_market_data(
     symbol: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener datos de mercado para un símbolo específico"""
     try:
@@ -215,7 +215,7 @@ async def get_market_data(
             )
 
         # Obtener precio actual
-        current_price = data_fetcher.get_current_price(symbol)
+        current_price = await data_fetcher.get_current_price_async(symbol)
         if not current_price:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -223,7 +223,7 @@ async def get_market_data(
             )
 
         # Obtener datos históricos (últimas 100 velas)
-        historical_data = data_fetcher.get_market_data(symbol, count=100)
+        historical_data = await data_fetcher.get_market_data_async(symbol, count=100)
         
         return {
             "success": True,
@@ -244,7 +244,7 @@ async def get_market_data(
 async def test_order(
     order_data: Dict[str, Any],
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Ejecutar una orden de prueba (solo para demo)"""
     try:
@@ -264,7 +264,7 @@ async def test_order(
                 )
 
         # Ejecutar orden de prueba
-        result = broker_api.execute_trade(
+        result = await broker_api.execute_trade_async(
             symbol=order_data['symbol'],
             signal=order_data['operation'],
             volume=order_data['volume'],
@@ -280,4 +280,9 @@ async def test_order(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error ejecutando orden de prueba: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/executor-stats")
+async def get_executor_stats(current_user: Principal = Depends(get_current_user)):
+    """Cola del ejecutor MT5 y latencias (espera en cola y ejecución) por tipo de llamada"""
+    return {"success": True, **mt5_executor.get_stats()}
@@ -1,33 +1,25 @@
 # backend/app/api/routes_news.py
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict, Any
-import requests
 from ..services.news_service import news_service
-from ..core.security import get_current_user
+from ..core.security import Principal, get_current_user
 from ..core.config import settings
-from ..models.user_model import User
 
 router = APIRouter()
 
 @router.get("/test-connection")
 async def test_finnhub_connection(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """Probar conexión con Finnhub API"""
     try:
-        # Hacer una llamada simple a Finnhub para probar
-        url = "https://finnhub.io/api/v1/quote"
-        params = {
-            "symbol": "AAPL",
-            "token": settings.FINNHUB_API_KEY
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
+        # Hacer una llamada simple a Finnhub para probar (sin bloquear el event loop)
+        response = await news_service.test_connection()
         
         return {
-            "status": "success" if response.status_code == 200 else "error",
-            "status_code": response.status_code,
-            "finnhub_response": response.json() if response.status_code == 200 else response.text,
+            "status": "success" if response["status_code"] == 200 else "error",
+            "status_code": response["status_code"],
+            "finnhub_response": response["body"],
             "api_key_length": len(settings.FINNHUB_API_KEY) if settings.FINNHUB_API_KEY else 0,
             "api_key_prefix": settings.FINNHUB_API_KEY[:10] + "..." if settings.FINNHUB_API_KEY else "No API Key"
         }
@@ -38,7 +30,7 @@ async def test_finnhub_connection(
 @router.get("/market-news")
 async def get_market_news(
     category: str = "general",
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ) -> List[Dict[str, Any]]:
     """Obtener noticias del mercado"""
     try:
@@ -51,9 +43,19 @@ async def get_market_news(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo noticias: {str(e)}")
 
+@router.get("/all-categories")
+async def get_news_all_categories(
+    current_user: Principal = Depends(get_current_user)
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Obtener noticias general, forex y crypto en paralelo"""
+    try:
+        return await news_service.get_news_by_categories()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo noticias: {str(e)}")
+
 @router.get("/crypto-news")
 async def get_crypto_news(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ) -> List[Dict[str, Any]]:
     """Obtener noticias de criptomonedas"""
     try:
@@ -64,7 +66,7 @@ async def get_crypto_news(
 
 @router.get("/forex-news") 
 async def get_forex_news(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ) -> List[Dict[str, Any]]:
     """Obtener noticias de Forex"""
     try:
@@ -1,11 +1,16 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta
 from ..database.db_connection import get_db
 from ..models.trade_model import Trade, TradeAnalysis
-from ..models.user_model import User
-from ..core.security import get_current_user
+from ..database.performance import get_performance_curve
+from ..database.trade_stats import get_trade_aggregates, get_daily_aggregates, start_of_day, win_rate
+from ..models.config_model import BotConfig
+from ..services.backtest_engine import BacktestConfig, run_backtest
+from ..services.market_store import TIMEFRAME_NAMES
+from ..core.security import Principal, get_current_user
 
 router = APIRouter()
 
@@ -16,7 +21,7 @@ async def get_trades(
     status: Optional[str] = Query(None, regex="^(open|closed|cancelled|all)$"),
     symbol: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener historial de operaciones"""
     query = db.query(Trade).filter(Trade.user_id == current_user.id)
@@ -58,7 +63,7 @@ async def get_trades(
 async def get_trade(
     trade_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener detalles de una operación específica"""
     trade = db.query(Trade).filter(
@@ -107,55 +112,99 @@ async def get_trade(
 
 @router.get("/stats/summary")
 async def get_trading_stats(
+    days: int = Query(30, ge=1, le=365),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Obtener estadísticas de trading"""
-    # Operaciones totales
-    total_trades = db.query(Trade).filter(Trade.user_id == current_user.id).count()
-    
-    # Operaciones abiertas
-    open_trades = db.query(Trade).filter(
-        Trade.user_id == current_user.id,
-        Trade.status == "open"
-    ).count()
-    
-    # Operaciones cerradas
-    closed_trades = db.query(Trade).filter(
-        Trade.user_id == current_user.id,
-        Trade.status == "closed"
-    ).count()
-    
-    # Profit total
-    total_profit = db.query(Trade).filter(
-        Trade.user_id == current_user.id,
-        Trade.status == "closed"
-    ).with_entities(db.func.sum(Trade.profit)).scalar() or 0.0
-    
-    # Operaciones ganadoras
-    winning_trades = db.query(Trade).filter(
-        Trade.user_id == current_user.id,
-        Trade.status == "closed",
-        Trade.profit > 0
-    ).count()
-    
-    # Tasa de éxito
-    win_rate = (winning_trades / closed_trades * 100) if closed_trades > 0 else 0
+    """Obtener estadísticas de trading (agregadas en SQL)"""
+    stats = get_trade_aggregates(db, current_user.id, start_of_day())
+    closed_trades = stats["closed_trades"]
+    total_profit = stats["closed_profit"]
     
     return {
         "summary": {
-            "total_trades": total_trades,
-            "open_trades": open_trades,
+            "total_trades": stats["total_trades"],
+            "open_trades": stats["open_trades"],
             "closed_trades": closed_trades,
-            "winning_trades": winning_trades,
-            "win_rate": round(win_rate, 2),
+            "winning_trades": stats["winning_closed"],
+            "win_rate": win_rate(stats["winning_closed"], closed_trades),
             "total_profit": round(total_profit, 2),
             "avg_profit_per_trade": round(total_profit / closed_trades, 2) if closed_trades > 0 else 0
         },
         "current_performance": {
-            "profit_today": 150.75,  # Mock data
-            "trades_today": 3,       # Mock data
-            "best_trade": 45.20,     # Mock data
-            "worst_trade": -12.50    # Mock data
-        }
-    }
\ No newline at end of file
+            "profit_today": round(stats["profit_today"], 2),
+            "trades_today": stats["trades_today"],
+            "best_trade": stats["best_today"],
+            "worst_trade": stats["worst_today"]
+        },
+        "daily": get_daily_aggregates(db, current_user.id, days)
+    }
+
+@router.get("/performance/curve")
+async def get_performance_curve_route(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    symbol: Optional[str] = None,
+    starting_balance: float = 0.0,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Curva diaria de PnL/equity para un rango de fechas (desde daily_performance)"""
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha inicial debe ser anterior a la final"
+        )
+    
+    return get_performance_curve(
+        db, current_user.id, start, end,
+        symbol.upper() if symbol else None, starting_balance
+    )
+
+@router.post("/backtest")
+async def run_backtest_route(
+    request: Dict[str, Any],
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Backtest de las reglas del bot sobre las velas grabadas localmente.
+    Campos: symbols, timeframe (M5), days (365) o start/end ISO, processes,
+    include_trades y cualquier campo de BacktestConfig (stop_loss_pips, lot_size,
+    commission_per_lot, swap_long, swap_short, spread_points, starting_balance...).
+    Stop y lote por defecto salen de la configuración del bot del usuario.
+    """
+    timeframe = str(request.get("timeframe", "M5")).upper()
+    if timeframe not in TIMEFRAME_NAMES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Timeframe no soportado: {timeframe}"
+        )
+    
+    bot_config = db.query(BotConfig).filter(BotConfig.user_id == current_user.id).first()
+    symbols = request.get("symbols")
+    if not symbols:
+        allowed = bot_config.allowed_symbols if bot_config else "EURUSD,GBPUSD,USDJPY,XAUUSD"
+        symbols = [symbol.strip() for symbol in allowed.split(",") if symbol.strip()]
+    symbols = [symbol.upper() for symbol in symbols]
+    
+    try:
+        end = datetime.fromisoformat(request["end"]) if request.get("end") else datetime.utcnow()
+        start = (datetime.fromisoformat(request["start"]) if request.get("start")
+                 else end - timedelta(days=int(request.get("days", 365))))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Fecha inválida: {str(e)}")
+    
+    overrides = {key: request[key] for key in BacktestConfig.__dataclass_fields__ if key in request}
+    config = BacktestConfig.from_bot_config(bot_config, **overrides) if bot_config else BacktestConfig(**overrides)
+    
+    # CPU intensivo: fuera del event loop (y en procesos si se pide)
+    result = await asyncio.to_thread(run_backtest, symbols, timeframe, start, end, config,
+                                     int(request.get("processes", 0)))
+    if not result["success"]:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=result["error"])
+    
+    if not request.get("include_trades"):
+        for symbol_result in result["results"].values():
+            symbol_result["trades"] = len(symbol_result["trades"])
+    return result
@@ -0,0 +1,50 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from ..services.price_stream import price_stream, PriceSubscriber
+from ..core.logger import logger
+
+router = APIRouter()
+
+@router.websocket("/ws/prices")
+async def prices_websocket(websocket: WebSocket, symbols: str = ""):
+    """
+    Precios en tiempo real. Suscripción inicial con ?symbols=EURUSD,XAUUSD y después
+    mensajes {"action": "subscribe" | "unsubscribe", "symbols": [...]}.
+    El servidor envía {"type": "prices", "data": [...]} solo con los símbolos que cambiaron.
+    """
+    await websocket.accept()
+    subscriber = PriceSubscriber(websocket)
+    price_stream.register(subscriber)
+    price_stream.subscribe(subscriber, [s.strip() for s in symbols.split(",") if s.strip()])
+    sender = asyncio.create_task(price_stream.sender(subscriber))
+
+    async def receive():
+        while True:
+            message = await websocket.receive_json()
+            action = message.get("action")
+            requested = message.get("symbols") or []
+            if action == "subscribe":
+                price_stream.subscribe(subscriber, requested)
+            elif action == "unsubscribe":
+                price_stream.unsubscribe(subscriber, requested)
+            else:
+                await websocket.send_json({"type": "error", "error": f"Acción desconocida: {action}"})
+                continue
+            await websocket.send_json({"type": "subscriptions", "symbols": sorted(subscriber.symbols)})
+
+    receiver = asyncio.create_task(receive())
+    try:
+        # Termina cuando el cliente se desconecta o el envío se atasca (cliente lento)
+        done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, (WebSocketDisconnect, asyncio.TimeoutError)):
+                logger.error(f"❌ Error en WebSocket de precios: {str(error)}")
+    finally:
+        price_stream.unregister(subscriber)
+        for task in (sender, receiver):
+            task.cancel()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
@@ -29,5 +29,50 @@ class AIConfig(BaseSettings):
     # Configuración de prompts
     MAX_TOKENS: int = 4000
     TEMPERATURE: float = 0.7
+    
+    # Pool HTTP por proveedor (sesiones aiohttp reutilizables)
+    HTTP_TIMEOUT: float = 60.0
+    HTTP_POOL_LIMIT: int = 20
+    HTTP_POOL_LIMIT_PER_HOST: int = 10
+    HTTP_KEEPALIVE_TIMEOUT: float = 60.0
+    HTTP_DNS_CACHE_TTL: int = 300
+    
+    # Streaming de respuestas IA (decisión anticipada antes de terminar el reasoning)
+    STREAMING_ENABLED: bool = True
+    
+    # Análisis por lotes: varios símbolos por llamada con preámbulo compartido
+    BATCH_ENABLED: bool = True
+    BATCH_MAX_SYMBOLS: int = 8
+    BATCH_MAX_PROMPT_TOKENS: int = 6000
+    BATCH_OUTPUT_TOKENS_PER_SYMBOL: int = 350  # Reserva de salida por símbolo (limitada por MAX_TOKENS)
+    CHARS_PER_TOKEN: float = 4.0  # Estimación de tokens a partir de la longitud del prompt
+    
+    # Caché de respuestas IA (clave = estado de mercado cuantizado)
+    CACHE_ENABLED: bool = True
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_ENTRIES: int = 500
+    CACHE_PRUNE_INTERVAL: int = 300  # Segundos entre limpiezas de la tabla (caducadas y exceso)
+    CACHE_PRICE_ATR_FRACTION: float = 0.25  # Tamaño del cubo de precio en fracciones de ATR
+    CACHE_RSI_BUCKET: float = 5.0
+    
+    # Coste estimado en USD por 1K tokens (mezcla entrada/salida) para métricas de ahorro
+    COST_PER_1K_TOKENS: Dict[str, float] = {
+        AIProvider.DEEPSEEK.value: 0.002,
+        AIProvider.OPENAI.value: 0.03,
+        AIProvider.GEMINI.value: 0.001,
+        AIProvider.CLAUDE.value: 0.015
+    }
+    
+    # Llamadas simultáneas máximas a proveedores de IA (todo el proceso)
+    MAX_CONCURRENT_AI_CALLS: int = 4
+    
+    # Presupuesto de peticiones por minuto por proveedor (IA y noticias)
+    RATE_LIMITS_PER_MINUTE: Dict[str, float] = {
+        AIProvider.DEEPSEEK.value: 60,
+        AIProvider.OPENAI.value: 60,
+        AIProvider.GEMINI.value: 60,
+        AIProvider.CLAUDE.value: 50,
+        "news": 30
+    }
 
 ai_config = AIConfig()
\ No newline at end of file
@@ -30,6 +30,42 @@ class Settings(BaseSettings):
 
     FINNHUB_API_KEY: str
 
+    # Pool de conexiones de los engines de BD (síncrono y asíncrono)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # Solo PostgreSQL: renovar conexiones antes de que el servidor las corte
+    # Inserciones en bloque: a partir de cuántas filas se usa COPY en PostgreSQL
+    DB_COPY_THRESHOLD: int = 1000
+
+    # Escritura diferida del historial (análisis IA, análisis de noticias, contadores de uso)
+    WRITE_BUFFER_ENABLED: bool = True
+    WRITE_BUFFER_MAX_BATCH: int = 200          # Escribir en cuanto haya tantas filas pendientes
+    WRITE_BUFFER_FLUSH_INTERVAL: float = 1.0   # ... o cada tantos segundos
+    WRITE_BUFFER_MAX_PENDING: int = 5000       # Por encima se escribe en el momento (memoria acotada)
+
+    # Caché del usuario autenticado (segundos)
+    AUTH_PRINCIPAL_TTL: float = 60.0
+
+    # Snapshot de cuenta/posiciones MT5 (segundos)
+    PORTFOLIO_REFRESH_INTERVAL: float = 1.0
+    PORTFOLIO_MAX_STALENESS: float = 2.0
+
+    # Streaming de precios por WebSocket (segundos)
+    PRICE_STREAM_INTERVAL: float = 0.25
+    PRICE_STREAM_REFERENCE_INTERVAL: float = 30.0
+    PRICE_STREAM_SEND_TIMEOUT: float = 5.0
+    PRICE_STREAM_MAX_SYMBOLS: int = 50
+
+    # Grabación local de ticks/velas (ficheros columnares por símbolo y día)
+    MARKET_DATA_DIR: str = "market_data"
+    MARKET_RECORDER_ENABLED: bool = True
+    MARKET_RECORDER_SYMBOLS: List[str] = ["EURUSD", "GBPUSD", "XAUUSD", "BTCUSD", "USDJPY", "AUDUSD"]
+    MARKET_RECORDER_TIMEFRAMES: List[str] = ["M1", "M5"]
+    MARKET_RECORDER_INTERVAL: float = 0.5
+    MARKET_RECORDER_BAR_INTERVAL: float = 10.0
+    MARKET_RECORDER_FLUSH_INTERVAL: float = 2.0
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -0,0 +1,176 @@
+# backend/app/core/http_pool.py
+# Pool de sesiones aiohttp de larga duración (una por proveedor)
+# Keep-alive, límite de conexiones, caché DNS e histogramas de latencia
+
+import bisect
+import time
+from typing import Any, Dict, Optional
+from .lazy import lazy_import
+from .logger import logger
+from .ai_config import ai_config
+
+aiohttp = lazy_import("aiohttp")
+
+# Límites superiores de los cubos del histograma (milisegundos)
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class LatencyHistogram:
+    """Histograma de latencias por cubos fijos (el último cubo es +inf)"""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Cota superior del cubo que contiene el cuantil `q` (acotada por el máximo observado)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                bound = float(self.buckets_ms[index]) if index < len(self.buckets_ms) else self.max_ms
+                return round(min(bound, self.max_ms), 1)
+        return self.max_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        labels = [f"<={b}ms" for b in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n}
+        }
+
+
+class _ProviderMetrics:
+    def __init__(self):
+        self.connect = LatencyHistogram()
+        self.ttfb = LatencyHistogram()
+        self.total = LatencyHistogram()
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.errors = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connect": self.connect.get_stats(),
+            "ttfb": self.ttfb.get_stats(),
+            "total": self.total.get_stats(),
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "errors": self.errors
+        }
+
+
+class HttpSessionPool:
+    """
+    Sesiones aiohttp reutilizables por proveedor.
+
+    Cada proveedor tiene su propio TCPConnector (keep-alive + caché DNS) y un
+    TraceConfig que mide: tiempo de conexión (TCP+TLS, solo conexiones nuevas),
+    tiempo hasta el primer byte (cabeceras de respuesta) y tiempo total.
+    Las sesiones se crean bajo demanda y se cierran en el shutdown de FastAPI.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.metrics: Dict[str, _ProviderMetrics] = {}
+
+    def _trace_config(self, metrics: _ProviderMetrics) -> "aiohttp.TraceConfig":
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.start = time.perf_counter()
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_start = time.perf_counter()
+
+        async def on_connection_create_end(session, ctx, params):
+            metrics.connections_created += 1
+            metrics.connect.record(time.perf_counter() - ctx.connect_start)
+
+        async def on_connection_reuseconn(session, ctx, params):
+            metrics.connections_reused += 1
+
+        async def on_request_end(session, ctx, params):
+            # aiohttp emite on_request_end al recibir las cabeceras de la respuesta
+            metrics.ttfb.record(time.perf_counter() - ctx.start)
+
+        async def on_request_exception(session, ctx, params):
+            metrics.errors += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_start.append(on_connection_create_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        return trace
+
+    def get_session(self, provider: str) -> "aiohttp.ClientSession":
+        """Sesión del proveedor (se crea la primera vez, dentro del event loop)"""
+        session = self.sessions.get(provider)
+        if session is None or session.closed:
+            metrics = self.metrics.setdefault(provider, _ProviderMetrics())
+            connector = aiohttp.TCPConnector(
+                limit=ai_config.HTTP_POOL_LIMIT,
+                limit_per_host=ai_config.HTTP_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=ai_config.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=ai_config.HTTP_KEEPALIVE_TIMEOUT
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=ai_config.HTTP_TIMEOUT),
+                trace_configs=[self._trace_config(metrics)]
+            )
+            self.sessions[provider] = session
+            logger.info(f"🔌 Sesión HTTP creada para {provider}")
+        return session
+
+    async def request(self, provider: str, method: str, url: str, **kwargs) -> "aiohttp.ClientResponse":
+        """
+        Petición con la sesión del proveedor. El cuerpo se lee completo antes de
+        devolver la respuesta, así el tiempo total incluye la descarga.
+        """
+        metrics = self.metrics.setdefault(provider, _ProviderMetrics())
+        start = time.perf_counter()
+        async with self.get_session(provider).request(method, url, **kwargs) as response:
+            await response.read()
+        metrics.total.record(time.perf_counter() - start)
+        return response
+
+    def record_total(self, provider: str, seconds: float):
+        """Registrar el tiempo total de una petición hecha directamente con la sesión (p. ej. streaming)"""
+        self.metrics.setdefault(provider, _ProviderMetrics()).total.record(seconds)
+
+    async def close(self):
+        """Cerrar todas las sesiones (shutdown de la aplicación)"""
+        for provider, session in list(self.sessions.items()):
+            if not session.closed:
+                await session.close()
+        self.sessions.clear()
+        logger.info("🔌 Sesiones HTTP cerradas")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            provider: {**metrics.get_stats(), "open": provider in self.sessions}
+            for provider, metrics in self.metrics.items()
+        }
+
+# Instancia global
+http_pool = HttpSessionPool()
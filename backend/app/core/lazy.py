@@ -0,0 +1,48 @@
+# backend/app/core/lazy.py
+# Importación diferida de módulos pesados (pandas, MetaTrader5, aiohttp, requests)
+# El módulo real se importa al primer acceso a un atributo, no al importar la app
+
+import importlib
+import sys
+import threading
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule(ModuleType):
+    """
+    Sustituto de un módulo que lo importa en el primer acceso a un atributo.
+    Si otro código ya lo instaló en sys.modules (p. ej. el terminal MT5 falso
+    de los scripts) se usa ese.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_module"] is not None
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Módulo ya importado si lo está; si no, un LazyModule que lo importará al usarse"""
+    module: Optional[ModuleType] = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -1,11 +1,16 @@
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+import asyncio
 import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 from .config import settings
+from .utils import SingleFlight
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from ..database.db_connection import get_db
+from ..database.db_connection import SessionLocal, get_db
 from ..models.user_model import User
 
 
@@ -33,17 +38,76 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Obtener usuario actual desde el token JWT"""
-    credentials_exception = HTTPException(
+@dataclass(frozen=True)
+class Principal:
+    """Foto inmutable del usuario autenticado (lo que usan las rutas, sin sesión SQLAlchemy)"""
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    risk_level: str
+    confidence_threshold: float
+    default_lot_size: float
+    theme: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id, username=user.username, email=user.email, full_name=user.full_name,
+            is_active=user.is_active, risk_level=user.risk_level,
+            confidence_threshold=user.confidence_threshold,
+            default_lot_size=user.default_lot_size, theme=user.theme
+        )
+
+
+class PrincipalCache:
+    """
+    username -> Principal con TTL. Las rutas que modifican el usuario llaman a
+    invalidate(); el TTL acota el tiempo que un cambio hecho por otra vía
+    (otro proceso, consola) tarda en verse.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: Dict[str, Tuple[float, Principal]] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, username: str) -> Optional[Principal]:
+        entry = self.entries.get(username)
+        if entry is None or entry[0] < time.monotonic():
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def put(self, principal: Principal):
+        if len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[principal.username] = (time.monotonic() + self.ttl, principal)
+
+    def invalidate(self, username: str = None):
+        """Olvidar un usuario (o todos si no se indica)"""
+        self.stats["invalidations"] += 1
+        if username is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(username, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "entries": len(self.entries)}
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _token_username(credentials: HTTPAuthorizationCredentials) -> str:
+    """Validar el JWT (firma y expiración) y devolver su sujeto"""
     try:
         payload = jwt.decode(
             credentials.credentials, 
@@ -51,12 +115,48 @@ def get_current_user(
             algorithms=[settings.ALGORITHM]
         )
         username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
+        raise _credentials_exception()
+    if username is None:
+        raise _credentials_exception()
+    return username
+
+def _load_principal(username: str) -> Optional[Principal]:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        return Principal.from_user(user) if user else None
+    finally:
+        db.close()
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+    """
+    Usuario actual desde el token JWT. El token se valida en cada petición; el
+    usuario sale de principal_cache y solo se abre sesión (en un hilo) si no
+    está en caché. Para modificar el usuario usar get_current_user_model.
+    """
+    username = _token_username(credentials)
+    principal = principal_cache.get(username)
+    if principal is None:
+        principal = await _principal_loads.do(username, lambda: asyncio.to_thread(_load_principal, username))
+        if principal is None:
+            raise _credentials_exception()
+        principal_cache.put(principal)
+    return principal
+
+def get_current_user_model(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Usuario actual como modelo SQLAlchemy en la sesión de la petición (rutas que lo modifican)"""
+    username = _token_username(credentials)
     user = db.query(User).filter(User.username == username).first()
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+    return user
+
+# Instancia global
+principal_cache = PrincipalCache(settings.AUTH_PRINCIPAL_TTL)
+_principal_loads = SingleFlight("Autenticación")
@@ -0,0 +1,146 @@
+# backend/app/core/utils.py
+# Utilidades genéricas de concurrencia compartidas por los servicios
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional
+from .logger import logger
+from .ai_config import ai_config
+from .http_pool import LatencyHistogram
+
+# Cubos (ms) para etapas del pipeline: parseo y prompt duran microsegundos, el modelo segundos
+STAGE_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class RateBudget:
+    """
+    Token bucket asíncrono: permite `rate` peticiones por minuto con ráfagas
+    de hasta `burst`. En lugar de dormir un tiempo fijo entre llamadas, cada
+    petición espera solo lo necesario para que haya un token disponible.
+    """
+
+    def __init__(self, name: str, rate: float, burst: Optional[int] = None):
+        self.name = name
+        self.rate = rate / 60.0  # tokens por segundo
+        self.capacity = float(burst if burst is not None else max(1, int(rate // 10)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self.acquired = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Esperar hasta disponer de `tokens` y consumirlos. Devuelve los segundos esperados"""
+        waited = 0.0
+        # El lock mantiene el orden de llegada entre tareas que compiten por el mismo presupuesto
+        async with self._lock:
+            self._refill()
+            if self.tokens < tokens:
+                wait_time = (tokens - self.tokens) / self.rate
+                logger.info(f"⏳ Presupuesto {self.name}: esperando {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+                waited = wait_time
+                self._refill()
+            self.tokens -= tokens
+        self.waited += waited
+        self.acquired += 1
+        return waited
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "rate_per_minute": round(self.rate * 60.0, 2),
+            "burst": self.capacity,
+            "acquired": self.acquired,
+            "waited_seconds": round(self.waited, 2)
+        }
+
+
+class RateBudgetRegistry:
+    """Presupuestos de peticiones por proveedor (IA, noticias, ...)"""
+
+    def __init__(self, limits_per_minute: Dict[str, float], default_per_minute: float = 60.0):
+        self.limits = dict(limits_per_minute)
+        self.default_per_minute = default_per_minute
+        self.budgets: Dict[str, RateBudget] = {}
+
+    def get(self, provider: str) -> RateBudget:
+        budget = self.budgets.get(provider)
+        if budget is None:
+            budget = RateBudget(provider, self.limits.get(provider, self.default_per_minute))
+            self.budgets[provider] = budget
+        return budget
+
+    async def acquire(self, provider: str, tokens: float = 1.0) -> float:
+        return await self.get(provider).acquire(tokens)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        return {name: budget.get_stats() for name, budget in self.budgets.items()}
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave: la primera ejecuta la
+    corrutina y el resto espera el mismo resultado en lugar de repetir el trabajo.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["calls"] += 1
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            logger.info(f"🔗 {self.name}: petición {key} unida a la que ya está en curso")
+            # shield: si este llamante se cancela no se cancela el trabajo compartido
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(factory())
+        self.in_flight[key] = future
+        future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+
+class StageTimings:
+    """
+    Histogramas de duración por etapa del pipeline de decisión (datos, noticias,
+    indicadores, prompt, modelo, parseo, ejecución, guardado). Con varias
+    peticiones concurrentes cada etapa mide su tiempo de pared, esperas incluidas.
+    """
+
+    def __init__(self, buckets_ms=STAGE_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.stages: Dict[str, LatencyHistogram] = {}
+
+    def record(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram(self.buckets_ms)
+        histogram.record(seconds)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def reset(self):
+        self.stages = {}
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {stage: histogram.get_stats() for stage, histogram in self.stages.items()}
+
+
+# Instancia global
+rate_budgets = RateBudgetRegistry(ai_config.RATE_LIMITS_PER_MINUTE)
+pipeline_timings = StageTimings()
@@ -0,0 +1,101 @@
+# backend/app/database/bulk.py
+# Inserciones en bloque según el dialecto
+# - PostgreSQL con psycopg2 y lotes grandes: COPY ... FROM STDIN (CSV)
+# - Resto: un único executemany (SQLAlchemy lo agrupa en INSERT de varias filas)
+# Las inserciones Core no pasan por el flush del ORM: para Trade se recalcula
+# daily_performance aquí, en la misma transacción
+
+import csv
+import io
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import JSON, Table, insert
+from sqlalchemy.engine import Connection
+from ..core.config import settings
+from ..models.trade_model import Trade
+from .performance import refresh_rollups, rollup_keys
+
+
+def prepare_rows(table: Table, rows: Sequence[Dict[str, Any]]) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """
+    Completar las filas con los defaults de Python de la tabla (COPY no los
+    aplica) y dejar las mismas columnas en todas (executemany lo exige).
+    Una columna que solo falta en algunas filas queda a NULL en ellas.
+    """
+    defaults = {column.key: column.default for column in table.columns
+                if column.default is not None and not column.primary_key}
+    prepared = []
+    for row in rows:
+        values = dict(row)
+        for key, default in defaults.items():
+            if key in values:
+                continue
+            if default.is_scalar:
+                values[key] = default.arg
+            elif default.is_callable:
+                values[key] = default.arg(None)
+        prepared.append(values)
+
+    keys = {key for values in prepared for key in values}
+    unknown = keys - set(table.columns.keys())
+    if unknown:
+        raise ValueError(f"Columnas desconocidas para {table.name}: {sorted(unknown)}")
+    columns = [column for column in table.columns if column.key in keys]
+    for values in prepared:
+        for column in columns:
+            values.setdefault(column.key, None)
+    return columns, prepared
+
+
+def supports_copy(connection: Connection) -> bool:
+    return connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2"
+
+
+def _copy_value(column, value):
+    if value is None:
+        return r"\N"
+    if isinstance(column.type, JSON):
+        return json.dumps(value)
+    return value
+
+
+def _copy_rows(connection: Connection, table: Table, columns: List[Any], rows: List[Dict[str, Any]]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for values in rows:
+        writer.writerow([_copy_value(column, values[column.key]) for column in columns])
+    buffer.seek(0)
+
+    preparer = connection.dialect.identifier_preparer
+    names = ", ".join(preparer.quote(column.name) for column in columns)
+    statement = f"COPY {preparer.format_table(table)} ({names}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(statement, buffer)
+    finally:
+        cursor.close()
+
+
+def bulk_insert(connection: Connection, model, rows: Sequence[Dict[str, Any]],
+                copy_threshold: Optional[int] = None) -> int:
+    """
+    Insertar filas (dicts con las columnas del modelo) en una sola operación,
+    dentro de la transacción de la conexión (db.connection() en una sesión).
+    No devuelve ids: si se necesitan los objetos, insert(Model).returning(Model).
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    columns, prepared = prepare_rows(table, rows)
+    threshold = settings.DB_COPY_THRESHOLD if copy_threshold is None else copy_threshold
+    # COPY no evalúa defaults SQL (p. ej. func.now()) de las columnas omitidas: esas tablas van por executemany
+    sql_defaults = any(column.default is not None and column.default.is_clause_element and column not in columns
+                       for column in table.columns)
+    if supports_copy(connection) and len(prepared) >= threshold and not sql_defaults:
+        _copy_rows(connection, table, columns, prepared)
+    else:
+        connection.execute(insert(table), prepared)
+
+    if table is Trade.__table__:
+        refresh_rollups(connection, rollup_keys(prepared))
+    return len(prepared)
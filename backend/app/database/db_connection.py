@@ -1,22 +1,51 @@
 # database/db_connection.py - VERSIÓN CORREGIDA
 import os
-from sqlalchemy import create_engine, event
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from ..core.config import settings
 from ..core.logger import logger
 
-# Configuración SIMPLIFICADA y FUNCIONAL para SQLiteç
-
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+# Dialecto de la BD configurada ("sqlite" o "postgresql")
+DIALECT = make_url(SQLALCHEMY_DATABASE_URL).get_backend_name()
+IS_SQLITE = DIALECT == "sqlite"
+
+def engine_options(url: str) -> dict:
+    """
+    Opciones del engine según el dialecto:
+    - SQLite: conexión usable desde varios hilos y espera de 30 s por bloqueos
+    - PostgreSQL: pre-ping y reciclado de conexiones (el servidor puede
+      cerrarlas) y, con psycopg2, lotes también para UPDATE/DELETE con executemany
+    - Ambos: tamaño de pool configurable (salvo SQLite en memoria)
+    """
+    parsed = make_url(url)
+    options = {}
+    if parsed.get_backend_name() == "sqlite":
+        options["connect_args"] = {"timeout": 30}
+        if parsed.get_driver_name() == "pysqlite":
+            options["connect_args"]["check_same_thread"] = False
+    else:
+        options.update({"pool_pre_ping": True, "pool_recycle": settings.DB_POOL_RECYCLE})
+        if parsed.get_driver_name() == "psycopg2":
+            options["executemany_mode"] = "values_plus_batch"
+    if parsed.database not in (None, "", ":memory:"):
+        options.update({
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT
+        })
+    return options
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={
-        "check_same_thread": False,
-        "timeout": 30
-    },
-    echo=False  # Cambiar a True solo para debug
+    echo=False,  # Cambiar a True solo para debug
+    **engine_options(SQLALCHEMY_DATABASE_URL)
 )
 
 SessionLocal = sessionmaker(
@@ -41,13 +70,59 @@ def create_tables():
     """Crear todas las tablas en la base de datos"""
     try:
         Base.metadata.create_all(bind=engine)
+        ensure_columns()
+        ensure_indexes()
         logger.info("✅ Tablas de la base de datos creadas exitosamente")
     except Exception as e:
         logger.error(f"❌ Error creando tablas: {str(e)}")
         raise
 
-# Optimizaciones SQLite (OPCIONAL, puedes comentar temporalmente)
-@event.listens_for(engine, "connect")
+def check_schema() -> dict:
+    """Columnas declaradas en los modelos que faltan en las tablas existentes ({tabla: [columnas]})"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        columns = [column.name for column in table.columns if column.name not in existing]
+        if columns:
+            missing[table.name] = columns
+    return missing
+
+def ensure_columns():
+    """
+    Añadir a tablas ya existentes las columnas nuevas de los modelos (sin
+    migraciones, create_all no altera tablas). Solo columnas que ALTER TABLE
+    ADD COLUMN admite: anulables, sin clave primaria ni unique; el resto se avisa.
+    """
+    missing = check_schema()
+    for table_name, column_names in missing.items():
+        table = Base.metadata.tables[table_name]
+        for name in column_names:
+            column = table.columns[name]
+            if column.primary_key or column.unique or not column.nullable:
+                logger.warning(f"⚠️ Esquema: falta {table_name}.{name} y no se puede añadir sin migración")
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {name} {column_type}'))
+            logger.info(f"🧱 Esquema: añadida columna {table_name}.{name} ({column_type})")
+
+def ensure_indexes():
+    """
+    Crear los índices declarados en los modelos que falten en tablas ya existentes
+    (create_all solo crea índices al crear la tabla)
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo crear el índice {index.name}: {str(e)}")
+
+# Optimizaciones SQLite (solo con SQLite: PostgreSQL no tiene PRAGMA)
 def set_sqlite_pragma(dbapi_connection, connection_record):
     try:
         cursor = dbapi_connection.cursor()
@@ -56,4 +131,78 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor.execute("PRAGMA cache_size=-10000")
         cursor.close()
     except Exception as e:
-        logger.warning(f"⚠️ No se pudo optimizar SQLite: {str(e)}")
\ No newline at end of file
+        logger.warning(f"⚠️ No se pudo optimizar SQLite: {str(e)}")
+
+if IS_SQLITE:
+    event.listen(engine, "connect", set_sqlite_pragma)
+
+# --- Capa asíncrona (aiosqlite para SQLite, asyncpg para PostgreSQL) ---
+# Las corrutinas que consultan la BD no bloquean el event loop y la espera de
+# una conexión libre del pool también es asíncrona. El engine se crea en el
+# primer uso (no retrasa el arranque ni exige el driver si no se usa).
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+_async_engine = None
+_async_sessionmaker = None
+
+def to_async_url(url: str) -> str:
+    """URL del engine síncrono con el driver asíncrono equivalente"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"Sin driver asíncrono para {backend}")
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def get_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        url = to_async_url(SQLALCHEMY_DATABASE_URL)
+        options = engine_options(url)
+        if "pool_size" in options:
+            # aiosqlite usa NullPool por defecto: se fuerza un pool con tamaño fijo
+            options["poolclass"] = AsyncAdaptedQueuePool
+        _async_engine = create_async_engine(url, echo=False, **options)
+        if IS_SQLITE:
+            event.listen(_async_engine.sync_engine, "connect", set_sqlite_pragma)
+        # expire_on_commit=False: los objetos siguen legibles tras el commit sin
+        # volver a consultar (un acceso perezoso fuera del await fallaría)
+        _async_sessionmaker = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+        logger.info(f"🔌 Engine asíncrono de BD listo ({make_url(url).drivername}, "
+                    f"pool {options.get('pool_size', '-')}+{options.get('max_overflow', '-')})")
+    return _async_engine
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AsyncSession]:
+    """
+    Sesión asíncrona para servicios: commit al salir sin errores, rollback si
+    hay excepción y cierre siempre.
+
+        async with async_session_scope() as db:
+            db.add(obj)
+    """
+    get_async_engine()
+    session = _async_sessionmaker()
+    try:
+        yield session
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependencia FastAPI con sesión asíncrona (las rutas hacen commit explícito)"""
+    get_async_engine()
+    session = _async_sessionmaker()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+async def dispose_async_engine():
+    """Cerrar las conexiones del pool asíncrono (parada de la app)"""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_sessionmaker = None
@@ -0,0 +1,251 @@
+# backend/app/database/performance.py
+# Resúmenes diarios materializados (tabla daily_performance)
+# Se mantienen en cada flush que cierra o modifica una operación cerrada, y las
+# curvas de PnL/equity se responden desde ellos en O(días) en lugar de O(trades)
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+from ..core.logger import logger
+from ..models.trade_model import Trade, DailyPerformance
+from .db_connection import SessionLocal
+
+# Campos de Trade que afectan al resumen diario
+_TRACKED_FIELDS = ("user_id", "symbol", "status", "profit", "commission", "swap", "closed_at")
+
+RollupKey = Tuple[int, str, date]
+
+_trades = Trade.__table__
+_rollups = DailyPerformance.__table__
+# Día de una operación cerrada: el de cierre (o el de apertura si no tiene cierre)
+_trade_day = func.date(func.coalesce(_trades.c.closed_at, _trades.c.opened_at))
+
+
+def summarize_day(rows: Iterable[Tuple[Optional[float], Optional[float], Optional[float]]]) -> Dict[str, Any]:
+    """Resumen de las operaciones de un (usuario, símbolo, día) en orden de cierre"""
+    summary = {"trades": 0, "wins": 0, "losses": 0, "gross_profit": 0.0, "gross_loss": 0.0,
+               "commission": 0.0, "swap": 0.0, "net_profit": 0.0, "max_drawdown": 0.0}
+    peak = 0.0
+    for profit, commission, swap in rows:
+        profit, commission, swap = profit or 0.0, commission or 0.0, swap or 0.0
+        summary["trades"] += 1
+        if profit > 0:
+            summary["wins"] += 1
+            summary["gross_profit"] += profit
+        elif profit < 0:
+            summary["losses"] += 1
+            summary["gross_loss"] -= profit
+        summary["commission"] += commission
+        summary["swap"] += swap
+        summary["net_profit"] += profit + commission + swap
+        peak = max(peak, summary["net_profit"])
+        summary["max_drawdown"] = max(summary["max_drawdown"], peak - summary["net_profit"])
+    return summary
+
+
+def _as_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+
+def _rollup_key(values: Dict[str, Any], opened_at) -> Optional[RollupKey]:
+    if values.get("status") != "closed" or values.get("user_id") is None or not values.get("symbol"):
+        return None
+    day = _as_date(values.get("closed_at")) or _as_date(opened_at) or date.today()
+    return (values["user_id"], values["symbol"], day)
+
+
+def _affected_keys(session: Session) -> Set[RollupKey]:
+    """Claves (usuario, símbolo, día) antes y después de los cambios pendientes de flush"""
+    keys: Set[RollupKey] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Trade):
+            continue
+        state = inspect(obj)
+        current, previous, changed = {}, {}, False
+        for field in _TRACKED_FIELDS:
+            history = state.attrs[field].history
+            # getattr carga los campos expirados (p. ej. tras un commit)
+            value = getattr(obj, field)
+            current[field] = value
+            previous[field] = history.deleted[0] if history.deleted else value
+            changed = changed or history.has_changes()
+        if not changed and obj not in session.deleted:
+            continue
+
+        opened_at = obj.opened_at if obj not in session.new else state.dict.get("opened_at")
+        if obj not in session.deleted:
+            keys.add(_rollup_key(current, opened_at))
+        if obj not in session.new:
+            keys.add(_rollup_key(previous, opened_at))
+    keys.discard(None)
+    return keys
+
+
+def rollup_keys(rows: Iterable[Dict[str, Any]]) -> Set[RollupKey]:
+    """Claves (usuario, símbolo, día) de operaciones insertadas sin pasar por el ORM (inserción en bloque)"""
+    keys = {_rollup_key(values, values.get("opened_at")) for values in rows}
+    keys.discard(None)
+    return keys
+
+
+def refresh_rollups(connection, keys: Iterable[RollupKey]):
+    """Recalcular las filas de daily_performance de las claves dadas"""
+    for user_id, symbol, day in keys:
+        rows = connection.execute(
+            select(_trades.c.profit, _trades.c.commission, _trades.c.swap).where(
+                _trades.c.user_id == user_id,
+                _trades.c.symbol == symbol,
+                _trades.c.status == "closed",
+                _trade_day == day
+            ).order_by(func.coalesce(_trades.c.closed_at, _trades.c.opened_at), _trades.c.id)
+        ).all()
+        connection.execute(delete(_rollups).where(
+            _rollups.c.user_id == user_id, _rollups.c.symbol == symbol, _rollups.c.day == day
+        ))
+        if rows:
+            connection.execute(insert(_rollups).values(
+                user_id=user_id, symbol=symbol, day=day, updated_at=datetime.now(), **summarize_day(rows)
+            ))
+
+
+# Guardar el valor anterior al asignar estos campos aunque estuvieran expirados,
+# para poder recalcular también el (usuario, símbolo, día) de origen
+for _field in _TRACKED_FIELDS:
+    event.listen(getattr(Trade, _field), "set", lambda target, value, oldvalue, initiator: None,
+                 active_history=True)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _collect_rollup_keys(session: Session, flush_context, instances):
+    keys = _affected_keys(session)
+    if keys:
+        session.info.setdefault("rollup_keys", set()).update(keys)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _update_rollups_after_flush(session: Session, flush_context):
+    """Mantener daily_performance en la misma transacción que el cambio de la operación"""
+    keys = session.info.pop("rollup_keys", None)
+    if keys:
+        refresh_rollups(session.connection(), keys)
+
+
+def backfill_daily_performance(db: Session, user_id: Optional[int] = None, chunk: int = 5000) -> int:
+    """Reconstruir daily_performance desde trades (todas o las de un usuario). Devuelve filas creadas"""
+    rollup_filter = [_rollups.c.user_id == user_id] if user_id is not None else []
+    trade_filter = [_trades.c.user_id == user_id] if user_id is not None else []
+    connection = db.connection()
+    connection.execute(delete(_rollups).where(*rollup_filter))
+
+    day = _trade_day.label("day")
+    result = connection.execute(
+        select(_trades.c.user_id, _trades.c.symbol, day,
+               _trades.c.profit, _trades.c.commission, _trades.c.swap).where(
+            _trades.c.status == "closed", *trade_filter
+        ).order_by(_trades.c.user_id, _trades.c.symbol, day,
+                   func.coalesce(_trades.c.closed_at, _trades.c.opened_at), _trades.c.id),
+        execution_options={"yield_per": chunk}
+    )
+
+    created, pending, group, current_key = 0, [], [], None
+    now = datetime.now()
+
+    def flush_group():
+        user, symbol, day_value = current_key
+        pending.append({"user_id": user, "symbol": symbol, "day": date.fromisoformat(str(day_value)),
+                        "updated_at": now, **summarize_day(group)})
+
+    for row in result:
+        key = (row.user_id, row.symbol, row.day)
+        if key != current_key and group:
+            flush_group()
+            group = []
+            if len(pending) >= chunk:
+                connection.execute(insert(_rollups), pending)
+                created += len(pending)
+                pending = []
+        current_key = key
+        group.append((row.profit, row.commission, row.swap))
+    if group:
+        flush_group()
+    if pending:
+        connection.execute(insert(_rollups), pending)
+        created += len(pending)
+
+    db.commit()
+    logger.info(f"📊 daily_performance reconstruida: {created} filas")
+    return created
+
+
+def get_performance_curve(db: Session, user_id: int, start: Optional[date] = None, end: Optional[date] = None,
+                          symbol: Optional[str] = None, starting_balance: float = 0.0) -> Dict[str, Any]:
+    """
+    Curva diaria de PnL/equity entre `start` y `end` (incluidos) desde los resúmenes.
+    El drawdown de la curva se mide sobre el cierre de cada día; `max_intraday_drawdown`
+    es la mayor caída intradía registrada en un (símbolo, día).
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    filters = [DailyPerformance.user_id == user_id, DailyPerformance.day >= start, DailyPerformance.day <= end]
+    if symbol:
+        filters.append(DailyPerformance.symbol == symbol)
+
+    rows = db.query(
+        DailyPerformance.day,
+        func.sum(DailyPerformance.trades).label("trades"),
+        func.sum(DailyPerformance.wins).label("wins"),
+        func.sum(DailyPerformance.gross_profit).label("gross_profit"),
+        func.sum(DailyPerformance.gross_loss).label("gross_loss"),
+        func.sum(DailyPerformance.commission).label("commission"),
+        func.sum(DailyPerformance.swap).label("swap"),
+        func.sum(DailyPerformance.net_profit).label("net_profit"),
+        func.max(DailyPerformance.max_drawdown).label("max_intraday_drawdown")
+    ).filter(*filters).group_by(DailyPerformance.day).order_by(DailyPerformance.day).all()
+
+    points: List[Dict[str, Any]] = []
+    cumulative, peak, max_drawdown = 0.0, starting_balance, 0.0
+    totals = {"trades": 0, "wins": 0, "gross_profit": 0.0, "gross_loss": 0.0, "commission": 0.0, "swap": 0.0}
+    max_intraday = 0.0
+    for row in rows:
+        cumulative += row.net_profit or 0.0
+        equity = starting_balance + cumulative
+        peak = max(peak, equity)
+        drawdown = peak - equity
+        max_drawdown = max(max_drawdown, drawdown)
+        max_intraday = max(max_intraday, row.max_intraday_drawdown or 0.0)
+        for field in totals:
+            totals[field] += getattr(row, field) or 0
+        points.append({
+            "date": str(row.day),
+            "trades": row.trades,
+            "wins": row.wins,
+            "net_profit": round(row.net_profit or 0.0, 2),
+            "cumulative_pnl": round(cumulative, 2),
+            "equity": round(equity, 2),
+            "drawdown": round(drawdown, 2)
+        })
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "symbol": symbol,
+        "points": points,
+        "summary": {
+            "trades": totals["trades"],
+            "wins": totals["wins"],
+            "win_rate": round(totals["wins"] / totals["trades"] * 100, 2) if totals["trades"] else 0.0,
+            "gross_profit": round(totals["gross_profit"], 2),
+            "gross_loss": round(totals["gross_loss"], 2),
+            "profit_factor": round(totals["gross_profit"] / totals["gross_loss"], 2) if totals["gross_loss"] else None,
+            "commission": round(totals["commission"], 2),
+            "swap": round(totals["swap"], 2),
+            "net_profit": round(cumulative, 2),
+            "max_drawdown": round(max_drawdown, 2),
+            "max_intraday_drawdown": round(max_intraday, 2)
+        }
+    }
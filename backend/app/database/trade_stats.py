@@ -0,0 +1,87 @@
+# backend/app/database/trade_stats.py
+# Estadísticas de operaciones calculadas en SQL (SUM/COUNT/MAX/MIN con CASE)
+# Una sola consulta por endpoint en lugar de cargar todas las filas en Python;
+# se apoya en los índices (user_id, opened_at) y (user_id, status) de trades
+
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from ..models.trade_model import Trade
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_if(condition, column):
+    return func.coalesce(func.sum(case((condition, column), else_=0.0)), 0.0)
+
+
+def start_of_day(day: Optional[datetime] = None) -> datetime:
+    return datetime.combine((day or datetime.now()).date(), time.min)
+
+
+def get_trade_aggregates(db: Session, user_id: int, today_start: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Totales históricos y del día de un usuario en UNA consulta.
+    Las ganadoras son operaciones con profit > 0 (cualquier estado) y
+    `winning_closed`/`closed_profit` se limitan a las cerradas.
+    """
+    today_start = today_start or start_of_day()
+    is_today = Trade.opened_at >= today_start
+    is_closed = Trade.status == "closed"
+    is_winner = Trade.profit > 0
+
+    row = db.query(
+        func.count(Trade.id).label("total_trades"),
+        _count_if(Trade.status == "open").label("open_trades"),
+        _count_if(is_closed).label("closed_trades"),
+        _count_if(is_winner).label("winning_trades"),
+        _count_if(is_closed & is_winner).label("winning_closed"),
+        func.coalesce(func.sum(Trade.profit), 0.0).label("total_profit"),
+        _sum_if(is_closed, Trade.profit).label("closed_profit"),
+        _count_if(is_today).label("trades_today"),
+        _count_if(is_today & is_winner).label("winning_today"),
+        _sum_if(is_today, Trade.profit).label("profit_today"),
+        func.max(case((is_today, Trade.profit))).label("best_today"),
+        func.min(case((is_today, Trade.profit))).label("worst_today")
+    ).filter(Trade.user_id == user_id).one()
+
+    aggregates = dict(row._mapping)
+    aggregates["best_today"] = aggregates["best_today"] or 0.0
+    aggregates["worst_today"] = aggregates["worst_today"] or 0.0
+    return aggregates
+
+
+def get_daily_aggregates(db: Session, user_id: int, days: int = 30) -> List[Dict[str, Any]]:
+    """Operaciones, ganadoras y profit por día de apertura (últimos `days` días)"""
+    day = func.date(Trade.opened_at).label("day")
+    rows = db.query(
+        day,
+        func.count(Trade.id).label("trades"),
+        _count_if(Trade.profit > 0).label("winning_trades"),
+        func.coalesce(func.sum(Trade.profit), 0.0).label("profit"),
+        func.max(Trade.profit).label("best_trade"),
+        func.min(Trade.profit).label("worst_trade")
+    ).filter(
+        Trade.user_id == user_id,
+        Trade.opened_at >= start_of_day() - timedelta(days=days - 1)
+    ).group_by(day).order_by(day).all()
+
+    return [
+        {
+            "date": str(row.day),
+            "trades": row.trades,
+            "winning_trades": row.winning_trades,
+            "win_rate": round(row.winning_trades / row.trades * 100, 2) if row.trades else 0.0,
+            "profit": round(row.profit, 2),
+            "best_trade": row.best_trade or 0.0,
+            "worst_trade": row.worst_trade or 0.0
+        }
+        for row in rows
+    ]
+
+
+def win_rate(winners: int, total: int) -> float:
+    return round(winners / total * 100, 2) if total else 0.0
@@ -1,21 +1,58 @@
 #backend/app/main.py
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from .database.db_connection import create_tables
-from .api import routes_auth, routes_bot, routes_trades, routes_config, routes_dashboard, routes_mt5, routes_ai, routes_news 
+from .database.db_connection import create_tables, dispose_async_engine
+from .database import performance  # noqa: F401  (registra el mantenimiento de daily_performance)
+from .api import routes_auth, routes_bot, routes_trades, routes_config, routes_dashboard, routes_mt5, routes_ai, routes_news, routes_ws
 from .core.config import settings
+from .core.http_pool import http_pool
+from .services.portfolio_snapshot import portfolio_snapshots
+from .services.mt5_executor import mt5_executor
+from .services.price_stream import price_stream
+from .services.market_recorder import market_recorder
+from .services.bot_supervisor import bot_supervisor
+from .services.write_buffer import write_buffer
+from .core.logger import logger
 from app.api.routes_bot import router as bot_router
 
 
-# Crear tablas al iniciar
-create_tables()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque: crear tablas y columnas/índices que falten, arrancar los pollers
+    y la escritura diferida del historial (las sesiones HTTP se crean bajo
+    demanda dentro del event loop).
+    Parada: parar los bots, escribir el historial pendiente, cerrar conexiones
+    keep-alive y el pool asíncrono de BD, parar los pollers (portfolio,
+    precios, grabación) y el hilo MT5.
+    """
+    await asyncio.to_thread(create_tables)
+    write_buffer.start()
+    portfolio_snapshots.start()
+    if settings.MARKET_RECORDER_ENABLED:
+        market_recorder.start()
+    logger.info("🚀 Backend iniciado - pool HTTP listo")
+    try:
+        yield
+    finally:
+        await bot_supervisor.stop_all()
+        await write_buffer.stop()
+        await portfolio_snapshots.stop()
+        await price_stream.stop()
+        await market_recorder.stop()
+        await http_pool.close()
+        await dispose_async_engine()
+        mt5_executor.stop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Backend para aplicación de escritorio de Trading Bot con IA",
     version=settings.APP_VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configuración CORS para app de escritorio
@@ -37,6 +74,7 @@ app.include_router(routes_dashboard.router, prefix="/api/dashboard", tags=["dash
 app.include_router(routes_mt5.router, prefix="/api/mt5", tags=["mt5"])
 app.include_router(routes_ai.router, prefix="/api/ai", tags=["ai"])
 app.include_router(routes_news.router, prefix="/api/news", tags=["news"]) 
+app.include_router(routes_ws.router, tags=["websocket"])
 
 @app.get("/")
 async def root():
@@ -1,17 +1,19 @@
 # backend/app/models/__init__.py - ACTUALIZAR
 from .user_model import User, UserConfig
-from .trade_model import Trade
+from .trade_model import Trade, DailyPerformance
 from .config_model import BotConfig
-from .ai_config_model import UserAIConfig, AIAnalysisHistory
+from .ai_config_model import UserAIConfig, AIAnalysisHistory, AIResponseCacheEntry
 from .news_model import MarketNews, NewsAnalysisHistory  # ✅ AÑADIR
 
 __all__ = [
     "User",
     "UserConfig", 
     "Trade",
+    "DailyPerformance",
     "BotConfig",
     "UserAIConfig",
     "AIAnalysisHistory",
+    "AIResponseCacheEntry",
     "MarketNews",           # ✅ AÑADIR
     "NewsAnalysisHistory"   # ✅ AÑADIR
 ]
\ No newline at end of file
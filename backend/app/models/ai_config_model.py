@@ -38,8 +38,24 @@ class AIAnalysisHistory(Base):
     ai_provider = Column(String)
     ai_model = Column(String)
     signal = Column(String)  # BUY, SELL, HOLD
+    executed_signal = Column(String)  # Orden enviada por el bot (puede diferir de signal si se ejecutó con la decisión anticipada)
     confidence = Column(Float)
     reasoning = Column(Text)
     processing_time = Column(Float)
     tokens_used = Column(Integer)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class AIResponseCacheEntry(Base):
+    __tablename__ = "ai_response_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)  # sha256 de las entradas cuantizadas
+    symbol = Column(String, index=True)
+    ai_provider = Column(String)
+    ai_model = Column(String)
+    response = Column(Text)  # Resultado parseado en JSON
+    tokens_used = Column(Integer, default=0)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=func.now())
+    last_hit_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from ..database.db_connection import Base
 
@@ -42,6 +42,12 @@ class Trade(Base):
     comment = Column(String)
     commission = Column(Float, default=0.0)
     swap = Column(Float, default=0.0)
+    
+    # Índices compuestos para las estadísticas por usuario (rango de fechas y estado)
+    __table_args__ = (
+        Index("ix_trades_user_opened_at", "user_id", "opened_at"),
+        Index("ix_trades_user_status", "user_id", "status"),
+    )
 
 class TradeAnalysis(Base):
     __tablename__ = "trade_analysis"
@@ -63,4 +69,30 @@ class TradeAnalysis(Base):
     
     # Timestamp
     analyzed_at = Column(DateTime(timezone=True), server_default=func.now())
-    analysis_data = Column(Text)  # JSON con datos completos del análisis
\ No newline at end of file
+    analysis_data = Column(Text)  # JSON con datos completos del análisis
+
+class DailyPerformance(Base):
+    """Resumen diario por usuario y símbolo de las operaciones CERRADAS (día de cierre)"""
+    __tablename__ = "daily_performance"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    symbol = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+    
+    trades = Column(Integer, default=0)
+    wins = Column(Integer, default=0)
+    losses = Column(Integer, default=0)
+    gross_profit = Column(Float, default=0.0)   # Suma de operaciones con profit > 0
+    gross_loss = Column(Float, default=0.0)     # Valor absoluto de la suma de pérdidas
+    commission = Column(Float, default=0.0)
+    swap = Column(Float, default=0.0)
+    net_profit = Column(Float, default=0.0)     # gross_profit - gross_loss + commission + swap
+    max_drawdown = Column(Float, default=0.0)   # Mayor caída intradía del PnL acumulado
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "symbol", "day", name="uq_daily_performance_user_symbol_day"),
+        Index("ix_daily_performance_user_day", "user_id", "day"),
+    )
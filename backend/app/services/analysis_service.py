@@ -4,160 +4,186 @@
 #// Cómo se deciden ajustes de SL/TP dinámicos
 
 import asyncio
-import pandas as pd
 import numpy as np
 from datetime import datetime
 from typing import Dict, List, Any, Optional
+from ..core.lazy import lazy_import
 from ..core.logger import logger
+from ..core.utils import SingleFlight, pipeline_timings
+from ..core.ai_config import ai_config as ai_config_settings
 from ..ai.ai_interface import ai_interface
 from ..models.ai_config_model import UserAIConfig, AIAnalysisHistory
 from ..database.db_connection import get_db
 from sqlalchemy.orm import Session
 from .data_fetcher import data_fetcher
-import MetaTrader5 as mt5
+from .mt5_executor import mt5_executor, PRIORITY_MARKET
 from .intelligent_news_service import intelligent_news_service
+from .indicator_engine import indicator_engine
+from .indicators import format_indicators
+from .write_buffer import write_buffer
+
+pd = lazy_import("pandas")
+mt5 = lazy_import("MetaTrader5")
 
 class AnalysisService:
     def __init__(self):
         self.active_analyses = {}
-        self.analysis_lock = asyncio.Lock()
+        # Sin lock global: se agrupan peticiones idénticas, MT5 tiene su propio lock
+        # (hilo único de mt5_executor) y las llamadas IA su límite de concurrencia
+        self.single_flight = SingleFlight("Análisis")
+        
+        # Motor incremental de indicadores
+        self.indicator_bars = 200          # Historia para la carga inicial
+        self.incremental_fetch_bars = 10   # Velas pedidas con el estado caliente
+        self.verify_indicators = False     # Comparar contra pandas en cada cálculo
+        self.verify_tolerance = 0.0
+        self.verification_stats = {"checks": 0, "mismatches": 0}
     
     async def analyze_symbol(self, symbol: str, user_id: int, analysis_type: str = "comprehensive") -> Dict[str, Any]:
-        """Analizar símbolo con manejo SEGURO de sesiones"""
-        async with self.analysis_lock:  # 🔒 ANÁLISIS SECUENCIAL, NO PARALELO
+        """
+        Analizar símbolo. Peticiones concurrentes para el mismo (símbolo, usuario, tipo)
+        comparten un único análisis en curso en lugar de repetirlo.
+        """
+        return await self.single_flight.do(
+            (symbol, user_id, analysis_type),
+            lambda: self._analyze_symbol(symbol, user_id, analysis_type)
+        )
+    
+    async def _analyze_symbol(self, symbol: str, user_id: int, analysis_type: str) -> Dict[str, Any]:
+        """Pipeline de análisis con manejo SEGURO de sesiones (sin lock global)"""
+        try:
+            logger.info(f"🔍 Iniciando análisis para {symbol} - Usuario: {user_id}")
+            
+            # ✅ OBTENER CONFIGURACIÓN IA (sesión separada y CERRADA)
+            db_config = next(get_db())
             try:
-                logger.info(f"🔍 Iniciando análisis para {symbol} - Usuario: {user_id}")
-                
-                # ✅ OBTENER CONFIGURACIÓN IA (sesión separada y CERRADA)
-                db_config = next(get_db())
-                try:
-                    ai_config = db_config.query(UserAIConfig).filter(UserAIConfig.user_id == user_id).first()
-                    if not ai_config or not ai_config.is_active:
-                        return {
-                            "success": False,
-                            "error": "Configuración de IA no encontrada o inactiva",
-                            "symbol": symbol,
-                            "signal": "HOLD",
-                            "confidence": 0.0
-                        }
-                finally:
-                    db_config.close()  # ✅ CERRAR SESIÓN INMEDIATAMENTE
-                
-                # ✅ OBTENER DATOS MERCADO (sin sesión BD)
-                market_data = await self._get_real_market_data(symbol)
-                if not market_data:
+                ai_config = db_config.query(UserAIConfig).filter(UserAIConfig.user_id == user_id).first()
+                if not ai_config or not ai_config.is_active:
                     return {
                         "success": False,
-                        "error": f"No se pudieron obtener datos de {symbol} desde MT5",
+                        "error": "Configuración de IA no encontrada o inactiva",
                         "symbol": symbol,
                         "signal": "HOLD",
                         "confidence": 0.0
                     }
-                
-                # ✅ CALCULAR INDICADORES (sin sesión BD)
+            finally:
+                db_config.close()  # ✅ CERRAR SESIÓN INMEDIATAMENTE
+            
+            # ✅ OBTENER DATOS MERCADO (sin sesión BD)
+            with pipeline_timings.measure("fetch"):
                 market_data = await self._get_real_market_data(symbol)
-                if not market_data:
-                    return {"success": False, "error": f"Sin datos de {symbol}", "signal": "HOLD"}
-                
-                # 3. ✅ NUEVO: Obtener noticias inteligentes
-                news_context = await intelligent_news_service.get_news_for_analysis(symbol, user_id)
-                logger.info(f"📰 Contexto de noticias: {news_context['news_count']} noticias, sentimiento: {news_context['overall_sentiment']}")
-                
-                # 4. Calcular indicadores técnicos
-                technical_indicators = self._calculate_real_technical_indicators(symbol)
-                
-                # ✅ ANÁLISIS IA
-                ai_config_dict = {
-                    "provider": ai_config.ai_provider,
-                    "api_key": ai_config.api_key,
-                    "model": ai_config.ai_model,
-                    "analysis_type": analysis_type,
-                    "risk_profile": "moderate"
-                }
-                
-                analysis_result = await ai_interface.analyze_market(
-                    symbol=symbol,
-                    user_id=user_id,
-                    market_data=market_data,
-                    technical_indicators=technical_indicators,
-                    news=news_context,  # ← Ahora pasa el contexto completo de noticias
-                    ai_config=ai_config_dict
-                )
-                
-                # ✅ GUARDAR RESULTADOS (sesión separada y CERRADA)
-                db_save = next(get_db())
-                try:
-                    analysis_history = AIAnalysisHistory(
-                        user_id=user_id,
-                        symbol=symbol,
-                        timeframe="M5",
-                        analysis_type=analysis_type,
-                        ai_provider=ai_config.ai_provider,
-                        ai_model=ai_config.ai_model,
-                        signal=analysis_result.get("signal", "HOLD"),
-                        confidence=analysis_result.get("confidence", 0.0),
-                        reasoning=analysis_result.get("reasoning", ""),
-                        processing_time=0.0
-                    )
-                    
-                    db_save.add(analysis_history)
-                    
-                    # Actualizar contador de requests
-                    ai_config_update = db_save.query(UserAIConfig).filter(UserAIConfig.user_id == user_id).first()
-                    if ai_config_update:
-                        ai_config_update.total_requests += 1
-                        ai_config_update.last_used = datetime.now()
-                    
-                    db_save.commit()
-                    
-                finally:
-                    db_save.close()  # ✅ CERRAR SESIÓN INMEDIATAMENTE
-                
-                logger.info(f"✅ Análisis completado - {symbol} | Señal: {analysis_result.get('signal')}")
-                
-                return {
-                    "success": True,
-                    "symbol": symbol,
-                    "signal": analysis_result.get("signal", "HOLD"),
-                    "confidence": analysis_result.get("confidence", 0.0),
-                    "reasoning": analysis_result.get("reasoning", ""),
-                    "news_used": news_context.get("news_count", 0),
-                    "market_sentiment": news_context.get("overall_sentiment", "neutral"),
-                    "processing_time": 0.0
-                }
-                
-            except Exception as e:
-                logger.error(f"❌ Error crítico en análisis de {symbol}: {str(e)}")
+            if not market_data:
                 return {
                     "success": False,
-                    "error": str(e),
+                    "error": f"No se pudieron obtener datos de {symbol} desde MT5",
                     "symbol": symbol,
                     "signal": "HOLD",
                     "confidence": 0.0
                 }
+            
+            # 3. ✅ NUEVO: Obtener noticias inteligentes
+            with pipeline_timings.measure("news"):
+                news_context = await intelligent_news_service.get_news_for_analysis(symbol, user_id)
+            logger.info(f"📰 Contexto de noticias: {news_context['news_count']} noticias, sentimiento: {news_context['overall_sentiment']}")
+            
+            # 4. Calcular indicadores técnicos (MT5 fuera del event loop)
+            with pipeline_timings.measure("indicators"):
+                technical_indicators = await asyncio.to_thread(self._calculate_real_technical_indicators, symbol)
+            
+            # ✅ ANÁLISIS IA
+            ai_config_dict = {
+                "provider": ai_config.ai_provider,
+                "api_key": ai_config.api_key,
+                "model": ai_config.ai_model,
+                "analysis_type": analysis_type,
+                "risk_profile": "moderate"
+            }
+            
+            analysis_result = await ai_interface.analyze_market(
+                symbol=symbol,
+                user_id=user_id,
+                market_data=market_data,
+                technical_indicators=technical_indicators,
+                news=news_context,  # ← Ahora pasa el contexto completo de noticias
+                ai_config=ai_config_dict
+            )
+            
+            # ✅ GUARDAR RESULTADOS (escritura diferida, no espera a la BD)
+            with pipeline_timings.measure("save"):
+                self._save_analysis(user_id, symbol, analysis_type, ai_config, analysis_result)
+            
+            logger.info(f"✅ Análisis completado - {symbol} | Señal: {analysis_result.get('signal')}")
+            
+            return self._build_result(symbol, analysis_result, news_context)
+            
+        except Exception as e:
+            logger.error(f"❌ Error crítico en análisis de {symbol}: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "symbol": symbol,
+                "signal": "HOLD",
+                "confidence": 0.0
+            }
+
+    def _save_analysis(self, user_id: int, symbol: str, analysis_type: str, ai_config: UserAIConfig,
+                       analysis_result: Dict[str, Any]):
+        """Encolar el análisis en el historial y el contador de requests (escritura diferida por lotes)"""
+        write_buffer.add(AIAnalysisHistory, {
+            "user_id": user_id,
+            "symbol": symbol,
+            "timeframe": "M5",
+            "analysis_type": analysis_type,
+            "ai_provider": ai_config.ai_provider,
+            "ai_model": ai_config.ai_model,
+            "signal": analysis_result.get("signal", "HOLD"),
+            "confidence": analysis_result.get("confidence", 0.0),
+            "reasoning": analysis_result.get("reasoning", ""),
+            "ai_response": analysis_result.get("raw_response"),
+            "processing_time": analysis_result.get("processing_time", 0.0),
+            "tokens_used": analysis_result.get("tokens_used", 0)
+        })
+        
+        # Actualizar contador de requests
+        write_buffer.increment(UserAIConfig, {"user_id": user_id}, {"total_requests": 1},
+                               {"last_used": datetime.now()})
     
+    def _build_result(self, symbol: str, analysis_result: Dict[str, Any], news_context: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "symbol": symbol,
+            "signal": analysis_result.get("signal", "HOLD"),
+            "confidence": analysis_result.get("confidence", 0.0),
+            "reasoning": analysis_result.get("reasoning", ""),
+            "news_used": news_context.get("news_count", 0),
+            "market_sentiment": news_context.get("overall_sentiment", "neutral"),
+            "processing_time": 0.0
+        }
+
     async def analyze_multiple_symbols(self, symbols: List[str], user_id: int, 
                                      analysis_type: str = "technical") -> Dict[str, Any]:
-        """Analizar múltiples símbolos de forma SECUENCIAL"""
+        """Analizar múltiples símbolos de forma concurrente (por lotes si está activo)"""
         try:
-            results = []
+            if ai_config_settings.BATCH_ENABLED and len(symbols) > 1:
+                outcomes = await self._analyze_batch(symbols, user_id, analysis_type)
+            else:
+                # Análisis concurrente: el límite lo ponen la concurrencia IA y los presupuestos por proveedor
+                outcomes = await asyncio.gather(
+                    *(self.analyze_symbol(symbol, user_id, analysis_type) for symbol in symbols),
+                    return_exceptions=True
+                )
             
-            # 🔄 ANÁLISIS SECUENCIAL - NO PARALELO
-            for symbol in symbols:
-                try:
-                    result = await self.analyze_symbol(symbol, user_id, analysis_type)
-                    results.append(result)
-                    
-                    # ⏸️ PEQUEÑA PAUSA ENTRE SÍMBOLOS
-                    await asyncio.sleep(1)
-                    
-                except Exception as e:
-                    logger.error(f"❌ Error analizando {symbol}: {str(e)}")
+            results = []
+            for symbol, outcome in zip(symbols, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"❌ Error analizando {symbol}: {str(outcome)}")
                     results.append({
                         "success": False,
                         "symbol": symbol,
-                        "error": str(e)
+                        "error": str(outcome)
                     })
+                else:
+                    results.append(outcome)
             
             # Procesar resultados
             successful_analyses = [r for r in results if r.get("success")]
@@ -181,8 +207,88 @@ class AnalysisService:
                 "error": str(e)
             }
         
+    async def _analyze_batch(self, symbols: List[str], user_id: int, analysis_type: str) -> List[Any]:
+        """
+        Reunir datos, noticias e indicadores de todos los símbolos en paralelo y
+        enviarlos a la IA en lotes (un preámbulo y una llamada por lote)
+        """
+        db_config = next(get_db())
+        try:
+            ai_config = db_config.query(UserAIConfig).filter(UserAIConfig.user_id == user_id).first()
+        finally:
+            db_config.close()
+        if not ai_config or not ai_config.is_active:
+            return [{
+                "success": False,
+                "error": "Configuración de IA no encontrada o inactiva",
+                "symbol": symbol,
+                "signal": "HOLD",
+                "confidence": 0.0
+            } for symbol in symbols]
+        
+        inputs = await asyncio.gather(
+            *(self._collect_inputs(symbol, user_id) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        items = []
+        outcomes: Dict[str, Any] = {}
+        for symbol, collected in zip(symbols, inputs):
+            if isinstance(collected, Exception):
+                outcomes[symbol] = collected
+            elif collected is None:
+                outcomes[symbol] = {
+                    "success": False,
+                    "error": f"No se pudieron obtener datos de {symbol} desde MT5",
+                    "symbol": symbol,
+                    "signal": "HOLD",
+                    "confidence": 0.0
+                }
+            else:
+                items.append(collected)
+        
+        ai_config_dict = {
+            "provider": ai_config.ai_provider,
+            "api_key": ai_config.api_key,
+            "model": ai_config.ai_model,
+            "analysis_type": analysis_type,
+            "risk_profile": "moderate"
+        }
+        batch_results = await ai_interface.analyze_market_batch(user_id, items, ai_config_dict) if items else {}
+        
+        for item in items:
+            symbol = item["symbol"]
+            analysis_result = batch_results.get(symbol) or ai_interface._get_error_response("Sin respuesta de IA")
+            try:
+                self._save_analysis(user_id, symbol, analysis_type, ai_config, analysis_result)
+                outcomes[symbol] = self._build_result(symbol, analysis_result, item["news"])
+            except Exception as e:
+                outcomes[symbol] = e
+        
+        return [outcomes[symbol] for symbol in symbols]
+    
+    async def _collect_inputs(self, symbol: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """Datos de mercado, noticias e indicadores de un símbolo (None si MT5 no tiene datos)"""
+        market_data = await self._get_real_market_data(symbol)
+        if not market_data:
+            return None
+        news_context, technical_indicators = await asyncio.gather(
+            intelligent_news_service.get_news_for_analysis(symbol, user_id),
+            asyncio.to_thread(self._calculate_real_technical_indicators, symbol)
+        )
+        return {
+            "symbol": symbol,
+            "market_data": market_data,
+            "technical_indicators": technical_indicators,
+            "news": news_context
+        }
+        
     async def _get_real_market_data(self, symbol: str) -> Optional[Dict[str, Any]]:
-        """Obtener datos reales de mercado desde MT5"""
+        """Obtener datos reales de mercado desde MT5 (en el hilo MT5, sin bloquear el event loop)"""
+        return await mt5_executor.run(PRIORITY_MARKET, self._read_market_data, symbol, name="read_market_data")
+    
+    def _read_market_data(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Lectura síncrona de MT5 (se ejecuta entera en el hilo de mt5_executor)"""
         try:
             # Verificar conexión MT5
             if not data_fetcher.connected:
@@ -190,7 +296,7 @@ class AnalysisService:
                 return None
             
             # Verificar que el símbolo existe
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = data_fetcher.get_symbol_info(symbol)
             if symbol_info is None:
                 logger.error(f"Símbolo {symbol} no encontrado en MT5")
                 return None
@@ -244,52 +350,37 @@ class AnalysisService:
             logger.error(f"Error obteniendo datos reales para {symbol}: {str(e)}")
             return None
     
+    def get_technical_indicators(self, symbol: str) -> Dict[str, Any]:
+        """Indicadores M5 del símbolo - punto de entrada común para todos los servicios"""
+        return self._calculate_real_technical_indicators(symbol)
+    
     def _calculate_real_technical_indicators(self, symbol: str) -> Dict[str, Any]:
-        """Calcular indicadores técnicos reales desde MT5"""
+        """Calcular indicadores técnicos reales desde MT5 (motor incremental)"""
         try:
-            # Obtener datos históricos
-            data = data_fetcher.get_market_data(symbol, mt5.TIMEFRAME_M5, 200)
+            timeframe = mt5.TIMEFRAME_M5
+            
+            # Con el estado caliente solo hacen falta las velas nuevas
+            warm = indicator_engine.is_warm(symbol, timeframe) and not self.verify_indicators
+            count = self.incremental_fetch_bars if warm else self.indicator_bars
+            
+            data = data_fetcher.get_market_data(symbol, timeframe, count)
             if data is None or data.empty:
                 logger.warning(f"No hay datos suficientes para calcular indicadores de {symbol}")
                 return self._get_fallback_indicators()
             
-            closes = data['close']
-            highs = data['high']
-            lows = data['low']
-            
-            # Calcular RSI
-            rsi = self._calculate_rsi(closes, 14)
-            
-            # Calcular MACD
-            macd_line, signal_line, macd_histogram = self._calculate_macd(closes)
-            
-            # Medias móviles
-            ma_20 = closes.rolling(20).mean().iloc[-1]
-            ma_50 = closes.rolling(50).mean().iloc[-1]
-            ma_200 = closes.rolling(200).mean().iloc[-1]
-            
-            # Soporte y resistencia
-            support = lows.tail(20).min()
-            resistance = highs.tail(20).max()
-            
-            # Bollinger Bands
-            bb_upper, bb_lower = self._calculate_bollinger_bands(closes, 20)
-            
-            # Stochastic
-            stochastic = self._calculate_stochastic(highs, lows, closes, 14)
-            
-            indicators = {
-                "rsi": round(rsi, 2) if not pd.isna(rsi) else 50.0,
-                "macd": round(macd_histogram, 6) if not pd.isna(macd_histogram) else 0.0,
-                "ma_20": round(ma_20, 5) if not pd.isna(ma_20) else closes.iloc[-1],
-                "ma_50": round(ma_50, 5) if not pd.isna(ma_50) else closes.iloc[-1],
-                "ma_200": round(ma_200, 5) if not pd.isna(ma_200) else closes.iloc[-1],
-                "support": round(support, 5) if not pd.isna(support) else closes.iloc[-1] * 0.99,
-                "resistance": round(resistance, 5) if not pd.isna(resistance) else closes.iloc[-1] * 1.01,
-                "bollinger_upper": round(bb_upper, 5) if not pd.isna(bb_upper) else closes.iloc[-1] * 1.02,
-                "bollinger_lower": round(bb_lower, 5) if not pd.isna(bb_lower) else closes.iloc[-1] * 0.98,
-                "stochastic": round(stochastic, 2) if not pd.isna(stochastic) else 50.0
-            }
+            raw = self._update_indicator_engine(symbol, timeframe, data)
+            if raw is None:
+                # Hueco de velas desde la última actualización: recarga completa
+                data = data_fetcher.get_market_data(symbol, timeframe, self.indicator_bars)
+                if data is None or data.empty:
+                    return self._get_fallback_indicators()
+                raw = self._update_indicator_engine(symbol, timeframe, data)
+            
+            indicators = format_indicators(raw)
+            
+            if self.verify_indicators:
+                reference = self._calculate_pandas_indicators(data)
+                self._compare_indicators(symbol, indicators, reference)
             
             logger.info(f"📈 Indicadores calculados para {symbol}: RSI {indicators['rsi']}, MACD {indicators['macd']}")
             return indicators
@@ -298,6 +389,76 @@ class AnalysisService:
             logger.error(f"Error calculando indicadores para {symbol}: {str(e)}")
             return self._get_fallback_indicators()
     
+    def _update_indicator_engine(self, symbol: str, timeframe: int, data: "pd.DataFrame") -> Optional[Dict[str, float]]:
+        """Pasar las velas de MT5 al motor incremental"""
+        times = data['time'].values.astype('datetime64[s]').astype('int64')
+        return indicator_engine.update(
+            symbol, timeframe, times,
+            data['high'].values, data['low'].values, data['close'].values
+        )
+    
+    def _calculate_pandas_indicators(self, data: "pd.DataFrame") -> Dict[str, Any]:
+        """Cálculo de referencia con pandas (recalcula toda la ventana)"""
+        closes = data['close']
+        highs = data['high']
+        lows = data['low']
+        
+        # Calcular RSI
+        rsi = self._calculate_rsi(closes, 14)
+        
+        # Calcular MACD
+        macd_line, signal_line, macd_histogram = self._calculate_macd(closes)
+        
+        # Medias móviles
+        ma_20 = closes.rolling(20).mean().iloc[-1]
+        ma_50 = closes.rolling(50).mean().iloc[-1]
+        ma_200 = closes.rolling(200).mean().iloc[-1]
+        
+        # Soporte y resistencia
+        support = lows.tail(20).min()
+        resistance = highs.tail(20).max()
+        
+        # Bollinger Bands
+        bb_upper, bb_lower = self._calculate_bollinger_bands(closes, 20)
+        
+        # Stochastic
+        stochastic = self._calculate_stochastic(highs, lows, closes, 14)
+        
+        return {
+            "rsi": round(rsi, 2) if not pd.isna(rsi) else 50.0,
+            "macd": round(macd_histogram, 6) if not pd.isna(macd_histogram) else 0.0,
+            "ma_20": round(ma_20, 5) if not pd.isna(ma_20) else closes.iloc[-1],
+            "ma_50": round(ma_50, 5) if not pd.isna(ma_50) else closes.iloc[-1],
+            "ma_200": round(ma_200, 5) if not pd.isna(ma_200) else closes.iloc[-1],
+            "support": round(support, 5) if not pd.isna(support) else closes.iloc[-1] * 0.99,
+            "resistance": round(resistance, 5) if not pd.isna(resistance) else closes.iloc[-1] * 1.01,
+            "bollinger_upper": round(bb_upper, 5) if not pd.isna(bb_upper) else closes.iloc[-1] * 1.02,
+            "bollinger_lower": round(bb_lower, 5) if not pd.isna(bb_lower) else closes.iloc[-1] * 0.98,
+            "stochastic": round(stochastic, 2) if not pd.isna(stochastic) else 50.0
+        }
+    
+    def _compare_indicators(self, symbol: str, incremental: Dict[str, Any], reference: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Modo verificación: comparar motor incremental vs pandas campo a campo.
+        
+        Con tolerancia 0 se exige igualdad exacta tras el redondeo. Ojo con el
+        MACD: el motor conserva la EMA desde el inicio del historial mientras que
+        pandas la reinicia en cada ventana de 200 velas, así que puede diferir
+        en el último decimal.
+        """
+        diffs = {
+            key: abs(float(incremental[key]) - float(reference[key]))
+            for key in reference
+        }
+        mismatches = {key: diff for key, diff in diffs.items() if diff > self.verify_tolerance}
+        
+        self.verification_stats["checks"] += 1
+        if mismatches:
+            self.verification_stats["mismatches"] += 1
+            logger.warning(f"⚠️ Indicadores {symbol} difieren de pandas: {mismatches}")
+        
+        return diffs
+    
     async def _get_market_news(self, symbol: str, market_data: Dict[str, Any], technical_indicators: Dict[str, Any]) -> List[str]:
         """Obtener contexto de mercado basado en datos técnicos"""
         try:
@@ -352,7 +513,7 @@ class AnalysisService:
             logger.error(f"Error generando contexto de mercado: {str(e)}")
             return ["Contexto de mercado no disponible temporalmente"]
     
-    def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> float:
+    def _calculate_rsi(self, prices: "pd.Series", period: int = 14) -> float:
         """Calcular RSI"""
         try:
             delta = prices.diff()
@@ -364,7 +525,7 @@ class AnalysisService:
         except:
             return 50.0
     
-    def _calculate_macd(self, prices: pd.Series) -> tuple:
+    def _calculate_macd(self, prices: "pd.Series") -> tuple:
         """Calcular MACD"""
         try:
             exp1 = prices.ewm(span=12).mean()
@@ -380,7 +541,7 @@ class AnalysisService:
         except:
             return 0.0, 0.0, 0.0
     
-    def _calculate_bollinger_bands(self, prices: pd.Series, period: int = 20):
+    def _calculate_bollinger_bands(self, prices: "pd.Series", period: int = 20):
         """Calcular Bollinger Bands"""
         try:
             sma = prices.rolling(period).mean()
@@ -394,7 +555,7 @@ class AnalysisService:
         except:
             return prices.iloc[-1] * 1.02, prices.iloc[-1] * 0.98
     
-    def _calculate_stochastic(self, highs: pd.Series, lows: pd.Series, closes: pd.Series, period: int = 14):
+    def _calculate_stochastic(self, highs: "pd.Series", lows: "pd.Series", closes: "pd.Series", period: int = 14):
         """Calcular Stochastic"""
         try:
             lowest_low = lows.rolling(period).min()
@@ -416,7 +577,8 @@ class AnalysisService:
             "resistance": 0.0,
             "bollinger_upper": 0.0,
             "bollinger_lower": 0.0,
-            "stochastic": 50.0
+            "stochastic": 50.0,
+            "atr": 0.0
         }
     
     def get_analysis_history(self, user_id: int, symbol: str = None, limit: int = 50) -> List[Dict[str, Any]]:
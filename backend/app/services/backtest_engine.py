@@ -0,0 +1,402 @@
+# backend/app/services/backtest_engine.py
+# Backtest de las reglas del bot sobre velas guardadas (market_store)
+#
+# - Indicadores: misma librería que el bot (compute_indicator_series)
+# - Filtro de entrada y SL/TP: mismas reglas que BotAnalysisService (trade_rules)
+# - Señal: estrategia técnica vectorizada (sustituye a la IA, que no se puede
+#   reproducir offline; se puede pasar otra función de señal)
+# - Salidas: búsqueda vectorizada del primer toque de SL/TP sobre bloques de
+#   velas (el trailing stop es un máximo acumulado) y resolución vela a vela
+#   (event-driven) cuando una misma vela toca ambos niveles o abre con gap
+# - Costes: spread de cada vela (o fijo), comisión por lote y swap por noche
+# - Límite max_open_trades entre símbolos aplicado al unir las operaciones
+# Las operaciones salen con las columnas del modelo Trade.
+
+import heapq
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from ..core.logger import logger
+from ..database.performance import summarize_day
+from ..models.trade_model import Trade
+from .indicators import compute_indicator_series
+from .market_store import MarketStore
+from .trade_rules import CONFIDENCE_THRESHOLD, calculate_stops, contract_size, pip_size
+
+SignalFunction = Callable[[Dict[str, np.ndarray]], Tuple[np.ndarray, np.ndarray]]
+
+# Columnas de las velas que usa la simulación
+BACKTEST_COLUMNS = ("time", "open", "high", "low", "close", "spread")
+
+_SECONDS_PER_DAY = 86400
+# 1970-01-01 fue jueves: día de la semana (lunes=0) de un día epoch
+_EPOCH_WEEKDAY = 3
+
+
+@dataclass
+class BacktestConfig:
+    stop_loss_pips: float = 100.0        # BotConfig.default_stop_loss
+    take_profit_pips: Optional[float] = None     # BotConfig.default_take_profit (None = ratio 1:2, como el bot)
+    trailing_stop_pips: Optional[float] = None   # BotConfig.trailing_stop_distance (None = sin trailing)
+    max_open_trades: Optional[int] = None        # BotConfig.max_open_trades (None = sin límite)
+    lot_size: float = 0.1                # BotConfig.default_lot_size
+    confidence_threshold: float = CONFIDENCE_THRESHOLD
+    commission_per_lot: float = 7.0      # Ida y vuelta, en divisa de cotización
+    swap_long: float = -6.0              # Por lote y noche (x3 los miércoles)
+    swap_short: float = 1.0
+    spread_points: Optional[float] = None  # None = spread registrado en cada vela
+    point: Optional[float] = None          # None = pip / 10
+    window: int = 288                    # Velas del primer bloque de búsqueda de salida
+    starting_balance: float = 10000.0
+    magic: int = 123456
+
+    @classmethod
+    def from_bot_config(cls, bot_config: Any, **overrides) -> "BacktestConfig":
+        """Tomar stop, lote y límite de operaciones de la configuración del bot del usuario"""
+        values = {
+            "stop_loss_pips": bot_config.default_stop_loss or 50.0,
+            "lot_size": bot_config.default_lot_size or 0.1,
+            "max_open_trades": bot_config.max_open_trades
+        }
+        values.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**values)
+
+
+def technical_signals(series: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Señal por vela (1 compra, -1 venta, 0 nada) y confianza 0-100 a partir de
+    tendencia (MACD, precio y cruces de medias) y momentum (RSI).
+    """
+    close, rsi, macd = series["close"], series["rsi"], series["macd"]
+    ma_20, ma_50 = series["ma_20"], series["ma_50"]
+    long_score = (30 * (macd > 0) + 25 * (close > ma_50) + 25 * (ma_20 > ma_50)
+                  + 20 * ((rsi > 50) & (rsi < 70)))
+    short_score = (30 * (macd < 0) + 25 * (close < ma_50) + 25 * (ma_20 < ma_50)
+                   + 20 * ((rsi < 50) & (rsi > 30)))
+    signals = np.where(long_score > short_score, 1, np.where(short_score > long_score, -1, 0)).astype(np.int8)
+    # Sin señal mientras los indicadores no tienen historia suficiente
+    signals[np.isnan(ma_50) | np.isnan(rsi)] = 0
+    return signals, np.maximum(long_score, short_score).astype(np.float64)
+
+
+def _rollover_nights(open_times: np.ndarray, close_times: np.ndarray) -> np.ndarray:
+    """Noches cobradas de swap por operación (lunes a jueves, triple el miércoles)"""
+    first = int(open_times.min()) // _SECONDS_PER_DAY
+    days = np.arange(first, int(close_times.max()) // _SECONDS_PER_DAY + 1)
+    weekday = (days + _EPOCH_WEEKDAY) % 7
+    weights = np.where(weekday == 2, 3, np.where(weekday < 4, 1, 0))
+    # cumulative[d] = noches de los días anteriores a d
+    cumulative = np.concatenate(([0], np.cumsum(weights)))
+    return (cumulative[close_times // _SECONDS_PER_DAY - first]
+            - cumulative[open_times // _SECONDS_PER_DAY - first])
+
+
+def _to_datetime(epoch: int) -> datetime:
+    return datetime.fromtimestamp(int(epoch), tz=timezone.utc)
+
+
+class SymbolBacktest:
+    """Simulación de un símbolo: una posición como máximo (regla de operación existente)"""
+
+    def __init__(self, symbol: str, rates: Dict[str, np.ndarray], config: BacktestConfig,
+                 signal_fn: SignalFunction = technical_signals,
+                 signals: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        self.symbol = symbol
+        self.config = config
+        self.signal_fn = signal_fn
+        # (señal, confianza) precalculadas: no dependen de los parámetros de stops y lote
+        self.signals = signals
+        self.time = np.asarray(rates["time"], dtype=np.int64)
+        self.open = np.asarray(rates["open"], dtype=np.float64)
+        self.high = np.asarray(rates["high"], dtype=np.float64)
+        self.low = np.asarray(rates["low"], dtype=np.float64)
+        self.close = np.asarray(rates["close"], dtype=np.float64)
+        self.pip = pip_size(symbol)
+        point = config.point or self.pip / 10
+        if config.spread_points is not None:
+            self.spread = np.full(len(self.time), config.spread_points * point)
+        else:
+            self.spread = np.asarray(rates["spread"], dtype=np.float64) * point
+        # Las posiciones vendidas se cierran al ask
+        self.ask_high = self.high + self.spread
+        self.ask_low = self.low + self.spread
+        self.contract = contract_size(symbol)
+
+    def _stop_levels(self, start: int, stop: int, side: int, stop_loss: float, entry_price: float,
+                     extreme: float) -> Tuple[np.ndarray, float]:
+        """
+        Nivel del trailing stop en cada vela del bloque. Se activa cuando el
+        precio avanza `trailing_stop_pips` a favor (como el trailing de MT5) y
+        usa el extremo de las velas ANTERIORES: dentro de una vela no se sabe si
+        llegó antes el máximo o el mínimo. `extreme` arrastra el máximo (o mínimo)
+        desde el bloque anterior.
+        """
+        distance = self.config.trailing_stop_pips * self.pip
+        if side > 0:
+            peak = np.maximum.accumulate(np.concatenate(([extreme], self.high[start:stop])))
+            levels = np.where(peak[:-1] >= entry_price + distance, peak[:-1] - distance, stop_loss)
+            return np.maximum(levels, stop_loss), float(peak[-1])
+        trough = np.minimum.accumulate(np.concatenate(([extreme], self.ask_low[start:stop])))
+        levels = np.where(trough[:-1] <= entry_price - distance, trough[:-1] + distance, stop_loss)
+        return np.minimum(levels, stop_loss), float(trough[-1])
+
+    def _first_touch(self, entry: int, side: int, stop_loss: float,
+                     take_profit: float) -> Optional[Tuple[int, bool, bool, float]]:
+        """
+        Primera vela que toca SL o TP, por bloques crecientes, y nivel de stop en
+        esa vela (distinto del inicial con trailing). None si no llega a tocar.
+        """
+        n = len(self.time)
+        start, window = entry, self.config.window
+        trailing = bool(self.config.trailing_stop_pips)
+        # Se abre al ask (compra) o al bid (venta); el extremo se sigue en el precio de cierre
+        bid, ask = float(self.open[entry]), float(self.open[entry] + self.spread[entry])
+        entry_price, extreme = (ask, bid) if side > 0 else (bid, ask)
+        while start < n:
+            stop = min(start + window, n)
+            if trailing:
+                levels, extreme = self._stop_levels(start, stop, side, stop_loss, entry_price, extreme)
+            else:
+                levels = stop_loss
+            if side > 0:
+                sl_hit = self.low[start:stop] <= levels
+                tp_hit = self.high[start:stop] >= take_profit
+            else:
+                sl_hit = self.ask_high[start:stop] >= levels
+                tp_hit = self.ask_low[start:stop] <= take_profit
+            hit = sl_hit | tp_hit
+            if hit.any():
+                offset = int(hit.argmax())
+                level = float(levels[offset]) if trailing else stop_loss
+                return start + offset, bool(sl_hit[offset]), bool(tp_hit[offset]), level
+            start, window = stop, window * 4
+        return None
+
+    def _fill(self, bar: int, side: int, stop_loss: float, take_profit: float,
+              sl_hit: bool, tp_hit: bool) -> Tuple[float, str]:
+        """
+        Precio y motivo de salida en la vela que toca los niveles. Con gap en la
+        apertura se cierra a la apertura; si la vela toca ambos sin gap se supone
+        que el SL se alcanza primero (criterio conservador). `stop_loss` es el
+        nivel vigente en la vela (el del trailing si se ha movido).
+        """
+        opening = self.open[bar] if side > 0 else self.open[bar] + self.spread[bar]
+        if side > 0:
+            if opening <= stop_loss:
+                return opening, "SL"
+            if opening >= take_profit:
+                return opening, "TP"
+        else:
+            if opening >= stop_loss:
+                return opening, "SL"
+            if opening <= take_profit:
+                return opening, "TP"
+        if sl_hit:
+            return stop_loss, "SL"
+        return take_profit, "TP"
+
+    def run(self) -> List[Dict[str, Any]]:
+        config = self.config
+        n = len(self.time)
+        if n < 2:
+            return []
+        if self.signals is not None:
+            signals, confidence = self.signals
+        else:
+            signals, confidence = self.signal_fn(compute_indicator_series(self.high, self.low, self.close))
+        # Señal al cierre de la vela i, entrada a la apertura de i + 1
+        candidates = np.flatnonzero((signals != 0) & (confidence >= config.confidence_threshold))
+        candidates = candidates[candidates + 1 < n]
+
+        # Recorrido secuencial (una posición a la vez): solo entradas, niveles y salidas
+        entries, exits, stops, targets, closes, reasons = [], [], [], [], [], []
+        free_from = 0
+        while True:
+            k = int(np.searchsorted(candidates, free_from))
+            if k >= len(candidates):
+                break
+            entry = int(candidates[k]) + 1
+            side = int(signals[entry - 1])
+            # Igual que el bot: stops calculados desde el bid
+            stop_loss, take_profit = calculate_stops(self.symbol, "BUY" if side > 0 else "SELL",
+                                                     float(self.open[entry]), config.stop_loss_pips,
+                                                     config.take_profit_pips)
+            touch = self._first_touch(entry, side, stop_loss, take_profit)
+            if touch is None:
+                exit_bar = n - 1
+                close_price = float(self.close[exit_bar]) + (0.0 if side > 0 else float(self.spread[exit_bar]))
+                reason = "Fin de datos"
+            else:
+                exit_bar, sl_hit, tp_hit, level = touch
+                close_price, reason = self._fill(exit_bar, side, level, take_profit, sl_hit, tp_hit)
+                if reason == "SL" and level != stop_loss:
+                    reason = "Trailing"
+
+            entries.append(entry)
+            exits.append(exit_bar)
+            stops.append(stop_loss)
+            targets.append(take_profit)
+            closes.append(float(close_price))
+            reasons.append(reason)
+            free_from = exit_bar
+
+        if not entries:
+            return []
+        return self._build_trades(np.array(entries), np.array(exits), stops, targets,
+                                  np.array(closes), reasons, signals, confidence)
+
+    def _build_trades(self, entries: np.ndarray, exits: np.ndarray, stops: List[float], targets: List[float],
+                      closes: np.ndarray, reasons: List[str], signals: np.ndarray,
+                      confidence: np.ndarray) -> List[Dict[str, Any]]:
+        """Resultados y costes de todas las operaciones de una vez (vectorizado)"""
+        config = self.config
+        sides = signals[entries - 1].astype(np.float64)
+        opens = np.where(sides > 0, self.open[entries] + self.spread[entries], self.open[entries])
+        difference = (closes - opens) * sides
+        profit = difference * config.lot_size * self.contract
+        open_times, close_times = self.time[entries], self.time[exits]
+        swap = (np.where(sides > 0, config.swap_long, config.swap_short) * config.lot_size
+                * _rollover_nights(open_times, close_times))
+        commission = np.full(len(entries), -config.commission_per_lot * config.lot_size)
+        net = profit + commission + swap
+        balance = config.starting_balance + np.concatenate(([0.0], np.cumsum(net)[:-1]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentage = np.where(balance != 0, profit / balance * 100, 0.0)
+
+        columns = zip(np.round(opens, 6).tolist(), np.round(closes, 6).tolist(), stops, targets,
+                      np.round(profit, 2).tolist(), np.round(difference / self.pip, 1).tolist(),
+                      np.round(percentage, 4).tolist(), confidence[entries - 1].tolist(),
+                      open_times.tolist(), close_times.tolist(), reasons,
+                      np.round(commission, 2).tolist(), (np.round(swap, 2) + 0.0).tolist(), sides.tolist())
+        trades = []
+        for ticket, (open_price, close_price, stop_loss, take_profit, trade_profit, pips, pct, conf,
+                     open_time, close_time, reason, trade_commission, trade_swap, side) in enumerate(columns, 1):
+            signal = "BUY" if side > 0 else "SELL"
+            trades.append({
+                "symbol": self.symbol,
+                "operation_type": signal,
+                "volume": config.lot_size,
+                "open_price": open_price,
+                "close_price": close_price,
+                "current_price": close_price,
+                "stop_loss": stop_loss,
+                "take_profit": take_profit,
+                "profit": trade_profit,
+                "profit_pips": pips,
+                "profit_percentage": pct,
+                "status": "closed",
+                "magic_number": config.magic,
+                "ticket": ticket,
+                "ai_confidence": conf,
+                "ai_signal": signal,
+                "opened_at": _to_datetime(open_time),
+                "closed_at": _to_datetime(close_time),
+                "comment": f"Backtest {reason}",
+                "commission": trade_commission,
+                "swap": trade_swap
+            })
+        return trades
+
+
+def summarize(trades: List[Dict[str, Any]], starting_balance: float) -> Dict[str, Any]:
+    """Mismo resumen que daily_performance, más win rate y profit factor"""
+    ordered = sorted(trades, key=lambda trade: trade["closed_at"])
+    summary = summarize_day((t["profit"], t["commission"], t["swap"]) for t in ordered)
+    summary["win_rate"] = round(summary["wins"] / summary["trades"] * 100, 2) if summary["trades"] else 0.0
+    summary["profit_factor"] = (round(summary["gross_profit"] / summary["gross_loss"], 2)
+                                if summary["gross_loss"] else None)
+    summary["final_balance"] = round(starting_balance + summary["net_profit"], 2)
+    return {key: round(value, 2) if isinstance(value, float) else value for key, value in summary.items()}
+
+
+def apply_open_trades_cap(trades: List[Dict[str, Any]], max_open_trades: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    Descartar las operaciones que se abrirían con `max_open_trades` posiciones
+    ya abiertas entre todos los símbolos (en orden de apertura). Aproximación:
+    el símbolo de una operación descartada no vuelve a buscar entrada antes.
+    """
+    if not max_open_trades:
+        return trades
+    accepted, open_until = [], []
+    for trade in sorted(trades, key=lambda t: t["opened_at"]):
+        while open_until and open_until[0] <= trade["opened_at"]:
+            heapq.heappop(open_until)
+        if len(open_until) < max_open_trades:
+            heapq.heappush(open_until, trade["closed_at"])
+            accepted.append(trade)
+    return accepted
+
+
+def backtest_symbol(symbol: str, rates: Dict[str, np.ndarray], config: BacktestConfig = None,
+                    signal_fn: SignalFunction = technical_signals,
+                    signals: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Dict[str, Any]:
+    """Backtest de un símbolo sobre velas en columnas (time, open, high, low, close, spread)"""
+    config = config or BacktestConfig()
+    start = time.perf_counter()
+    trades = SymbolBacktest(symbol, rates, config, signal_fn, signals).run()
+    return {
+        "symbol": symbol,
+        "bars": len(rates["time"]),
+        "trades": trades,
+        "summary": summarize(trades, config.starting_balance),
+        "elapsed": round(time.perf_counter() - start, 4)
+    }
+
+
+def _backtest_stored_symbol(symbol: str, timeframe: str, start: datetime, end: datetime,
+                            config: BacktestConfig, root: Optional[str]) -> Dict[str, Any]:
+    """Trabajo de un proceso: lee las velas del disco (memmap) en lugar de recibirlas serializadas"""
+    store = MarketStore(root)
+    return backtest_symbol(symbol, store.read_bars(symbol, timeframe, start, end, BACKTEST_COLUMNS), config)
+
+
+def run_backtest(symbols: List[str], timeframe: str, start: datetime, end: datetime,
+                 config: BacktestConfig = None, processes: int = 0,
+                 root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Backtest de varios símbolos con las velas grabadas. `processes` > 1 reparte
+    los símbolos en un pool de procesos; cada símbolo se simula por separado y
+    el límite max_open_trades se aplica después al unir las operaciones.
+    """
+    config = config or BacktestConfig()
+    started = time.perf_counter()
+    try:
+        if processes and processes > 1 and len(symbols) > 1:
+            with ProcessPoolExecutor(max_workers=min(processes, len(symbols))) as pool:
+                futures = [pool.submit(_backtest_stored_symbol, symbol, timeframe, start, end, config, root)
+                           for symbol in symbols]
+                results = [future.result() for future in futures]
+        else:
+            results = [_backtest_stored_symbol(symbol, timeframe, start, end, config, root) for symbol in symbols]
+    except Exception as e:
+        logger.error(f"❌ Error en backtest: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+    all_trades = [trade for result in results for trade in result["trades"]]
+    if config.max_open_trades:
+        all_trades = apply_open_trades_cap(all_trades, config.max_open_trades)
+        kept = {id(trade) for trade in all_trades}
+        for result in results:
+            result["trades"] = [trade for trade in result["trades"] if id(trade) in kept]
+            result["summary"] = summarize(result["trades"], config.starting_balance)
+    elapsed = time.perf_counter() - started
+    logger.info(f"🧪 Backtest {len(symbols)} símbolos {timeframe}: {len(all_trades)} operaciones en {elapsed:.2f}s")
+    return {
+        "success": True,
+        "timeframe": timeframe,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "config": asdict(config),
+        "bars": sum(result["bars"] for result in results),
+        "results": {result["symbol"]: result for result in results},
+        "summary": summarize(all_trades, config.starting_balance),
+        "elapsed": round(elapsed, 3)
+    }
+
+
+def to_trades(trades: List[Dict[str, Any]], user_id: int) -> List[Trade]:
+    """Operaciones simuladas como objetos Trade (sin añadir a ninguna sesión)"""
+    return [Trade(user_id=user_id, **trade) for trade in trades]
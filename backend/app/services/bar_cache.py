@@ -0,0 +1,154 @@
+# backend/app/services/bar_cache.py
+# Caché de velas MT5 por (símbolo, timeframe) con descarga incremental
+# Solo se piden a MT5 las velas posteriores a la última guardada y los
+# cortes se sirven como vistas (sin copia) del array estructurado de MT5
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from ..core.logger import logger
+
+
+class _BarBuffer:
+    """
+    Buffer de velas de un (símbolo, timeframe).
+
+    Funciona como un ring buffer "desenrollado": el array tiene el doble de
+    capacidad y cuando se llena se compactan las últimas `capacity` velas al
+    principio. Así las últimas N velas siempre son contiguas y se pueden
+    devolver como vista, con coste de compactación amortizado O(1) por vela.
+    """
+
+    def __init__(self, rates: np.ndarray, capacity: int):
+        self.capacity = max(capacity, len(rates))
+        self.data = np.empty(self.capacity * 2, dtype=rates.dtype)
+        self.length = 0
+        self.last_fetch = 0.0
+        self.replace(rates)
+
+    def replace(self, rates: np.ndarray):
+        rates = rates[-self.capacity:]
+        self.length = len(rates)
+        self.data[:self.length] = rates
+
+    @property
+    def last_time(self) -> int:
+        return int(self.data['time'][self.length - 1])
+
+    def merge(self, rates: np.ndarray) -> bool:
+        """
+        Incorporar un bloque reciente de MT5. Devuelve False si el bloque no
+        solapa con lo guardado (hueco) y hace falta una recarga completa.
+        """
+        if len(rates) == 0:
+            return True
+        last_time = self.last_time
+        if int(rates['time'][0]) > last_time:
+            return False
+
+        # La última vela guardada puede ser la vela en formación: se sobrescribe
+        new = rates[rates['time'] >= last_time]
+        start = self.length - 1
+        if start + len(new) > len(self.data):
+            keep = self.capacity - len(new)
+            self.data[:keep] = self.data[start - keep:start]
+            start = keep
+        self.data[start:start + len(new)] = new
+        self.length = start + len(new)
+        return True
+
+    def tail(self, count: int) -> np.ndarray:
+        return self.data[max(self.length - count, 0):self.length]
+
+
+class BarCache:
+    """
+    Caché en proceso de velas MT5.
+
+    - Primera petición (o más velas de las guardadas): descarga completa.
+    - Siguientes: solo `delta_bars` velas recientes que se fusionan en el buffer.
+    - Peticiones dentro de `refresh_interval` segundos: se sirven sin llamar a MT5.
+
+    El módulo MT5 es inyectable para poder probar la caché con un MT5 falso.
+    """
+
+    def __init__(self, mt5_module: Any = None, capacity: int = 1000, delta_bars: int = 3,
+                 refresh_interval: float = 1.0):
+        if mt5_module is None:
+            import MetaTrader5 as mt5_module
+        self.mt5 = mt5_module
+        self.capacity = capacity
+        self.delta_bars = delta_bars
+        self.refresh_interval = refresh_interval
+        self.buffers: Dict[Tuple[str, int], _BarBuffer] = {}
+        self.stats = {"hits": 0, "delta_fetches": 0, "misses": 0, "bars_fetched": 0}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, timeframe: int, count: int) -> Optional[np.ndarray]:
+        """
+        Últimas `count` velas (la última es la vela en formación) como vista del buffer.
+
+        La vista se sobrescribe en las siguientes descargas: solo es segura en el hilo
+        MT5 y hasta la siguiente llamada; copiarla si se va a guardar o a pasar a otro hilo.
+        """
+        key = (symbol, timeframe)
+        with self._lock:
+            buffer = self.buffers.get(key)
+            now = time.monotonic()
+
+            if buffer is None or buffer.length < count:
+                buffer = self._full_fetch(key, count)
+                if buffer is None:
+                    return None
+            elif now - buffer.last_fetch < self.refresh_interval:
+                self.stats["hits"] += 1
+            else:
+                rates = self.mt5.copy_rates_from_pos(symbol, timeframe, 0, self.delta_bars)
+                if rates is None:
+                    return None
+                self.stats["bars_fetched"] += len(rates)
+                if buffer.merge(rates):
+                    buffer.last_fetch = now
+                    self.stats["delta_fetches"] += 1
+                else:
+                    logger.info(f"🔁 Caché velas {symbol}: hueco desde la última descarga, recarga completa")
+                    buffer = self._full_fetch(key, count)
+                    if buffer is None:
+                        return None
+
+            return buffer.tail(count)
+
+    def _full_fetch(self, key: Tuple[str, int], count: int) -> Optional[_BarBuffer]:
+        symbol, timeframe = key
+        rates = self.mt5.copy_rates_from_pos(symbol, timeframe, 0, max(count, self.delta_bars))
+        if rates is None or len(rates) == 0:
+            return None
+        self.stats["misses"] += 1
+        self.stats["bars_fetched"] += len(rates)
+
+        buffer = self.buffers.get(key)
+        if buffer is None or buffer.data.dtype != rates.dtype or len(rates) > buffer.capacity:
+            buffer = _BarBuffer(rates, max(self.capacity, count))
+            self.buffers[key] = buffer
+        else:
+            buffer.replace(rates)
+        buffer.last_fetch = time.monotonic()
+        return buffer
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Vaciar la caché de un símbolo (o completa)"""
+        with self._lock:
+            if symbol is None:
+                self.buffers.clear()
+            else:
+                for key in [k for k in self.buffers if k[0] == symbol]:
+                    del self.buffers[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        requests = self.stats["hits"] + self.stats["delta_fetches"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "cached_series": len(self.buffers),
+            "hit_rate": round((requests - self.stats["misses"]) / requests, 4) if requests else 0.0
+        }
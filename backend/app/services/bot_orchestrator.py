@@ -1,53 +1,99 @@
 # backend/app/services/bot_orchestrator.py
 
 import asyncio
+import time
+from collections import deque
 from datetime import datetime
+import numpy as np
+from sqlalchemy import select
+from ..core.lazy import lazy_import
 from ..core.logger import logger
+from ..core.utils import StageTimings, rate_budgets
 from .bot_analysis_service import bot_analysis_service
 from .analysis_service import analysis_service
 from .trading_service import trading_service
 from .broker_api import broker_api
-from ..database.db_connection import get_db
-from typing import Dict
+from .data_fetcher import data_fetcher
+from . import indicators
+from ..database.db_connection import async_session_scope
+from typing import Dict, List, Any
+
+mt5 = lazy_import("MetaTrader5")
 
 class BotOrchestrator:
-    def __init__(self):
+    """Ciclo del bot de un usuario (cada usuario tiene su instancia, gestionada por bot_supervisor)"""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
         self.is_running = False
+        self.stop_event = asyncio.Event()
         self.analysis_interval = 300
         self.reanalysis_interval = 60
-        self.symbol_delay = 120 
+        self.max_concurrent_symbols = 4  # Símbolos analizados a la vez (los proveedores limitan con su presupuesto)
         self.current_cycle = 0
+        self.started_at = None
+        self.last_cycle: Dict[str, Any] = {}
+        self.cycle_timings = StageTimings()  # Duración de cada fase del ciclo y del ciclo completo
+        self.last_analysis: Dict[str, float] = {}  # símbolo -> timestamp del último análisis
+        self.scan_history = deque(maxlen=50)
     
-    async def start_bot(self, user_id: int):
-        """Iniciar el ciclo continuo del bot con DELAYS entre símbolos"""
-        logger.info(f"🚀 Iniciando Bot Orchestrator para usuario {user_id}")
+    def start(self) -> asyncio.Task:
+        """Marcar el bot como activo y lanzar su ciclo (un stop_bot posterior lo detiene aunque no haya empezado)"""
         self.is_running = True
+        self.stop_event.clear()
+        self.started_at = datetime.now()
+        return asyncio.create_task(self.start_bot(), name=f"bot-{self.user_id}")
+    
+    async def start_bot(self):
+        """Ciclo continuo del bot"""
+        user_id = self.user_id
+        logger.info(f"🚀 Iniciando Bot Orchestrator para usuario {user_id}")
         
         while self.is_running:
             try:
                 self.current_cycle += 1
-                logger.info(f"🔄 Ciclo #{self.current_cycle} - {datetime.now()}")
+                cycle_start = time.monotonic()
+                logger.info(f"🔄 Usuario {user_id} - Ciclo #{self.current_cycle} - {datetime.now()}")
                 
                 # 1. Reanalizar operaciones abiertas
-                await self._reanalyze_open_trades(user_id)
+                with self.cycle_timings.measure("reanalysis"):
+                    await self._reanalyze_open_trades(user_id)
                 
                 # 2. Buscar nuevas oportunidades (cada 5 minutos)
                 if self.current_cycle % 5 == 0:
-                    await self._analyze_new_opportunities(user_id)
+                    with self.cycle_timings.measure("scan"):
+                        await self._analyze_new_opportunities(user_id)
                 
                 # 3. Verificar límites de riesgo
-                await self._check_risk_limits(user_id)
+                with self.cycle_timings.measure("risk"):
+                    await self._check_risk_limits(user_id)
                 
-                await asyncio.sleep(self.reanalysis_interval)
+                duration = time.monotonic() - cycle_start
+                self.cycle_timings.record("cycle", duration)
+                self.last_cycle = {
+                    "cycle": self.current_cycle,
+                    "finished_at": datetime.now().isoformat(),
+                    "duration": round(duration, 3)
+                }
+                await self._sleep(self.reanalysis_interval)
                 
             except Exception as e:
-                logger.error(f"❌ Error en ciclo bot: {str(e)}")
-                await asyncio.sleep(30)
+                logger.error(f"❌ Error en ciclo bot (usuario {user_id}): {str(e)}")
+                await self._sleep(30)
+        
+        logger.info(f"⏹️ Bot Orchestrator detenido para usuario {user_id}")
+    
+    async def _sleep(self, seconds: float):
+        """Esperar al siguiente ciclo; stop_bot despierta la espera en el acto"""
+        try:
+            await asyncio.wait_for(self.stop_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
     
     async def _reanalyze_open_trades(self, user_id: int):
         """Reanalizar y ajustar operaciones abiertas"""
         try:
-            portfolio = broker_api.get_portfolio_status()
+            portfolio = await broker_api.get_portfolio_status_async()
             if not portfolio["success"]:
                 return
             
@@ -83,7 +129,7 @@ class BotOrchestrator:
                 
                 # Si la IA proporciona stops, ajustar la posición
                 if stop_loss and take_profit:
-                    result = trading_service.modify_position(
+                    result = await trading_service.modify_position_async(
                         position["ticket"], 
                         stop_loss=stop_loss, 
                         take_profit=take_profit
@@ -96,7 +142,7 @@ class BotOrchestrator:
                 # Verificar si la señal es contraria a la posición actual
                 current_direction = "BUY" if position.get("type") == 0 else "SELL"
                 if signal != current_direction and signal != "HOLD":
-                    result = trading_service.close_position(position["ticket"])
+                    result = await trading_service.close_position_async(position["ticket"])
                     if result["success"]:
                         logger.info(f"🛑 Posición cerrada por señal contraria: {position['symbol']}")
                     
@@ -104,52 +150,128 @@ class BotOrchestrator:
             logger.error(f"Error ajustando posición: {str(e)}")
     
     async def _analyze_new_opportunities(self, user_id: int):
-        """Buscar nuevas oportunidades con DELAYS entre símbolos"""
-        db = None
+        """Buscar nuevas oportunidades analizando los símbolos en paralelo (concurrencia acotada)"""
         try:
             logger.info(f"🤖 BOT Buscando oportunidades para usuario {user_id}")
             
-            db = next(get_db())
-            from ..models.config_model import BotConfig
-            bot_config = db.query(BotConfig).filter(BotConfig.user_id == user_id).first()
+            bot_config = await self._load_bot_config(user_id)
             
             if not bot_config or not bot_config.is_active or not bot_config.allowed_symbols:
                 logger.info("⏹️ Bot inactivo o sin configuración")
                 return
             
-            symbols = [s.strip() for s in bot_config.allowed_symbols.split(",")]
-            logger.info(f"🤖 BOT Analizando símbolos: {symbols}")
+            symbols = [s.strip() for s in bot_config.allowed_symbols.split(",") if s.strip()]
+            symbols = await self._prioritize_symbols(symbols)
+            logger.info(f"🤖 BOT Analizando símbolos (por prioridad): {symbols}")
             
-            # ✅ NUEVO: Analizar CADA símbolo con delay de 2 minutos
-            for i, symbol in enumerate(symbols):
-                try:
-                    logger.info(f"🔍 BOT Analizando símbolo {i+1}/{len(symbols)}: {symbol}")
-                    
-                    result = await bot_analysis_service.analyze_and_execute(symbol, user_id, bot_config)
-                    
-                    if result.get("success"):
-                        execution_result = result.get("execution_result", {})
-                        if execution_result.get("executed"):
-                            logger.info(f"🎯 BOT OPERACIÓN EJECUTADA: {symbol}")
-                        else:
-                            logger.info(f"⏹️ BOT No ejecutado {symbol}: {execution_result.get('reason')}")
-                    else:
-                        logger.error(f"❌ BOT Error en análisis de {symbol}: {result.get('error')}")
-                    
-                    # ✅ NUEVO: Esperar 2 minutos antes del próximo símbolo (excepto el último)
-                    if i < len(symbols) - 1:
-                        logger.info(f"⏳ Esperando {self.symbol_delay} segundos antes del próximo símbolo...")
-                        await asyncio.sleep(self.symbol_delay)
-                    
-                except Exception as e:
-                    logger.error(f"❌ BOT Error con {symbol}: {str(e)}")
-                    continue
+            scan_start = time.monotonic()
+            semaphore = asyncio.Semaphore(self.max_concurrent_symbols)
+            
+            async def scan(symbol: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self._analyze_symbol(symbol, user_id, bot_config)
+            
+            results = await asyncio.gather(*(scan(symbol) for symbol in symbols))
+            
+            wall_time = time.monotonic() - scan_start
+            scan_report = {
+                "cycle": self.current_cycle,
+                "timestamp": datetime.now().isoformat(),
+                "symbols": len(symbols),
+                "executed": sum(1 for r in results if r.get("executed")),
+                "errors": sum(1 for r in results if not r.get("success")),
+                "wall_time": round(wall_time, 2),
+                "symbol_times": {r["symbol"]: r["elapsed"] for r in results},
+                "rate_budgets": rate_budgets.get_stats()
+            }
+            self.scan_history.append(scan_report)
+            logger.info(f"⏱️ BOT Escaneo de {len(symbols)} símbolos en {wall_time:.1f}s "
+                        f"({scan_report['executed']} ejecutadas, {scan_report['errors']} errores)")
                     
         except Exception as e:
             logger.error(f"❌ BOT Error en búsqueda de oportunidades: {str(e)}")
-        finally:
-            if db:
-                db.close()
+    
+    async def _analyze_symbol(self, symbol: str, user_id: int, bot_config) -> Dict[str, Any]:
+        """Analizar (y ejecutar si procede) un símbolo dentro del escaneo"""
+        start = time.monotonic()
+        report = {"symbol": symbol, "success": False, "executed": False}
+        try:
+            logger.info(f"🔍 BOT Analizando símbolo: {symbol}")
+            result = await bot_analysis_service.analyze_and_execute(symbol, user_id, bot_config)
+            self.last_analysis[symbol] = time.time()
+            
+            if result.get("success"):
+                report["success"] = True
+                execution_result = result.get("execution_result", {})
+                if execution_result.get("executed"):
+                    report["executed"] = True
+                    logger.info(f"🎯 BOT OPERACIÓN EJECUTADA: {symbol}")
+                else:
+                    logger.info(f"⏹️ BOT No ejecutado {symbol}: {execution_result.get('reason')}")
+            else:
+                logger.error(f"❌ BOT Error en análisis de {symbol}: {result.get('error')}")
+                
+        except Exception as e:
+            logger.error(f"❌ BOT Error con {symbol}: {str(e)}")
+        
+        report["elapsed"] = round(time.monotonic() - start, 2)
+        return report
+    
+    async def _prioritize_symbols(self, symbols: List[str]) -> List[str]:
+        """
+        Ordenar símbolos por prioridad: volatilidad relativa (ATR / precio en M5)
+        más tiempo desde el último análisis, ambos normalizados a [0, 1].
+        Los símbolos nunca analizados tienen la máxima antigüedad.
+        """
+        now = time.time()
+        ages = {}
+        for symbol in symbols:
+            last = self.last_analysis.get(symbol)
+            ages[symbol] = now - last if last else float("inf")
+        volatility = dict(zip(symbols, await asyncio.gather(*(self._relative_volatility(s) for s in symbols))))
+        
+        max_age = max((age for age in ages.values() if age != float("inf")), default=0.0) or 1.0
+        max_volatility = max(volatility.values(), default=0.0) or 1.0
+        
+        def score(symbol: str) -> float:
+            age_score = min(ages[symbol] / max_age, 1.0)
+            return age_score + volatility[symbol] / max_volatility
+        
+        return sorted(symbols, key=score, reverse=True)
+    
+    async def _relative_volatility(self, symbol: str) -> float:
+        """ATR(14) M5 relativo al precio, desde la caché de velas (0 si no hay datos)"""
+        try:
+            rates = await data_fetcher.get_rates_async(symbol, mt5.TIMEFRAME_M5, indicators.ATR_PERIOD + 1)
+            if rates is None or len(rates) <= indicators.ATR_PERIOD:
+                return 0.0
+            atr = indicators.atr(rates['high'], rates['low'], rates['close'])[-1]
+            close = float(rates['close'][-1])
+            return float(atr / close) if close and np.isfinite(atr) else 0.0
+        except Exception as e:
+            logger.error(f"Error calculando volatilidad de {symbol}: {str(e)}")
+            return 0.0
+    
+    def get_scan_stats(self) -> Dict[str, Any]:
+        """Historial de escaneos con tiempo total por ciclo"""
+        history = list(self.scan_history)
+        return {
+            "scans": history,
+            "last_wall_time": history[-1]["wall_time"] if history else None,
+            "avg_wall_time": round(sum(s["wall_time"] for s in history) / len(history), 2) if history else None
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado de la instancia y duración de sus ciclos por fase"""
+        return {
+            "user_id": self.user_id,
+            "is_running": self.is_running,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "current_cycle": self.current_cycle,
+            "last_cycle": self.last_cycle,
+            "cycle_timings": self.cycle_timings.get_stats(),
+            "last_scan": self.scan_history[-1] if self.scan_history else None
+        }
 
     async def _execute_best_opportunities(self, analysis_result: Dict, bot_config):
         """Ejecutar mejores oportunidades - CORREGIDO"""
@@ -181,7 +303,7 @@ class BotOrchestrator:
             logger.info(f"🔧 DEBUG _execute_trade INICIADO: {symbol} {order_type} {confidence}%")
             
             # 1. Verificar portfolio
-            portfolio = broker_api.get_portfolio_status()
+            portfolio = await broker_api.get_portfolio_status_async()
             logger.info(f"🔧 DEBUG Portfolio success: {portfolio.get('success')}")
             
             if portfolio["success"]:
@@ -217,7 +339,7 @@ class BotOrchestrator:
             volume = bot_config.default_lot_size or 0.1
             logger.info(f"🔧 DEBUG Ejecutando orden: {symbol} {order_type} {volume} lots")
             
-            result = trading_service.place_order(
+            result = await trading_service.place_order_async(
                 symbol=symbol,
                 order_type=order_type,
                 volume=volume,
@@ -241,7 +363,7 @@ class BotOrchestrator:
         """Obtener precio actual para calcular stops"""
         try:
             from .data_fetcher import data_fetcher
-            price_data = data_fetcher.get_current_price(symbol)
+            price_data = await data_fetcher.get_current_price_async(symbol)
             return price_data.get('bid') if price_data else None
         except Exception as e:
             logger.error(f"Error obteniendo precio de {symbol}: {str(e)}")
@@ -262,17 +384,13 @@ class BotOrchestrator:
 
     async def _check_risk_limits(self, user_id: int):
         """Verificar límites de riesgo - CORREGIDO"""
-        db = None
         try:
-            db = next(get_db())
-            
-            from ..models.config_model import BotConfig
-            bot_config = db.query(BotConfig).filter(BotConfig.user_id == user_id).first()
+            bot_config = await self._load_bot_config(user_id)
             
             if not bot_config:
                 return
             
-            portfolio = broker_api.get_portfolio_status()
+            portfolio = await broker_api.get_portfolio_status_async()
             if not portfolio["success"]:
                 return
             
@@ -289,14 +407,16 @@ class BotOrchestrator:
                     
         except Exception as e:
             logger.error(f"Error verificando límites: {str(e)}")
-        finally:
-            if db:
-                db.close()  # ✅ SIEMPRE cerrar sesión
+    
+    async def _load_bot_config(self, user_id: int):
+        """BotConfig del usuario con sesión asíncrona (el objeto sigue legible tras cerrarla)"""
+        from ..models.config_model import BotConfig
+        async with async_session_scope() as db:
+            result = await db.execute(select(BotConfig).where(BotConfig.user_id == user_id).limit(1))
+            return result.scalars().first()
     
     def stop_bot(self):
-        """Detener el bot"""
-        logger.info("🛑 Deteniendo Bot Orchestrator")
+        """Detener el bot (termina el ciclo en curso y no empieza otro)"""
+        logger.info(f"🛑 Deteniendo Bot Orchestrator de usuario {self.user_id}")
         self.is_running = False
-
-# Instancia global
-bot_orchestrator = BotOrchestrator()
\ No newline at end of file
+        self.stop_event.set()
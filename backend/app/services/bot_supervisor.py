@@ -0,0 +1,82 @@
+# backend/app/services/bot_supervisor.py
+# Supervisor de bots: una instancia de BotOrchestrator y una tarea por usuario
+#
+# - Arrancar un bot que ya está corriendo no crea un segundo bucle
+# - Cada instancia tiene su estado (ciclo, historial de escaneos, tiempos)
+# - Los datos de mercado se comparten entre usuarios: caché de velas y
+#   snapshot de cartera globales, y peticiones simultáneas del mismo precio,
+#   velas o indicadores agrupadas (SingleFlight en data_fetcher y
+#   bot_analysis_service)
+
+import asyncio
+from typing import Any, Dict, Optional
+from ..core.logger import logger
+from .bot_orchestrator import BotOrchestrator
+
+
+class BotSupervisor:
+    def __init__(self):
+        self.instances: Dict[int, BotOrchestrator] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    def is_running(self, user_id: int) -> bool:
+        task = self.tasks.get(user_id)
+        return task is not None and not task.done()
+
+    def start(self, user_id: int) -> Dict[str, Any]:
+        """Arrancar el bot del usuario (sin duplicar si ya está corriendo)"""
+        if self.is_running(user_id):
+            orchestrator = self.instances[user_id]
+            if not orchestrator.is_running:
+                # Parada pedida pero el ciclo en curso aún no ha terminado: se anula la parada
+                orchestrator.is_running = True
+                orchestrator.stop_event.clear()
+            logger.info(f"🔁 Bot de usuario {user_id} ya en marcha: no se crea otro ciclo")
+            return {"success": True, "already_running": True}
+
+        orchestrator = self.instances.get(user_id) or BotOrchestrator(user_id)
+        self.instances[user_id] = orchestrator
+        task = orchestrator.start()
+        task.add_done_callback(lambda finished: self._on_done(user_id, finished))
+        self.tasks[user_id] = task
+        logger.info(f"🤖 Supervisor: bot de usuario {user_id} iniciado ({len(self.tasks)} activos)")
+        return {"success": True, "already_running": False}
+
+    def _on_done(self, user_id: int, task: asyncio.Task):
+        if self.tasks.get(user_id) is task:
+            del self.tasks[user_id]
+        if not task.cancelled() and task.exception():
+            logger.error(f"❌ Bot de usuario {user_id} terminó con error: {task.exception()}")
+
+    def stop(self, user_id: int) -> bool:
+        """Pedir la parada del bot del usuario (False si no estaba corriendo)"""
+        orchestrator = self.instances.get(user_id)
+        if orchestrator is None or not self.is_running(user_id):
+            return False
+        orchestrator.stop_bot()
+        return True
+
+    async def stop_all(self, timeout: float = 30.0):
+        """Parar todos los bots y esperar a que terminen su ciclo en curso"""
+        tasks = list(self.tasks.values())
+        for orchestrator in self.instances.values():
+            orchestrator.stop_bot()
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        logger.info(f"🛑 Supervisor: {len(done)} bots detenidos ({len(pending)} cancelados)")
+
+    def get_instance(self, user_id: int) -> Optional[BotOrchestrator]:
+        return self.instances.get(user_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Instancias activas y tiempos de ciclo de cada una"""
+        return {
+            "running": len(self.tasks),
+            "instances": {user_id: orchestrator.get_stats() for user_id, orchestrator in self.instances.items()}
+        }
+
+# Instancia global
+bot_supervisor = BotSupervisor()
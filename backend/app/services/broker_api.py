@@ -3,11 +3,15 @@
 #  Mecanismos de reintento en fallos de ejecución
 #  Verificación de márgenes y límites antes de operar
 
-import MetaTrader5 as mt5
 from typing import Dict, List, Optional
+from ..core.lazy import lazy_import
 from ..core.logger import logger
 from .data_fetcher import data_fetcher
 from .trading_service import trading_service
+from .portfolio_snapshot import portfolio_snapshots
+from .mt5_executor import mt5_executor, PRIORITY_ORDER
+
+mt5 = lazy_import("MetaTrader5")
 
 class BrokerAPI:
     def __init__(self):
@@ -19,6 +23,7 @@ class BrokerAPI:
             logger.info(f"🔗 Conectando a MT5 - Servidor: {server}, Login: {login}")
             
             success = data_fetcher.initialize_mt5(server, login, password, timeout)
+            portfolio_snapshots.invalidate()
             
             if success:
                 self.connected = True
@@ -30,11 +35,12 @@ class BrokerAPI:
                     "account_info": account_info
                 }
             else:
-                error_msg = mt5.last_error() if mt5.last_error() else "Error desconocido"
+                last_error = mt5_executor.call(PRIORITY_ORDER, mt5.last_error)
+                error_msg = last_error if last_error else "Error desconocido"
                 return {
                     "success": False,
                     "error": f"Error de conexión: {error_msg}",
-                    "error_code": mt5.last_error()
+                    "error_code": last_error
                 }
                 
         except Exception as e:
@@ -49,6 +55,7 @@ class BrokerAPI:
         try:
             data_fetcher.shutdown_mt5()
             self.connected = False
+            portfolio_snapshots.invalidate()
             return {
                 "success": True,
                 "message": "Desconectado de MT5"
@@ -110,30 +117,41 @@ class BrokerAPI:
             logger.error(f"❌ Error ejecutando trade: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def get_portfolio_status(self) -> Dict:
-        """Obtener estado completo del portfolio"""
+    # Fachada asíncrona (conexión y órdenes en el hilo MT5 con prioridad máxima)
+    async def connect_to_mt5_async(self, server: str, login: int, password: str, timeout: int = 60000) -> Dict:
+        return await mt5_executor.run(PRIORITY_ORDER, self.connect_to_mt5, server, login, password, timeout, name="connect")
+    
+    async def disconnect_mt5_async(self) -> Dict:
+        return await mt5_executor.run(PRIORITY_ORDER, self.disconnect_mt5, name="disconnect")
+    
+    async def execute_trade_async(self, symbol: str, signal: str, volume: float,
+                                  risk_percent: float = 2.0, stop_loss_pips: float = 50.0) -> Dict:
+        return await mt5_executor.run(PRIORITY_ORDER, self.execute_trade, symbol, signal, volume,
+                                      risk_percent, stop_loss_pips, name="execute_trade")
+    
+    async def get_portfolio_status_async(self, max_staleness: Optional[float] = None) -> Dict:
+        """get_portfolio_status para coroutines (no bloquea el event loop si hay que refrescar)"""
         try:
             if not self.connected:
                 return {"success": False, "error": "MT5 no conectado"}
             
-            account_info = data_fetcher.get_account_info()
-            open_positions = data_fetcher.get_open_positions()
+            return (await portfolio_snapshots.get_async(max_staleness)).to_status()
             
-            total_profit = sum(pos["profit"] for pos in open_positions)
-            total_volume = sum(pos["volume"] for pos in open_positions)
+        except Exception as e:
+            logger.error(f"Error obteniendo portfolio: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def get_portfolio_status(self, max_staleness: Optional[float] = None) -> Dict:
+        """
+        Obtener estado completo del portfolio desde la snapshot en memoria.
+        `max_staleness` (segundos) limita la antigüedad aceptada; por defecto
+        PORTFOLIO_MAX_STALENESS, con 0 se fuerza lectura del terminal.
+        """
+        try:
+            if not self.connected:
+                return {"success": False, "error": "MT5 no conectado"}
             
-            return {
-                "success": True,
-                "account_info": account_info,
-                "open_positions": open_positions,
-                "summary": {
-                    "total_positions": len(open_positions),
-                    "total_profit": total_profit,
-                    "total_volume": total_volume,
-                    "buy_positions": len([p for p in open_positions if p["type"] == "BUY"]),
-                    "sell_positions": len([p for p in open_positions if p["type"] == "SELL"])
-                }
-            }
+            return portfolio_snapshots.get(max_staleness).to_status()
             
         except Exception as e:
             logger.error(f"Error obteniendo portfolio: {str(e)}")
@@ -1,16 +1,32 @@
-import MetaTrader5 as mt5
-import pandas as pd
 from datetime import datetime, timedelta
 import time
 from typing import Dict, List, Optional
+import numpy as np
+from ..core.lazy import lazy_import
 from ..core.logger import logger
+from ..core.utils import SingleFlight
+from .bar_cache import BarCache
+from .mt5_executor import mt5_executor, PRIORITY_ORDER, PRIORITY_POSITION, PRIORITY_MARKET, PRIORITY_HISTORY
+
+mt5 = lazy_import("MetaTrader5")
+pd = lazy_import("pandas")
 
 class DataFetcher:
-    def __init__(self):
+    def __init__(self, mt5_module=None):
         self.connected = False
+        self.bar_cache = BarCache(mt5_module or mt5)
+        # El terminal MT5 no es thread-safe: toda llamada al terminal se ejecuta en el
+        # hilo único de mt5_executor (en línea si ya se está en ese hilo)
+        self.executor = mt5_executor
+        # Bots de varios usuarios piden a la vez el mismo precio o las mismas velas:
+        # las peticiones simultáneas comparten una sola llamada al terminal
+        self.single_flight = SingleFlight("MT5")
     
     def initialize_mt5(self, server: str, login: int, password: str, timeout: int = 60000) -> bool:
         """Inicializar conexión con MT5"""
+        return self.executor.call(PRIORITY_ORDER, self._initialize_mt5, server, login, password, timeout, name="initialize")
+    
+    def _initialize_mt5(self, server: str, login: int, password: str, timeout: int) -> bool:
         try:
             if not mt5.initialize():
                 logger.error(f"Error inicializando MT5: {mt5.last_error()}")
@@ -20,6 +36,7 @@ class DataFetcher:
             connected = mt5.login(login=login, password=password, server=server, timeout=timeout)
             if connected:
                 self.connected = True
+                self.bar_cache.invalidate()
                 logger.info(f"✅ Conectado a MT5 - Cuenta: {login}, Servidor: {server}")
                 return True
             else:
@@ -33,8 +50,9 @@ class DataFetcher:
     def shutdown_mt5(self):
         """Cerrar conexión con MT5"""
         if self.connected:
-            mt5.shutdown()
+            self.executor.call(PRIORITY_ORDER, mt5.shutdown)
             self.connected = False
+            self.bar_cache.invalidate()
             logger.info("🔌 Conexión MT5 cerrada")
     
     def get_account_info(self) -> Optional[Dict]:
@@ -43,7 +61,7 @@ class DataFetcher:
             return None
             
         try:
-            account_info = mt5.account_info()
+            account_info = self.executor.call(PRIORITY_POSITION, mt5.account_info)
             if account_info is None:
                 return None
                 
@@ -62,13 +80,15 @@ class DataFetcher:
             logger.error(f"Error obteniendo info cuenta: {str(e)}")
             return None
     
-    def get_market_data(self, symbol: str, timeframe: int = mt5.TIMEFRAME_M5, count: int = 100) -> Optional[pd.DataFrame]:
+    def get_market_data(self, symbol: str, timeframe: Optional[int] = None, count: int = 100) -> Optional["pd.DataFrame"]:
         """Obtener datos de mercado para un símbolo"""
+        timeframe = mt5.TIMEFRAME_M5 if timeframe is None else timeframe
         if not self.connected:
             return None
             
         try:
-            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+            rates = self.executor.call(PRIORITY_HISTORY, self.bar_cache.get, symbol, timeframe, count,
+                                       name="copy_rates_from_pos")
             if rates is None:
                 return None
                 
@@ -79,13 +99,43 @@ class DataFetcher:
             logger.error(f"Error obteniendo datos mercado {symbol}: {str(e)}")
             return None
     
+    def get_rates(self, symbol: str, timeframe: Optional[int] = None, count: int = 100) -> Optional[np.ndarray]:
+        """
+        Velas como array estructurado de MT5 (vista de la caché, sin DataFrame).
+        La vista se reescribe en la siguiente descarga del hilo MT5: fuera de ese
+        hilo usar get_rates_async, que devuelve una copia.
+        """
+        timeframe = mt5.TIMEFRAME_M5 if timeframe is None else timeframe
+        if not self.connected:
+            return None
+            
+        try:
+            return self.executor.call(PRIORITY_HISTORY, self.bar_cache.get, symbol, timeframe, count,
+                                      name="copy_rates_from_pos")
+        except Exception as e:
+            logger.error(f"Error obteniendo velas {symbol}: {str(e)}")
+            return None
+    
+    def _get_rates_copy(self, symbol: str, timeframe: Optional[int] = None, count: int = 100) -> Optional[np.ndarray]:
+        """Copia de solo lectura hecha en el hilo MT5 (ninguna descarga puede reescribir el buffer a la vez)"""
+        rates = self.get_rates(symbol, timeframe, count)
+        if rates is None:
+            return None
+        rates = rates.copy()
+        rates.flags.writeable = False  # SingleFlight la comparte entre corrutinas
+        return rates
+    
+    def get_symbol_info(self, symbol: str):
+        """Información del símbolo en MT5 (None si no existe)"""
+        return self.executor.call(PRIORITY_MARKET, mt5.symbol_info, symbol)
+    
     def get_current_price(self, symbol: str) -> Optional[Dict]:
         """Obtener precio actual de un símbolo"""
         if not self.connected:
             return None
             
         try:
-            tick = mt5.symbol_info_tick(symbol)
+            tick = self.executor.call(PRIORITY_MARKET, mt5.symbol_info_tick, symbol)
             if tick is None:
                 return None
                 
@@ -108,7 +158,7 @@ class DataFetcher:
             return []
             
         try:
-            symbols = mt5.symbols_get()
+            symbols = self.executor.call(PRIORITY_HISTORY, mt5.symbols_get)
             return [s.name for s in symbols]
         except Exception as e:
             logger.error(f"Error obteniendo símbolos: {str(e)}")
@@ -120,7 +170,7 @@ class DataFetcher:
             return []
             
         try:
-            positions = mt5.positions_get()
+            positions = self.executor.call(PRIORITY_POSITION, mt5.positions_get)
             if positions is None:
                 return []
                 
@@ -143,5 +193,27 @@ class DataFetcher:
             logger.error(f"Error obteniendo posiciones: {str(e)}")
             return []
 
+    # Fachada asíncrona: el método completo se ejecuta en el hilo MT5 y el
+    # coroutine espera sin bloquear el event loop
+    async def get_current_price_async(self, symbol: str) -> Optional[Dict]:
+        return await self.single_flight.do(
+            ("price", symbol), lambda: self.executor.run(PRIORITY_MARKET, self.get_current_price, symbol)
+        )
+    
+    async def get_market_data_async(self, symbol: str, timeframe: Optional[int] = None, count: int = 100) -> Optional["pd.DataFrame"]:
+        return await self.executor.run(PRIORITY_HISTORY, self.get_market_data, symbol, timeframe, count)
+    
+    async def get_rates_async(self, symbol: str, timeframe: Optional[int] = None, count: int = 100) -> Optional[np.ndarray]:
+        return await self.single_flight.do(
+            ("rates", symbol, timeframe, count),
+            lambda: self.executor.run(PRIORITY_HISTORY, self._get_rates_copy, symbol, timeframe, count, name="get_rates")
+        )
+    
+    async def get_symbols_async(self) -> List[str]:
+        return await self.executor.run(PRIORITY_HISTORY, self.get_symbols)
+    
+    async def get_open_positions_async(self) -> List[Dict]:
+        return await self.executor.run(PRIORITY_POSITION, self.get_open_positions)
+
 # Instancia global
 data_fetcher = DataFetcher()
\ No newline at end of file
@@ -26,11 +26,110 @@ class HealthService:
             logger.error(f"❌ Health check MT5 falló: {str(e)}")
             return False
     
+    @staticmethod
+    def get_cache_stats():
+        """Contadores de la caché de velas MT5"""
+        try:
+            from .data_fetcher import data_fetcher
+            return data_fetcher.bar_cache.get_stats()
+        except Exception as e:
+            logger.error(f"❌ Health check caché falló: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def get_portfolio_snapshot_stats():
+        """Lecturas servidas desde la snapshot de portfolio frente a llamadas al terminal"""
+        try:
+            from .portfolio_snapshot import portfolio_snapshots
+            return portfolio_snapshots.get_stats()
+        except Exception as e:
+            logger.error(f"❌ Health check snapshot portfolio falló: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def get_price_stream_stats():
+        """Clientes WebSocket de precios, lecturas de ticks y mensajes enviados"""
+        try:
+            from .price_stream import price_stream
+            return price_stream.get_stats()
+        except Exception as e:
+            logger.error(f"❌ Health check streaming de precios falló: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def get_market_recorder_stats():
+        """Ticks y velas grabados en disco y días compactados"""
+        try:
+            from .market_recorder import market_recorder
+            return market_recorder.get_stats()
+        except Exception as e:
+            logger.error(f"❌ Health check grabación de mercado falló: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def get_executor_stats():
+        """Cola y latencias del ejecutor MT5 de hilo único"""
+        try:
+            from .mt5_executor import mt5_executor
+            return mt5_executor.get_stats()
+        except Exception as e:
+            logger.error(f"❌ Health check ejecutor MT5 falló: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def get_pipeline_stats():
+        """Duración por etapa del pipeline de decisión (datos, noticias, indicadores, IA, ejecución)"""
+        try:
+            from ..core.utils import pipeline_timings
+            return pipeline_timings.get_stats()
+        except Exception as e:
+            logger.error(f"❌ Health check tiempos del pipeline falló: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def get_bot_stats():
+        """Bots en marcha (uno por usuario) y duración de sus ciclos"""
+        try:
+            from .bot_supervisor import bot_supervisor
+            return bot_supervisor.get_stats()
+        except Exception as e:
+            logger.error(f"❌ Health check bots falló: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def get_auth_cache_stats():
+        """Aciertos de la caché del usuario autenticado"""
+        try:
+            from ..core.security import principal_cache
+            return principal_cache.get_stats()
+        except Exception as e:
+            logger.error(f"❌ Health check caché de autenticación falló: {str(e)}")
+            return {}
+    
+    @staticmethod
+    def get_write_buffer_stats():
+        """Escrituras diferidas del historial pendientes y escritas"""
+        try:
+            from .write_buffer import write_buffer
+            return write_buffer.get_stats()
+        except Exception as e:
+            logger.error(f"❌ Health check escritura diferida falló: {str(e)}")
+            return {}
+    
     @staticmethod
     def get_system_status():
         """Obtener estado completo del sistema"""
         return {
             "database": HealthService.check_database(),
             "metatrader": HealthService.check_mt5_connection(),
+            "bar_cache": HealthService.get_cache_stats(),
+            "portfolio_snapshot": HealthService.get_portfolio_snapshot_stats(),
+            "mt5_executor": HealthService.get_executor_stats(),
+            "price_stream": HealthService.get_price_stream_stats(),
+            "market_recorder": HealthService.get_market_recorder_stats(),
+            "pipeline": HealthService.get_pipeline_stats(),
+            "bots": HealthService.get_bot_stats(),
+            "auth_cache": HealthService.get_auth_cache_stats(),
+            "write_buffer": HealthService.get_write_buffer_stats(),
             "timestamp": datetime.now().isoformat()
         }
\ No newline at end of file
@@ -0,0 +1,353 @@
+# backend/app/services/indicator_engine.py
+# Motor de indicadores INCREMENTAL por (símbolo, timeframe)
+# Mantiene sumas móviles, estados EMA y ventanas min/max para actualizar
+# RSI, MACD, MA20/50/200, Bollinger, Estocástico y ATR en O(1) por vela cerrada
+# La carga inicial se calcula vectorizada con la librería de indicadores
+
+import math
+import threading
+from collections import deque
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from ..core.logger import logger
+from . import indicators
+from .indicators import (
+    RSI_PERIOD, MACD_FAST, MACD_SLOW, MACD_SIGNAL, BB_PERIOD,
+    STOCH_PERIOD, SR_PERIOD, ATR_PERIOD, MA_PERIODS
+)
+
+# Cada cuántas velas se recalculan las sumas desde cero para evitar deriva numérica
+RESYNC_EVERY = 1000
+
+
+class _EwmState:
+    """EMA equivalente a pandas ewm(span=N, adjust=True)"""
+
+    def __init__(self, span: int):
+        self.beta = 1.0 - 2.0 / (span + 1.0)
+        self.num = 0.0
+        self.den = 0.0
+
+    def update(self, value: float) -> float:
+        self.num = value + self.beta * self.num
+        self.den = 1.0 + self.beta * self.den
+        return self.num / self.den
+
+    def peek(self, value: float) -> float:
+        """Valor que tendría la EMA con `value` sin modificar el estado"""
+        return (value + self.beta * self.num) / (1.0 + self.beta * self.den)
+
+    @property
+    def value(self) -> float:
+        return self.num / self.den if self.den else math.nan
+
+
+class _RollingSum:
+    """Suma (y suma de cuadrados) de las últimas `size` velas cerradas"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def load(self, values: np.ndarray):
+        """Cargar la ventana desde un array (carga inicial vectorizada)"""
+        self.values = deque(values[-self.size:].tolist(), maxlen=self.size)
+        self.resync()
+
+    def push(self, value: float):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+    def resync(self):
+        self.total = math.fsum(self.values)
+        self.total_sq = math.fsum(v * v for v in self.values)
+
+
+class _RollingExtreme:
+    """Mínimo/máximo de las últimas `size` velas cerradas con deque monotónica"""
+
+    def __init__(self, size: int, is_max: bool):
+        self.size = size
+        self.is_max = is_max
+        self.window = deque()  # (índice, valor)
+
+    def push(self, index: int, value: float):
+        if self.is_max:
+            while self.window and self.window[-1][1] <= value:
+                self.window.pop()
+        else:
+            while self.window and self.window[-1][1] >= value:
+                self.window.pop()
+        self.window.append((index, value))
+        while self.window[0][0] <= index - self.size:
+            self.window.popleft()
+
+    def peek(self, value: float) -> float:
+        if not self.window:
+            return value
+        current = self.window[0][1]
+        return max(current, value) if self.is_max else min(current, value)
+
+
+class IncrementalIndicatorState:
+    """
+    Estado de indicadores para un (símbolo, timeframe).
+
+    Solo las velas CERRADAS modifican el estado. La vela en formación se
+    evalúa con `snapshot()` sin mutar nada, así que llamar varias veces dentro
+    de la misma vela cuesta O(1) y no acumula error.
+
+    Todas las ventanas guardan N-1 velas cerradas: la vela en formación
+    completa la ventana de N igual que hace `rolling(N)` en pandas.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bars = 0
+        self.last_time: Optional[int] = None
+        self.last_close: Optional[float] = None
+
+        self.ma_sums = {period: _RollingSum(period - 1) for period in MA_PERIODS}
+        self.bb_sum = _RollingSum(BB_PERIOD - 1)
+        self.gains = _RollingSum(RSI_PERIOD - 1)
+        self.losses = _RollingSum(RSI_PERIOD - 1)
+        self.true_ranges = _RollingSum(ATR_PERIOD - 1)
+
+        self.ema_fast = _EwmState(MACD_FAST)
+        self.ema_slow = _EwmState(MACD_SLOW)
+        self.ema_signal = _EwmState(MACD_SIGNAL)
+
+        self.stoch_low = _RollingExtreme(STOCH_PERIOD - 1, is_max=False)
+        self.stoch_high = _RollingExtreme(STOCH_PERIOD - 1, is_max=True)
+        self.support = _RollingExtreme(SR_PERIOD - 1, is_max=False)
+        self.resistance = _RollingExtreme(SR_PERIOD - 1, is_max=True)
+
+    def _true_range(self, high: float, low: float) -> float:
+        if self.last_close is None:
+            return high - low
+        return max(high - low, abs(high - self.last_close), abs(low - self.last_close))
+
+    def seed(self, times: np.ndarray, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray):
+        """
+        Construir el estado desde un bloque de velas cerradas de una vez.
+
+        El trabajo O(n) (EMAs, diferencias, true range) se hace con NumPy;
+        después solo se guardan las colas que necesitan las ventanas.
+        """
+        self.reset()
+        count = len(closes)
+        if count == 0:
+            return
+        highs = indicators.as_float_array(highs)
+        lows = indicators.as_float_array(lows)
+        closes = indicators.as_float_array(closes)
+
+        delta = indicators.price_deltas(closes)
+        self.gains.load(np.where(delta > 0, delta, 0.0))
+        self.losses.load(np.where(delta < 0, -delta, 0.0))
+        self.true_ranges.load(indicators.true_range(highs, lows, closes))
+
+        for rolling in self.ma_sums.values():
+            rolling.load(closes)
+        self.bb_sum.load(closes)
+
+        macd_line = indicators.ewm_mean(closes, MACD_FAST) - indicators.ewm_mean(closes, MACD_SLOW)
+        self.ema_fast.num, self.ema_fast.den = indicators.ewm_state(closes, MACD_FAST)
+        self.ema_slow.num, self.ema_slow.den = indicators.ewm_state(closes, MACD_SLOW)
+        self.ema_signal.num, self.ema_signal.den = indicators.ewm_state(macd_line, MACD_SIGNAL)
+
+        for extreme, values in ((self.stoch_low, lows), (self.stoch_high, highs),
+                                (self.support, lows), (self.resistance, highs)):
+            start = max(count - extreme.size, 0)
+            for index in range(start, count):
+                extreme.push(index, float(values[index]))
+
+        self.bars = count
+        self.last_time = int(times[-1])
+        self.last_close = float(closes[-1])
+
+    def push_closed_bar(self, bar_time: int, high: float, low: float, close: float):
+        """Incorporar una vela cerrada - O(1) amortizado"""
+        delta = close - self.last_close if self.last_close is not None else 0.0
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        self.true_ranges.push(self._true_range(high, low))
+
+        for rolling in self.ma_sums.values():
+            rolling.push(close)
+        self.bb_sum.push(close)
+
+        fast = self.ema_fast.update(close)
+        slow = self.ema_slow.update(close)
+        self.ema_signal.update(fast - slow)
+
+        self.stoch_low.push(self.bars, low)
+        self.stoch_high.push(self.bars, high)
+        self.support.push(self.bars, low)
+        self.resistance.push(self.bars, high)
+
+        self.bars += 1
+        self.last_time = bar_time
+        self.last_close = close
+
+        if self.bars % RESYNC_EVERY == 0:
+            for rolling in (*self.ma_sums.values(), self.bb_sum, self.gains, self.losses, self.true_ranges):
+                rolling.resync()
+
+    def snapshot(self, high: float, low: float, close: float) -> Dict[str, float]:
+        """Indicadores incluyendo la vela en formación (sin modificar el estado)"""
+        total = self.bars + 1
+        nan = math.nan
+
+        # RSI (medias simples como la versión pandas, no Wilder)
+        if total >= RSI_PERIOD:
+            delta = close - self.last_close if self.last_close is not None else 0.0
+            gain = (self.gains.total + (delta if delta > 0 else 0.0)) / RSI_PERIOD
+            loss = (self.losses.total + (-delta if delta < 0 else 0.0)) / RSI_PERIOD
+            if loss == 0:
+                rsi = 100.0 if gain > 0 else nan
+            else:
+                rsi = 100.0 - (100.0 / (1.0 + gain / loss))
+        else:
+            rsi = nan
+
+        # MACD
+        fast = self.ema_fast.peek(close)
+        slow = self.ema_slow.peek(close)
+        macd_line = fast - slow
+        signal_line = self.ema_signal.peek(macd_line)
+
+        # Medias móviles
+        moving_averages = {}
+        for period, rolling in self.ma_sums.items():
+            moving_averages[period] = (rolling.total + close) / period if total >= period else nan
+
+        # Bollinger (desviación estándar muestral, ddof=1)
+        if total >= BB_PERIOD:
+            sma = (self.bb_sum.total + close) / BB_PERIOD
+            sum_sq = self.bb_sum.total_sq + close * close
+            variance = max((sum_sq - BB_PERIOD * sma * sma) / (BB_PERIOD - 1), 0.0)
+            std = math.sqrt(variance)
+            bb_upper, bb_lower = sma + 2 * std, sma - 2 * std
+        else:
+            bb_upper = bb_lower = nan
+
+        # Estocástico
+        if total >= STOCH_PERIOD:
+            lowest = self.stoch_low.peek(low)
+            highest = self.stoch_high.peek(high)
+            spread = highest - lowest
+            stochastic = 100.0 * (close - lowest) / spread if spread else nan
+        else:
+            stochastic = nan
+
+        # ATR (media simple del true range)
+        if total >= ATR_PERIOD:
+            atr = (self.true_ranges.total + self._true_range(high, low)) / ATR_PERIOD
+        else:
+            atr = nan
+
+        # Soporte / resistencia (últimas 20 velas, como tail(20))
+        support = self.support.peek(low)
+        resistance = self.resistance.peek(high)
+
+        return {
+            "rsi": rsi,
+            "macd_line": macd_line,
+            "macd_signal": signal_line,
+            "macd": macd_line - signal_line,
+            "ma_20": moving_averages[20],
+            "ma_50": moving_averages[50],
+            "ma_200": moving_averages[200],
+            "support": support,
+            "resistance": resistance,
+            "bollinger_upper": bb_upper,
+            "bollinger_lower": bb_lower,
+            "stochastic": stochastic,
+            "atr": atr,
+            "close": close
+        }
+
+
+class IndicatorEngine:
+    """Registro de estados incrementales por (símbolo, timeframe)"""
+
+    def __init__(self):
+        self.states: Dict[Tuple[str, int], IncrementalIndicatorState] = {}
+        self.stats = {"incremental_updates": 0, "full_rebuilds": 0, "bars_processed": 0}
+        # Los análisis calculan indicadores desde hilos distintos (asyncio.to_thread)
+        self._lock = threading.Lock()
+
+    def is_warm(self, symbol: str, timeframe: int) -> bool:
+        state = self.states.get((symbol, timeframe))
+        return state is not None and state.last_time is not None
+
+    def update(self, symbol: str, timeframe: int, times: Sequence[int], highs: Sequence[float],
+               lows: Sequence[float], closes: Sequence[float]) -> Optional[Dict[str, float]]:
+        """
+        Actualizar con las velas recibidas de MT5 (la última es la vela en formación)
+        y devolver los indicadores actuales.
+
+        Devuelve None si el bloque recibido no enlaza con el estado guardado
+        (hueco de velas) y no trae historia suficiente para reconstruir.
+        """
+        with self._lock:
+            return self._update(symbol, timeframe, times, highs, lows, closes)
+    
+    def _update(self, symbol: str, timeframe: int, times: Sequence[int], highs: Sequence[float],
+                lows: Sequence[float], closes: Sequence[float]) -> Optional[Dict[str, float]]:
+        count = len(closes)
+        if count == 0:
+            return None
+
+        key = (symbol, timeframe)
+        state = self.states.get(key)
+        if state is None:
+            state = IncrementalIndicatorState()
+            self.states[key] = state
+
+        closed = count - 1
+        last_time = state.last_time
+
+        if last_time is not None and int(times[0]) <= last_time:
+            # El bloque enlaza con el estado: solo procesar velas cerradas nuevas
+            start = closed
+            while start > 0 and int(times[start - 1]) > last_time:
+                start -= 1
+            self.stats["incremental_updates"] += 1
+        else:
+            if last_time is not None and count < MA_PERIODS[-1]:
+                # Hueco respecto al estado y sin historia suficiente: pedir recarga completa
+                logger.info(f"🔁 Indicadores {symbol}: hueco de velas, se requiere recarga completa")
+                return None
+            state.seed(times[:closed], highs[:closed], lows[:closed], closes[:closed])
+            start = closed
+            self.stats["full_rebuilds"] += 1
+            self.stats["bars_processed"] += closed
+
+        for i in range(start, closed):
+            state.push_closed_bar(int(times[i]), float(highs[i]), float(lows[i]), float(closes[i]))
+        self.stats["bars_processed"] += max(closed - start, 0)
+
+        return state.snapshot(float(highs[-1]), float(lows[-1]), float(closes[-1]))
+
+    def reset(self, symbol: Optional[str] = None):
+        """Olvidar el estado de un símbolo (o de todos)"""
+        with self._lock:
+            if symbol is None:
+                self.states.clear()
+            else:
+                for key in [k for k in self.states if k[0] == symbol]:
+                    del self.states[key]
+
+# Instancia global
+indicator_engine = IndicatorEngine()
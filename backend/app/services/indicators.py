@@ -0,0 +1,340 @@
+# backend/app/services/indicators.py
+# Librería ÚNICA de indicadores técnicos vectorizados con NumPy
+# Usada por AnalysisService y BotAnalysisService (vía el motor incremental)
+# Todas las funciones trabajan sobre arrays float64 contiguos, sin pandas
+
+import math
+from typing import Dict, Any, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BB_PERIOD = 20
+BB_STD = 2.0
+STOCH_PERIOD = 14
+SR_PERIOD = 20
+ATR_PERIOD = 14
+MA_PERIODS = (20, 50, 200)
+
+# Exponente máximo de beta^-k dentro de un bloque de la EMA vectorizada
+_EWM_MAX_EXPONENT = 50.0
+
+
+def as_float_array(values) -> np.ndarray:
+    """Convertir a array float64 contiguo (sin copia si ya lo es)"""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _ewm_block_size(beta: float) -> int:
+    if beta <= 0.0:
+        return 1
+    return max(1, int(_EWM_MAX_EXPONENT / -math.log(beta)))
+
+
+def _ewm_numerators(values: np.ndarray, beta: float, num: float = 0.0) -> np.ndarray:
+    """
+    Numeradores de la EMA ajustada: num_t = x_t + beta * num_{t-1}.
+
+    Se resuelve por bloques con sumas acumuladas escaladas por beta^-k,
+    limitando el exponente para no perder precisión ni desbordar.
+    """
+    out = np.empty_like(values)
+    block = _ewm_block_size(beta)
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        k = np.arange(len(chunk), dtype=np.float64)
+        powers = beta ** k
+        out[start:start + len(chunk)] = powers * (beta * num + np.cumsum(chunk / powers))
+        num = out[start + len(chunk) - 1]
+    return out
+
+
+def ewm_mean(values, span: int) -> np.ndarray:
+    """Equivalente a pandas Series.ewm(span=span).mean() (adjust=True)"""
+    values = as_float_array(values)
+    beta = 1.0 - 2.0 / (span + 1.0)
+    numerators = _ewm_numerators(values, beta)
+    denominators = (1.0 - beta ** np.arange(1, len(values) + 1, dtype=np.float64)) / (1.0 - beta)
+    return numerators / denominators
+
+
+def ewm_state(values, span: int) -> Tuple[float, float]:
+    """Estado final (numerador, denominador) de la EMA para continuar en incremental"""
+    values = as_float_array(values)
+    if len(values) == 0:
+        return 0.0, 0.0
+    beta = 1.0 - 2.0 / (span + 1.0)
+    num = float(_ewm_numerators(values, beta)[-1])
+    den = (1.0 - beta ** len(values)) / (1.0 - beta)
+    return num, den
+
+
+def rolling_mean(values, period: int) -> np.ndarray:
+    values = as_float_array(values)
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = sliding_window_view(values, period).mean(axis=1)
+    return out
+
+
+def rolling_std(values, period: int) -> np.ndarray:
+    """Desviación estándar muestral (ddof=1) como pandas rolling().std()"""
+    values = as_float_array(values)
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = sliding_window_view(values, period).std(axis=1, ddof=1)
+    return out
+
+
+def rolling_min(values, period: int) -> np.ndarray:
+    values = as_float_array(values)
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = sliding_window_view(values, period).min(axis=1)
+    return out
+
+
+def rolling_max(values, period: int) -> np.ndarray:
+    values = as_float_array(values)
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = sliding_window_view(values, period).max(axis=1)
+    return out
+
+
+def price_deltas(close) -> np.ndarray:
+    """Diferencias entre cierres; la primera es 0 como delta.where(...) en pandas"""
+    close = as_float_array(close)
+    return np.diff(close, prepend=close[:1])
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = as_float_array(high), as_float_array(low), as_float_array(close)
+    tr = high - low
+    if len(close) > 1:
+        previous = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    return tr
+
+
+def _rsi_from_means(gain, loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 - (100.0 / (1.0 + gain / loss))
+
+
+def rsi(close, period: int = RSI_PERIOD) -> np.ndarray:
+    """RSI con medias simples (misma fórmula que la versión pandas original)"""
+    delta = price_deltas(close)
+    gain = rolling_mean(np.where(delta > 0, delta, 0.0), period)
+    loss = rolling_mean(np.where(delta < 0, -delta, 0.0), period)
+    return _rsi_from_means(gain, loss)
+
+
+def macd(close, fast: int = MACD_FAST, slow: int = MACD_SLOW,
+         signal: int = MACD_SIGNAL) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    line = ewm_mean(close, fast) - ewm_mean(close, slow)
+    signal_line = ewm_mean(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger_bands(close, period: int = BB_PERIOD, num_std: float = BB_STD) -> Tuple[np.ndarray, np.ndarray]:
+    sma = rolling_mean(close, period)
+    std = rolling_std(close, period)
+    return sma + num_std * std, sma - num_std * std
+
+
+def stochastic(high, low, close, period: int = STOCH_PERIOD) -> np.ndarray:
+    lowest = rolling_min(low, period)
+    highest = rolling_max(high, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 * (as_float_array(close) - lowest) / (highest - lowest)
+
+
+def atr(high, low, close, period: int = ATR_PERIOD) -> np.ndarray:
+    """Average True Range con media simple"""
+    return rolling_mean(true_range(high, low, close), period)
+
+
+def compute_indicator_series(high, low, close) -> Dict[str, np.ndarray]:
+    """Series completas de todos los indicadores (para backtesting)"""
+    high, low, close = as_float_array(high), as_float_array(low), as_float_array(close)
+    line, signal_line, histogram = macd(close)
+    bb_upper, bb_lower = bollinger_bands(close)
+    series = {
+        "rsi": rsi(close),
+        "macd_line": line,
+        "macd_signal": signal_line,
+        "macd": histogram,
+        "bollinger_upper": bb_upper,
+        "bollinger_lower": bb_lower,
+        "stochastic": stochastic(high, low, close),
+        "support": rolling_min(low, SR_PERIOD),
+        "resistance": rolling_max(high, SR_PERIOD),
+        "atr": atr(high, low, close),
+        "close": close
+    }
+    for period in MA_PERIODS:
+        series[f"ma_{period}"] = rolling_mean(close, period)
+    return series
+
+
+def _tail_mean(values: np.ndarray, period: int) -> float:
+    return float(values[-period:].mean()) if len(values) >= period else math.nan
+
+
+def compute_indicators(high, low, close) -> Dict[str, float]:
+    """
+    Valores actuales (última vela) de todos los indicadores en una sola pasada.
+
+    Solo las EMAs del MACD recorren toda la serie; el resto trabaja sobre las
+    colas necesarias de los arrays, sin construir series intermedias.
+    """
+    high, low, close = as_float_array(high), as_float_array(low), as_float_array(close)
+    nan = math.nan
+    count = len(close)
+    if count == 0:
+        raise ValueError("Se necesita al menos una vela")
+
+    # RSI
+    if count >= RSI_PERIOD:
+        delta = price_deltas(close[-(RSI_PERIOD + 1):])[-RSI_PERIOD:]
+        gain = float(np.where(delta > 0, delta, 0.0).mean())
+        loss = float(np.where(delta < 0, -delta, 0.0).mean())
+        rsi_value = float(_rsi_from_means(np.float64(gain), np.float64(loss)))
+    else:
+        rsi_value = nan
+
+    # MACD
+    line = ewm_mean(close, MACD_FAST) - ewm_mean(close, MACD_SLOW)
+    signal_num, signal_den = ewm_state(line, MACD_SIGNAL)
+    macd_line = float(line[-1])
+    macd_signal = signal_num / signal_den
+
+    # Bollinger
+    if count >= BB_PERIOD:
+        window = close[-BB_PERIOD:]
+        sma = float(window.mean())
+        std = float(window.std(ddof=1))
+        bb_upper, bb_lower = sma + BB_STD * std, sma - BB_STD * std
+    else:
+        bb_upper = bb_lower = nan
+
+    # Estocástico
+    if count >= STOCH_PERIOD:
+        lowest = float(low[-STOCH_PERIOD:].min())
+        highest = float(high[-STOCH_PERIOD:].max())
+        spread = highest - lowest
+        stochastic_value = 100.0 * (float(close[-1]) - lowest) / spread if spread else nan
+    else:
+        stochastic_value = nan
+
+    # ATR
+    if count >= ATR_PERIOD:
+        tail = slice(-(ATR_PERIOD + 1), None)
+        atr_value = float(true_range(high[tail], low[tail], close[tail])[-ATR_PERIOD:].mean())
+    else:
+        atr_value = nan
+
+    return {
+        "rsi": rsi_value,
+        "macd_line": macd_line,
+        "macd_signal": macd_signal,
+        "macd": macd_line - macd_signal,
+        "ma_20": _tail_mean(close, 20),
+        "ma_50": _tail_mean(close, 50),
+        "ma_200": _tail_mean(close, 200),
+        "support": float(low[-SR_PERIOD:].min()),
+        "resistance": float(high[-SR_PERIOD:].max()),
+        "bollinger_upper": bb_upper,
+        "bollinger_lower": bb_lower,
+        "stochastic": stochastic_value,
+        "atr": atr_value,
+        "close": float(close[-1])
+    }
+
+
+def format_indicators(raw: Dict[str, float]) -> Dict[str, Any]:
+    """Redondear y aplicar los fallbacks históricos de AnalysisService"""
+    close = raw["close"]
+
+    def value(key: str, digits: int, fallback: float) -> float:
+        number = raw.get(key, math.nan)
+        return round(number, digits) if math.isfinite(number) else fallback
+
+    return {
+        "rsi": value("rsi", 2, 50.0),
+        "macd": value("macd", 6, 0.0),
+        "ma_20": value("ma_20", 5, close),
+        "ma_50": value("ma_50", 5, close),
+        "ma_200": value("ma_200", 5, close),
+        "support": value("support", 5, close * 0.99),
+        "resistance": value("resistance", 5, close * 1.01),
+        "bollinger_upper": value("bollinger_upper", 5, close * 1.02),
+        "bollinger_lower": value("bollinger_lower", 5, close * 0.98),
+        "stochastic": value("stochastic", 2, 50.0),
+        "atr": value("atr", 6, 0.0),
+        "current_price": round(close, 5)
+    }
+
+
+def _pandas_reference(high, low, close) -> Dict[str, float]:
+    """Ruta pandas original (una Series por indicador) para el benchmark"""
+    import pandas as pd
+
+    closes, highs, lows = pd.Series(close), pd.Series(high), pd.Series(low)
+    delta = closes.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rsi_series = 100 - (100 / (1 + gain / loss))
+    macd_line = closes.ewm(span=12).mean() - closes.ewm(span=26).mean()
+    signal_line = macd_line.ewm(span=9).mean()
+    sma = closes.rolling(20).mean()
+    std = closes.rolling(20).std()
+    lowest = lows.rolling(14).min()
+    highest = highs.rolling(14).max()
+    stoch = 100 * ((closes - lowest) / (highest - lowest))
+    return {
+        "rsi": rsi_series.iloc[-1],
+        "macd": (macd_line - signal_line).iloc[-1],
+        "ma_20": closes.rolling(20).mean().iloc[-1],
+        "ma_50": closes.rolling(50).mean().iloc[-1],
+        "ma_200": closes.rolling(200).mean().iloc[-1],
+        "support": lows.tail(20).min(),
+        "resistance": highs.tail(20).max(),
+        "bollinger_upper": (sma + std * 2).iloc[-1],
+        "bollinger_lower": (sma - std * 2).iloc[-1],
+        "stochastic": stoch.iloc[-1]
+    }
+
+
+def benchmark(bars: int = 10_000, repeat: int = 50) -> Dict[str, float]:
+    """Micro-benchmark: librería NumPy vs ruta pandas sobre `bars` velas"""
+    import timeit
+
+    rng = np.random.default_rng(42)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0005, bars))
+    high = close + rng.uniform(0, 0.0004, bars)
+    low = close - rng.uniform(0, 0.0004, bars)
+
+    numpy_result = compute_indicators(high, low, close)
+    pandas_result = _pandas_reference(high, low, close)
+    max_diff = max(abs(numpy_result[key] - pandas_result[key]) for key in pandas_result)
+
+    numpy_time = timeit.timeit(lambda: compute_indicators(high, low, close), number=repeat) / repeat
+    pandas_time = timeit.timeit(lambda: _pandas_reference(high, low, close), number=repeat) / repeat
+
+    return {
+        "bars": bars,
+        "numpy_ms": round(numpy_time * 1000, 3),
+        "pandas_ms": round(pandas_time * 1000, 3),
+        "speedup": round(pandas_time / numpy_time, 1),
+        "max_abs_diff": max_diff
+    }
+
+
+if __name__ == "__main__":
+    # python -m app.services.indicators
+    print(benchmark())
@@ -3,18 +3,21 @@ import asyncio
 import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from ..core.logger import logger
-from ..database.db_connection import get_db
+from ..core.utils import rate_budgets
+from ..database.db_connection import async_session_scope
 from .news_service import news_service
+from .write_buffer import write_buffer
 from ..models import MarketNews, NewsAnalysisHistory
 
 class IntelligentNewsService:
     def __init__(self):
         self.news_cache = {}  # Cache simple en memoria
         self.news_cache_hours = 6
+        self.max_news_per_symbol = 5  # Noticias por símbolo en caché y en el contexto de la IA
         self.last_api_call = 0  # Timestamp de última llamada a API
-        self.min_call_interval = 120  # 2 minutos entre llamadas a Finnhub
         self.request_queue = asyncio.Queue()
         self.is_processing = False
     
@@ -60,14 +63,8 @@ class IntelligentNewsService:
             return self._get_fallback_news_context(symbol)
     
     async def _wait_for_api_slot(self):
-        """Esperar hasta que podamos hacer una nueva llamada a la API"""
-        current_time = time.time()
-        time_since_last_call = current_time - self.last_api_call
-        
-        if time_since_last_call < self.min_call_interval:
-            wait_time = self.min_call_interval - time_since_last_call
-            logger.info(f"⏳ Rate limiting: Esperando {wait_time:.1f} segundos antes de nueva llamada a API")
-            await asyncio.sleep(wait_time)
+        """Esperar turno en el presupuesto de peticiones de noticias (token bucket)"""
+        await rate_budgets.acquire("news")
         
     def _is_relevant_news(self, news: Dict, keywords: List[str]) -> bool:
         """Verificar si la noticia es relevante"""
@@ -106,7 +103,8 @@ class IntelligentNewsService:
             "market_context": "\n".join(context_parts),
             "news_count": len(news_list),
             "overall_sentiment": overall_sentiment,
-            "symbol": symbol
+            "symbol": symbol,
+            "news_ids": [news.get('id') for news in news_list]
         }
         
     def _analyze_news_sentiment(self, news: Dict) -> str:
@@ -128,23 +126,20 @@ class IntelligentNewsService:
     
     async def _get_cached_news(self, symbol: str) -> List[MarketNews]:
         """Obtener noticias en caché de la base de datos"""
-        db = next(get_db())
-        try:
-            # Obtener noticias de las últimas 24 horas, ordenadas por relevancia
-            cutoff_time = datetime.now() - timedelta(hours=24)
-            
-            news = db.query(MarketNews).filter(
-                MarketNews.symbol == symbol,
-                MarketNews.published_at >= cutoff_time
-            ).order_by(
-                MarketNews.impact_level.desc(),
-                MarketNews.relevance_score.desc(),
-                MarketNews.published_at.desc()
-            ).limit(self.max_news_per_symbol).all()
-            
-            return news
-        finally:
-            db.close()
+        # Obtener noticias de las últimas 24 horas, ordenadas por relevancia
+        cutoff_time = datetime.now() - timedelta(hours=24)
+        async with async_session_scope() as db:
+            result = await db.execute(
+                select(MarketNews).where(
+                    MarketNews.symbol == symbol,
+                    MarketNews.published_at >= cutoff_time
+                ).order_by(
+                    MarketNews.impact_level.desc(),
+                    MarketNews.relevance_score.desc(),
+                    MarketNews.published_at.desc()
+                ).limit(self.max_news_per_symbol)
+            )
+            return list(result.scalars())
     
     def _should_refresh_cache(self, cached_data: Dict) -> bool:
         """Determinar si necesitamos refrescar el cache"""
@@ -271,44 +266,42 @@ class IntelligentNewsService:
             return "low"
     
     async def _save_news_to_db(self, symbol: str, news_list: List[Dict]) -> List[MarketNews]:
-        """Guardar noticias procesadas en la base de datos"""
-        db = next(get_db())
-        try:
-            saved_news = []
+        """Guardar noticias procesadas en la base de datos (una consulta de existentes y un INSERT de varias filas)"""
+        async with async_session_scope() as db:
+            # Verificar cuáles ya existen (basado en título y símbolo)
+            titles = [news_data['title'] for news_data in news_list]
+            result = await db.execute(
+                select(MarketNews).where(MarketNews.symbol == symbol, MarketNews.title.in_(titles))
+            )
+            by_title = {news.title: news for news in result.scalars()}
             
+            new_rows = {}
             for news_data in news_list:
-                # Verificar si ya existe (basado en título y fecha)
-                existing = db.query(MarketNews).filter(
-                    MarketNews.title == news_data['title'],
-                    MarketNews.symbol == symbol
-                ).first()
-                
-                if not existing:
-                    news_obj = MarketNews(
-                        symbol=symbol,
-                        title=news_data['title'],
-                        summary=news_data.get('summary', ''),
-                        source=news_data.get('source', ''),
-                        url=news_data.get('url', '#'),
-                        image_url=news_data.get('image_url', ''),
-                        published_at=datetime.now(),  # Usar fecha real si está disponible
-                        category=news_data.get('category', 'general'),
-                        impact_level=news_data.get('impact_level', 'low'),
-                        sentiment=news_data.get('sentiment', 'neutral'),
-                        relevance_score=news_data.get('relevance_score', 0.0),
-                        is_high_impact=news_data.get('impact_level') == 'high'
-                    )
-                    
-                    db.add(news_obj)
-                    db.commit()
-                    db.refresh(news_obj)
-                    saved_news.append(news_obj)
-                else:
-                    saved_news.append(existing)
+                if news_data['title'] in by_title or news_data['title'] in new_rows:
+                    continue
+                new_rows[news_data['title']] = {
+                    "symbol": symbol,
+                    "title": news_data['title'],
+                    "summary": news_data.get('summary', ''),
+                    "source": news_data.get('source', ''),
+                    "url": news_data.get('url', '#'),
+                    "image_url": news_data.get('image_url', ''),
+                    "published_at": datetime.now(),  # Usar fecha real si está disponible
+                    "category": news_data.get('category', 'general'),
+                    "impact_level": news_data.get('impact_level', 'low'),
+                    "sentiment": news_data.get('sentiment', 'neutral'),
+                    "relevance_score": news_data.get('relevance_score', 0.0),
+                    "is_high_impact": news_data.get('impact_level') == 'high'
+                }
             
-            return saved_news
-        finally:
-            db.close()
+            if new_rows:
+                # executemany con RETURNING: las nuevas filas vuelven ya como objetos con id
+                inserted = await db.scalars(
+                    insert(MarketNews).returning(MarketNews, sort_by_parameter_order=True),
+                    list(new_rows.values())
+                )
+                by_title.update((news.title, news) for news in inserted)
+            return [by_title[title] for title in titles]
     
     def _format_news_for_ai(self, news_list: List[MarketNews], symbol: str) -> Dict[str, Any]:
         """Formatear noticias para el análisis de IA"""
@@ -364,37 +357,20 @@ class IntelligentNewsService:
         }
     
     async def _update_news_usage(self, symbol: str, news_ids: List[int]):
-        """Actualizar contador de uso de noticias"""
-        db = next(get_db())
-        try:
-            for news_id in news_ids:
-                news = db.query(MarketNews).filter(MarketNews.id == news_id).first()
-                if news:
-                    news.usage_count += 1
-                    news.last_used_in_analysis = datetime.now()
-            
-            db.commit()
-        finally:
-            db.close()
+        """Actualizar contador de uso de noticias (escritura diferida: un UPDATE por noticia y lote)"""
+        now = datetime.now()
+        for news_id in news_ids:
+            write_buffer.increment(MarketNews, {"id": news_id}, {"usage_count": 1}, {"last_used_in_analysis": now})
     
     async def _record_news_analysis(self, user_id: int, symbol: str, news_used: List[MarketNews]):
-        """Registrar análisis de noticias en el historial"""
-        db = next(get_db())
-        try:
-            high_impact_count = sum(1 for n in news_used if n.is_high_impact)
-            
-            history = NewsAnalysisHistory(
-                user_id=user_id,
-                symbol=symbol,
-                news_used=[n.id for n in news_used],
-                total_news_considered=len(news_used),
-                high_impact_count=high_impact_count
-            )
-            
-            db.add(history)
-            db.commit()
-        finally:
-            db.close()
+        """Registrar análisis de noticias en el historial (escritura diferida)"""
+        write_buffer.add(NewsAnalysisHistory, {
+            "user_id": user_id,
+            "symbol": symbol,
+            "news_used": [n.id for n in news_used],
+            "total_news_considered": len(news_used),
+            "high_impact_news_count": sum(1 for n in news_used if n.is_high_impact)
+        })
     
     def _calculate_overall_sentiment(self, news_list: List[Dict]) -> str:
         """Calcular sentimiento general de las noticias"""
@@ -0,0 +1,153 @@
+# backend/app/services/market_recorder.py
+# Grabación continua de ticks y velas cerradas de los símbolos vigilados
+# Las lecturas al terminal van por el hilo MT5 (ticks con prioridad de mercado,
+# velas con prioridad de históricos) y la escritura a disco en un hilo aparte,
+# por lotes cada MARKET_RECORDER_FLUSH_INTERVAL segundos.
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..core.lazy import lazy_import
+from ..core.config import settings
+from ..core.logger import logger
+from .data_fetcher import data_fetcher
+from .market_store import market_store, MarketStore, BAR_COLUMNS, TICK_COLUMNS, TICKS, bars_kind
+from .mt5_executor import mt5_executor, PRIORITY_MARKET, PRIORITY_HISTORY
+
+mt5 = lazy_import("MetaTrader5")
+
+
+class MarketRecorder:
+    def __init__(self, store: MarketStore = None, symbols: List[str] = None, timeframes: List[str] = None,
+                 interval: float = None, bar_interval: float = None, flush_interval: float = None):
+        self.store = store or market_store
+        self.symbols = symbols or settings.MARKET_RECORDER_SYMBOLS
+        self.timeframes = timeframes or settings.MARKET_RECORDER_TIMEFRAMES
+        self.interval = interval or settings.MARKET_RECORDER_INTERVAL
+        self.bar_interval = bar_interval or settings.MARKET_RECORDER_BAR_INTERVAL
+        self.flush_interval = flush_interval or settings.MARKET_RECORDER_FLUSH_INTERVAL
+        # Últimos instantes grabados (se recuperan del disco al arrancar)
+        self.last_tick: Dict[str, int] = {}
+        self.last_bar: Dict[Tuple[str, str], int] = {}
+        self.pending_ticks: Dict[str, List[Tuple]] = {}
+        self.pending_bars: Dict[Tuple[str, str], List[np.ndarray]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.compacted_day = None
+        self.stats = {"ticks_recorded": 0, "bars_recorded": 0, "flushes": 0, "errors": 0}
+
+    def _resume(self):
+        for symbol in self.symbols:
+            last = self.store.last_time(symbol, TICKS)
+            if last is not None:
+                self.last_tick[symbol] = last
+            for timeframe in self.timeframes:
+                last = self.store.last_time(symbol, bars_kind(timeframe))
+                if last is not None:
+                    self.last_bar[(symbol, timeframe)] = last
+
+    # --- Captura (hilo MT5) ---
+
+    def _capture_ticks(self):
+        for symbol in self.symbols:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                continue
+            time_msc = int(getattr(tick, "time_msc", 0) or tick.time * 1000)
+            if time_msc <= self.last_tick.get(symbol, -1):
+                continue
+            self.last_tick[symbol] = time_msc
+            self.pending_ticks.setdefault(symbol, []).append(
+                (time_msc, tick.bid, tick.ask, tick.last, float(tick.volume))
+            )
+
+    def _capture_bars(self, count: int = 100):
+        """Velas cerradas nuevas: desde la posición 1 para excluir la vela en formación"""
+        for symbol in self.symbols:
+            for timeframe in self.timeframes:
+                rates = mt5.copy_rates_from_pos(symbol, getattr(mt5, f"TIMEFRAME_{timeframe}"), 1, count)
+                if rates is None or len(rates) == 0:
+                    continue
+                key = (symbol, timeframe)
+                new = rates[rates["time"] > self.last_bar.get(key, -1)]
+                if len(new):
+                    self.last_bar[key] = int(new["time"][-1])
+                    self.pending_bars.setdefault(key, []).append(new)
+
+    # --- Escritura (hilo de disco) ---
+
+    def _take_pending(self):
+        ticks, bars = self.pending_ticks, self.pending_bars
+        self.pending_ticks, self.pending_bars = {}, {}
+        return ticks, bars
+
+    def _write(self, ticks: Dict[str, List[Tuple]], bars: Dict[Tuple[str, str], List[np.ndarray]]):
+        for symbol, rows in ticks.items():
+            columns = dict(zip(TICK_COLUMNS, (np.array(values) for values in zip(*rows))))
+            self.stats["ticks_recorded"] += self.store.append(symbol, TICKS, columns)
+        for (symbol, timeframe), chunks in bars.items():
+            rates = np.concatenate(chunks)
+            columns = {name: rates[name] for name in BAR_COLUMNS}
+            self.stats["bars_recorded"] += self.store.append(symbol, bars_kind(timeframe), columns)
+        self.stats["flushes"] += 1
+
+    async def flush(self):
+        ticks, bars = await mt5_executor.run(PRIORITY_MARKET, self._take_pending, name="recorder_take")
+        if ticks or bars:
+            await asyncio.to_thread(self._write, ticks, bars)
+
+    async def _compact_if_new_day(self):
+        """Al cambiar el día UTC se compactan los días ya cerrados"""
+        today = datetime.now(timezone.utc).date()
+        if self.compacted_day != today:
+            self.compacted_day = today
+            await asyncio.to_thread(self.store.compact, today)
+
+    async def _run(self):
+        await asyncio.to_thread(self._resume)
+        last_bars = last_flush = 0.0
+        while True:
+            try:
+                if data_fetcher.connected:
+                    await mt5_executor.run(PRIORITY_MARKET, self._capture_ticks, name="recorder_ticks")
+                    now = time.monotonic()
+                    if now - last_bars >= self.bar_interval:
+                        await mt5_executor.run(PRIORITY_HISTORY, self._capture_bars, name="recorder_bars")
+                        last_bars = now
+                    if now - last_flush >= self.flush_interval:
+                        await self.flush()
+                        last_flush = now
+                await self._compact_if_new_day()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Error grabando datos de mercado: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Arrancar la grabación (dentro del event loop de la aplicación)"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+            logger.info(f"💾 Grabando {', '.join(self.symbols)} ({', '.join(self.timeframes)}) en {self.store.root}")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+            await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "running": self.task is not None and not self.task.done(),
+            "symbols": self.symbols,
+            "timeframes": self.timeframes,
+            "store": self.store.get_stats()
+        }
+
+# Instancia global
+market_recorder = MarketRecorder()
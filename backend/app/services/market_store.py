@@ -0,0 +1,288 @@
+# backend/app/services/market_store.py
+# Almacén local de ticks y velas en ficheros columnares de solo-añadir
+#
+# Estructura: {MARKET_DATA_DIR}/{símbolo}/{tipo}/{AAAA-MM-DD}/{columna}.bin
+#   tipo = "ticks" o "bars_M1", "bars_M5", ...
+# Cada columna es un array binario plano (dtype fijo por columna) al que solo se
+# añaden bytes, así se lee con np.memmap sin copiar ni parsear. La compactación
+# ordena y deduplica los días cerrados y los reescribe como .npy (np.load con
+# mmap_mode="r"), borrando los .bin.
+
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from ..core.config import settings
+from ..core.logger import logger
+
+TICK_COLUMNS = {
+    "time_msc": np.dtype("<i8"),
+    "bid": np.dtype("<f8"),
+    "ask": np.dtype("<f8"),
+    "last": np.dtype("<f8"),
+    "volume": np.dtype("<f8")
+}
+
+BAR_COLUMNS = {
+    "time": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "tick_volume": np.dtype("<i8"),
+    "spread": np.dtype("<i4"),
+    "real_volume": np.dtype("<i8")
+}
+
+TICKS = "ticks"
+TIMEFRAME_NAMES = ("M1", "M5", "M15", "M30", "H1", "H4", "D1")
+
+Columns = Dict[str, np.ndarray]
+
+
+def bars_kind(timeframe: str) -> str:
+    return f"bars_{timeframe}"
+
+
+def _schema(kind: str) -> Tuple[Dict[str, np.dtype], str, int]:
+    """(columnas, columna de tiempo, segundos por unidad de tiempo)"""
+    if kind == TICKS:
+        return TICK_COLUMNS, "time_msc", 1000
+    return BAR_COLUMNS, "time", 1
+
+
+def _to_epoch(value: datetime, per_second: int) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * per_second)
+
+
+def _open_npy(path: str, dtype: np.dtype, mmap: bool = True) -> np.ndarray:
+    """
+    Abrir un .npy escrito por compact_day sin parsear la cabecera (np.load la
+    evalúa con ast y domina el coste al abrir cientos de días): el dtype es el
+    del esquema y el desplazamiento sale del preámbulo de la versión del formato.
+    Con mmap=False se lee a memoria (para lecturas que se van a concatenar).
+    """
+    with open(path, "rb") as handle:
+        preamble = handle.read(12)
+    if preamble[:6] != b"\x93NUMPY":
+        return np.load(path, mmap_mode="r")
+    if preamble[6] == 1:
+        offset = 10 + int.from_bytes(preamble[8:10], "little")
+    else:
+        offset = 12 + int.from_bytes(preamble[8:12], "little")
+    rows = (os.path.getsize(path) - offset) // dtype.itemsize
+    if rows <= 0:
+        return np.empty(0, dtype=dtype)
+    if not mmap:
+        return np.fromfile(path, dtype=dtype, count=rows, offset=offset)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(rows,))
+
+
+class MarketStore:
+    """
+    Escritura y lectura de las columnas por (símbolo, tipo, día).
+
+    Las lecturas de un solo día devuelven vistas de memoria mapeada (sin copia);
+    las de varios días concatenan (copia) salvo que se use `iter_days`.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or settings.MARKET_DATA_DIR
+        self._lock = threading.Lock()
+        self.stats = {"rows_written": 0, "bytes_written": 0, "days_compacted": 0}
+
+    def _day_dir(self, symbol: str, kind: str, day: date) -> str:
+        return os.path.join(self.root, symbol, kind, day.isoformat())
+
+    # --- Escritura ---
+
+    def append(self, symbol: str, kind: str, columns: Columns) -> int:
+        """Añadir filas (ordenadas por tiempo) repartiéndolas por día UTC. Devuelve filas escritas"""
+        schema, time_column, per_second = _schema(kind)
+        times = np.asarray(columns[time_column], dtype=schema[time_column])
+        if len(times) == 0:
+            return 0
+        days = (times // (per_second * 86400)).astype("<i8")
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(times)]))
+
+        with self._lock:
+            for start, end in zip(starts, ends):
+                day = date(1970, 1, 1) + timedelta(days=int(days[start]))
+                directory = self._day_dir(symbol, kind, day)
+                os.makedirs(directory, exist_ok=True)
+                for name, dtype in schema.items():
+                    data = np.ascontiguousarray(np.asarray(columns[name], dtype=dtype)[start:end])
+                    with open(os.path.join(directory, f"{name}.bin"), "ab") as handle:
+                        handle.write(data.tobytes())
+                    self.stats["bytes_written"] += data.nbytes
+            self.stats["rows_written"] += len(times)
+        return len(times)
+
+    # --- Lectura ---
+
+    def days(self, symbol: str, kind: str) -> List[date]:
+        directory = os.path.join(self.root, symbol, kind)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(date.fromisoformat(name) for name in os.listdir(directory))
+
+    def read_day(self, symbol: str, kind: str, day: date, columns: Optional[Iterable[str]] = None,
+                 mmap: bool = True) -> Columns:
+        """Columnas de un día (todas o las pedidas) como vistas de solo lectura (memmap), sin copia"""
+        schema, _, _ = _schema(kind)
+        names = list(columns) if columns is not None else list(schema)
+        directory = self._day_dir(symbol, kind, day)
+        compacted, raw = {}, {}
+        for name in names:
+            npy_path = os.path.join(directory, f"{name}.npy")
+            if os.path.exists(npy_path):
+                compacted[name] = _open_npy(npy_path, schema[name], mmap)
+            bin_path = os.path.join(directory, f"{name}.bin")
+            if os.path.exists(bin_path):
+                raw[name] = bin_path
+
+        # Una escritura interrumpida puede dejar columnas de distinta longitud
+        if raw:
+            sizes = {name: os.path.getsize(os.path.join(directory, f"{name}.bin")) // dtype.itemsize
+                     if os.path.exists(os.path.join(directory, f"{name}.bin")) else 0
+                     for name, dtype in schema.items()}
+            rows = min(sizes.values())
+            if not rows:
+                raw = {name: np.empty(0, dtype=schema[name]) for name in raw}
+            elif mmap:
+                raw = {name: np.memmap(path, dtype=schema[name], mode="r", shape=(rows,)) for name, path in raw.items()}
+            else:
+                raw = {name: np.fromfile(path, dtype=schema[name], count=rows) for name, path in raw.items()}
+        if compacted and raw:
+            # Datos tardíos de un día ya compactado: se unen (copia) hasta la próxima compactación
+            return {name: np.concatenate((compacted[name], raw[name])) for name in names}
+        if compacted or raw:
+            return compacted or raw
+        return {name: np.empty(0, dtype=schema[name]) for name in names}
+
+    def _days_between(self, symbol: str, kind: str, start_ts: int, end_ts: int, per_second: int) -> List[date]:
+        first_day = datetime.fromtimestamp(start_ts / per_second, tz=timezone.utc).date()
+        # end es exclusivo: [d, d+1) es un solo día, no se abre el de las 00:00 de d+1
+        last_day = datetime.fromtimestamp(max(end_ts - 1, start_ts) / per_second, tz=timezone.utc).date()
+        return [day for day in self.days(symbol, kind) if first_day <= day <= last_day]
+
+    def iter_days(self, symbol: str, kind: str, start: datetime, end: datetime,
+                  columns: Optional[Iterable[str]] = None, mmap: bool = True) -> Iterator[Tuple[date, Columns]]:
+        """Vistas por día recortadas a [start, end) (búsqueda binaria sobre la columna de tiempo)"""
+        _, time_column, per_second = _schema(kind)
+        names = None if columns is None else [time_column] + [name for name in columns if name != time_column]
+        start_ts, end_ts = _to_epoch(start, per_second), _to_epoch(end, per_second)
+        for day in self._days_between(symbol, kind, start_ts, end_ts, per_second):
+            values = self.read_day(symbol, kind, day, names, mmap)
+            times = values[time_column]
+            lo, hi = np.searchsorted(times, start_ts, "left"), np.searchsorted(times, end_ts, "left")
+            if hi > lo:
+                yield day, {name: column[lo:hi] for name, column in values.items()}
+
+    def read(self, symbol: str, kind: str, start: datetime, end: datetime,
+             columns: Optional[Iterable[str]] = None) -> Columns:
+        """
+        Columnas en [start, end): vista (memmap) si cae en un día; si abarca varios
+        se leen a memoria y se concatenan. Con `columns` solo se abren esas (más la
+        de tiempo).
+        """
+        schema, time_column, per_second = _schema(kind)
+        names = list(schema) if columns is None else [time_column] + [n for n in columns if n != time_column]
+        days = self._days_between(symbol, kind, _to_epoch(start, per_second), _to_epoch(end, per_second), per_second)
+        chunks = [values for _, values in self.iter_days(symbol, kind, start, end, columns, mmap=len(days) <= 1)]
+        if not chunks:
+            return {name: np.empty(0, dtype=schema[name]) for name in names}
+        if len(chunks) == 1:
+            return chunks[0]
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in names}
+
+    def read_ticks(self, symbol: str, start: datetime, end: datetime,
+                   columns: Optional[Iterable[str]] = None) -> Columns:
+        return self.read(symbol, TICKS, start, end, columns)
+
+    def read_bars(self, symbol: str, timeframe: str, start: datetime, end: datetime,
+                  columns: Optional[Iterable[str]] = None) -> Columns:
+        return self.read(symbol, bars_kind(timeframe), start, end, columns)
+
+    def last_time(self, symbol: str, kind: str) -> Optional[int]:
+        """Último instante guardado (para reanudar la grabación sin duplicar)"""
+        _, time_column, _ = _schema(kind)
+        for day in reversed(self.days(symbol, kind)):
+            times = self.read_day(symbol, kind, day, [time_column])[time_column]
+            if len(times):
+                return int(times.max())
+        return None
+
+    @staticmethod
+    def to_rates(columns: Columns) -> np.ndarray:
+        """Velas como array estructurado al estilo de copy_rates_from_pos (copia)"""
+        rates = np.empty(len(columns["time"]), dtype=[(name, dtype) for name, dtype in BAR_COLUMNS.items()])
+        for name in BAR_COLUMNS:
+            rates[name] = columns[name]
+        return rates
+
+    # --- Compactación ---
+
+    def compact_day(self, symbol: str, kind: str, day: date) -> bool:
+        """Ordenar, deduplicar y reescribir un día como .npy. False si no había nada que compactar"""
+        schema, time_column, _ = _schema(kind)
+        directory = self._day_dir(symbol, kind, day)
+        if not any(name.endswith(".bin") for name in os.listdir(directory)):
+            return False
+
+        with self._lock:
+            columns = {name: np.array(values) for name, values in self.read_day(symbol, kind, day).items()}
+            order = np.argsort(columns[time_column], kind="stable")
+            columns = {name: values[order] for name, values in columns.items()}
+            times = columns[time_column]
+            if kind == TICKS:
+                # Ticks repetidos por lecturas solapadas: mismo instante y mismo precio
+                keep = np.ones(len(times), dtype=bool)
+                keep[1:] = ((times[1:] != times[:-1]) | (columns["bid"][1:] != columns["bid"][:-1])
+                            | (columns["ask"][1:] != columns["ask"][:-1]))
+            else:
+                # Una vela por instante: la última escrita
+                keep = np.ones(len(times), dtype=bool)
+                keep[:-1] = times[1:] != times[:-1]
+            columns = {name: values[keep] for name, values in columns.items()}
+
+            for name, values in columns.items():
+                tmp_path = os.path.join(directory, f"{name}.tmp.npy")
+                np.save(tmp_path, values)
+                os.replace(tmp_path, os.path.join(directory, f"{name}.npy"))
+            for name in schema:
+                bin_path = os.path.join(directory, f"{name}.bin")
+                try:
+                    if os.path.exists(bin_path):
+                        os.remove(bin_path)
+                except OSError as e:
+                    # En Windows no se puede borrar un fichero mapeado por un lector abierto
+                    logger.warning(f"⚠️ No se pudo borrar {bin_path}: {str(e)}")
+            self.stats["days_compacted"] += 1
+        return True
+
+    def compact(self, before: Optional[date] = None) -> int:
+        """Compactar todos los días cerrados (anteriores a `before`, por defecto hoy UTC)"""
+        before = before or datetime.now(timezone.utc).date()
+        compacted = 0
+        if not os.path.isdir(self.root):
+            return 0
+        for symbol in sorted(os.listdir(self.root)):
+            for kind in sorted(os.listdir(os.path.join(self.root, symbol))):
+                for day in self.days(symbol, kind):
+                    if day < before and self.compact_day(symbol, kind, day):
+                        compacted += 1
+        if compacted:
+            logger.info(f"🗜️ Datos de mercado compactados: {compacted} días")
+        return compacted
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "root": os.path.abspath(self.root)}
+
+# Instancia global
+market_store = MarketStore()
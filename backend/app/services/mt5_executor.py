@@ -0,0 +1,125 @@
+# backend/app/services/mt5_executor.py
+# Ejecutor de UN SOLO HILO para el terminal MetaTrader5
+# La API de MT5 no es thread-safe: todas las llamadas se encolan aquí y las ejecuta
+# siempre el mismo hilo, por prioridad (órdenes > posiciones > precios > históricos).
+# Los coroutines esperan con `await mt5_executor.run(...)` sin bloquear el event loop.
+
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+from ..core.http_pool import LatencyHistogram
+from ..core.logger import logger
+
+# Prioridades (menor = antes)
+PRIORITY_ORDER = 0       # Enviar/cerrar órdenes, conexión
+PRIORITY_POSITION = 1    # Posiciones y modificación de SL/TP, cuenta
+PRIORITY_MARKET = 2      # Ticks, info de símbolo
+PRIORITY_HISTORY = 3     # Velas históricas, listado de símbolos
+
+PRIORITY_NAMES = {
+    PRIORITY_ORDER: "order",
+    PRIORITY_POSITION: "position",
+    PRIORITY_MARKET: "market",
+    PRIORITY_HISTORY: "history"
+}
+
+
+class _CallMetrics:
+    def __init__(self):
+        self.wait = LatencyHistogram()
+        self.run = LatencyHistogram()
+        self.calls = 0
+        self.errors = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "errors": self.errors,
+                "queue_wait": self.wait.get_stats(), "execution": self.run.get_stats()}
+
+
+class MT5Executor:
+    """
+    Cola de prioridad + hilo dedicado. `call()` es la fachada síncrona (para código
+    que ya corre en un hilo) y `run()` la asíncrona. Las llamadas hechas desde el
+    propio hilo del ejecutor se ejecutan en línea, así un método que agrupa varias
+    llamadas a MT5 puede encolarse entero sin bloquearse a sí mismo.
+    """
+
+    def __init__(self, name: str = "mt5-executor"):
+        self.name = name
+        self.queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.thread: Optional[threading.Thread] = None
+        self.start_lock = threading.Lock()
+        self.metrics: Dict[str, _CallMetrics] = {}
+        self.max_queue_depth = 0
+
+    def _ensure_started(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.start_lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+                self.thread.start()
+                logger.info("🧵 Ejecutor MT5 iniciado (hilo único)")
+
+    def in_executor_thread(self) -> bool:
+        return threading.current_thread() is self.thread
+
+    def _worker(self):
+        while True:
+            priority, _, enqueued_at, name, fn, args, kwargs, future = self.queue.get()
+            if fn is None:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            metrics = self.metrics.setdefault(name, _CallMetrics())
+            started = time.perf_counter()
+            metrics.wait.record(started - enqueued_at)
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                metrics.errors += 1
+                future.set_exception(e)
+            finally:
+                metrics.calls += 1
+                metrics.run.record(time.perf_counter() - started)
+
+    def submit(self, priority: int, fn: Callable, *args, name: str = None, **kwargs) -> Future:
+        """Encolar una llamada; devuelve un concurrent.futures.Future"""
+        self._ensure_started()
+        future: Future = Future()
+        self.queue.put((priority, next(self.sequence), time.perf_counter(),
+                        name or getattr(fn, "__name__", "call"), fn, args, kwargs, future))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return future
+
+    def call(self, priority: int, fn: Callable, *args, name: str = None, **kwargs) -> Any:
+        """Fachada síncrona: ejecutar en el hilo MT5 y esperar el resultado"""
+        if self.in_executor_thread():
+            return fn(*args, **kwargs)
+        return self.submit(priority, fn, *args, name=name, **kwargs).result()
+
+    async def run(self, priority: int, fn: Callable, *args, name: str = None, **kwargs) -> Any:
+        """Fachada asíncrona: el coroutine espera sin bloquear el event loop"""
+        return await asyncio.wrap_future(self.submit(priority, fn, *args, name=name, **kwargs))
+
+    def stop(self):
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put((float("inf"), next(self.sequence), 0.0, "stop", None, (), {}, None))
+            self.thread.join(timeout=5)
+        self.thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.thread is not None and self.thread.is_alive(),
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "calls": {name: metrics.get_stats() for name, metrics in sorted(self.metrics.items())}
+        }
+
+# Instancia global
+mt5_executor = MT5Executor()
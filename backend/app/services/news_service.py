@@ -1,60 +1,109 @@
 # backend/app/services/news_service.py - CORREGIDO
-import requests
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from ..core.lazy import lazy_import
 from ..core.logger import logger
 from ..core.config import settings
+from ..core.http_pool import http_pool
+
+aiohttp = lazy_import("aiohttp")
 
 class NewsService:
     def __init__(self):
         self.api_key = settings.FINNHUB_API_KEY
         self.base_url = "https://finnhub.io/api/v1"
+        self.timeout = 10
+        self.default_categories = ("general", "forex", "crypto")
+        # Validadores HTTP por categoría para peticiones condicionales (ETag / Last-Modified)
+        self.conditional_cache: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"requests": 0, "not_modified": 0, "errors": 0}
+        # Modo replay: fuente con `async get_market_news(category)` en lugar de Finnhub
+        self.replay_source = None
+    
+    async def _get(self, path: str, params: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> "aiohttp.ClientResponse":
+        """GET asíncrono a Finnhub con la sesión persistente (no bloquea el event loop)"""
+        self.stats["requests"] += 1
+        return await http_pool.request(
+            "finnhub", "GET", f"{self.base_url}{path}",
+            params={**params, "token": self.api_key},
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
     
     async def get_market_news(self, category: str = "general") -> List[Dict[str, Any]]:
-        """Obtener noticias del mercado desde Finnhub - CORREGIDO"""
+        """Obtener noticias del mercado desde Finnhub (async, con petición condicional)"""
+        if self.replay_source is not None:
+            return await self.replay_source.get_market_news(category)
         try:
             logger.info(f"📰 Obteniendo noticias de categoría: {category}")
             
-            url = f"{self.base_url}/news"
-            params = {
-                "category": category,
-                "token": self.api_key 
-            }
-            
-            logger.info(f"🔗 Llamando a Finnhub: {url}?category={category}")
+            cached = self.conditional_cache.get(category)
+            headers = {}
+            if cached:
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
             
-            # Hacer la llamada a la API de Finnhub
-            response = requests.get(
-                url,
-                params=params,
-                timeout=10
-            )
+            logger.info(f"🔗 Llamando a Finnhub: {self.base_url}/news?category={category}")
+            response = await self._get("/news", {"category": category}, headers)
             
-            logger.info(f"📊 Respuesta Finnhub - Status: {response.status_code}")
+            logger.info(f"📊 Respuesta Finnhub - Status: {response.status}")
             
-            if response.status_code == 200:
-                news_data = response.json()
+            if response.status == 304 and cached:
+                self.stats["not_modified"] += 1
+                logger.info(f"✅ Noticias {category} sin cambios (304), usando copia local")
+                return [dict(news) for news in cached["news"]]
+            elif response.status == 200:
+                news_data = await response.json()
                 logger.info(f"📰 Datos crudos recibidos: {len(news_data)} noticias")
                 
                 # Procesar y limitar las noticias
                 processed_news = self._process_news_data(news_data[:15])  # Últimas 15 noticias
                 logger.info(f"✅ Obtenidas {len(processed_news)} noticias procesadas")
+                
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if etag or last_modified:
+                    self.conditional_cache[category] = {
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "news": processed_news
+                    }
                 return processed_news
-            elif response.status_code == 429:
+            elif response.status == 429:
+                self.stats["errors"] += 1
                 logger.error("❌ Límite de tasa excedido en Finnhub")
                 return self._get_fallback_news("Límite de API excedido")
             else:
-                logger.error(f"❌ Error API Finnhub: {response.status_code} - {response.text}")
-                return self._get_fallback_news(f"Error API: {response.status_code}")
+                self.stats["errors"] += 1
+                logger.error(f"❌ Error API Finnhub: {response.status} - {await response.text()}")
+                return self._get_fallback_news(f"Error API: {response.status}")
                 
-        except requests.exceptions.Timeout:
+        except asyncio.TimeoutError:
+            self.stats["errors"] += 1
             logger.error("❌ Timeout en llamada a Finnhub")
             return self._get_fallback_news("Timeout")
         except Exception as e:
+            self.stats["errors"] += 1
             logger.error(f"❌ Error obteniendo noticias: {str(e)}")
             return self._get_fallback_news(str(e))
     
+    async def get_news_by_categories(self, categories: Optional[Tuple[str, ...]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Obtener varias categorías en paralelo (una sola espera en lugar de una por categoría)"""
+        categories = tuple(categories or self.default_categories)
+        results = await asyncio.gather(*(self.get_market_news(category) for category in categories))
+        return dict(zip(categories, results))
+    
+    async def test_connection(self) -> Dict[str, Any]:
+        """Llamada simple a Finnhub (quote de AAPL) para comprobar la API key"""
+        response = await self._get("/quote", {"symbol": "AAPL"})
+        return {
+            "status_code": response.status,
+            "body": await response.json() if response.status == 200 else await response.text()
+        }
+    
     async def get_crypto_news(self) -> List[Dict[str, Any]]:
         """Obtener noticias específicas de criptomonedas"""
         return await self.get_market_news("crypto")
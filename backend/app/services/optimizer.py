@@ -0,0 +1,422 @@
+# backend/app/services/optimizer.py
+# Optimización de parámetros del bot (stops, trailing, límite de operaciones,
+# umbral de confianza) con barridos de backtests sobre las velas grabadas
+#
+# - Búsqueda: rejilla, aleatoria o bayesiana (proceso gaussiano + expected
+#   improvement, en numpy)
+# - Paralelismo: pool de procesos; velas y señales precalculadas de todos los
+#   símbolos en un único bloque de memoria compartida (los procesos crean vistas
+#   numpy sobre él, sin copias ni serialización por prueba)
+# - Parada temprana: cada configuración se simula primero sobre el tramo
+#   inicial del periodo y se descarta si ya pierde claramente
+# - Informe: tabla de configuraciones ordenada por el objetivo
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..core.logger import logger
+from .backtest_engine import (
+    BACKTEST_COLUMNS, BacktestConfig, SymbolBacktest, apply_open_trades_cap, summarize, technical_signals
+)
+from .indicators import compute_indicator_series
+from .market_store import MarketStore
+
+OBJECTIVES = ("net_profit", "profit_factor", "return_drawdown")
+METHODS = ("grid", "random", "bayesian")
+# Profit factor asignado a configuraciones sin pérdidas
+_MAX_PROFIT_FACTOR = 10.0
+
+
+@dataclass(frozen=True)
+class Parameter:
+    bot_field: Optional[str]  # Campo de BotConfig equivalente (None si el bot no lo guarda)
+    low: float
+    high: float
+    integer: bool = False
+
+
+# Parámetros de BacktestConfig que se pueden optimizar
+PARAMETERS: Dict[str, Parameter] = {
+    "stop_loss_pips": Parameter("default_stop_loss", 20.0, 200.0),
+    "take_profit_pips": Parameter("default_take_profit", 20.0, 400.0),
+    "trailing_stop_pips": Parameter("trailing_stop_distance", 0.0, 150.0),  # 0 = sin trailing
+    "max_open_trades": Parameter("max_open_trades", 1, 10, integer=True),
+    "confidence_threshold": Parameter(None, 50.0, 90.0),
+    "lot_size": Parameter("default_lot_size", 0.01, 1.0)
+}
+DEFAULT_SPACE = ("stop_loss_pips", "take_profit_pips", "trailing_stop_pips", "max_open_trades", "confidence_threshold")
+
+
+@dataclass(frozen=True)
+class EarlyStopping:
+    """
+    Descartar una configuración tras simular `fraction` del periodo si, con al
+    menos `min_trades` operaciones, su profit factor es menor que
+    `min_profit_factor` o su drawdown supera `max_drawdown_pct` del balance
+    (BotConfig.max_drawdown). El drawdown solo puede crecer con más datos, así
+    que ese criterio nunca descarta una configuración que lo cumpliría completa.
+    """
+    fraction: float = 0.3
+    min_trades: int = 20
+    min_profit_factor: float = 0.8
+    max_drawdown_pct: Optional[float] = None
+
+
+class SharedBars:
+    """Columnas de todos los símbolos en un bloque de memoria compartida (layout por nombre y desplazamiento)"""
+
+    def __init__(self, arrays: Dict[str, Dict[str, np.ndarray]]):
+        layout, offset = {}, 0
+        for symbol, columns in arrays.items():
+            layout[symbol] = {}
+            for name, values in columns.items():
+                values = np.ascontiguousarray(values)
+                layout[symbol][name] = (offset, values.dtype.str, len(values))
+                offset += -(-values.nbytes // 64) * 64  # alineado a 64 bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.layout = layout
+        for symbol, columns in arrays.items():
+            for name, view in self.views(self.shm, layout)[symbol].items():
+                view[:] = columns[name]
+
+    @staticmethod
+    def views(shm: shared_memory.SharedMemory,
+              layout: Dict[str, Dict[str, Tuple[int, str, int]]]) -> Dict[str, Dict[str, np.ndarray]]:
+        return {
+            symbol: {
+                name: np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+                for name, (offset, dtype, length) in columns.items()
+            }
+            for symbol, columns in layout.items()
+        }
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+# Estado de cada proceso del pool: bloque compartido abierto y vistas por símbolo
+_worker: Dict[str, Any] = {}
+
+
+def _attach_worker(name: str, layout: Dict[str, Dict[str, Tuple[int, str, int]]]):
+    shm = shared_memory.SharedMemory(name=name)
+    _worker["shm"] = shm
+    _worker["arrays"] = SharedBars.views(shm, layout)
+
+
+def _simulate(arrays: Dict[str, Dict[str, np.ndarray]], config: BacktestConfig, fraction: float) -> Dict[str, Any]:
+    """Backtest de todos los símbolos sobre el tramo inicial `fraction` de sus velas"""
+    trades = []
+    for symbol, columns in arrays.items():
+        cut = max(int(len(columns["time"]) * fraction), 2)
+        rates = {name: columns[name][:cut] for name in BACKTEST_COLUMNS}
+        signals = (columns["signal"][:cut], columns["confidence"][:cut])
+        trades.extend(SymbolBacktest(symbol, rates, config, signals=signals).run())
+    return summarize(apply_open_trades_cap(trades, config.max_open_trades), config.starting_balance)
+
+
+def score(summary: Dict[str, Any], objective: str) -> float:
+    if objective == "profit_factor":
+        if summary["profit_factor"] is None:
+            return _MAX_PROFIT_FACTOR if summary["trades"] else 0.0
+        return min(summary["profit_factor"], _MAX_PROFIT_FACTOR)
+    if objective == "return_drawdown":
+        return summary["net_profit"] / max(summary["max_drawdown"], 1.0)
+    return summary["net_profit"]
+
+
+def _evaluate_trial(trial: int, params: Dict[str, Any], base: Dict[str, Any], objective: str,
+                    early_stopping: Optional[EarlyStopping]) -> Dict[str, Any]:
+    """Trabajo de un proceso: una configuración sobre las vistas compartidas"""
+    started = time.perf_counter()
+    arrays = _worker["arrays"]
+    config = BacktestConfig(**{**base, **to_config_values(params)})
+    fraction, pruned = 1.0, False
+
+    if early_stopping and 0 < early_stopping.fraction < 1:
+        summary = _simulate(arrays, config, early_stopping.fraction)
+        if _clearly_losing(summary, config, early_stopping):
+            fraction, pruned = early_stopping.fraction, True
+    if not pruned:
+        summary = _simulate(arrays, config, 1.0)
+
+    return {
+        "trial": trial,
+        "params": params,
+        "score": round(score(summary, objective), 4),
+        "pruned": pruned,
+        "evaluated_fraction": fraction,
+        "trades": summary["trades"],
+        "net_profit": summary["net_profit"],
+        "win_rate": summary["win_rate"],
+        "profit_factor": summary["profit_factor"],
+        "max_drawdown": summary["max_drawdown"],
+        "elapsed": round(time.perf_counter() - started, 3)
+    }
+
+
+def _clearly_losing(summary: Dict[str, Any], config: BacktestConfig, early_stopping: EarlyStopping) -> bool:
+    if early_stopping.max_drawdown_pct is not None:
+        if summary["max_drawdown"] > config.starting_balance * early_stopping.max_drawdown_pct / 100:
+            return True
+    if summary["trades"] < early_stopping.min_trades:
+        return False
+    profit_factor = summary["profit_factor"]
+    return profit_factor is not None and profit_factor < early_stopping.min_profit_factor
+
+
+def to_config_values(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Parámetros de la búsqueda como valores de BacktestConfig (trailing 0 = sin trailing)"""
+    values = dict(params)
+    if not values.get("trailing_stop_pips"):
+        values["trailing_stop_pips"] = None
+    return values
+
+
+def to_bot_config(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Parámetros con los nombres de campo de BotConfig (para aplicar la mejor configuración)"""
+    values = {}
+    for name, value in params.items():
+        field = PARAMETERS[name].bot_field
+        if field == "trailing_stop_distance":
+            values["use_trailing_stop"] = bool(value)
+        if field and (field != "trailing_stop_distance" or value):
+            values[field] = value
+    return values
+
+
+# --- Estrategias de búsqueda ---
+
+def _round_params(values: Dict[str, float]) -> Dict[str, Any]:
+    return {name: int(round(value)) if PARAMETERS[name].integer else round(float(value), 2)
+            for name, value in values.items()}
+
+
+def grid_trials(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+
+def random_trials(space: List[str], count: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    return [_round_params({name: rng.uniform(PARAMETERS[name].low, PARAMETERS[name].high) for name in space})
+            for _ in range(count)]
+
+
+def space_size(space: List[str]) -> Optional[int]:
+    """Configuraciones distintas del espacio (None si algún parámetro es continuo)"""
+    if not all(PARAMETERS[name].integer for name in space):
+        return None
+    return math.prod(int(PARAMETERS[name].high - PARAMETERS[name].low) + 1 for name in space)
+
+
+def _normalize(trials: List[Dict[str, Any]], space: List[str]) -> np.ndarray:
+    return np.array([[(trial[name] - PARAMETERS[name].low) / (PARAMETERS[name].high - PARAMETERS[name].low)
+                      for name in space] for trial in trials], dtype=np.float64)
+
+
+class _GaussianProcess:
+    """GP con kernel RBF sobre parámetros normalizados a [0, 1] y objetivo estandarizado"""
+
+    def __init__(self, length_scale: float = 0.25, noise: float = 1e-3):
+        self.length_scale = length_scale
+        self.noise = noise
+
+    def _kernel(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        distances = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+        return np.exp(-0.5 * distances / self.length_scale ** 2)
+
+    def fit(self, x: np.ndarray, y: np.ndarray) -> "_GaussianProcess":
+        self.x = x
+        self.mean, self.std = float(y.mean()), float(y.std()) or 1.0
+        kernel = self._kernel(x, x) + self.noise * np.eye(len(x))
+        self.cholesky = np.linalg.cholesky(kernel)
+        self.alpha = np.linalg.solve(self.cholesky.T, np.linalg.solve(self.cholesky, (y - self.mean) / self.std))
+        return self
+
+    def predict(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cross = self._kernel(x, self.x)
+        mean = cross @ self.alpha
+        v = np.linalg.solve(self.cholesky, cross.T)
+        variance = np.clip(1.0 - (v ** 2).sum(axis=0), 1e-12, None)
+        return mean * self.std + self.mean, np.sqrt(variance) * self.std
+
+
+_erf = np.vectorize(math.erf)
+
+
+def expected_improvement(mean: np.ndarray, std: np.ndarray, best: float) -> np.ndarray:
+    z = (mean - best) / std
+    cdf = 0.5 * (1.0 + _erf(z / math.sqrt(2.0)))
+    pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2.0 * math.pi)
+    return (mean - best) * cdf + std * pdf
+
+
+def bayesian_trials(space: List[str], done: List[Dict[str, Any]], count: int,
+                    rng: np.random.Generator, candidates: int = 2000) -> List[Dict[str, Any]]:
+    """
+    Siguientes `count` configuraciones por expected improvement sobre una nube
+    de candidatas aleatorias. Las descartadas por parada temprana cuentan con el
+    peor resultado observado (el GP aprende a evitar su región).
+    """
+    scores = np.array([row["score"] for row in done], dtype=np.float64)
+    pruned = np.array([row["pruned"] for row in done])
+    if (~pruned).any():
+        scores[pruned] = min(scores[pruned].min(initial=np.inf), scores[~pruned].min())
+    process = _GaussianProcess().fit(_normalize([row["params"] for row in done], space), scores)
+
+    pool = random_trials(space, candidates, rng)
+    mean, std = process.predict(_normalize(pool, space))
+    improvement = expected_improvement(mean, std, float(scores.max()))
+    seen = {tuple(sorted(row["params"].items())) for row in done}
+    chosen = []
+    for index in np.argsort(-improvement):
+        key = tuple(sorted(pool[index].items()))
+        if key not in seen:
+            seen.add(key)
+            chosen.append(pool[index])
+            if len(chosen) == count:
+                break
+    return chosen
+
+
+# --- Optimización ---
+
+def load_shared_inputs(symbols: List[str], timeframe: str, start: datetime, end: datetime,
+                       root: Optional[str] = None) -> Dict[str, Dict[str, np.ndarray]]:
+    """Velas de cada símbolo más señal y confianza precalculadas (no dependen de los parámetros)"""
+    store = MarketStore(root)
+    arrays = {}
+    for symbol in symbols:
+        bars = store.read_bars(symbol, timeframe, start, end, BACKTEST_COLUMNS)
+        if len(bars["time"]) < 2:
+            logger.warning(f"⚠️ Optimizador: sin velas {timeframe} de {symbol} en el periodo")
+            continue
+        columns = {name: np.asarray(bars[name]) for name in BACKTEST_COLUMNS}
+        signal, confidence = technical_signals(compute_indicator_series(
+            columns["high"].astype(np.float64), columns["low"].astype(np.float64), columns["close"].astype(np.float64)
+        ))
+        arrays[symbol] = {**columns, "signal": signal, "confidence": confidence}
+    return arrays
+
+
+def optimize(symbols: List[str], timeframe: str, start: datetime, end: datetime,
+             method: str = "random", trials: int = 50, grid: Optional[Dict[str, List[Any]]] = None,
+             space: Optional[List[str]] = None, base_config: Optional[BacktestConfig] = None,
+             objective: str = "net_profit", processes: int = 0,
+             early_stopping: Optional[EarlyStopping] = EarlyStopping(), initial_trials: int = 10,
+             seed: int = 7, root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Barrido de parámetros. `grid` = {parámetro: [valores]} para method="grid";
+    `space` = parámetros a explorar (por defecto DEFAULT_SPACE) en "random" y
+    "bayesian", que prueban `trials` configuraciones (la bayesiana empieza con
+    `initial_trials` aleatorias y luego lotes del tamaño del pool).
+    """
+    if method not in METHODS:
+        return {"success": False, "error": f"Método no soportado: {method}"}
+    if objective not in OBJECTIVES:
+        return {"success": False, "error": f"Objetivo no soportado: {objective}"}
+    space = list(grid) if method == "grid" else list(space or DEFAULT_SPACE)
+    unknown = [name for name in space if name not in PARAMETERS]
+    if unknown:
+        return {"success": False, "error": f"Parámetros no optimizables: {unknown}"}
+
+    started = time.perf_counter()
+    base = asdict(base_config or BacktestConfig())
+    rng = np.random.default_rng(seed)
+    arrays = load_shared_inputs(symbols, timeframe, start, end, root)
+    if not arrays:
+        return {"success": False, "error": "No hay velas grabadas para los símbolos y el periodo"}
+
+    shared = SharedBars(arrays)
+    rows: List[Dict[str, Any]] = []
+    pool = None
+    try:
+        if processes and processes > 1:
+            pool = ProcessPoolExecutor(max_workers=processes, initializer=_attach_worker,
+                                       initargs=(shared.shm.name, shared.layout))
+        else:
+            _worker["arrays"] = SharedBars.views(shared.shm, shared.layout)
+
+        def evaluate(batch: List[Dict[str, Any]]):
+            first = len(rows) + 1
+            if pool is None:
+                results = [_evaluate_trial(first + i, params, base, objective, early_stopping)
+                           for i, params in enumerate(batch)]
+            else:
+                futures = [pool.submit(_evaluate_trial, first + i, params, base, objective, early_stopping)
+                           for i, params in enumerate(batch)]
+                results = [future.result() for future in futures]
+            rows.extend(results)
+
+        if method == "grid":
+            evaluate(grid_trials(grid))
+        elif method == "random":
+            evaluate(random_trials(space, trials, rng))
+        else:
+            batch_size = max(processes, 1)
+            size = space_size(space)
+            if size is not None and trials > size:
+                logger.info(f"🎯 Optimizador: el espacio solo tiene {size} configuraciones (se piden {trials})")
+                trials = size
+            # Sin repetir configuraciones (en espacios discretos el muestreo aleatorio repite)
+            initial = {tuple(sorted(params.items())): params
+                       for params in random_trials(space, min(initial_trials, trials) * 4, rng)}
+            evaluate(list(initial.values())[:min(initial_trials, trials)])
+            while len(rows) < trials:
+                batch = bayesian_trials(space, rows, min(batch_size, trials - len(rows)), rng)
+                if not batch:
+                    # Todas las candidatas ya se han probado: no quedan puntos nuevos
+                    break
+                evaluate(batch)
+    except Exception as e:
+        logger.error(f"❌ Error en optimización: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        _worker.pop("arrays", None)
+        shared.close()
+
+    ranked = sorted(rows, key=lambda row: (row["pruned"], -row["score"]))
+    best = ranked[0]
+    elapsed = time.perf_counter() - started
+    logger.info(f"🎯 Optimización {method}: {len(rows)} configuraciones "
+                f"({sum(row['pruned'] for row in rows)} descartadas) en {elapsed:.2f}s")
+    return {
+        "success": True,
+        "method": method,
+        "objective": objective,
+        "symbols": list(arrays),
+        "timeframe": timeframe,
+        "bars": sum(len(columns["time"]) for columns in arrays.values()),
+        "trials": ranked,
+        "pruned": sum(row["pruned"] for row in rows),
+        "best": best,
+        "best_bot_config": to_bot_config(best["params"]),
+        "elapsed": round(elapsed, 3)
+    }
+
+
+def format_report(result: Dict[str, Any], top: int = 20) -> str:
+    """Tabla de texto con las mejores configuraciones"""
+    if not result.get("success"):
+        return f"Error: {result.get('error')}"
+    names = list(result["best"]["params"])
+    header = ["#"] + names + ["score", "trades", "net", "win%", "PF", "max DD", "estado"]
+    lines = []
+    for row in result["trials"][:top]:
+        lines.append([str(row["trial"])] + [str(row["params"][name]) for name in names] + [
+            str(row["score"]), str(row["trades"]), str(row["net_profit"]), str(row["win_rate"]),
+            "-" if row["profit_factor"] is None else str(row["profit_factor"]), str(row["max_drawdown"]),
+            f"descartada ({row['evaluated_fraction']:.0%})" if row["pruned"] else "completa"
+        ])
+    widths = [max(len(header[i]), *(len(line[i]) for line in lines)) for i in range(len(header))]
+    render = lambda cells: "  ".join(cell.rjust(width) for cell, width in zip(cells, widths))  # noqa: E731
+    return "\n".join([render(header), render(["-" * width for width in widths])] + [render(line) for line in lines])
@@ -0,0 +1,147 @@
+# backend/app/services/portfolio_snapshot.py
+# Foto en memoria de la cuenta y las posiciones de MT5
+# Un poller en segundo plano la refresca cada PORTFOLIO_REFRESH_INTERVAL segundos;
+# los lectores (dashboard, bot, rutas MT5) la leen sin llamar al terminal
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+from ..core.config import settings
+from ..core.logger import logger
+from .data_fetcher import data_fetcher
+from .mt5_executor import mt5_executor, PRIORITY_POSITION
+
+
+@dataclass(frozen=True)
+class PortfolioSnapshot:
+    """Foto inmutable: cuenta y posiciones son vistas de solo lectura"""
+    account_info: Optional[Mapping[str, Any]]
+    positions: Tuple[Mapping[str, Any], ...]
+    taken_at: float = field(default_factory=time.monotonic)
+    taken_at_wall: datetime = field(default_factory=datetime.now)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+    def to_status(self) -> Dict[str, Any]:
+        """Formato de BrokerAPI.get_portfolio_status (copias, el llamador puede modificarlas)"""
+        positions = [dict(position) for position in self.positions]
+        return {
+            "success": True,
+            "account_info": dict(self.account_info) if self.account_info is not None else None,
+            "open_positions": positions,
+            "summary": {
+                "total_positions": len(positions),
+                "total_profit": sum(pos["profit"] for pos in positions),
+                "total_volume": sum(pos["volume"] for pos in positions),
+                "buy_positions": len([p for p in positions if p["type"] == "BUY"]),
+                "sell_positions": len([p for p in positions if p["type"] == "SELL"])
+            },
+            "snapshot_age": round(self.age, 3),
+            "snapshot_time": self.taken_at_wall.isoformat()
+        }
+
+
+class PortfolioSnapshotService:
+    """
+    Mantiene la última PortfolioSnapshot. `get(max_staleness)` la devuelve si es
+    suficientemente reciente; si no (o sin poller), la refresca bajo demanda y las
+    lecturas concurrentes comparten esa única llamada al terminal.
+    """
+
+    def __init__(self, refresh_interval: float = None, max_staleness: float = None):
+        self.refresh_interval = refresh_interval or settings.PORTFOLIO_REFRESH_INTERVAL
+        self.max_staleness = max_staleness or settings.PORTFOLIO_MAX_STALENESS
+        self.snapshot: Optional[PortfolioSnapshot] = None
+        self.refresh_lock = threading.Lock()
+        self.poller_task: Optional[asyncio.Task] = None
+        self.stats = {"reads": 0, "served_from_snapshot": 0, "on_demand_refreshes": 0,
+                      "poller_refreshes": 0, "terminal_calls": 0, "errors": 0}
+
+    def _take_snapshot(self) -> PortfolioSnapshot:
+        account_info = data_fetcher.get_account_info()
+        positions = data_fetcher.get_open_positions()
+        self.stats["terminal_calls"] += 2
+        snapshot = PortfolioSnapshot(
+            account_info=MappingProxyType(dict(account_info)) if account_info is not None else None,
+            positions=tuple(MappingProxyType(dict(position)) for position in positions)
+        )
+        self.snapshot = snapshot
+        return snapshot
+
+    def refresh(self, max_staleness: float = 0.0) -> PortfolioSnapshot:
+        """Refrescar salvo que otro hilo lo acabe de hacer mientras se esperaba el lock"""
+        with self.refresh_lock:
+            snapshot = self.snapshot
+            if snapshot is not None and snapshot.age <= max_staleness:
+                return snapshot
+            return self._take_snapshot()
+
+    def get(self, max_staleness: Optional[float] = None) -> PortfolioSnapshot:
+        max_staleness = self.max_staleness if max_staleness is None else max_staleness
+        self.stats["reads"] += 1
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.age <= max_staleness:
+            self.stats["served_from_snapshot"] += 1
+            return snapshot
+        self.stats["on_demand_refreshes"] += 1
+        return self.refresh(max_staleness)
+
+    async def get_async(self, max_staleness: Optional[float] = None) -> PortfolioSnapshot:
+        """Como get(), pero si hay que refrescar se espera al hilo MT5 sin bloquear el event loop"""
+        max_staleness = self.max_staleness if max_staleness is None else max_staleness
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.age <= max_staleness:
+            self.stats["reads"] += 1
+            self.stats["served_from_snapshot"] += 1
+            return snapshot
+        return await mt5_executor.run(PRIORITY_POSITION, self.get, max_staleness, name="portfolio_snapshot")
+    
+    def invalidate(self):
+        """Forzar lectura del terminal en el próximo acceso (p. ej. tras abrir/cerrar una orden)"""
+        self.snapshot = None
+
+    async def _poll(self):
+        while True:
+            try:
+                if data_fetcher.connected:
+                    await mt5_executor.run(PRIORITY_POSITION, self.refresh, self.refresh_interval / 2,
+                                           name="portfolio_snapshot")
+                    self.stats["poller_refreshes"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Error refrescando snapshot del portfolio: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        """Arrancar el poller (dentro del event loop de la aplicación)"""
+        if self.poller_task is None or self.poller_task.done():
+            self.poller_task = asyncio.create_task(self._poll())
+            logger.info(f"📸 Snapshot de portfolio cada {self.refresh_interval}s")
+
+    async def stop(self):
+        if self.poller_task is not None:
+            self.poller_task.cancel()
+            try:
+                await self.poller_task
+            except asyncio.CancelledError:
+                pass
+            self.poller_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            **self.stats,
+            "refresh_interval": self.refresh_interval,
+            "max_staleness": self.max_staleness,
+            "poller_running": self.poller_task is not None and not self.poller_task.done(),
+            "snapshot_age": round(snapshot.age, 3) if snapshot else None
+        }
+
+# Instancia global
+portfolio_snapshots = PortfolioSnapshotService()
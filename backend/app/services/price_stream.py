@@ -0,0 +1,225 @@
+# backend/app/services/price_stream.py
+# Difusión de precios en tiempo real (WebSocket /ws/prices)
+# Un único poller lee los ticks de la unión de símbolos suscritos en una sola
+# llamada al hilo MT5 y reparte solo los cambios a cada cliente. Las lecturas al
+# terminal no dependen del número de clientes conectados.
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+from ..core.lazy import lazy_import
+from ..core.config import settings
+from ..core.logger import logger
+from .data_fetcher import data_fetcher
+from .mt5_executor import mt5_executor, PRIORITY_MARKET
+
+mt5 = lazy_import("MetaTrader5")
+
+
+class PriceSubscriber:
+    """
+    Cliente conectado. Las actualizaciones pendientes se guardan por símbolo
+    (conflación): si el cliente va lento, un símbolo que cambia diez veces se
+    envía una sola vez con el último valor, así la cola nunca crece más que el
+    número de símbolos suscritos.
+    """
+
+    def __init__(self, websocket, symbols: Iterable[str] = ()):
+        self.websocket = websocket
+        self.symbols: Set[str] = set(symbols)
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.wakeup = asyncio.Event()
+        self.sent = 0
+        self.conflated = 0
+
+    def push(self, quote: Dict[str, Any]):
+        if quote["symbol"] in self.pending:
+            self.conflated += 1
+        self.pending[quote["symbol"]] = quote
+        self.wakeup.set()
+
+    def take(self) -> List[Dict[str, Any]]:
+        quotes = list(self.pending.values())
+        self.pending = {}
+        self.wakeup.clear()
+        return quotes
+
+
+class PriceStreamService:
+    def __init__(self, interval: float = None, reference_interval: float = None,
+                 send_timeout: float = None, max_symbols: int = None):
+        self.interval = interval or settings.PRICE_STREAM_INTERVAL
+        self.reference_interval = reference_interval or settings.PRICE_STREAM_REFERENCE_INTERVAL
+        self.send_timeout = send_timeout or settings.PRICE_STREAM_SEND_TIMEOUT
+        self.max_symbols = max_symbols or settings.PRICE_STREAM_MAX_SYMBOLS
+        self.subscribers: Set[PriceSubscriber] = set()
+        self.quotes: Dict[str, Dict[str, Any]] = {}
+        self.quotes_at: Dict[str, float] = {}
+        # Cierre de la vela M1 anterior (referencia para el % de cambio)
+        self.references: Dict[str, float] = {}
+        self.references_at: Dict[str, float] = {}
+        self.poller_task: Optional[asyncio.Task] = None
+        self.stats = {"polls": 0, "tick_reads": 0, "updates_published": 0,
+                      "messages_sent": 0, "slow_clients_dropped": 0, "errors": 0}
+
+    # --- Lecturas en el hilo MT5 ---
+
+    def _read_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Todos los ticks en una única tarea del ejecutor (las llamadas internas van en línea)"""
+        now = time.monotonic()
+        quotes = {}
+        for symbol in symbols:
+            if now - self.references_at.get(symbol, float("-inf")) >= self.reference_interval:
+                self._read_reference(symbol, now)
+            price = data_fetcher.get_current_price(symbol)
+            if price:
+                quotes[symbol] = self._build_quote(symbol, price)
+        self.stats["tick_reads"] += len(symbols)
+        return quotes
+
+    def _read_reference(self, symbol: str, now: float):
+        rates = data_fetcher.get_rates(symbol, mt5.TIMEFRAME_M1, 2)
+        if rates is not None and len(rates) > 0:
+            self.references[symbol] = float(rates["close"][-2] if len(rates) > 1 else rates["close"][-1])
+        self.references_at[symbol] = now
+
+    def _build_quote(self, symbol: str, price: Dict[str, Any]) -> Dict[str, Any]:
+        bid = price["bid"]
+        reference = self.references.get(symbol) or bid
+        change = (bid - reference) / reference * 100 if reference else 0.0
+        return {
+            "symbol": symbol,
+            "bid": round(bid, 5),
+            "ask": round(price["ask"], 5),
+            "spread": round(price["spread"], 5),
+            "change": round(change, 2),
+            "trend": "up" if change > 0 else "down" if change < 0 else "flat",
+            "time": price["time"].isoformat()
+        }
+
+    # --- Lectura compartida (también para /api/dashboard/market-overview) ---
+
+    async def get_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Cotizaciones recientes; solo se va al terminal por las que tengan más de un intervalo"""
+        now = time.monotonic()
+        stale = [s for s in symbols if now - self.quotes_at.get(s, float("-inf")) > self.interval]
+        if stale and data_fetcher.connected:
+            fresh = await mt5_executor.run(PRIORITY_MARKET, self._read_quotes, stale, name="price_stream")
+            self._publish(self._store(fresh))
+        return {s: self.quotes[s] for s in symbols if s in self.quotes}
+
+    def _store(self, quotes: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Guardar las cotizaciones y devolver solo las que cambiaron"""
+        now = time.monotonic()
+        changed = []
+        for symbol, quote in quotes.items():
+            previous = self.quotes.get(symbol)
+            if previous is None or previous["bid"] != quote["bid"] or previous["ask"] != quote["ask"]:
+                changed.append(quote)
+            self.quotes[symbol] = quote
+            self.quotes_at[symbol] = now
+        return changed
+
+    # --- Poller y difusión ---
+
+    def subscribed_symbols(self) -> List[str]:
+        symbols: Set[str] = set()
+        for subscriber in self.subscribers:
+            symbols |= subscriber.symbols
+        return sorted(symbols)
+
+    async def _poll(self):
+        while True:
+            try:
+                symbols = self.subscribed_symbols()
+                if symbols and data_fetcher.connected:
+                    quotes = await mt5_executor.run(PRIORITY_MARKET, self._read_quotes, symbols,
+                                                    name="price_stream")
+                    self.stats["polls"] += 1
+                    self._publish(self._store(quotes))
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Error en el poller de precios: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, changed: List[Dict[str, Any]]):
+        if not changed:
+            return
+        self.stats["updates_published"] += len(changed)
+        for subscriber in list(self.subscribers):
+            for quote in changed:
+                if quote["symbol"] in subscriber.symbols:
+                    subscriber.push(quote)
+
+    def start(self):
+        """Arrancar el poller (dentro del event loop de la aplicación)"""
+        if self.poller_task is None or self.poller_task.done():
+            self.poller_task = asyncio.create_task(self._poll())
+            logger.info(f"📡 Streaming de precios cada {self.interval}s")
+
+    async def stop(self):
+        if self.poller_task is not None:
+            self.poller_task.cancel()
+            try:
+                await self.poller_task
+            except asyncio.CancelledError:
+                pass
+            self.poller_task = None
+
+    # --- Clientes ---
+
+    def subscribe(self, subscriber: PriceSubscriber, symbols: Iterable[str]):
+        """Añadir símbolos y enviar su último valor conocido de inmediato"""
+        room = self.max_symbols - len(subscriber.symbols)
+        new = [s.upper() for s in symbols if s and s.upper() not in subscriber.symbols][:max(room, 0)]
+        subscriber.symbols.update(new)
+        for symbol in new:
+            if symbol in self.quotes:
+                subscriber.push(self.quotes[symbol])
+
+    def unsubscribe(self, subscriber: PriceSubscriber, symbols: Iterable[str]):
+        for symbol in symbols:
+            subscriber.symbols.discard(symbol.upper())
+            subscriber.pending.pop(symbol.upper(), None)
+
+    def register(self, subscriber: PriceSubscriber):
+        self.subscribers.add(subscriber)
+        self.start()
+
+    def unregister(self, subscriber: PriceSubscriber):
+        self.subscribers.discard(subscriber)
+
+    async def sender(self, subscriber: PriceSubscriber):
+        """
+        Enviar al cliente lo pendiente. Si un envío tarda más de send_timeout el
+        cliente no está leyendo: se desconecta en lugar de acumular memoria.
+        """
+        while True:
+            await subscriber.wakeup.wait()
+            quotes = subscriber.take()
+            if not quotes:
+                continue
+            try:
+                await asyncio.wait_for(
+                    subscriber.websocket.send_json({"type": "prices", "data": quotes}),
+                    timeout=self.send_timeout
+                )
+            except asyncio.TimeoutError:
+                self.stats["slow_clients_dropped"] += 1
+                logger.warning("🐢 Cliente de precios demasiado lento, desconectado")
+                raise
+            subscriber.sent += 1
+            self.stats["messages_sent"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "interval": self.interval,
+            "subscribers": len(self.subscribers),
+            "symbols": self.subscribed_symbols(),
+            "conflated_updates": sum(s.conflated for s in self.subscribers),
+            "poller_running": self.poller_task is not None and not self.poller_task.done()
+        }
+
+# Instancia global
+price_stream = PriceStreamService()
@@ -0,0 +1,375 @@
+# backend/app/services/replay_service.py
+# Modo replay del pipeline de decisión IA (benchmark reproducible del bucle del bot)
+#
+# - Mercado: ticks y velas grabados en market_store, vistos en el instante del reloj
+#   de replay (el terminal lo simula scripts/fake_mt5.py con set_market).
+# - Modelo: stub determinista que devuelve las respuestas grabadas en
+#   AIAnalysisHistory.ai_response (o una sintética derivada de símbolo e instante).
+# - Noticias: las guardadas en market_news hasta el instante del reloj.
+# - Reloj: avanza con los eventos, `speed` veces más rápido que el tiempo real
+#   (0 = sin esperas, lo más rápido posible).
+#
+# El pipeline que se ejecuta es el de producción (analysis_service /
+# bot_analysis_service); los tiempos por etapa salen de pipeline_timings.
+
+import asyncio
+import hashlib
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from ..core.lazy import lazy_import
+from ..core.http_pool import LatencyHistogram
+from ..core.logger import logger
+from ..core.utils import STAGE_BUCKETS_MS, pipeline_timings
+from ..models.ai_config_model import AIAnalysisHistory
+from ..models.news_model import MarketNews
+from .analysis_service import analysis_service
+from .bot_analysis_service import bot_analysis_service
+from .market_store import BAR_COLUMNS, TICKS, TIMEFRAME_NAMES, MarketStore
+from .trade_rules import pip_size
+
+mt5 = lazy_import("MetaTrader5")
+
+TIMEFRAME_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "M30": 1800, "H1": 3600, "H4": 14400, "D1": 86400}
+
+Event = Tuple[datetime, str]
+
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def resample_bars(bars: Dict[str, np.ndarray], seconds: int) -> Dict[str, np.ndarray]:
+    """Agregar velas (ordenadas) a un marco temporal mayor múltiplo del original"""
+    if len(bars["time"]) == 0:
+        return bars
+    buckets = bars["time"] // seconds * seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    return {
+        "time": buckets[starts],
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends],
+        "tick_volume": np.add.reduceat(bars["tick_volume"], starts),
+        "spread": bars["spread"][ends],
+        "real_volume": np.add.reduceat(bars["real_volume"], starts)
+    }
+
+
+class ReplayClock:
+    """Reloj simulado que avanza con los eventos grabados"""
+
+    def __init__(self, start: datetime, speed: float = 0.0):
+        self.current = _epoch(start)
+        self.speed = speed
+        self._origin: Optional[Tuple[float, float]] = None  # (instante simulado, perf_counter)
+
+    def timestamp(self) -> float:
+        return self.current
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.current, tz=timezone.utc)
+
+    async def advance_to(self, when: datetime):
+        """Esperar (a `speed`x) hasta el instante `when` y avanzar el reloj"""
+        target = _epoch(when)
+        if self.speed > 0:
+            if self._origin is None:
+                self._origin = (target, time.perf_counter())
+            delay = self._origin[1] + (target - self._origin[0]) / self.speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self.current = max(self.current, target)
+
+
+class StoreMarket:
+    """
+    Mercado grabado visto en el instante del reloj: tick vigente y velas cerradas.
+
+    Las velas de cada (símbolo, marco) se cargan una vez para toda la ventana de
+    replay; un marco no grabado se agrega desde el grabado más fino que lo divida
+    (p.ej. H1 desde M1). Los ticks se abren por día con memmap. Sin ticks
+    grabados, el precio es el cierre de la última vela cerrada más su spread.
+    """
+
+    def __init__(self, store: MarketStore, clock: ReplayClock, start: datetime, end: datetime,
+                 lookback: timedelta = timedelta(days=30)):
+        self.store = store
+        self.clock = clock
+        self.start = start - lookback
+        self.end = end + timedelta(days=1)
+        self.timeframes = {getattr(mt5, f"TIMEFRAME_{name}"): name for name in TIMEFRAME_NAMES}
+        self._bars: Dict[Tuple[str, str], Optional[Dict[str, np.ndarray]]] = {}
+        self._ticks: Dict[Tuple[str, date], Dict[str, np.ndarray]] = {}
+        self.stats = {"ticks": 0, "ticks_from_bars": 0, "rates": 0, "misses": 0}
+
+    def _read_bars(self, symbol: str, timeframe: str) -> Optional[Dict[str, np.ndarray]]:
+        bars = self.store.read_bars(symbol, timeframe, self.start, self.end)
+        if len(bars["time"]) == 0:
+            return None
+        times = bars["time"]
+        if np.any(times[1:] <= times[:-1]):
+            # Días sin compactar: pueden traer velas desordenadas o repetidas
+            _, index = np.unique(times, return_index=True)
+            bars = {name: values[index] for name, values in bars.items()}
+        return bars
+
+    def bars(self, symbol: str, timeframe: str) -> Optional[Dict[str, np.ndarray]]:
+        key = (symbol, timeframe)
+        if key not in self._bars:
+            bars = self._read_bars(symbol, timeframe)
+            if bars is None:
+                seconds = TIMEFRAME_SECONDS[timeframe]
+                for source in TIMEFRAME_NAMES:
+                    source_seconds = TIMEFRAME_SECONDS[source]
+                    if source_seconds >= seconds or seconds % source_seconds:
+                        continue
+                    finer = self._read_bars(symbol, source)
+                    if finer is not None:
+                        bars = resample_bars(finer, seconds)
+                        break
+            self._bars[key] = bars
+        return self._bars[key]
+
+    def rates(self, symbol: str, timeframe: int, start: int, count: int) -> Optional[np.ndarray]:
+        """copy_rates_from_pos sobre lo grabado: solo velas cerradas en el instante del reloj"""
+        name = self.timeframes.get(timeframe)
+        bars = self.bars(symbol, name) if name else None
+        if bars is None:
+            self.stats["misses"] += 1
+            return None
+        closed = int(np.searchsorted(bars["time"], self.clock.timestamp() - TIMEFRAME_SECONDS[name], side="right"))
+        hi = max(closed - start, 0)
+        lo = max(hi - count, 0)
+        if hi == lo:
+            self.stats["misses"] += 1
+            return None
+        self.stats["rates"] += 1
+        return MarketStore.to_rates({column: bars[column][lo:hi] for column in BAR_COLUMNS})
+
+    def _day_ticks(self, symbol: str, day: date) -> Dict[str, np.ndarray]:
+        key = (symbol, day)
+        ticks = self._ticks.get(key)
+        if ticks is None:
+            ticks = self.store.read_day(symbol, TICKS, day) if day in self.store.days(symbol, TICKS) else {}
+            self._ticks[key] = ticks
+        return ticks
+
+    def tick(self, symbol: str) -> Optional[Tuple[float, float, float, float, int]]:
+        """(bid, ask, last, volume, time) vigente en el instante del reloj"""
+        now = self.clock.timestamp()
+        now_ms = int(now * 1000)
+        for day in (self.clock.now().date(), self.clock.now().date() - timedelta(days=1)):
+            ticks = self._day_ticks(symbol, day)
+            if not ticks or not len(ticks["time_msc"]):
+                continue
+            index = int(np.searchsorted(ticks["time_msc"], now_ms, side="right")) - 1
+            if index >= 0:
+                self.stats["ticks"] += 1
+                return (float(ticks["bid"][index]), float(ticks["ask"][index]), float(ticks["last"][index]),
+                        float(ticks["volume"][index]), int(ticks["time_msc"][index]) // 1000)
+
+        for name in TIMEFRAME_NAMES:
+            bars = self.bars(symbol, name)
+            if bars is None:
+                continue
+            index = int(np.searchsorted(bars["time"], now - TIMEFRAME_SECONDS[name], side="right")) - 1
+            if index < 0:
+                continue
+            bid = float(bars["close"][index])
+            ask = bid + int(bars["spread"][index]) * pip_size(symbol) / 10
+            self.stats["ticks_from_bars"] += 1
+            return bid, ask, bid, float(bars["tick_volume"][index]), int(bars["time"][index]) + TIMEFRAME_SECONDS[name]
+
+        self.stats["misses"] += 1
+        return None
+
+    def event_times(self, symbol: str, start: datetime, end: datetime, interval: float) -> List[datetime]:
+        """Instantes cada `interval` segundos en los que hay velas grabadas (mercado abierto)"""
+        for name in TIMEFRAME_NAMES:
+            bars = self.bars(symbol, name)
+            if bars is None:
+                continue
+            closes = bars["time"] + TIMEFRAME_SECONDS[name]
+            closes = closes[(closes >= _epoch(start)) & (closes < _epoch(end))]
+            slots = np.unique(np.ceil(closes / interval) * interval)
+            return [datetime.fromtimestamp(float(slot), tz=timezone.utc) for slot in slots]
+        return []
+
+
+class ReplayModel:
+    """
+    Modelo stub determinista para ai_interface.replay_model.
+
+    Devuelve la respuesta grabada más reciente del símbolo en el instante del
+    reloj; sin grabación, una respuesta sintética derivada de (símbolo, instante),
+    así dos replays de la misma ventana producen las mismas decisiones.
+    """
+
+    def __init__(self, clock: ReplayClock, responses: Dict[str, List[Tuple[datetime, str]]] = None,
+                 latency_ms: float = 0.0):
+        self.clock = clock
+        self.latency_ms = latency_ms
+        self.responses: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+        for symbol, rows in (responses or {}).items():
+            rows = sorted(rows, key=lambda row: row[0])
+            self.responses[symbol] = (np.array([_epoch(when) for when, _ in rows]), [text for _, text in rows])
+        self.stats = {"recorded": 0, "synthetic": 0}
+
+    async def complete(self, symbol: str, prompt: str) -> str:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        recorded = self.responses.get(symbol)
+        if recorded is not None:
+            index = int(np.searchsorted(recorded[0], self.clock.timestamp(), side="right")) - 1
+            if index >= 0:
+                self.stats["recorded"] += 1
+                return recorded[1][index]
+        self.stats["synthetic"] += 1
+        return self._synthetic(symbol)
+
+    def _synthetic(self, symbol: str) -> str:
+        digest = hashlib.sha256(f"{symbol}:{int(self.clock.timestamp())}".encode()).digest()
+        signal = ("BUY", "SELL", "HOLD")[digest[0] % 3]
+        return json.dumps({
+            "signal": signal,
+            "confidence": 40 + digest[1] % 56,
+            "risk_level": "MEDIUM",
+            "reasoning": f"Respuesta sintética de replay para {symbol}"
+        })
+
+
+class ReplayNews:
+    """Fuente de noticias para news_service.replay_source: market_news hasta el instante del reloj"""
+
+    def __init__(self, clock: ReplayClock, news: Sequence[MarketNews] = (), limit: int = 15):
+        self.clock = clock
+        self.limit = limit
+        self.news = sorted(news, key=lambda item: item.published_at)
+        self.times = np.array([_epoch(item.published_at) for item in self.news])
+
+    async def get_market_news(self, category: str = "general") -> List[Dict[str, Any]]:
+        available = self.news[:int(np.searchsorted(self.times, self.clock.timestamp(), side="right"))]
+        if category != "general":
+            available = [item for item in available if item.category == category]
+        return [
+            {
+                "id": item.id,
+                "title": item.title,
+                "summary": item.summary or "No hay resumen disponible",
+                "source": item.source or "Fuente desconocida",
+                "url": item.url or "#",
+                "image_url": item.image_url or "",
+                "time": item.published_at.strftime("%H:%M"),
+                "sentiment": item.sentiment or "neutral",
+                "category": item.category or category
+            }
+            for item in reversed(available[-self.limit:])
+        ]
+
+
+def load_recorded_analyses(db: Session, symbols: List[str], start: datetime, end: datetime,
+                           user_id: Optional[int] = None) -> List[AIAnalysisHistory]:
+    """Análisis grabados (con o sin ai_response) de los símbolos en [start, end)"""
+    # SQLite guarda created_at en UTC sin zona
+    query = db.query(AIAnalysisHistory).filter(
+        AIAnalysisHistory.symbol.in_(symbols),
+        AIAnalysisHistory.created_at >= start.replace(tzinfo=None),
+        AIAnalysisHistory.created_at < end.replace(tzinfo=None)
+    )
+    if user_id is not None:
+        query = query.filter(AIAnalysisHistory.user_id == user_id)
+    return query.order_by(AIAnalysisHistory.created_at).all()
+
+
+def load_recorded_news(db: Session, start: datetime, end: datetime) -> List[MarketNews]:
+    return db.query(MarketNews).filter(
+        MarketNews.published_at >= start.replace(tzinfo=None),
+        MarketNews.published_at < end.replace(tzinfo=None)
+    ).all()
+
+
+class PipelineReplay:
+    """
+    Reproduce eventos (instante, símbolo) por el pipeline de producción.
+
+    mode="bot" ejecuta bot_analysis_service.analyze_and_execute (incluye la
+    decisión y el envío de la orden al terminal simulado); mode="analysis"
+    ejecuta analysis_service.analyze_symbol. `concurrency` limita los eventos en
+    vuelo (0 = sin límite: con speed > 0 cada evento se lanza a su hora aunque el
+    anterior no haya terminado, como en vivo).
+    """
+
+    def __init__(self, clock: ReplayClock, user_id: int, mode: str = "bot", bot_config: Any = None,
+                 concurrency: int = 1):
+        if mode not in ("bot", "analysis"):
+            raise ValueError(f"Modo de replay no soportado: {mode}")
+        self.clock = clock
+        self.user_id = user_id
+        self.mode = mode
+        self.bot_config = bot_config
+        self.concurrency = concurrency
+        self.latency = LatencyHistogram(STAGE_BUCKETS_MS)
+        self.outcomes = {"signals": {}, "executed": 0, "errors": 0}
+
+    async def _run_event(self, symbol: str):
+        start = time.perf_counter()
+        try:
+            if self.mode == "bot":
+                result = await bot_analysis_service.analyze_and_execute(symbol, self.user_id, self.bot_config)
+            else:
+                result = await analysis_service.analyze_symbol(symbol, self.user_id)
+        except Exception as e:
+            logger.error(f"❌ Replay {symbol}: {str(e)}")
+            result = {"success": False}
+        self.latency.record(time.perf_counter() - start)
+
+        if not result.get("success"):
+            self.outcomes["errors"] += 1
+            return
+        signal = result.get("signal", "HOLD")
+        self.outcomes["signals"][signal] = self.outcomes["signals"].get(signal, 0) + 1
+        if (result.get("execution_result") or {}).get("executed"):
+            self.outcomes["executed"] += 1
+
+    async def run(self, events: List[Event]) -> Dict[str, Any]:
+        events = sorted(events)
+        pipeline_timings.reset()
+        slots = asyncio.Semaphore(self.concurrency) if self.concurrency > 0 else None
+        tasks = []
+
+        async def run_event(symbol: str):
+            try:
+                await self._run_event(symbol)
+            finally:
+                if slots is not None:
+                    slots.release()
+
+        began = time.perf_counter()
+        for when, symbol in events:
+            if slots is not None:
+                await slots.acquire()
+            await self.clock.advance_to(when)
+            tasks.append(asyncio.create_task(run_event(symbol)))
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - began
+
+        simulated = _epoch(events[-1][0]) - _epoch(events[0][0]) if events else 0.0
+        return {
+            "mode": self.mode,
+            "events": len(events),
+            "wall_seconds": round(wall, 3),
+            "events_per_second": round(len(events) / wall, 2) if wall else None,
+            "simulated_seconds": simulated,
+            "acceleration": round(simulated / wall, 1) if wall else None,
+            "latency": self.latency.get_stats(),
+            "stages": pipeline_timings.get_stats(),
+            **self.outcomes
+        }
@@ -0,0 +1,75 @@
+# backend/app/services/trade_rules.py
+# Reglas de trading puras (sin MT5 ni BD), compartidas por el bot en vivo y el backtest
+# BotAnalysisService._execute_trade_if_valid / _calculate_stops delegan aquí para
+# que el backtest evalúe exactamente las mismas reglas.
+
+from typing import Optional, Tuple
+
+# Confianza mínima de la señal para abrir operación
+CONFIDENCE_THRESHOLD = 60.0
+# Take profit = stop x RISK_REWARD (ratio 1:2)
+RISK_REWARD = 2.0
+
+_CRYPTOS = ('BTC', 'ETH', 'LTC', 'XRP', 'ADA')
+
+
+def pip_size(symbol: str) -> float:
+    """Tamaño del pip según el símbolo"""
+    if "JPY" in symbol:
+        return 0.01
+    if "XAU" in symbol or "GOLD" in symbol:
+        return 0.1
+    if "XAG" in symbol:
+        return 0.001
+    if any(crypto in symbol for crypto in _CRYPTOS):
+        return 1.0
+    return 0.0001
+
+
+def price_digits(symbol: str) -> int:
+    """Decimales a los que se redondean SL/TP"""
+    if "JPY" in symbol:
+        return 2
+    if "XAU" in symbol:
+        return 1
+    if any(crypto in symbol for crypto in ['BTC', 'ETH']):
+        return 0
+    return 5
+
+
+def contract_size(symbol: str) -> float:
+    """Tamaño de contrato estándar por lote (cuando no hay symbol_info de MT5)"""
+    if "XAU" in symbol or "GOLD" in symbol:
+        return 100.0
+    if "XAG" in symbol:
+        return 5000.0
+    if any(crypto in symbol for crypto in _CRYPTOS):
+        return 1.0
+    return 100000.0
+
+
+def calculate_stops(symbol: str, signal: str, entry_price: float, stop_loss_pips: float,
+                    take_profit_pips: Optional[float] = None) -> Tuple[float, float]:
+    """Stop loss a `stop_loss_pips` pips y take profit a `take_profit_pips` (por defecto ratio 1:2)"""
+    stop_distance = stop_loss_pips * pip_size(symbol)
+    if take_profit_pips:
+        target_distance = take_profit_pips * pip_size(symbol)
+    else:
+        target_distance = stop_distance * RISK_REWARD
+
+    if signal == "BUY":
+        stop_loss = entry_price - stop_distance
+        take_profit = entry_price + target_distance
+    else:  # SELL
+        stop_loss = entry_price + stop_distance
+        take_profit = entry_price - target_distance
+
+    digits = price_digits(symbol)
+    return round(stop_loss, digits), round(take_profit, digits)
+
+
+def fallback_stops(signal: str, entry_price: float) -> Tuple[float, float]:
+    """Stops porcentuales de seguridad si el cálculo normal falla"""
+    if signal == "BUY":
+        return entry_price * 0.99, entry_price * 1.02
+    return entry_price * 1.01, entry_price * 0.98
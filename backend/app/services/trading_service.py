@@ -3,20 +3,60 @@
 #  Mecanismos de bloqueo para evitar operaciones duplicadas
 #  Manejo de hilos/asyncio para análisis en segundo plano
 
-import MetaTrader5 as mt5
 from datetime import datetime
 from typing import Dict, Optional, Tuple
+from ..core.lazy import lazy_import
 from ..core.logger import logger
 from .data_fetcher import data_fetcher
+from .portfolio_snapshot import portfolio_snapshots
+from .mt5_executor import mt5_executor, PRIORITY_ORDER, PRIORITY_POSITION, PRIORITY_MARKET
+
+mt5 = lazy_import("MetaTrader5")
 
 class TradingService:
     def __init__(self):
         self.is_running = False
     
+    # Cada operación se ejecuta entera en el hilo de mt5_executor con su prioridad:
+    # los métodos públicos esperan el resultado (síncrono) y las variantes *_async
+    # lo esperan desde un coroutine sin bloquear el event loop
     def place_order(self, symbol: str, order_type: str, volume: float, 
                    stop_loss: float = 0.0, take_profit: float = 0.0,
                    magic: int = 123456, comment: str = "AI Trading") -> Dict:
         """Colocar una orden de trading"""
+        return mt5_executor.call(PRIORITY_ORDER, self._place_order, symbol, order_type, volume,
+                                 stop_loss, take_profit, magic, comment, name="order_send")
+    
+    async def place_order_async(self, symbol: str, order_type: str, volume: float, 
+                                stop_loss: float = 0.0, take_profit: float = 0.0,
+                                magic: int = 123456, comment: str = "AI Trading") -> Dict:
+        return await mt5_executor.run(PRIORITY_ORDER, self._place_order, symbol, order_type, volume,
+                                      stop_loss, take_profit, magic, comment, name="order_send")
+    
+    def close_position(self, ticket: int) -> Dict:
+        """Cerrar una posición existente"""
+        return mt5_executor.call(PRIORITY_ORDER, self._close_position, ticket, name="close_position")
+    
+    async def close_position_async(self, ticket: int) -> Dict:
+        return await mt5_executor.run(PRIORITY_ORDER, self._close_position, ticket, name="close_position")
+    
+    def modify_position(self, ticket: int, stop_loss: float = None, take_profit: float = None) -> Dict:
+        """Modificar stops de una posición existente"""
+        return mt5_executor.call(PRIORITY_POSITION, self._modify_position, ticket, stop_loss, take_profit,
+                                 name="modify_position")
+    
+    async def modify_position_async(self, ticket: int, stop_loss: float = None, take_profit: float = None) -> Dict:
+        return await mt5_executor.run(PRIORITY_POSITION, self._modify_position, ticket, stop_loss, take_profit,
+                                      name="modify_position")
+    
+    def calculate_position_size(self, symbol: str, risk_percent: float, stop_loss_pips: float) -> float:
+        """Calcular tamaño de posición basado en riesgo"""
+        return mt5_executor.call(PRIORITY_MARKET, self._calculate_position_size, symbol, risk_percent, stop_loss_pips,
+                                 name="calculate_position_size")
+    
+    def _place_order(self, symbol: str, order_type: str, volume: float, 
+                   stop_loss: float = 0.0, take_profit: float = 0.0,
+                   magic: int = 123456, comment: str = "AI Trading") -> Dict:
         try:
             if not data_fetcher.connected:
                 return {"success": False, "error": "MT5 no conectado"}
@@ -52,6 +92,7 @@ class TradingService:
                 }
             
             logger.info(f"✅ Orden ejecutada - {order_type} {volume} {symbol}")
+            portfolio_snapshots.invalidate()
             return {
                 "success": True,
                 "order_id": result.order,
@@ -64,8 +105,7 @@ class TradingService:
             logger.error(f"❌ Error colocando orden: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def close_position(self, ticket: int) -> Dict:
-        """Cerrar una posición existente"""
+    def _close_position(self, ticket: int) -> Dict:
         try:
             if not data_fetcher.connected:
                 return {"success": False, "error": "MT5 no conectado"}
@@ -103,6 +143,7 @@ class TradingService:
                 }
             
             logger.info(f"🔒 Posición cerrada - Ticket: {ticket}")
+            portfolio_snapshots.invalidate()
             return {
                 "success": True,
                 "order_id": result.order,
@@ -115,8 +156,7 @@ class TradingService:
             logger.error(f"❌ Error cerrando posición: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def modify_position(self, ticket: int, stop_loss: float = None, take_profit: float = None) -> Dict:
-        """Modificar stops de una posición existente"""
+    def _modify_position(self, ticket: int, stop_loss: float = None, take_profit: float = None) -> Dict:
         try:
             if not data_fetcher.connected:
                 return {"success": False, "error": "MT5 no conectado"}
@@ -150,6 +190,7 @@ class TradingService:
                 }
             
             logger.info(f"⚙️ Posición modificada - Ticket: {ticket}")
+            portfolio_snapshots.invalidate()
             return {
                 "success": True,
                 "message": "Posición modificada exitosamente",
@@ -161,8 +202,7 @@ class TradingService:
             logger.error(f"❌ Error modificando posición: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def calculate_position_size(self, symbol: str, risk_percent: float, stop_loss_pips: float) -> float:
-        """Calcular tamaño de posición basado en riesgo"""
+    def _calculate_position_size(self, symbol: str, risk_percent: float, stop_loss_pips: float) -> float:
         try:
             if not data_fetcher.connected:
                 return 0.01  # Tamaño por defecto
@@ -0,0 +1,225 @@
+# backend/app/services/write_buffer.py
+# Escritura diferida (write-behind) del historial: análisis IA, análisis de
+# noticias y contadores de uso. Las filas se acumulan en memoria y se escriben
+# en un hilo aparte, en una sola transacción, al llegar a WRITE_BUFFER_MAX_BATCH
+# pendientes o cada WRITE_BUFFER_FLUSH_INTERVAL segundos.
+#
+# - Parada de la app: se escribe lo pendiente antes de cerrar el pool de BD
+# - Memoria acotada: con WRITE_BUFFER_MAX_PENDING pendientes se escribe en el
+#   momento (write-through) en lugar de seguir acumulando
+# - Sin el buffer arrancado (scripts, WRITE_BUFFER_ENABLED=False) también
+# - Si una escritura falla el lote vuelve a la cola (sin superar el límite)
+# - Los incrementos de la misma fila se suman en memoria: un UPDATE por fila
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, func, update
+from ..core.config import settings
+from ..core.logger import logger
+from ..database.bulk import bulk_insert
+from ..database.db_connection import SessionLocal
+
+UpdateKey = Tuple[Any, Tuple[Tuple[str, Any], ...]]
+
+
+class WriteBehindBuffer:
+    def __init__(self, max_batch: int = None, flush_interval: float = None, max_pending: int = None):
+        self.max_batch = max_batch or settings.WRITE_BUFFER_MAX_BATCH
+        self.flush_interval = flush_interval or settings.WRITE_BUFFER_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.WRITE_BUFFER_MAX_PENDING
+        self.inserts: Dict[Any, List[Dict[str, Any]]] = {}
+        self.updates: Dict[UpdateKey, Dict[str, Dict[str, Any]]] = {}
+        self.pending = 0
+        # add/increment pueden llamarse desde hilos (to_thread, hilo MT5)
+        self.lock = threading.Lock()
+        # Una escritura a la vez: flush del hilo de fondo o write-through
+        self.write_lock = threading.Lock()
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.stopping = False
+        self.stats = {"queued": 0, "rows_written": 0, "updates_written": 0, "flushes": 0,
+                      "write_through": 0, "errors": 0, "dropped": 0, "last_flush_ms": 0.0}
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    # --- Encolado ---
+
+    def add(self, model, row: Dict[str, Any]):
+        """Encolar una fila nueva de model (dict con sus columnas)"""
+        unknown = set(row) - set(model.__table__.columns.keys())
+        if unknown:
+            # Un error de programación no debe quedarse reintentando en la cola
+            raise ValueError(f"Columnas desconocidas para {model.__tablename__}: {sorted(unknown)}")
+        with self.lock:
+            self.inserts.setdefault(model, []).append(dict(row))
+            self.pending += 1
+        self._after_enqueue()
+
+    def increment(self, model, where: Dict[str, Any], counters: Dict[str, float], values: Dict[str, Any] = None):
+        """Encolar incrementos de contadores (y asignaciones) de las filas que cumplen where"""
+        key = (model, tuple(sorted(where.items())))
+        with self.lock:
+            entry = self.updates.get(key)
+            if entry is None:
+                entry = self.updates[key] = {"counters": {}, "values": {}}
+                self.pending += 1
+            for column, amount in counters.items():
+                entry["counters"][column] = entry["counters"].get(column, 0) + amount
+            entry["values"].update(values or {})
+        self._after_enqueue()
+
+    def _after_enqueue(self):
+        self.stats["queued"] += 1
+        if not self.running:
+            self.write_now()
+        elif self.pending >= self.max_pending:
+            self.stats["write_through"] += 1
+            self.write_now()
+        elif self.pending >= self.max_batch:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    # --- Escritura ---
+
+    def _take(self):
+        with self.lock:
+            inserts, updates = self.inserts, self.updates
+            self.inserts, self.updates, self.pending = {}, {}, 0
+        return inserts, updates
+
+    def _requeue(self, inserts: Dict[Any, List[Dict[str, Any]]], updates: Dict[UpdateKey, Dict[str, Dict]]):
+        """Devolver a la cola un lote que no se pudo escribir (se descarta si no cabe)"""
+        size = sum(len(rows) for rows in inserts.values()) + len(updates)
+        with self.lock:
+            if self.pending + size > self.max_pending:
+                self.stats["dropped"] += size
+                logger.error(f"❌ Escritura diferida: se descartan {size} escrituras (cola llena)")
+                return
+            for model, rows in inserts.items():
+                self.inserts[model] = rows + self.inserts.get(model, [])
+            for key, entry in updates.items():
+                current = self.updates.get(key)
+                if current is None:
+                    self.updates[key] = entry
+                    self.pending += 1
+                    continue
+                for column, amount in entry["counters"].items():
+                    current["counters"][column] = current["counters"].get(column, 0) + amount
+                current["values"] = {**entry["values"], **current["values"]}
+            self.pending += size - len(updates)
+
+    @staticmethod
+    def _update_batches(updates: Dict[UpdateKey, Dict[str, Dict]]):
+        """Agrupar los UPDATE con las mismas columnas: un executemany por grupo"""
+        batches: Dict[Tuple, List[Dict[str, Any]]] = {}
+        for (model, where), entry in updates.items():
+            signature = (model, tuple(column for column, _ in where),
+                         tuple(sorted(entry["counters"])), tuple(sorted(entry["values"])))
+            params = {f"w_{column}": value for column, value in where}
+            params.update({f"c_{column}": amount for column, amount in entry["counters"].items()})
+            params.update({f"v_{column}": value for column, value in entry["values"].items()})
+            batches.setdefault(signature, []).append(params)
+
+        for (model, where_columns, counter_columns, value_columns), params in batches.items():
+            table = model.__table__
+            assignments = {column: func.coalesce(table.c[column], 0) + bindparam(f"c_{column}")
+                           for column in counter_columns}
+            assignments.update({column: bindparam(f"v_{column}") for column in value_columns})
+            statement = update(table).where(
+                *(table.c[column] == bindparam(f"w_{column}") for column in where_columns)
+            ).values(assignments)
+            yield statement, params
+
+    def _write(self, inserts: Dict[Any, List[Dict[str, Any]]], updates: Dict[UpdateKey, Dict[str, Dict]]):
+        """Escribir un lote en una transacción (hilo aparte o write-through)"""
+        start = time.perf_counter()
+        with self.write_lock:
+            db = SessionLocal()
+            try:
+                connection = db.connection()
+                rows = sum(bulk_insert(connection, model, model_rows) for model, model_rows in inserts.items())
+                for statement, params in self._update_batches(updates):
+                    connection.execute(statement, params)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+        self.stats["rows_written"] += rows
+        self.stats["updates_written"] += len(updates)
+        self.stats["flushes"] += 1
+        self.stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    def write_now(self):
+        """Escribir lo pendiente en el hilo actual (bloqueante)"""
+        inserts, updates = self._take()
+        if not inserts and not updates:
+            return
+        try:
+            self._write(inserts, updates)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Error en la escritura diferida: {str(e)}")
+            self._requeue(inserts, updates)
+
+    async def flush(self):
+        """Escribir lo pendiente en un hilo aparte"""
+        inserts, updates = self._take()
+        if not inserts and not updates:
+            return
+        try:
+            await asyncio.to_thread(self._write, inserts, updates)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Error en la escritura diferida: {str(e)}")
+            self._requeue(inserts, updates)
+
+    async def _run(self):
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """Arrancar la escritura por lotes (dentro del event loop de la aplicación)"""
+        if not settings.WRITE_BUFFER_ENABLED or self.running:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.stopping = False
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"🗃️ Escritura diferida del historial: lotes de {self.max_batch} o cada {self.flush_interval:.1f}s")
+
+    async def stop(self):
+        """Parar y escribir lo pendiente"""
+        if self.task is not None:
+            # Sin cancel(): en Python 3.11 wait_for puede tragarse la cancelación
+            # si el evento se activa a la vez, y el bucle no terminaría
+            self.stopping = True
+            self.wakeup.set()
+            await self.task
+            self.task = None
+        await self.flush()
+        if self.pending:
+            logger.warning(f"⚠️ Escritura diferida: {self.pending} escrituras sin guardar al parar")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": self.pending,
+            "running": self.running,
+            "max_batch": self.max_batch,
+            "flush_interval": self.flush_interval,
+            "max_pending": self.max_pending
+        }
+
+# Instancia global
+write_buffer = WriteBehindBuffer()
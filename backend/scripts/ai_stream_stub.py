@@ -0,0 +1,152 @@
+# backend/scripts/ai_stream_stub.py
+# Servidor stub que imita el streaming SSE de DeepSeek/OpenAI, Gemini y Claude
+#
+# Uso:
+#   python scripts/ai_stream_stub.py serve --port 8765
+#       (apuntar DEEPSEEK_API_URL/OPENAI_API_URL/GEMINI_API_URL/CLAUDE_API_URL al stub)
+#   python scripts/ai_stream_stub.py measure --delay 0.02
+#       (levanta el stub en proceso y mide tiempo hasta decisión vs. respuesta completa)
+#
+# La respuesta se emite en trozos de --chunk caracteres con --delay segundos entre
+# trozos, así el reasoning largo simula el tiempo de generación del modelo.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+REASONING = (
+    "El precio rebota en el soporte diario con RSI saliendo de sobreventa y cruce alcista del MACD. "
+    "Las noticias recientes son neutrales para el par y la volatilidad (ATR) está en la media de 20 sesiones. "
+) * 12
+
+STUB_RESPONSE = {
+    "signal": "BUY",
+    "confidence": 78,
+    "stop_loss": "1.08250",
+    "take_profit": "1.09100",
+    "timeframe": "4H",
+    "risk_level": "MEDIUM",
+    "key_levels": {"support": ["1.08300"], "resistance": ["1.09000"]},
+    "news_impact": "Neutral",
+    "reasoning": REASONING
+}
+
+
+def chunks(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def make_app(delay: float, chunk_size: int) -> web.Application:
+    content = json.dumps(STUB_RESPONSE, ensure_ascii=False, indent=2)
+    tokens = len(content) // 4
+
+    async def sse(request: web.Request, events) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for event in events:
+            payload = event if isinstance(event, str) else json.dumps(event)
+            await response.write(f"data: {payload}\n\n".encode())
+            await asyncio.sleep(delay)
+        await response.write_eof()
+        return response
+
+    async def chat_completions(request: web.Request):
+        body = await request.json()
+        if not body.get("stream"):
+            await asyncio.sleep(delay * len(chunks(content, chunk_size)))
+            return web.json_response({
+                "choices": [{"message": {"content": content}}],
+                "usage": {"total_tokens": tokens}
+            })
+        events = [{"choices": [{"delta": {"content": part}}]} for part in chunks(content, chunk_size)]
+        events.append({"choices": [], "usage": {"total_tokens": tokens}})
+        events.append("[DONE]")
+        return await sse(request, events)
+
+    async def gemini(request: web.Request):
+        action = request.match_info["action"]
+        if action == "generateContent":
+            await asyncio.sleep(delay * len(chunks(content, chunk_size)))
+            return web.json_response({"candidates": [{"content": {"parts": [{"text": content}]}}]})
+        events = [{"candidates": [{"content": {"parts": [{"text": part}]}}]} for part in chunks(content, chunk_size)]
+        events[-1]["usageMetadata"] = {"totalTokenCount": tokens}
+        return await sse(request, events)
+
+    async def messages(request: web.Request):
+        body = await request.json()
+        if not body.get("stream"):
+            await asyncio.sleep(delay * len(chunks(content, chunk_size)))
+            return web.json_response({"content": [{"type": "text", "text": content}]})
+        events = [{"type": "message_start", "message": {"usage": {"input_tokens": tokens // 2}}}]
+        events += [{"type": "content_block_delta", "delta": {"type": "text_delta", "text": part}}
+                   for part in chunks(content, chunk_size)]
+        events.append({"type": "message_delta", "usage": {"output_tokens": tokens}})
+        events.append({"type": "message_stop"})
+        return await sse(request, events)
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/v1/models/{model}:{action}", gemini)
+    app.router.add_post("/v1/messages", messages)
+    return app
+
+
+async def measure(args):
+    from app.core.ai_config import ai_config, AIProvider
+    from app.core.http_pool import http_pool
+    from app.ai.ai_interface import ai_interface
+
+    runner = web.AppRunner(make_app(args.delay, args.chunk))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+
+    base = f"http://127.0.0.1:{args.port}/v1"
+    ai_config.DEEPSEEK_API_URL = f"{base}/chat/completions"
+    ai_config.OPENAI_API_URL = f"{base}/chat/completions"
+    ai_config.GEMINI_API_URL = f"{base}/models/gemini-pro:generateContent"
+    ai_config.CLAUDE_API_URL = f"{base}/messages"
+
+    print(f"{'Proveedor':<10} {'Decisión':>10} {'Completa':>10} {'Sin stream':>11} {'Señal':>6}")
+    try:
+        for provider in AIProvider:
+            decisions = []
+
+            async def on_decision(decision):
+                decisions.append(decision)
+
+            result = await ai_interface._stream_and_parse(provider, "stub-key", "stub-model", "prompt", {}, on_decision)
+
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await ai_interface._call_ai_provider(provider, "stub-key", "stub-model", "prompt", {})
+            plain = loop.time() - start
+
+            print(f"{provider.value:<10} {result['time_to_decision']:>9.3f}s {result['time_to_full_response']:>9.3f}s "
+                  f"{plain:>10.3f}s {decisions[0]['signal'] if decisions else '-':>6}")
+    finally:
+        await http_pool.close()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub de streaming SSE de proveedores IA")
+    parser.add_argument("mode", choices=["serve", "measure"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.02, help="Segundos entre trozos")
+    parser.add_argument("--chunk", type=int, default=16, help="Caracteres por trozo")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        web.run_app(make_app(args.delay, args.chunk), host="127.0.0.1", port=args.port)
+    else:
+        asyncio.run(measure(args))
+
+
+if __name__ == "__main__":
+    main()
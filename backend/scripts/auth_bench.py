@@ -0,0 +1,106 @@
+# backend/scripts/auth_bench.py
+# Throughput de /api/dashboard/recent-activity con y sin la caché del usuario autenticado
+#
+# Uso:
+#   python scripts/auth_bench.py -n 2000 -c 10
+#
+# La aplicación corre en el propio proceso (httpx + ASGI) contra una BD
+# temporal y un terminal MT5 falso (scripts/fake_mt5.py). El modo "sin caché"
+# sustituye get_current_user por la resolución anterior: decodificar el JWT y
+# consultar el usuario en una sesión SQLAlchemy en cada petición.
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='auth_'), 'auth.db')}")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, ".."))
+
+import fake_mt5  # noqa: E402
+
+PATH = "/api/dashboard/recent-activity"
+
+
+async def measure(client, token: str, requests: int, concurrency: int):
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies, statuses = [], {}
+    queue = iter(range(requests))
+
+    async def worker():
+        for _ in queue:
+            start = time.perf_counter()
+            response = await client.get(PATH, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies), statuses
+
+
+async def run(args):
+    fake_mt5.install()
+
+    import httpx
+    from fastapi import Depends
+    from fastapi.security import HTTPAuthorizationCredentials
+    from sqlalchemy.orm import Session
+    from app.main import app
+    from app.core import security
+    from app.database.crud import create_default_user
+    from app.database.db_connection import SessionLocal, create_tables, dispose_async_engine, get_db
+    from app.models.user_model import User
+    from app.services.mt5_executor import mt5_executor
+
+    logging.getLogger("trading_bot").setLevel(logging.WARNING)
+    create_tables()
+    db = SessionLocal()
+    try:
+        create_default_user(db)
+        username = db.query(User).first().username
+    finally:
+        db.close()
+    token = security.create_access_token({"sub": username})
+
+    def uncached_user(credentials: HTTPAuthorizationCredentials = Depends(security.security),
+                      db: Session = Depends(get_db)) -> User:
+        """Resolución anterior: JWT + consulta del usuario en cada petición"""
+        return security.get_current_user_model(credentials, db)
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await measure(client, token, args.concurrency, args.concurrency)  # Calentamiento
+            for label, override in (("sin caché", uncached_user), ("con caché", None)):
+                app.dependency_overrides.clear()
+                if override:
+                    app.dependency_overrides[security.get_current_user] = override
+                security.principal_cache.invalidate()
+                elapsed, latencies, statuses = await measure(client, token, args.requests, args.concurrency)
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                print(f"{label:>10}: {args.requests / elapsed:8.1f} req/s | p50 {statistics.median(latencies) * 1000:.2f} ms"
+                      f" | p95 {p95 * 1000:.2f} ms | estados {statuses}")
+        print(f"Caché de usuario: {security.principal_cache.get_stats()}")
+    finally:
+        app.dependency_overrides.clear()
+        await dispose_async_engine()  # ASGITransport no ejecuta el lifespan
+        mt5_executor.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de autenticación en recent-activity")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=10,
+                        help="Peticiones en vuelo (por debajo del pool de conexiones: DB_POOL_SIZE + DB_MAX_OVERFLOW)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
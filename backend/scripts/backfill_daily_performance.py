@@ -0,0 +1,39 @@
+# backend/scripts/backfill_daily_performance.py
+# Reconstruir la tabla daily_performance a partir de trades
+#
+# Uso:
+#   python scripts/backfill_daily_performance.py              (todos los usuarios)
+#   python scripts/backfill_daily_performance.py --user-id 1
+#
+# Necesario una vez tras crear la tabla; después se mantiene sola en cada flush
+# que cierre o modifique una operación.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.database.db_connection import SessionLocal, create_tables  # noqa: E402
+from app.database.performance import backfill_daily_performance  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruir daily_performance desde trades")
+    parser.add_argument("--user-id", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=5000, help="Filas por inserción")
+    args = parser.parse_args()
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        created = backfill_daily_performance(db, args.user_id, args.chunk)
+        print(f"daily_performance: {created} filas en {time.perf_counter() - start:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
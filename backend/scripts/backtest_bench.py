@@ -0,0 +1,73 @@
+# backend/scripts/backtest_bench.py
+# Backtest de 1 año de velas M5 para 20 símbolos sintéticos
+#
+# Uso:
+#   python scripts/backtest_bench.py --symbols 20 --days 365 --processes 4
+#
+# Genera paseos aleatorios M5 (solo días laborables) en un almacén temporal con
+# market_store y ejecuta run_backtest en un solo proceso y con pool de procesos.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='backtest_'), 'bench.db')}")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services.backtest_engine import BacktestConfig, run_backtest  # noqa: E402
+from app.services.market_store import MarketStore, bars_kind  # noqa: E402
+
+BASES = ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD", "USDCHF", "NZDUSD", "EURGBP", "EURJPY", "GBPJPY",
+         "XAUUSD", "BTCUSD", "EURCHF", "AUDJPY", "CADJPY", "EURAUD", "GBPCHF", "AUDNZD", "CHFJPY", "EURCAD"]
+
+
+def synthetic_m5(symbol: str, start: datetime, days: int, rng: np.random.Generator):
+    times = int(start.timestamp()) + 300 * np.arange(days * 288)
+    weekday = (times // 86400 + 3) % 7
+    times = times[weekday < 5]
+    price = 150.0 if "JPY" in symbol else 2000.0 if "XAU" in symbol else 40000.0 if "BTC" in symbol else 1.1
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.0007, len(times))))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    wick = np.abs(rng.normal(0, 0.0004, len(times))) * close
+    return {"time": times, "open": open_, "high": np.maximum(open_, close) + wick,
+            "low": np.minimum(open_, close) - wick, "close": close,
+            "tick_volume": np.full(len(times), 100), "spread": np.full(len(times), 12),
+            "real_volume": np.zeros(len(times), dtype=np.int64)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de backtest")
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    root = tempfile.mkdtemp(prefix="market_data_")
+    store = MarketStore(root)
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=args.days)
+    symbols = BASES[:args.symbols]
+    for symbol in symbols:
+        store.append(symbol, bars_kind("M5"), synthetic_m5(symbol, start, args.days, rng))
+    store.compact((end + timedelta(days=1)).date())
+
+    config = BacktestConfig(stop_loss_pips=30.0)
+    for processes in (0, args.processes):
+        began = time.perf_counter()
+        result = run_backtest(symbols, "M5", start, end, config, processes=processes, root=root)
+        elapsed = time.perf_counter() - began
+        summary = result["summary"]
+        label = "1 proceso" if processes <= 1 else f"{processes} procesos"
+        print(f"{label:>11}: {result['bars']} velas, {summary['trades']} operaciones en {elapsed:.2f}s "
+              f"(win rate {summary['win_rate']}%, neto {summary['net_profit']})")
+
+
+if __name__ == "__main__":
+    main()
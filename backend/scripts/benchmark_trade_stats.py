@@ -0,0 +1,122 @@
+# backend/scripts/benchmark_trade_stats.py
+# Benchmark de las estadísticas de operaciones con una tabla trades creciente
+#
+# Uso:
+#   python scripts/benchmark_trade_stats.py --rows 1000000 --user-trades 2000
+#
+# Crea una BD SQLite temporal, inserta operaciones sintéticas de muchos usuarios
+# y mide, a cada tamaño de tabla, la consulta agregada (app/database/trade_stats.py)
+# frente al cálculo anterior (cargar todas las filas del usuario con .all()).
+# El usuario medido tiene siempre el mismo número de operaciones: con los índices
+# compuestos el tiempo de la consulta agregada debe mantenerse plano.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="trade_stats_"), "benchmark.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.database.db_connection import Base, SessionLocal, engine, ensure_indexes  # noqa: E402
+from app.database.trade_stats import get_daily_aggregates, get_trade_aggregates, start_of_day  # noqa: E402
+from app.models.trade_model import Trade  # noqa: E402
+
+TARGET_USER = 1
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "BTCUSD"]
+
+
+def synthetic_trades(count: int, user_ids, now: datetime, rng: random.Random):
+    for _ in range(count):
+        opened_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        status = rng.choices(["closed", "open", "cancelled"], weights=[85, 10, 5])[0]
+        yield {
+            "user_id": rng.choice(user_ids),
+            "symbol": rng.choice(SYMBOLS),
+            "operation_type": rng.choice(["BUY", "SELL"]),
+            "volume": 0.1,
+            "open_price": 1.1,
+            "profit": round(rng.gauss(2.0, 25.0), 2),
+            "status": status,
+            "opened_at": opened_at,
+            "closed_at": opened_at + timedelta(minutes=30) if status == "closed" else None
+        }
+
+
+def insert(rows, chunk: int = 50000):
+    batch = []
+    with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk:
+                conn.execute(Trade.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Trade.__table__.insert(), batch)
+
+
+def legacy_stats(db, user_id: int):
+    """Cálculo anterior: todas las filas del usuario (hoy e histórico) en Python"""
+    today = datetime.now().date()
+    today_trades = db.query(Trade).filter(Trade.user_id == user_id, Trade.opened_at >= today).all()
+    all_trades = db.query(Trade).filter(Trade.user_id == user_id).all()
+    return (
+        sum(t.profit for t in today_trades if t.profit),
+        len([t for t in all_trades if t.profit and t.profit > 0]),
+        sum(t.profit for t in all_trades if t.profit)
+    )
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de estadísticas de operaciones")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Filas totales al final")
+    parser.add_argument("--user-trades", type=int, default=2000, help="Operaciones del usuario medido")
+    parser.add_argument("--users", type=int, default=500, help="Usuarios de relleno")
+    parser.add_argument("--steps", type=int, default=4, help="Tamaños de tabla medidos (escala x10)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+
+    insert(synthetic_trades(args.user_trades, [TARGET_USER], now, rng))
+    sizes = sorted({max(args.user_trades, args.rows // 10 ** i) for i in range(args.steps)})
+    filler_users = list(range(2, args.users + 2))
+
+    print(f"BD: {DB_PATH}")
+    print(f"{'Filas':>10} {'Agregada':>10} {'Diaria':>10} {'Anterior':>10}")
+    current = args.user_trades
+    for size in sizes:
+        insert(synthetic_trades(size - current, filler_users, now, rng))
+        current = size
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+        db = SessionLocal()
+        try:
+            aggregate_ms = timed(lambda: get_trade_aggregates(db, TARGET_USER, start_of_day()), args.repeat)
+            daily_ms = timed(lambda: get_daily_aggregates(db, TARGET_USER, 30), args.repeat)
+            legacy_ms = timed(lambda: legacy_stats(db, TARGET_USER), args.repeat)
+        finally:
+            db.close()
+        print(f"{size:>10} {aggregate_ms:>8.2f}ms {daily_ms:>8.2f}ms {legacy_ms:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# backend/scripts/compact_market_data.py
+# Compactar los días cerrados del almacén local de ticks y velas
+#
+# Uso:
+#   python scripts/compact_market_data.py                    (días anteriores a hoy UTC)
+#   python scripts/compact_market_data.py --before 2024-06-01 --root market_data
+#
+# El grabador ya compacta al cambiar de día; esto sirve tras importar datos o
+# si el backend estuvo parado durante el cambio de día.
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services.market_store import MarketStore, market_store  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compactar datos de mercado grabados")
+    parser.add_argument("--root", default=None, help="Directorio del almacén (por defecto MARKET_DATA_DIR)")
+    parser.add_argument("--before", type=date.fromisoformat, default=None, help="Compactar días anteriores (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    store = MarketStore(args.root) if args.root else market_store
+    start = time.perf_counter()
+    compacted = store.compact(args.before)
+    print(f"{compacted} días compactados en {time.perf_counter() - start:.2f}s ({store.root})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# backend/scripts/db_async_bench.py
+# Peticiones concurrentes con sesión síncrona (bloquea el event loop) frente a sesión asíncrona
+#
+# Uso:
+#   python scripts/db_async_bench.py -n 2000 -c 10 --rows 20000
+#
+# Cada petición hace las consultas de /api/dashboard/recent-activity (últimas
+# operaciones, últimos análisis IA y BotConfig) con una espera intermedia que
+# simula la lectura del portfolio. Mientras tanto una tarea mide el retraso
+# del event loop: con sesiones síncronas cada consulta lo bloquea; con el
+# engine asíncrono (aiosqlite/asyncpg) el loop sigue atendiendo otras tareas.
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='db_async_'), 'bench.db')}")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import select  # noqa: E402
+from app.database.db_connection import (  # noqa: E402
+    SessionLocal, async_session_scope, create_tables, dispose_async_engine
+)
+from app.models.ai_config_model import AIAnalysisHistory  # noqa: E402
+from app.models.config_model import BotConfig  # noqa: E402
+from app.models.trade_model import Trade  # noqa: E402
+
+USERS = 20
+
+
+def seed(rows: int):
+    db = SessionLocal()
+    try:
+        if db.query(Trade).count():
+            return
+        now = datetime.now()
+        rng = random.Random(7)
+        db.bulk_save_objects([BotConfig(user_id=user_id, is_active=True) for user_id in range(1, USERS + 1)])
+        db.bulk_save_objects([
+            Trade(user_id=rng.randint(1, USERS), symbol="EURUSD", operation_type="BUY", volume=0.1,
+                  open_price=1.1, profit=rng.uniform(-50, 50), status="closed",
+                  opened_at=now - timedelta(minutes=i))
+            for i in range(rows)
+        ])
+        db.bulk_save_objects([
+            AIAnalysisHistory(user_id=rng.randint(1, USERS), symbol="EURUSD", timeframe="M5",
+                              analysis_type="bot_execution", ai_provider="deepseek", ai_model="stub",
+                              signal="BUY", confidence=rng.uniform(40, 90), created_at=now - timedelta(minutes=i))
+            for i in range(rows)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def recent_activity_sync(user_id: int, io_wait: float):
+    db = SessionLocal()
+    try:
+        db.query(Trade).filter(Trade.user_id == user_id).order_by(Trade.opened_at.desc()).limit(5).all()
+        await asyncio.sleep(io_wait)  # Portfolio (MT5)
+        db.query(AIAnalysisHistory).filter(AIAnalysisHistory.user_id == user_id).order_by(
+            AIAnalysisHistory.created_at.desc()).limit(5).all()
+        db.query(BotConfig).filter(BotConfig.user_id == user_id).first()
+    finally:
+        db.close()
+
+
+async def recent_activity_async(user_id: int, io_wait: float):
+    async with async_session_scope() as db:
+        await db.execute(select(Trade).where(Trade.user_id == user_id).order_by(Trade.opened_at.desc()).limit(5))
+        await asyncio.sleep(io_wait)  # Portfolio (MT5)
+        await db.execute(select(AIAnalysisHistory).where(AIAnalysisHistory.user_id == user_id)
+                         .order_by(AIAnalysisHistory.created_at.desc()).limit(5))
+        await db.execute(select(BotConfig).where(BotConfig.user_id == user_id).limit(1))
+
+
+async def measure(request, requests: int, concurrency: int, io_wait: float):
+    latencies, lags = [], []
+    pending = iter(range(requests))
+    finished = asyncio.Event()
+
+    async def monitor():
+        # Retraso del loop: cuánto se pasa un sleep de 1 ms
+        while not finished.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    async def worker():
+        for index in pending:
+            start = time.perf_counter()
+            await request(index % USERS + 1, io_wait)
+            latencies.append(time.perf_counter() - start)
+
+    monitor_task = asyncio.create_task(monitor())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    finished.set()
+    await monitor_task
+    return elapsed, sorted(latencies), sorted(lags)
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(args):
+    create_tables()
+    seed(args.rows)
+    await measure(recent_activity_async, args.concurrency, args.concurrency, 0)  # Calentamiento del pool
+    print(f"{args.requests} peticiones, {args.concurrency} en vuelo, {args.rows} filas por tabla, "
+          f"espera de E/S {args.io_wait * 1000:.0f} ms")
+    for label, request in (("síncrona", recent_activity_sync), ("asíncrona", recent_activity_async)):
+        elapsed, latencies, lags = await measure(request, args.requests, args.concurrency, args.io_wait)
+        print(f"{label:>10}: {args.requests / elapsed:8.1f} req/s | p50 {statistics.median(latencies) * 1000:6.2f} ms"
+              f" | p95 {percentile(latencies, 0.95) * 1000:6.2f} ms | retraso del loop p95 "
+              f"{percentile(lags, 0.95) * 1000:6.2f} ms, máx {lags[-1] * 1000:6.2f} ms")
+    await dispose_async_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de sesiones de BD síncronas y asíncronas")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=10,
+                        help="Peticiones en vuelo (la sesión síncrona con más de DB_POOL_SIZE + DB_MAX_OVERFLOW agota el pool)")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--io-wait", type=float, default=0.002, help="Espera simulada de MT5 entre consultas (s)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
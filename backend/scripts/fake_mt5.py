@@ -0,0 +1,176 @@
+# backend/scripts/fake_mt5.py
+# Módulo MetaTrader5 falso con latencia inyectada (sin terminal, cualquier SO)
+#
+# Se instala en sys.modules antes de importar la app:
+#   import fake_mt5; fake_mt5.install(latency_ms=20)
+#
+# Cada función duerme `latency_ms` (o la latencia propia de LATENCY_MS[nombre]) y
+# registra el hilo que la ejecutó, para comprobar que todas las llamadas al
+# terminal pasan por un único hilo.
+#
+# Con set_market(market) los ticks y velas salen de `market` (p.ej. el mercado
+# grabado del replay) y las posiciones se cierran al tocar su SL/TP.
+
+import sys
+import threading
+import time
+from collections import namedtuple
+from types import ModuleType
+
+import numpy as np
+
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_SLTP = 6
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+ORDER_TIME_GTC = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_FOK = 0
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+TRADE_RETCODE_DONE = 10009
+
+DEFAULT_LATENCY_MS = 10.0
+LATENCY_MS = {}
+calls = []
+threads = set()
+_lock = threading.Lock()
+
+AccountInfo = namedtuple("AccountInfo", "login balance equity margin margin_free leverage currency server profit")
+Tick = namedtuple("Tick", "bid ask last volume time")
+Position = namedtuple("Position", "ticket symbol type volume price_open price_current profit sl tp time")
+SymbolInfo = namedtuple("SymbolInfo", "name point digits volume_min volume_max trade_contract_size")
+OrderResult = namedtuple("OrderResult", "retcode order price volume")
+
+RATES_DTYPE = np.dtype([("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+                        ("close", "<f8"), ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")])
+
+_positions = {}
+_next_ticket = [1000]
+_market = [None]
+
+
+def _terminal(name):
+    with _lock:
+        calls.append((name, threading.current_thread().name))
+        threads.add(threading.current_thread().name)
+    time.sleep(LATENCY_MS.get(name, DEFAULT_LATENCY_MS) / 1000.0)
+
+
+def initialize(*args, **kwargs):
+    _terminal("initialize")
+    return True
+
+
+def login(**kwargs):
+    _terminal("login")
+    return True
+
+
+def shutdown():
+    _terminal("shutdown")
+
+
+def last_error():
+    return (1, "Success")
+
+
+def account_info():
+    _terminal("account_info")
+    profit = sum(p.profit for p in _positions.values())
+    return AccountInfo(12345, 10000.0, 10000.0 + profit, 100.0, 9900.0, 100, "USD", "Fake-Server", profit)
+
+
+def positions_get(**kwargs):
+    _terminal("positions_get")
+    if "ticket" in kwargs:
+        position = _positions.get(kwargs["ticket"])
+        return (position,) if position else ()
+    return tuple(_positions.values())
+
+
+def symbol_info(symbol):
+    _terminal("symbol_info")
+    return SymbolInfo(symbol, 0.00001, 5, 0.01, 100.0, 100000)
+
+
+def symbol_info_tick(symbol):
+    _terminal("symbol_info_tick")
+    if _market[0] is not None:
+        tick = _market[0].tick(symbol)
+        if tick is None:
+            return None
+        tick = Tick(*tick)
+        _settle(symbol, tick)
+        return tick
+    return Tick(1.10000, 1.10010, 1.10005, 1, int(time.time()))
+
+
+def symbols_get():
+    _terminal("symbols_get")
+    Symbol = namedtuple("Symbol", "name")
+    return tuple(Symbol(name) for name in ("EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "BTCUSD"))
+
+
+def copy_rates_from_pos(symbol, timeframe, start, count):
+    _terminal("copy_rates_from_pos")
+    if _market[0] is not None:
+        return _market[0].rates(symbol, timeframe, start, count)
+    now = int(time.time()) // 300 * 300
+    rates = np.zeros(count, dtype=RATES_DTYPE)
+    rates["time"] = now - 300 * np.arange(count)[::-1]
+    close = 1.1 + 0.001 * np.sin(np.arange(count) / 5.0)
+    rates["open"] = close
+    rates["close"] = close
+    rates["high"] = close + 0.0005
+    rates["low"] = close - 0.0005
+    rates["tick_volume"] = 100
+    return rates
+
+
+def order_send(request):
+    _terminal("order_send")
+    if request.get("action") == TRADE_ACTION_DEAL and "position" not in request:
+        ticket = _next_ticket[0]
+        _next_ticket[0] += 1
+        _positions[ticket] = Position(ticket, request["symbol"], request["type"], request["volume"],
+                                      request["price"], request["price"], 0.0,
+                                      request.get("sl", 0.0), request.get("tp", 0.0), int(time.time()))
+    elif "position" in request and request.get("action") == TRADE_ACTION_DEAL:
+        _positions.pop(request["position"], None)
+    return OrderResult(TRADE_RETCODE_DONE, _next_ticket[0], request.get("price", 0.0), request.get("volume", 0.0))
+
+
+def _settle(symbol, tick):
+    """Cerrar las posiciones del símbolo cuyo SL o TP ha tocado el tick (sin P&L en la cuenta)"""
+    for ticket, p in list(_positions.items()):
+        if p.symbol != symbol:
+            continue
+        if p.type == ORDER_TYPE_BUY:
+            hit = (p.sl and tick.bid <= p.sl) or (p.tp and tick.bid >= p.tp)
+        else:
+            hit = (p.sl and tick.ask >= p.sl) or (p.tp and tick.ask <= p.tp)
+        if hit:
+            _positions.pop(ticket, None)
+
+
+def set_market(market):
+    """Servir ticks y velas desde `market` (tick(symbol) y rates(symbol, timeframe, start, count))"""
+    _market[0] = market
+
+
+def install(latency_ms: float = DEFAULT_LATENCY_MS, **per_call_ms) -> ModuleType:
+    """Registrar este módulo como `MetaTrader5` (antes de importar la app)"""
+    global DEFAULT_LATENCY_MS
+    DEFAULT_LATENCY_MS = latency_ms
+    LATENCY_MS.update(per_call_ms)
+    module = sys.modules[__name__]
+    sys.modules["MetaTrader5"] = module
+    return module
@@ -0,0 +1,125 @@
+# backend/scripts/http_pool_stub.py
+# Servidor stub para comprobar el pool de sesiones HTTP (keep-alive y límite de conexiones)
+#
+# Uso:
+#   python scripts/http_pool_stub.py serve --port 8767 --delay 0.02
+#   python scripts/http_pool_stub.py measure -n 5 -c 30 --delay 0.05
+#       (levanta el stub en proceso y cuenta las conexiones TCP que recibe)
+#
+# El stub cuenta las conexiones por puerto de origen. En modo measure se
+# comprueba que:
+# - N peticiones seguidas por http_pool usan UNA conexión (keep-alive), frente
+#   a N con una sesión nueva por petición (el comportamiento anterior)
+# - C peticiones concurrentes no abren más de HTTP_POOL_LIMIT_PER_HOST conexiones
+# - las métricas del pool (conexiones creadas/reutilizadas) cuadran con el stub
+# - close() cierra las sesiones
+# Sale con código 1 si alguna comprobación falla.
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+PROVIDER = "stub"
+
+
+def make_app(delay: float) -> web.Application:
+    peers = set()
+
+    async def echo(request: web.Request):
+        peers.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(delay)
+        return web.json_response({"ok": True, "connections": len(peers)})
+
+    app = web.Application()
+    app["peers"] = peers
+    app.router.add_route("*", "/echo", echo)
+    return app
+
+
+async def measure(args) -> int:
+    from app.core.ai_config import ai_config
+    from app.core.http_pool import http_pool
+
+    app = make_app(args.delay)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+    url = f"http://127.0.0.1:{args.port}/echo"
+    peers = app["peers"]
+    results = []
+
+    def check(name: str, ok: bool, detail: str):
+        results.append(ok)
+        print(f"{'✅' if ok else '❌'} {name:<28} {detail}")
+
+    try:
+        # Sin pool: una sesión (y una conexión) por petición
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            async with aiohttp.ClientSession() as session:
+                async with session.post(url, json={}) as response:
+                    await response.read()
+        fresh_s = time.perf_counter() - start
+        fresh_connections = len(peers)
+
+        # Con pool: la sesión del proveedor mantiene la conexión abierta
+        peers.clear()
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            response = await http_pool.request(PROVIDER, "POST", url, json={})
+            assert response.status == 200, f"HTTP {response.status}"
+        pooled_s = time.perf_counter() - start
+        check("keep-alive", len(peers) == 1,
+              f"{args.requests} llamadas → {len(peers)} conexión(es) con pool ({pooled_s * 1000:.0f} ms) | "
+              f"{fresh_connections} sin pool ({fresh_s * 1000:.0f} ms)")
+
+        # Concurrentes: el conector no abre más de limit_per_host conexiones (la
+        # del keep-alive anterior se reutiliza y cuenta entre ellas)
+        responses = await asyncio.gather(*(http_pool.request(PROVIDER, "POST", url, json={})
+                                           for _ in range(args.concurrency)))
+        limit = ai_config.HTTP_POOL_LIMIT_PER_HOST
+        check("límite por host", all(r.status == 200 for r in responses) and len(peers) <= limit,
+              f"{args.concurrency} concurrentes → {len(peers)} conexiones en total (límite {limit})")
+
+        stats = http_pool.get_stats()[PROVIDER]
+        total = args.requests + args.concurrency
+        created, reused = stats["connections_created"], stats["connections_reused"]
+        check("métricas del pool", created == len(peers) and created + reused == total,
+              f"{created} creadas + {reused} reutilizadas = {created + reused} de {total} | "
+              f"ttfb p50 {stats['ttfb']['p50_ms']} ms, total p95 {stats['total']['p95_ms']} ms")
+
+        session = http_pool.get_session(PROVIDER)
+        await http_pool.close()
+        check("cierre", session.closed and not http_pool.sessions, "sesiones cerradas")
+    finally:
+        await http_pool.close()
+        await runner.cleanup()
+
+    print(f"{sum(results)}/{len(results)} comprobaciones correctas")
+    return 0 if all(results) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub HTTP para el pool de sesiones")
+    parser.add_argument("mode", choices=["serve", "measure"])
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("-n", "--requests", type=int, default=5, help="Peticiones seguidas")
+    parser.add_argument("-c", "--concurrency", type=int, default=30, help="Peticiones concurrentes")
+    parser.add_argument("--delay", type=float, default=0.05, help="Segundos de espera por respuesta")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        web.run_app(make_app(args.delay), host="127.0.0.1", port=args.port)
+    else:
+        sys.exit(asyncio.run(measure(args)))
+
+
+if __name__ == "__main__":
+    main()
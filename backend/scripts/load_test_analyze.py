@@ -0,0 +1,72 @@
+# backend/scripts/load_test_analyze.py
+# Prueba de carga: N peticiones concurrentes a /api/ai/analyze/{symbol}
+#
+# Uso (con el backend en marcha):
+#   python scripts/load_test_analyze.py --user admin --password admin123 -n 20 -s EURUSD,GBPUSD,USDJPY
+#
+# Con un solo símbolo las peticiones se agrupan en un único análisis (single-flight);
+# con varios símbolos el límite lo marcan MAX_CONCURRENT_AI_CALLS y los presupuestos por proveedor.
+
+import argparse
+import asyncio
+import statistics
+import time
+import aiohttp
+
+
+async def login(session: aiohttp.ClientSession, base_url: str, username: str, password: str) -> str:
+    async with session.post(f"{base_url}/api/auth/login", data={"username": username, "password": password}) as response:
+        response.raise_for_status()
+        return (await response.json())["access_token"]
+
+
+async def analyze(session: aiohttp.ClientSession, base_url: str, token: str, symbol: str, analysis_type: str):
+    start = time.perf_counter()
+    async with session.post(
+        f"{base_url}/api/ai/analyze/{symbol}",
+        params={"analysis_type": analysis_type},
+        headers={"Authorization": f"Bearer {token}"}
+    ) as response:
+        await response.read()
+        return response.status, time.perf_counter() - start
+
+
+async def run(args):
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        token = await login(session, args.base_url, args.user, args.password)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(analyze(session, args.base_url, token, symbols[i % len(symbols)], args.analysis_type)
+              for i in range(args.requests)),
+            return_exceptions=True
+        )
+        wall_time = time.perf_counter() - start
+
+    latencies = sorted(r[1] for r in results if not isinstance(r, Exception))
+    ok = sum(1 for r in results if not isinstance(r, Exception) and r[0] == 200)
+    errors = len(results) - ok
+
+    print(f"Peticiones: {args.requests} | Símbolos: {len(symbols)} | OK: {ok} | Errores: {errors}")
+    print(f"Tiempo total: {wall_time:.2f}s | Throughput: {args.requests / wall_time:.2f} req/s")
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"Latencia p50: {statistics.median(latencies):.2f}s | p95: {p95:.2f}s | máx: {latencies[-1]:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del endpoint de análisis IA")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("-n", "--requests", type=int, default=10, help="Peticiones concurrentes")
+    parser.add_argument("-s", "--symbols", default="EURUSD", help="Símbolos separados por comas")
+    parser.add_argument("--analysis-type", default="comprehensive")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# backend/scripts/market_store_bench.py
+# Rendimiento del almacén columnar de ticks/velas
+#
+# Uso:
+#   python scripts/market_store_bench.py --days 5 --ticks-per-day 500000
+#
+# Escribe ticks y velas M1 sintéticos en un directorio temporal por lotes (como
+# el grabador), los lee con memmap antes y después de compactar y comprueba
+# que la lectura de un día no copia (la vista comparte memoria con el fichero);
+# si copia, sale con código 1.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='market_store_'), 'bench.db')}")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services.market_store import MarketStore, TICKS, bars_kind  # noqa: E402
+
+SYMBOL = "EURUSD"
+
+
+def synthetic_ticks(start_ms: int, count: int, span_ms: int, rng: np.random.Generator):
+    times = start_ms + np.sort(rng.integers(0, span_ms, count))
+    bid = 1.1 + np.cumsum(rng.normal(0, 1e-5, count))
+    return {"time_msc": times, "bid": bid, "ask": bid + 1e-4, "last": bid, "volume": np.ones(count)}
+
+
+def synthetic_bars(start_s: int, count: int, rng: np.random.Generator):
+    close = 1.1 + np.cumsum(rng.normal(0, 1e-4, count))
+    return {"time": start_s + 60 * np.arange(count), "open": close, "high": close + 2e-4,
+            "low": close - 2e-4, "close": close, "tick_volume": np.full(count, 100),
+            "spread": np.full(count, 10), "real_volume": np.zeros(count, dtype=np.int64)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del almacén de datos de mercado")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--ticks-per-day", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=1000, help="Filas por escritura")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    store = MarketStore(tempfile.mkdtemp(prefix="market_data_"))
+    first_day = (datetime.now(timezone.utc) - timedelta(days=args.days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    start = time.perf_counter()
+    for d in range(args.days):
+        day_start = first_day + timedelta(days=d)
+        ticks = synthetic_ticks(int(day_start.timestamp() * 1000), args.ticks_per_day, 86_400_000, rng)
+        for lo in range(0, args.ticks_per_day, args.batch):
+            store.append(SYMBOL, TICKS, {name: values[lo:lo + args.batch] for name, values in ticks.items()})
+        store.append(SYMBOL, bars_kind("M1"), synthetic_bars(int(day_start.timestamp()), 1440, rng))
+    write_s = time.perf_counter() - start
+    total = args.days * args.ticks_per_day
+    print(f"Escritura: {total} ticks en {write_s:.2f}s ({total / write_s / 1e6:.2f} M ticks/s, lotes de {args.batch})")
+
+    end = first_day + timedelta(days=args.days)
+    zero_copy = []
+    for label in ("Sin compactar", "Compactado"):
+        start = time.perf_counter()
+        ticks = store.read_ticks(SYMBOL, first_day, end)
+        mean = float(ticks["bid"].mean())
+        read_s = time.perf_counter() - start
+        one_day = store.read_ticks(SYMBOL, first_day, first_day + timedelta(days=1))
+        shared = isinstance(one_day["bid"].base, np.memmap) or isinstance(one_day["bid"], np.memmap)
+        zero_copy.append(shared)
+        print(f"{label:>14}: {len(ticks['bid'])} ticks leídos en {read_s * 1000:.1f} ms "
+              f"({len(ticks['bid']) / read_s / 1e6:.1f} M ticks/s, media {mean:.5f}); "
+              f"un día sin copia: {shared}")
+        if label == "Sin compactar":
+            start = time.perf_counter()
+            compacted = store.compact()
+            print(f"Compactación: {compacted} días en {time.perf_counter() - start:.2f}s")
+
+    bars = store.read_bars(SYMBOL, "M1", first_day, first_day + timedelta(hours=6))
+    rates = MarketStore.to_rates(bars)
+    print(f"Velas M1 (6h): {len(rates)} — primera {datetime.fromtimestamp(int(rates['time'][0]), tz=timezone.utc)}")
+    if not all(zero_copy):
+        print("❌ La lectura de un día [d, d+1) copia en lugar de devolver la vista memmap")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
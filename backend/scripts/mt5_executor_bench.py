@@ -0,0 +1,99 @@
+# backend/scripts/mt5_executor_bench.py
+# Comprobación del ejecutor MT5 contra un terminal falso con latencia inyectada
+#
+# Uso:
+#   python scripts/mt5_executor_bench.py --latency-ms 20 --history 60 --orders 5
+#
+# Instala scripts/fake_mt5.py como módulo MetaTrader5 y lanza a la vez muchas
+# descargas de velas y unas pocas órdenes desde el event loop. Mide:
+#   - el retraso máximo del event loop (un tick cada 5 ms) mientras el terminal trabaja
+#   - la espera en cola de las órdenes frente a la de las descargas de históricos
+#   - cuántos hilos distintos llegaron a tocar el terminal (debe ser 1)
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='mt5_exec_'), 'bench.db')}")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, ".."))
+
+import fake_mt5  # noqa: E402
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(args):
+    from app.services.data_fetcher import data_fetcher
+    from app.services.mt5_executor import mt5_executor
+    from app.services.trading_service import trading_service
+
+    data_fetcher.initialize_mt5("Fake-Server", 12345, "password")
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    start = time.perf_counter()
+
+    # Primero se encolan los históricos (símbolos distintos, sin caché) y después las órdenes
+    history = [asyncio.create_task(data_fetcher.get_rates_async(f"SYM{i}", count=args.bars))
+               for i in range(args.history)]
+    await asyncio.sleep(0)
+    orders = [asyncio.create_task(trading_service.place_order_async("EURUSD", "BUY", 0.1))
+              for _ in range(args.orders)]
+
+    order_results = await asyncio.gather(*orders)
+    orders_done = time.perf_counter() - start
+    await asyncio.gather(*history)
+    history_done = time.perf_counter() - start
+
+    stop.set()
+    worst_lag = await lag_task
+
+    stats = mt5_executor.get_stats()
+    mt5_executor.stop()
+    return order_results, orders_done, history_done, worst_lag, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecutor MT5 con terminal falso")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latencia inyectada por llamada")
+    parser.add_argument("--history", type=int, default=60, help="Descargas de velas concurrentes")
+    parser.add_argument("--orders", type=int, default=5, help="Órdenes lanzadas tras los históricos")
+    parser.add_argument("--bars", type=int, default=500)
+    args = parser.parse_args()
+
+    fake_mt5.install(latency_ms=args.latency_ms)
+    order_results, orders_done, history_done, worst_lag, stats = asyncio.run(run(args))
+
+    ok = sum(1 for result in order_results if result.get("success"))
+    calls = stats["calls"]
+    order_wait = calls["order_send"]["queue_wait"]
+    history_wait = calls["get_rates"]["queue_wait"]
+
+    print(f"Latencia inyectada:     {args.latency_ms:.0f} ms por llamada")
+    print(f"Órdenes OK:             {ok}/{args.orders} en {orders_done:.2f}s")
+    print(f"Históricos:             {args.history} en {history_done:.2f}s")
+    print(f"Espera en cola órdenes: {order_wait}")
+    print(f"Espera en cola velas:   {history_wait}")
+    print(f"Máx. cola:              {stats['max_queue_depth']}")
+    print(f"Retraso máx. del loop:  {worst_lag * 1000:.1f} ms")
+    print(f"Hilos que tocaron MT5:  {sorted(fake_mt5.threads)}")
+
+    assert ok == args.orders, "no se ejecutaron todas las órdenes"
+    assert len(fake_mt5.threads) == 1, "el terminal se llamó desde más de un hilo"
+    assert orders_done < history_done, "las órdenes no adelantaron a los históricos"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# backend/scripts/news_stub.py
+# Servidor stub de Finnhub (/news y /quote) con respuestas lentas
+#
+# Uso:
+#   python scripts/news_stub.py serve --port 8766 --delay 1.0
+#       (apuntar news_service.base_url a http://127.0.0.1:8766/api/v1)
+#   python scripts/news_stub.py measure --delay 1.0 --max-lag 0.05
+#       (levanta el stub en proceso y comprueba que el event loop no se bloquea)
+#
+# Cada respuesta tarda --delay segundos y lleva ETag (el stub contesta 304 a
+# If-None-Match). En modo measure un ticker de 10 ms corre en el mismo loop
+# mientras se piden las categorías en paralelo: el retraso máximo del ticker
+# debe quedar por debajo de --max-lag y las categorías deben tardar una sola
+# espera, no una por categoría. Sale con código 1 si alguna comprobación falla.
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TICK = 0.01
+
+
+def stub_news(category: str, count: int = 20):
+    now = int(time.time())
+    return [{
+        "id": index,
+        "category": category,
+        "datetime": now - index * 60,
+        "headline": f"Fed holds rates as {category} markets rally ({index})",
+        "summary": "Resumen de prueba del stub de Finnhub",
+        "source": "stub",
+        "url": "#",
+        "image": ""
+    } for index in range(count)]
+
+
+def make_app(delay: float) -> web.Application:
+    requests = {"news": 0, "not_modified": 0}
+
+    async def news(request: web.Request):
+        requests["news"] += 1
+        category = request.query.get("category", "general")
+        etag = f'"{category}-v1"'
+        await asyncio.sleep(delay)
+        if request.headers.get("If-None-Match") == etag:
+            requests["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.json_response(stub_news(category), headers={"ETag": etag})
+
+    async def quote(request: web.Request):
+        await asyncio.sleep(delay)
+        return web.json_response({"c": 189.5, "h": 190.1, "l": 187.9, "o": 188.2, "pc": 188.0})
+
+    app = web.Application()
+    app["requests"] = requests
+    app.router.add_get("/api/v1/news", news)
+    app.router.add_get("/api/v1/quote", quote)
+    return app
+
+
+async def measure(args) -> int:
+    from app.core.http_pool import http_pool
+    from app.services.news_service import news_service
+
+    app = make_app(args.delay)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+    news_service.base_url = f"http://127.0.0.1:{args.port}/api/v1"
+    news_service.api_key = "stub"
+
+    lags = []
+    finished = asyncio.Event()
+
+    async def ticker():
+        # Retraso del loop: cuánto se pasa un sleep de 10 ms
+        while not finished.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    results = []
+
+    def check(name: str, ok: bool, detail: str):
+        results.append(ok)
+        print(f"{'✅' if ok else '❌'} {name:<32} {detail}")
+
+    ticker_task = asyncio.create_task(ticker())
+    try:
+        categories = news_service.default_categories
+        for label in ("primera", "condicional"):
+            lags.clear()
+            start = time.perf_counter()
+            by_category = await news_service.get_news_by_categories()
+            elapsed = time.perf_counter() - start
+            counts = {category: len(items) for category, items in by_category.items()}
+            check(f"categorías ({label})", elapsed < args.delay * (len(categories) - 0.5),
+                  f"{len(categories)} en {elapsed:.2f}s (espera del stub {args.delay:.2f}s) {counts}")
+            check(f"retraso del loop ({label})", max(lags) < args.max_lag,
+                  f"máx {max(lags) * 1000:.1f} ms en {len(lags)} ticks (límite {args.max_lag * 1000:.0f} ms)")
+        check("peticiones condicionales", app["requests"]["not_modified"] == len(categories),
+              f"{app['requests']['not_modified']} respuestas 304 de {app['requests']['news']} peticiones")
+    finally:
+        finished.set()
+        await ticker_task
+        await http_pool.close()
+        await runner.cleanup()
+
+    print(f"{sum(results)}/{len(results)} comprobaciones correctas")
+    return 0 if all(results) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub de Finnhub con respuestas lentas")
+    parser.add_argument("mode", choices=["serve", "measure"])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--delay", type=float, default=1.0, help="Segundos de espera por respuesta")
+    parser.add_argument("--max-lag", type=float, default=0.05, help="Retraso máximo admitido del event loop (s)")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        web.run_app(make_app(args.delay), host="127.0.0.1", port=args.port)
+    else:
+        sys.exit(asyncio.run(measure(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# backend/scripts/optimize_bot.py
+# Barrido de parámetros del bot (stops, trailing, límite de operaciones, umbral)
+#
+# Uso:
+#   python scripts/optimize_bot.py --synthetic 90 --symbols 6 --method bayesian --trials 60 --processes 4
+#   python scripts/optimize_bot.py --symbols EURUSD,GBPUSD --timeframe M5 --start 2024-01-01 --end 2024-06-30 \
+#       --method grid --grid stop_loss_pips=30,50,100 --grid take_profit_pips=60,100,200
+#
+# Sin --synthetic lee las velas de market_store (MARKET_DATA_DIR o --market-data).
+# Con --synthetic genera N días de velas M5 sintéticas en un almacén temporal.
+# --compare repite la búsqueda en un solo proceso y sin parada temprana para
+# medir la ganancia de cada mecanismo.
+# --check comprueba además que la búsqueda bayesiana termina cuando se piden
+# más configuraciones de las que tiene un espacio discreto (sale con código 1).
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='optimize_'), 'optimize.db')}")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, ".."))
+
+from backtest_bench import BASES, synthetic_m5  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.backtest_engine import BacktestConfig  # noqa: E402
+from app.services.market_store import MarketStore, bars_kind  # noqa: E402
+from app.services.optimizer import (  # noqa: E402
+    DEFAULT_SPACE, METHODS, OBJECTIVES, PARAMETERS, EarlyStopping, format_report, optimize, space_size
+)
+
+
+def parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_grid(entries):
+    grid = {}
+    for entry in entries or []:
+        name, _, values = entry.partition("=")
+        integer = PARAMETERS[name].integer
+        grid[name] = [int(value) if integer else float(value) for value in values.split(",") if value]
+    return grid
+
+
+def check_small_space(symbols, timeframe, start, end, root, timeout: float = 120.0) -> bool:
+    """Bayesiana con más trials que configuraciones distintas: debe terminar sin repetir ninguna"""
+    space = ["max_open_trades"]
+    trials = space_size(space) + 5
+    outcome = {}
+    worker = threading.Thread(daemon=True, target=lambda: outcome.update(optimize(
+        symbols, timeframe, start, end, method="bayesian", trials=trials, space=space,
+        early_stopping=None, root=root
+    )))
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        print(f"❌ Bayesiana con {trials} trials sobre {space}: no termina en {timeout:.0f}s")
+        return False
+    values = [row["params"]["max_open_trades"] for row in outcome.get("trials", [])]
+    ok = outcome.get("success") and len(values) == len(set(values)) <= space_size(space)
+    print(f"{'✅' if ok else '❌'} Bayesiana con {trials} trials sobre {space}: "
+          f"{len(values)} configuraciones distintas de {space_size(space)}")
+    return bool(ok)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimización de parámetros del bot con backtests")
+    parser.add_argument("--symbols", default="6", help="Número de símbolos sintéticos o lista separada por comas")
+    parser.add_argument("--timeframe", default="M5")
+    parser.add_argument("--start", default=None, help="Inicio (ISO, UTC)")
+    parser.add_argument("--end", default=None, help="Fin (ISO, UTC)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generar N días de velas M5 sintéticas")
+    parser.add_argument("--market-data", default=None, help="Directorio del almacén (por defecto MARKET_DATA_DIR)")
+    parser.add_argument("--method", choices=METHODS, default="random")
+    parser.add_argument("--trials", type=int, default=40)
+    parser.add_argument("--grid", action="append", help="parametro=v1,v2,... (repetible, method=grid)")
+    parser.add_argument("--space", default=",".join(DEFAULT_SPACE), help="Parámetros a explorar")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="net_profit")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--no-pruning", action="store_true", help="Desactivar la parada temprana")
+    parser.add_argument("--prune-fraction", type=float, default=0.3)
+    parser.add_argument("--max-drawdown", type=float, default=None, help="Drawdown máximo, %% del balance (BotConfig.max_drawdown)")
+    parser.add_argument("--compare", action="store_true", help="Comparar con 1 proceso y sin parada temprana")
+    parser.add_argument("--check", action="store_true", help="Comprobar que la bayesiana termina en espacios pequeños")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", default=None, help="Guardar el resultado en este fichero")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        root = tempfile.mkdtemp(prefix="market_data_")
+        store = MarketStore(root)
+        symbols = BASES[:int(args.symbols)] if args.symbols.isdigit() else args.symbols.upper().split(",")
+        end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=args.synthetic)
+        rng = np.random.default_rng(args.seed)
+        for symbol in symbols:
+            store.append(symbol, bars_kind("M5"), synthetic_m5(symbol, start, args.synthetic, rng))
+        store.compact((end + timedelta(days=1)).date())
+        timeframe = "M5"
+    else:
+        root = args.market_data or settings.MARKET_DATA_DIR
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+        end = parse_time(args.end) if args.end else datetime.now(timezone.utc)
+        start = parse_time(args.start) if args.start else end - timedelta(days=90)
+        timeframe = args.timeframe
+
+    early_stopping = None if args.no_pruning else EarlyStopping(
+        fraction=args.prune_fraction, max_drawdown_pct=args.max_drawdown
+    )
+    options = dict(method=args.method, trials=args.trials, grid=parse_grid(args.grid),
+                   space=[name.strip() for name in args.space.split(",") if name.strip()],
+                   base_config=BacktestConfig(), objective=args.objective, seed=args.seed, root=root)
+
+    began = time.perf_counter()
+    result = optimize(symbols, timeframe, start, end, processes=args.processes,
+                      early_stopping=early_stopping, **options)
+    elapsed = time.perf_counter() - began
+    if not result["success"]:
+        print(f"Error: {result['error']}")
+        sys.exit(1)
+
+    print(f"{result['method']} sobre {len(result['symbols'])} símbolos {timeframe} ({result['bars']} velas): "
+          f"{len(result['trials'])} configuraciones, {result['pruned']} descartadas pronto, "
+          f"{elapsed:.2f}s con {max(args.processes, 1)} proceso(s)")
+    print(format_report(result, args.top))
+    print(f"Mejor configuración (BotConfig): {result['best_bot_config']}")
+
+    if args.compare:
+        for label, processes, stopping in (("1 proceso", 0, early_stopping), ("sin parada temprana", args.processes, None)):
+            began = time.perf_counter()
+            other = optimize(symbols, timeframe, start, end, processes=processes, early_stopping=stopping, **options)
+            print(f"{label:>20}: {time.perf_counter() - began:.2f}s "
+                  f"(mejor {other['best']['score']} con {other['best']['params']})")
+
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(result, handle, indent=2, default=str)
+
+    if args.check and not check_small_space(symbols, timeframe, start, end, root):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# backend/scripts/price_stream_bench.py
+# Streaming de precios con muchos clientes contra el terminal falso
+#
+# Uso:
+#   python scripts/price_stream_bench.py --clients 1 10 100 500 --seconds 3
+#
+# Para cada número de clientes (cada uno suscrito a 3 de 6 símbolos, y un 10 %
+# de ellos lentos) mide las lecturas de ticks al terminal por segundo, los
+# mensajes enviados, las actualizaciones conflacionadas y los clientes lentos
+# desconectados. Las lecturas por segundo dependen de los símbolos suscritos
+# (unión de todos los clientes), no del número de clientes.
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='price_stream_'), 'bench.db')}")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, ".."))
+
+import fake_mt5  # noqa: E402
+
+SYMBOLS = ["EURUSD", "GBPUSD", "XAUUSD", "BTCUSD", "USDJPY", "AUDUSD"]
+
+
+class FakeWebSocket:
+    """Cliente simulado: los lentos tardan más en leer que el timeout de envío"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received = 0
+
+    async def send_json(self, message):
+        await asyncio.sleep(self.delay)
+        self.received += len(message["data"])
+
+
+def moving_tick(symbol):
+    fake_mt5._terminal("symbol_info_tick")
+    bid = 1.1 + random.random() / 1000
+    return fake_mt5.Tick(bid, bid + 0.0001, bid, 1, int(time.time()))
+
+
+async def run_clients(count: int, seconds: float, slow_ratio: float):
+    from app.services.price_stream import PriceStreamService, PriceSubscriber
+
+    stream = PriceStreamService(interval=0.05, send_timeout=0.5)
+    rng = random.Random(count)
+    senders = []
+    for i in range(count):
+        slow = i < int(count * slow_ratio)
+        subscriber = PriceSubscriber(FakeWebSocket(delay=2.0 if slow else 0.0))
+        stream.register(subscriber)
+        stream.subscribe(subscriber, rng.sample(SYMBOLS, 3))
+        senders.append(asyncio.create_task(stream.sender(subscriber)))
+
+    await asyncio.sleep(seconds)
+    await stream.stop()
+    for task in senders:
+        task.cancel()
+    await asyncio.gather(*senders, return_exceptions=True)
+
+    return stream.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming de precios por WebSocket")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--slow-ratio", type=float, default=0.1, help="Fracción de clientes lentos")
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    fake_mt5.install(latency_ms=args.latency_ms)
+    fake_mt5.symbol_info_tick = moving_tick
+    from app.services.data_fetcher import data_fetcher
+    from app.services.mt5_executor import mt5_executor
+    data_fetcher.initialize_mt5("Fake-Server", 12345, "password")
+
+    logging.getLogger("trading_bot").setLevel(logging.ERROR)
+    print(f"{'Clientes':>8} {'Símbolos':>8} {'Ticks/s':>8} {'Mensajes':>9} {'Conflac.':>9} {'Lentos fuera':>13}")
+    for count in args.clients:
+        stats = asyncio.run(run_clients(count, args.seconds, args.slow_ratio))
+        print(f"{count:>8} {len(stats['symbols']):>8} {stats['tick_reads'] / args.seconds:>8.1f} {stats['messages_sent']:>9} "
+              f"{stats['conflated_updates']:>9} {stats['slow_clients_dropped']:>13}")
+    mt5_executor.stop()
+
+
+if __name__ == "__main__":
+    main()
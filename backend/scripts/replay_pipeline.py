@@ -0,0 +1,198 @@
+# backend/scripts/replay_pipeline.py
+# Replay del pipeline de decisión IA sobre mercado grabado y respuestas IA grabadas
+#
+# Uso:
+#   python scripts/replay_pipeline.py --symbols EURUSD,GBPUSD --start 2024-06-03 --end 2024-06-04 \
+#       --source-db sqlite:///trading_bot.db --speed 0
+#   python scripts/replay_pipeline.py --synthetic 5 --symbols EURUSD,USDJPY,XAUUSD --interval 300
+#
+# Ticks y velas salen de market_store (MARKET_DATA_DIR o --market-data; con
+# --synthetic se generan velas M1 en un almacén temporal). Las respuestas IA
+# salen de AIAnalysisHistory.ai_response de --source-db (su created_at marca los
+# eventos); sin grabaciones, un evento cada --interval segundos de mercado y un
+# modelo stub determinista. El pipeline corre contra una BD temporal y un
+# terminal MT5 falso (scripts/fake_mt5.py), sin proveedores externos.
+#
+# Informa throughput, aceleración frente al tiempo real, latencia por evento y
+# duración de cada etapa (fetch, news, indicators, prompt, model, parse,
+# execution, save).
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='replay_'), 'replay.db')}")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, ".."))
+
+import fake_mt5  # noqa: E402
+
+USER_ID = 1
+
+
+def parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def synthetic_m1(symbol: str, start: datetime, days: int, rng: np.random.Generator):
+    times = int(start.timestamp()) + 60 * np.arange(days * 1440)
+    times = times[(times // 86400 + 3) % 7 < 5]
+    price = 150.0 if "JPY" in symbol else 2000.0 if "XAU" in symbol else 40000.0 if "BTC" in symbol else 1.1
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.0003, len(times))))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    wick = np.abs(rng.normal(0, 0.0002, len(times))) * close
+    return {"time": times, "open": open_, "high": np.maximum(open_, close) + wick,
+            "low": np.minimum(open_, close) - wick, "close": close,
+            "tick_volume": np.full(len(times), 60), "spread": np.full(len(times), 12),
+            "real_volume": np.zeros(len(times), dtype=np.int64)}
+
+
+async def run(args):
+    fake_mt5.install(latency_ms=args.mt5_latency_ms)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.ai.ai_interface import ai_interface
+    from app.core.ai_config import ai_config as ai_config_settings
+    from app.core.config import settings
+    from app.database.db_connection import SessionLocal, create_tables, dispose_async_engine
+    from app.models.ai_config_model import UserAIConfig
+    from app.models.config_model import BotConfig
+    from app.services.broker_api import broker_api
+    from app.services.data_fetcher import data_fetcher
+    from app.services.market_store import MarketStore, bars_kind
+    from app.services.mt5_executor import mt5_executor
+    from app.services.news_service import news_service
+    from app.services.write_buffer import write_buffer
+    from app.services.replay_service import (
+        PipelineReplay, ReplayClock, ReplayModel, ReplayNews, StoreMarket,
+        load_recorded_analyses, load_recorded_news
+    )
+
+    if not args.verbose:
+        logging.getLogger("trading_bot").setLevel(logging.WARNING)
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+
+    if args.synthetic:
+        store = MarketStore(tempfile.mkdtemp(prefix="market_data_"))
+        end = parse_time(args.end) if args.end else datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        first = end - timedelta(days=args.synthetic)
+        rng = np.random.default_rng(args.seed)
+        for symbol in symbols:
+            store.append(symbol, bars_kind("M1"), synthetic_m1(symbol, first - timedelta(days=30), args.synthetic + 30, rng))
+        store.compact((end + timedelta(days=1)).date())
+        start = parse_time(args.start) if args.start else first
+    else:
+        store = MarketStore(args.market_data or settings.MARKET_DATA_DIR)
+        end = parse_time(args.end) if args.end else datetime.now(timezone.utc)
+        start = parse_time(args.start) if args.start else end - timedelta(days=1)
+
+    # Grabaciones (respuestas IA y noticias) de la BD de origen, si se indica
+    recorded, news = [], []
+    if args.source_db:
+        source = sessionmaker(bind=create_engine(args.source_db))()
+        try:
+            recorded = load_recorded_analyses(source, symbols, start, end, args.source_user)
+            news = load_recorded_news(source, start - timedelta(days=2), end)
+            source.expunge_all()
+        finally:
+            source.close()
+
+    clock = ReplayClock(start, speed=args.speed)
+    market = StoreMarket(store, clock, start, end)
+    responses = {}
+    for row in recorded:
+        if row.ai_response:
+            responses.setdefault(row.symbol, []).append((row.created_at, row.ai_response))
+    model = ReplayModel(clock, responses, latency_ms=args.model_latency_ms)
+
+    if recorded:
+        events = [(row.created_at.replace(tzinfo=timezone.utc), row.symbol) for row in recorded]
+    else:
+        events = [(when, symbol) for symbol in symbols for when in market.event_times(symbol, start, end, args.interval)]
+    if args.limit:
+        events = sorted(events)[:args.limit]
+    if not events:
+        print("Sin eventos: no hay análisis grabados ni velas en la ventana indicada")
+        return
+
+    # Pipeline de producción contra el terminal falso, el modelo stub y una BD temporal
+    fake_mt5.set_market(market)
+    ai_interface.replay_model = model
+    news_service.replay_source = ReplayNews(clock, news)
+    ai_config_settings.CACHE_ENABLED = args.cache
+    data_fetcher.bar_cache.refresh_interval = 0.0  # El reloj de replay no es el de la caché
+    data_fetcher.initialize_mt5("Replay", 0, "")
+    broker_api.connected = True
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        db.add(UserAIConfig(user_id=USER_ID, ai_provider="deepseek", ai_model="replay", api_key="replay"))
+        bot_config = BotConfig(user_id=USER_ID, allowed_symbols=",".join(symbols))
+        db.add(bot_config)
+        db.commit()
+        db.refresh(bot_config)
+        db.expunge(bot_config)
+    finally:
+        db.close()
+
+    print(f"Replay {args.mode}: {len(events)} eventos ({len(responses)} símbolos con respuestas grabadas), "
+          f"{start:%Y-%m-%d %H:%M} → {end:%Y-%m-%d %H:%M}, velocidad {args.speed or 'máxima'}")
+    replay = PipelineReplay(clock, USER_ID, mode=args.mode, bot_config=bot_config, concurrency=args.concurrency)
+    write_buffer.start()  # Historial por lotes, como en la app
+    try:
+        report = await replay.run(events)
+    finally:
+        await write_buffer.stop()
+        await dispose_async_engine()  # La caché IA usa la sesión asíncrona
+        mt5_executor.stop()
+
+    print(f"Eventos: {report['events']} en {report['wall_seconds']}s | {report['events_per_second']} eventos/s | "
+          f"aceleración {report['acceleration']}x | errores {report['errors']} | ejecutadas {report['executed']}")
+    print(f"Señales: {report['signals']} | modelo: {model.stats} | mercado: {market.stats}")
+    latency = report["latency"]
+    print(f"Latencia por evento: media {latency['avg_ms']} ms | p50 {latency['p50_ms']} ms | "
+          f"p95 {latency['p95_ms']} ms | máx {latency['max_ms']} ms")
+    print(f"{'Etapa':<12}{'n':>7}{'media ms':>11}{'p95 ms':>10}{'máx ms':>10}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<12}{stats['count']:>7}{stats['avg_ms']:>11}{stats['p95_ms']:>10}{stats['max_ms']:>10}")
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump({**report, "model": model.stats, "market": market.stats}, handle, indent=2, default=str)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay del pipeline de decisión IA")
+    parser.add_argument("--symbols", default="EURUSD", help="Símbolos separados por comas")
+    parser.add_argument("--start", default=None, help="Inicio (ISO, UTC)")
+    parser.add_argument("--end", default=None, help="Fin (ISO, UTC)")
+    parser.add_argument("--mode", choices=("bot", "analysis"), default="bot")
+    parser.add_argument("--speed", type=float, default=0.0, help="Aceleración del reloj (0 = sin esperas)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Eventos en vuelo (0 = sin límite)")
+    parser.add_argument("--interval", type=float, default=60.0, help="Segundos entre eventos sin grabaciones")
+    parser.add_argument("--limit", type=int, default=0, help="Máximo de eventos")
+    parser.add_argument("--source-db", default=None, help="URL de la BD con AIAnalysisHistory y market_news")
+    parser.add_argument("--source-user", type=int, default=None, help="Solo análisis de este usuario")
+    parser.add_argument("--market-data", default=None, help="Directorio del almacén (por defecto MARKET_DATA_DIR)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generar N días de velas M1 sintéticas")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="Latencia simulada del modelo")
+    parser.add_argument("--mt5-latency-ms", type=float, default=0.0, help="Latencia simulada del terminal")
+    parser.add_argument("--cache", action="store_true", help="Mantener la caché de respuestas IA")
+    parser.add_argument("--json", default=None, help="Guardar el informe en este fichero")
+    parser.add_argument("--verbose", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# backend/scripts/startup_bench.py
+# Tiempo de importación de la app (python -X importtime) con presupuesto
+#
+# Uso:
+#   python scripts/startup_bench.py --runs 5 --budget-ms 1500 --top 15
+#
+# Importa app.main en procesos nuevos (sin crear tablas: eso ocurre en el
+# lifespan) y muestra la mediana del tiempo de importación, los módulos con
+# más tiempo acumulado y si algún módulo pesado diferido (pandas, MetaTrader5,
+# aiohttp, requests) se ha cargado al importar. Sale con código 1 si se supera
+# el presupuesto o se carga un módulo diferido, para usarlo en CI.
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFERRED = ("pandas", "MetaTrader5", "aiohttp", "requests")
+PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import app.main\n"
+    "elapsed = time.perf_counter() - start\n"
+    f"print(elapsed, ','.join(name for name in {DEFERRED!r} if name in sys.modules), sep='|')\n"
+)
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_probe(env, importtime: bool):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    elapsed, loaded = result.stdout.strip().splitlines()[-1].split("|")
+    return float(elapsed), [name for name in loaded.split(",") if name], result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque (importación) de la app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Máximo para la mediana de importación")
+    parser.add_argument("--top", type=int, default=15, help="Módulos a mostrar por tiempo acumulado")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='startup_'), 'startup.db')}")
+    run_probe(env, importtime=False)  # Calentamiento (compila los .pyc)
+
+    times, loaded = [], set()
+    for _ in range(args.runs):
+        elapsed, modules, _ = run_probe(env, importtime=False)
+        times.append(elapsed * 1000)
+        loaded.update(modules)
+    _, _, report = run_probe(env, importtime=True)
+
+    # Desglose: primera importación de cada paquete externo y módulos de la app, por tiempo acumulado
+    rows, seen = [], set()
+    for match in LINE.finditer(report):
+        self_us, cumulative_us, indent, name = match.groups()
+        root = name.split(".")[0]
+        if name.startswith("app.") and len(indent) // 2 <= 2:
+            rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, name))
+        elif "." not in name and root != "app" and root not in seen:
+            seen.add(root)
+            rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, name))
+    rows.sort(reverse=True)
+    print(f"{'módulo':<45}{'acumulado ms':>14}{'propio ms':>11}")
+    for cumulative, own, name in rows[:args.top]:
+        print(f"{name:<45}{cumulative:>14.1f}{own:>11.1f}")
+
+    median = statistics.median(times)
+    print(f"\nImportación de app.main: mediana {median:.0f} ms (mín {min(times):.0f}, máx {max(times):.0f}) "
+          f"en {args.runs} ejecuciones | presupuesto {args.budget_ms:.0f} ms")
+    print(f"Módulos diferidos cargados al importar: {sorted(loaded) or 'ninguno'}")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"la importación supera el presupuesto ({median:.0f} > {args.budget_ms:.0f} ms)")
+    if loaded:
+        failures.append(f"se importan módulos que deberían diferirse: {sorted(loaded)}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# backend/scripts/write_buffer_bench.py
+# Latencia de guardar el historial de análisis: commit por fila frente a escritura diferida
+#
+# Uso:
+#   python scripts/write_buffer_bench.py -n 2000 -c 20
+#
+# Simula N análisis (C concurrentes) que, tras la respuesta de la IA, guardan
+# su fila de AIAnalysisHistory y el contador de UserAIConfig. El modo
+# "directo" es el anterior (sesión, add y commit por análisis, con fsync de
+# SQLite en el event loop); el modo "diferido" encola en write_buffer, que
+# escribe por lotes en un hilo. Al final se para el buffer (escribe lo
+# pendiente) y se comprueba que no falta ninguna fila ni incremento.
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='write_buffer_'), 'bench.db')}")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import func, select  # noqa: E402
+from app.database.db_connection import SessionLocal, create_tables  # noqa: E402
+from app.models import AIAnalysisHistory, UserAIConfig  # noqa: E402
+from app.services.write_buffer import write_buffer  # noqa: E402
+
+USERS = 10
+
+
+def analysis_row(user_id: int, analysis_type: str):
+    return {"user_id": user_id, "symbol": "EURUSD", "timeframe": "M5", "analysis_type": analysis_type,
+            "ai_provider": "deepseek", "ai_model": "bench", "signal": "BUY", "confidence": 72.5,
+            "reasoning": "Tendencia alcista con RSI neutral", "processing_time": 0.4, "tokens_used": 350}
+
+
+def save_direct(user_id: int, analysis_type: str):
+    """Guardado anterior: una sesión y un commit por análisis"""
+    db = SessionLocal()
+    try:
+        db.add(AIAnalysisHistory(**analysis_row(user_id, analysis_type)))
+        config = db.query(UserAIConfig).filter(UserAIConfig.user_id == user_id).first()
+        config.total_requests += 1
+        config.last_used = datetime.now()
+        db.commit()
+    finally:
+        db.close()
+
+
+def save_buffered(user_id: int, analysis_type: str):
+    write_buffer.add(AIAnalysisHistory, analysis_row(user_id, analysis_type))
+    write_buffer.increment(UserAIConfig, {"user_id": user_id}, {"total_requests": 1}, {"last_used": datetime.now()})
+
+
+async def measure(save, label: str, requests: int, concurrency: int, ai_wait: float):
+    latencies, lags = [], []
+    pending = iter(range(requests))
+    finished = asyncio.Event()
+
+    async def monitor():
+        while not finished.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    async def worker():
+        for index in pending:
+            await asyncio.sleep(ai_wait)  # Respuesta de la IA
+            start = time.perf_counter()
+            save(index % USERS + 1, label)
+            latencies.append(time.perf_counter() - start)
+
+    monitor_task = asyncio.create_task(monitor())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    if save is save_buffered:
+        await write_buffer.stop()  # Escribe lo pendiente, como en la parada de la app
+    elapsed = time.perf_counter() - start
+    finished.set()
+    await monitor_task
+    return elapsed, sorted(latencies), sorted(lags)
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def stored(label: str):
+    db = SessionLocal()
+    try:
+        rows = db.scalar(select(func.count(AIAnalysisHistory.id)).where(AIAnalysisHistory.analysis_type == label))
+        requests = db.scalar(select(func.sum(UserAIConfig.total_requests)))
+        return rows, requests
+    finally:
+        db.close()
+
+
+async def run(args):
+    create_tables()
+    db = SessionLocal()
+    try:
+        db.add_all([UserAIConfig(user_id=user_id, total_requests=0) for user_id in range(1, USERS + 1)])
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"{args.requests} análisis, {args.concurrency} concurrentes, espera de IA {args.ai_wait * 1000:.0f} ms")
+    expected_requests = 0
+    for label, save in (("directo", save_direct), ("diferido", save_buffered)):
+        if save is save_buffered:
+            write_buffer.start()
+        elapsed, latencies, lags = await measure(save, label, args.requests, args.concurrency, args.ai_wait)
+        expected_requests += args.requests
+        rows, requests = stored(label)
+        status = "✅" if rows == args.requests and requests == expected_requests else "❌"
+        print(f"{label:>9}: guardado p50 {statistics.median(latencies) * 1000:7.3f} ms | p95 "
+              f"{percentile(latencies, 0.95) * 1000:7.3f} ms | retraso del loop p95 {percentile(lags, 0.95) * 1000:6.2f} ms"
+              f" | total {elapsed:.2f}s | {status} {rows} filas, {requests} requests")
+    stats = write_buffer.get_stats()
+    print(f"Escritura diferida: {stats['flushes']} lotes, último {stats['last_flush_ms']} ms, "
+          f"{stats['write_through']} write-through, {stats['errors']} errores")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la escritura diferida del historial")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("--ai-wait", type=float, default=0.005, help="Espera simulada de la IA por análisis (s)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()